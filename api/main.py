@@ -12,31 +12,70 @@ import datetime
 import os
 import time
 import uuid
-from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from api.schemas import (
+    CatchmentResponse,
+    CriticalityResponse,
+    ETARequest,
+    ETAResponse,
+    NearestRequest,
+    NearestResponse,
     PositionUpdate,
     RerouteCheck,
+    RouteConstraints,
     RouteRequest,
     RouteResponse,
     RouteStatus,
     TrafficSnapshot,
 )
+from core.apsp import ETATableRouter
+from core.arc_flags import ArcFlagRouter
+from core.catchments import catchment_for
+from core.cch import CCHRouter
 from core.config import (
     APP_ENV,
+    APSP_PRECOMPUTE,
+    ARC_FLAGS,
     GRAPH_PATH,
     LOG_LEVEL,
     REROUTE_THRESHOLD_SEC,
+    REVERSE_TREE_MIN_ROUTES,
+    SEARCH_WORKSPACES,
+    SINGLEFLIGHT_DEPART_BUCKET_SEC,
     SLOWDOWN_LOOKAHEAD,
     SLOWDOWN_RATIO,
 )
+from core.criticality import CriticalityAnalyzer
 from core.graph import EdgeNotFoundError, Graph
+from core.hub_labels import HubLabelRouter
+from core.incremental import IncrementalRoute
 from core.logging_config import configure_logging, get_logger
-from core.routing import _ensure_utc, _remaining_seconds, a_star_route, time_dependent_dijkstra
+from core.map_matching import MapMatcher
+from core.masks import MaskSpec, mask_for
+from core.mld import MLDRouter
+from core.profiles import PROFILES, VehicleProfile, cost_layer
+from core.reverse_tree import ReverseTree, reverse_tree_for
+from core.routing import (
+    Engine,
+    EngineRegistry,
+    RouteResult,
+    SearchStats,
+    _ensure_utc,
+    _remaining_seconds,
+    a_star_route,
+    dijkstra_route,
+    haversine_distance,
+    nearest_targets_a_star,
+    nearest_targets_dijkstra,
+)
+from core.singleflight import SingleFlight
+from core.workspace import workspace_a_star_route, workspace_dijkstra_route
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -61,6 +100,105 @@ if os.path.exists(_graph_path):
 else:
     log.warning("Graph file not found at %s — starting with empty graph", _graph_path)
 
+# Built in the background at startup, so the first CCH query does not pay for the
+# hierarchy; re-customized in the background after traffic updates.
+cch_router = CCHRouter(graph)
+if graph.nodes:
+    cch_router.prepare_async(MaskSpec())
+
+# Multi-level overlay, built on the first MLD query; traffic updates re-customize
+# only the cells they touch, in the background.
+mld_router = MLDRouter(graph)
+
+# Concurrent identical route requests share one search.
+route_flight = SingleFlight()
+
+# Matches GPS pings to road edges, keeping candidate state per ambulance.
+map_matcher = MapMatcher(graph)
+
+# Optional arc flags (ARC_FLAGS=1), computed in the background.
+arc_flags: Optional[ArcFlagRouter] = None
+if ARC_FLAGS:
+    arc_flags = ArcFlagRouter(graph)
+    arc_flags.refresh_async()
+
+# Hub labels for /api/v1/eta, built in the background on the first request.
+hub_labels = HubLabelRouter(graph)
+
+# Ranks edges on active routes by the delay their closure would cause.
+criticality = CriticalityAnalyzer(graph)
+
+# Optional all-pairs ETA tables (APSP_PRECOMPUTE=1), built in the background.
+eta_tables: Optional[ETATableRouter] = None
+if APSP_PRECOMPUTE:
+    eta_tables = ETATableRouter(graph)
+    eta_tables.refresh_async()
+
+
+def _search_engine(algorithm: str):
+    """Dijkstra or A* route function, answered from ETA tables or arc flags when they apply."""
+
+    def route(g, source, target, depart_dt, spec, stats=None, layer=None) -> RouteResult:
+        mask = mask_for(g, spec)
+        if layer is not None:
+            # Tables and flags are built on the graph's own costs.
+            if algorithm == "dijkstra":
+                fn = workspace_dijkstra_route if SEARCH_WORKSPACES else dijkstra_route
+                return fn(g, source, target, depart_dt, mask, stats, layer.travel_time)
+            fn = workspace_a_star_route if SEARCH_WORKSPACES else a_star_route
+            return fn(
+                g, source, target, depart_dt, mask, stats, layer.max_speed_ms, layer.travel_time
+            )
+        if g is graph:
+            # Explain requests are about the search itself, so they never use the tables.
+            if eta_tables is not None and stats is None:
+                tabled = eta_tables.route(source, target, depart_dt, spec)
+                if tabled is not None:
+                    return tabled
+            if arc_flags is not None:
+                flagged = arc_flags.route(source, target, depart_dt, spec, stats, algorithm)
+                if flagged is not None:
+                    return flagged
+        if SEARCH_WORKSPACES:
+            fn = workspace_dijkstra_route if algorithm == "dijkstra" else workspace_a_star_route
+        else:
+            fn = dijkstra_route if algorithm == "dijkstra" else a_star_route
+        return fn(g, source, target, depart_dt, mask, stats)
+
+    return route
+
+
+def _cch_route(g, source, target, depart_dt, spec, stats=None, layer=None) -> RouteResult:
+    return cch_router.route(source, target, depart_dt, spec, stats)
+
+
+def _mld_route(g, source, target, depart_dt, spec, stats=None, layer=None) -> RouteResult:
+    return mld_router.route(source, target, depart_dt, spec, stats)
+
+
+# Point-to-point engines by name; algorithm=auto picks among them by observed latency.
+engines = EngineRegistry()
+engines.register(Engine("dijkstra", _search_engine("dijkstra"), profiles=True))
+engines.register(Engine("astar", _search_engine("astar"), profiles=True))
+engines.register(
+    Engine(
+        "cch",
+        _cch_route,
+        preprocessing="contraction hierarchy, customized per traffic epoch and time period",
+        fresh=cch_router.fresh,
+        prepare=cch_router.prepare_async,
+    )
+)
+engines.register(
+    Engine(
+        "mld",
+        _mld_route,
+        preprocessing="multi-level overlay, touched cells customized per traffic epoch and period",
+        fresh=mld_router.fresh,
+        prepare=mld_router.prepare_async,
+    )
+)
+
 # ---------------------------------------------------------------------------
 # Application
 # ---------------------------------------------------------------------------
@@ -173,8 +311,11 @@ def _store_route(
     start_lat: float,
     start_lon: float,
     status: RouteStatus = RouteStatus.EN_ROUTE,
+    mask_spec: Optional[MaskSpec] = None,
+    profile: Optional[str] = None,
 ) -> None:
     now = _now_utc()
+    map_matcher.forget(ambulance_id)
     active_routes[ambulance_id] = {
         "ambulance_id": ambulance_id,
         "path": path,
@@ -189,9 +330,29 @@ def _store_route(
         "remaining_seconds": _remaining_seconds(eta, now),
         "status": status,
         "last_update_time": now,
+        "mask_spec": mask_spec or MaskSpec(),
+        "profile": profile,
     }
 
 
+def _mask_spec(
+    constraints: Optional[RouteConstraints], profile: Optional[VehicleProfile] = None
+) -> MaskSpec:
+    if profile is not None and constraints is None:
+        return profile.mask_spec()
+    c = constraints or RouteConstraints()
+    height = c.vehicle_height_m or (profile.height_m if profile is not None else None)
+    return MaskSpec.build(c.emergency_only, c.avoid_closures, height)
+
+
+def _route_travel_time(g: Graph, route: Dict[str, Any]):
+    """Edge cost function for a stored route: its vehicle profile's layer, else the graph's."""
+    name = route.get("profile")
+    if name is None:
+        return g.edge_travel_time
+    return cost_layer(g, PROFILES[name]).travel_time
+
+
 def _estimate_segment(
     per_segment_times: List[Tuple[datetime.datetime, datetime.datetime]],
     now: datetime.datetime,
@@ -207,14 +368,41 @@ def _estimate_segment(
     return len(per_segment_times) - 1, per_segment_times[-1][0]
 
 
-def _build_route_steps(
-    g: Graph, path: List[int], per_segment_times: List[Tuple[datetime.datetime, datetime.datetime]]
-) -> Tuple[List[str], int]:
+def _current_node_index(route: Dict[str, Any], now: datetime.datetime) -> int:
+    """Path index of the node the ambulance will reach next, by schedule."""
+    per_seg = route["per_segment_times"]
+    if now < per_seg[0][0]:
+        return 0
+    seg_idx, _ = _estimate_segment(per_seg, now)
+    return min(seg_idx + 1, len(route["path"]) - 2)
+
+
+def _route_edge_positions(g: Graph, route: Dict[str, Any]) -> Dict[int, int]:
+    """
+    Map each edge on the route to the path index of its tail node.
+
+    Cached on the route until its path list is replaced by a reroute.
+    """
+    cached = route.get("edge_positions")
+    if cached is not None and cached[0] is route["path"]:
+        return cached[1]
+    path = route["path"]
+    positions: Dict[int, int] = {}
+    for i in range(len(path) - 1):
+        eid = g.edge_id_between(path[i], path[i + 1])
+        if eid is not None:
+            positions.setdefault(eid, i)
+    route["edge_positions"] = (path, positions)
+    return positions
+
+
+def _build_route_steps(g: Graph, result: RouteResult) -> Tuple[List[str], int]:
+    """Format human-readable steps from the float arrival times of a search result."""
     steps = []
     total_seconds = 0
-    for i in range(len(path) - 1):
-        s_dt, e_dt = per_segment_times[i]
-        secs = int((e_dt - s_dt).total_seconds())
+    path = result.path or []
+    for i, seg_secs in enumerate(result.segment_seconds()):
+        secs = int(seg_secs)
         total_seconds += secs
         sc = g.nodes[path[i]]
         ec = g.nodes[path[i + 1]]
@@ -231,15 +419,17 @@ def _compute_remaining_path_cost(
     path: List[int],
     from_node_idx: int,
     now: datetime.datetime,
+    travel_time=None,
 ) -> float:
     """Sum edge travel times from path[from_node_idx] to path[-1] using current graph state."""
+    travel_time = travel_time or g.edge_travel_time
     total = 0.0
     t = now.timestamp()
     for i in range(from_node_idx, len(path) - 1):
         eid = g.edge_id_between(path[i], path[i + 1])
         if eid is None:
             return float("inf")
-        cost = g.edge_travel_time(eid, t)
+        cost = travel_time(eid, t)
         total += cost
         t += cost
     return total
@@ -250,10 +440,14 @@ def _recalculate_eta(
     ambulance_id: str,
     now: Optional[datetime.datetime] = None,
     algorithm: str = "dijkstra",
+    tree: Optional[ReverseTree] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Recalculate the best route from the ambulance's estimated current position.
     Returns a result dict or None if the ambulance has no active route.
+
+    When tree (a reverse tree for this route's destination) is given, the new
+    route is read from it instead of running a search.
     """
     route = active_routes.get(ambulance_id)
     if not route:
@@ -262,31 +456,43 @@ def _recalculate_eta(
         return None
 
     now = now or _now_utc()
-    per_seg = route["per_segment_times"]
     path = route["path"]
 
-    seg_idx, _ = _estimate_segment(per_seg, now)
-    if now < per_seg[0][0]:
-        current_node_idx = 0
-    else:
-        current_node_idx = min(seg_idx + 1, len(path) - 2)
+    current_node_idx = _current_node_index(route, now)
     current_node = path[current_node_idx]
     dest_node = path[-1]
 
-    fn = time_dependent_dijkstra if algorithm == "dijkstra" else a_star_route
-    new_eta, new_path, new_per_seg = fn(g, current_node, dest_node, now)
+    spec = route.get("mask_spec") or MaskSpec()
+    travel_time = _route_travel_time(g, route)
+    if route.get("profile") is not None:
+        # Trees and incremental repair search the graph's own costs.
+        layer = cost_layer(g, PROFILES[route["profile"]])
+        new_route = engines.get(algorithm).route(g, current_node, dest_node, now, spec, None, layer)
+    elif tree is not None:
+        new_route = tree.route_from(current_node, now)
+    elif algorithm == "dijkstra":
+        # Keep one incremental router per ambulance so repeated checks only
+        # repair what traffic changed since the last one.
+        router = route.get("router")
+        if router is None or router.graph is not g or router.target != dest_node:
+            router = IncrementalRoute(g, current_node, dest_node, now, spec)
+            route["router"] = router
+        new_route = router.reroute_from(current_node, now)
+    else:
+        new_route = engines.get(algorithm).route(g, current_node, dest_node, now, spec)
 
-    if new_path is None:
+    if not new_route.found:
         return None
 
-    old_remaining = _compute_remaining_path_cost(g, path, current_node_idx, now)
+    new_eta = new_route.arrival
+    old_remaining = _compute_remaining_path_cost(g, path, current_node_idx, now, travel_time)
     new_remaining = _remaining_seconds(new_eta, now)
     time_saved = old_remaining - new_remaining
 
     return {
         "new_eta": new_eta,
-        "new_path": new_path,
-        "new_per_seg": new_per_seg,
+        "new_path": new_route.path,
+        "new_route": new_route,
         "old_remaining": old_remaining,
         "new_remaining": new_remaining,
         "time_saved": time_saved,
@@ -294,6 +500,25 @@ def _recalculate_eta(
     }
 
 
+def _hot_destination_trees(
+    now: datetime.datetime,
+) -> Dict[Tuple[int, MaskSpec], ReverseTree]:
+    """
+    Build (or fetch) one reverse tree per destination shared by at least
+    REVERSE_TREE_MIN_ROUTES active routes with the same constraints.
+    """
+    counts: Counter = Counter(
+        (route["path"][-1], route.get("mask_spec") or MaskSpec())
+        for route in active_routes.values()
+        if route["status"] != RouteStatus.ARRIVED and route.get("profile") is None
+    )
+    return {
+        key: reverse_tree_for(graph, key[0], now, key[1])
+        for key, n in counts.items()
+        if n >= REVERSE_TREE_MIN_ROUTES
+    }
+
+
 # ---------------------------------------------------------------------------
 # Root
 # ---------------------------------------------------------------------------
@@ -320,15 +545,55 @@ def read_root():
 # ---------------------------------------------------------------------------
 
 
-def _do_route(req: RouteRequest, algorithm: str) -> Dict[str, Any]:
+def _do_route(
+    req: RouteRequest, algorithm: str, explain: bool = False, explain_settled: bool = False
+) -> Any:
+    t0 = time.perf_counter()
     start_node = graph.nearest_node((req.current_location.lat, req.current_location.lon))
     end_node = graph.nearest_node((req.destination.lat, req.destination.lon))
     depart_dt = _ensure_utc(req.departure_time) if req.departure_time else _now_utc()
+    t_snap = time.perf_counter()
+
+    stats = SearchStats(record_settled=explain_settled) if explain else None
+    if algorithm != "auto" and algorithm not in engines:
+        raise HTTPException(status_code=422, detail=f"Unknown algorithm {algorithm!r}")
+    profile = PROFILES[req.profile] if req.profile else None
+    spec = _mask_spec(req.constraints, profile)
+    s, e = graph.nodes.get(start_node), graph.nodes.get(end_node)
+    distance = haversine_distance(s["lat"], s["lon"], e["lat"], e["lon"]) if s and e else 0.0
+
+    choice = None
+    if algorithm == "auto":
+        choice = engines.select(distance, spec, profile is not None, depart_dt)
+        engine = choice.engine
+    else:
+        engine = engines.get(algorithm)
+    if profile is not None and not engine.profiles:
+        raise HTTPException(
+            status_code=422, detail=f"Vehicle profiles are not supported by {algorithm}"
+        )
+    algorithm = engine.name
+    layer = cost_layer(graph, profile) if profile is not None else None
 
-    fn = time_dependent_dijkstra if algorithm == "dijkstra" else a_star_route
-    arrival, path, per_seg = fn(graph, start_node, end_node, depart_dt)
+    def search() -> RouteResult:
+        return engine.route(graph, start_node, end_node, depart_dt, spec, stats, layer)
 
-    if path is None:
+    # Explain requests measure their own search, so they never share one.
+    shared = False
+    if explain or SINGLEFLIGHT_DEPART_BUCKET_SEC <= 0:
+        result = search()
+    else:
+        bucket = int(depart_dt.timestamp() // SINGLEFLIGHT_DEPART_BUCKET_SEC)
+        key = (start_node, end_node, bucket, algorithm, spec, req.profile, graph.epoch)
+        result, shared = route_flight.do(key, search)
+        if shared and result.found:
+            # The shared search departed at the first caller's time (same bucket).
+            depart_dt = datetime.datetime.fromtimestamp(result.depart_ts, UTC)
+    t_search = time.perf_counter()
+    if not shared:
+        engines.observe(algorithm, distance, t_search - t_snap)
+
+    if not result.found:
         log.warning(
             "No route found: start=%d end=%d algorithm=%s ambulance_id=%s",
             start_node,
@@ -338,17 +603,20 @@ def _do_route(req: RouteRequest, algorithm: str) -> Dict[str, Any]:
         )
         raise HTTPException(status_code=404, detail="No route found between the given locations")
 
-    steps, total_sec = _build_route_steps(graph, path, per_seg)
+    path = result.path
+    arrival = result.arrival
 
     if req.ambulance_id:
         _store_route(
             req.ambulance_id,
             path,
-            per_seg,
+            result.per_segment_times,
             depart_dt,
             arrival,
             req.current_location.lat,
             req.current_location.lon,
+            mask_spec=spec,
+            profile=req.profile,
         )
         log.info(
             "Route stored: ambulance_id=%s algorithm=%s path=%s eta=%s",
@@ -358,23 +626,55 @@ def _do_route(req: RouteRequest, algorithm: str) -> Dict[str, Any]:
             arrival.isoformat(),
         )
 
-    return {
+    steps, total_sec = _build_route_steps(graph, result)
+    t_build = time.perf_counter()
+    payload = {
         "ambulance_id": req.ambulance_id,
         "algorithm": algorithm,
+        "auto_selection": (
+            {
+                "reason": choice.reason,
+                "distance_m": distance,
+                "expected_ms": (
+                    choice.expected_seconds * 1000 if choice.expected_seconds is not None else None
+                ),
+            }
+            if choice is not None
+            else None
+        ),
+        "profile": req.profile,
         "total_time_minutes": {"minutes": total_sec // 60, "seconds": total_sec % 60},
         "estimated_arrival": arrival.strftime("%Y-%m-%dT%H:%M:%SZ"),
         "route_steps": steps,
         "path": path,
     }
+    if not explain:
+        return payload
+
+    payload["explain"] = {
+        "phases_ms": {
+            "snapping": (t_snap - t0) * 1000,
+            "search": (t_search - t_snap) * 1000,
+            "segment_build": (t_build - t_search) * 1000,
+        },
+        "stats": stats.to_dict(),
+    }
+    response = RouteResponse.model_validate(payload)
+    # Covers building the response model; FastAPI's final JSON encoding comes after.
+    response.explain.phases_ms["serialization"] = (time.perf_counter() - t_build) * 1000
+    return response
 
 
 @app.post(
     "/api/v1/route_ambulance",
     response_model=RouteResponse,
-    summary="Route ambulance (Dijkstra)",
+    summary="Route ambulance (Dijkstra, or any engine via ?algorithm=)",
     description=(
         "Calculate the fastest route using time-dependent Dijkstra. "
-        "Stores the route for automatic rerouting when traffic changes."
+        "Stores the route for automatic rerouting when traffic changes. "
+        "?algorithm= names another registered engine; algorithm=auto picks the engine "
+        "with the lowest observed latency for the query's distance among those whose "
+        "preprocessed data is current."
     ),
     tags=["routing"],
     responses={
@@ -383,8 +683,13 @@ def _do_route(req: RouteRequest, algorithm: str) -> Dict[str, Any]:
         422: {"description": "Validation error in request body"},
     },
 )
-def route_ambulance_v1(req: RouteRequest):
-    return _do_route(req, "dijkstra")
+def route_ambulance_v1(
+    req: RouteRequest,
+    explain: bool = False,
+    explain_settled: bool = False,
+    algorithm: str = "dijkstra",
+):
+    return _do_route(req, algorithm, explain, explain_settled)
 
 
 @app.post(
@@ -402,8 +707,297 @@ def route_ambulance_v1(req: RouteRequest):
         422: {"description": "Validation error in request body"},
     },
 )
-def route_ambulance_astar_v1(req: RouteRequest):
-    return _do_route(req, "astar")
+def route_ambulance_astar_v1(
+    req: RouteRequest, explain: bool = False, explain_settled: bool = False
+):
+    return _do_route(req, "astar", explain, explain_settled)
+
+
+@app.post(
+    "/api/v1/route_ambulance_cch",
+    response_model=RouteResponse,
+    summary="Route ambulance (CCH)",
+    description=(
+        "Calculate a route with Customizable Contraction Hierarchies. The hierarchy is "
+        "customized with edge costs at customization time and refreshed in the background "
+        "after traffic updates; the returned ETA is re-timed with time-dependent costs."
+    ),
+    tags=["routing"],
+    responses={
+        200: {"description": "Route calculated successfully"},
+        404: {"description": "No route found between the given locations"},
+        422: {"description": "Validation error in request body"},
+    },
+)
+def route_ambulance_cch_v1(req: RouteRequest, explain: bool = False, explain_settled: bool = False):
+    return _do_route(req, "cch", explain, explain_settled)
+
+
+@app.post(
+    "/api/v1/route_ambulance_mld",
+    response_model=RouteResponse,
+    summary="Route ambulance (multi-level overlay)",
+    description=(
+        "Calculate a route on a multi-level partition overlay: only the source and target "
+        "cells are searched edge by edge, the rest through precomputed boundary cliques. "
+        "Traffic updates re-customize only the cells they touch, in the background; the "
+        "returned ETA is re-timed with time-dependent costs."
+    ),
+    tags=["routing"],
+    responses={
+        200: {"description": "Route calculated successfully"},
+        404: {"description": "No route found between the given locations"},
+        422: {"description": "Validation error in request body"},
+    },
+)
+def route_ambulance_mld_v1(req: RouteRequest, explain: bool = False, explain_settled: bool = False):
+    return _do_route(req, "mld", explain, explain_settled)
+
+
+@app.post(
+    "/api/v1/route_nearest",
+    response_model=NearestResponse,
+    summary="Route to the nearest target (e.g. hospital)",
+    description=(
+        "Find the k soonest-reachable targets — explicit node ids or every node with a tag — "
+        "with one time-dependent search that stops when the k-th target is settled."
+    ),
+    tags=["routing"],
+    responses={
+        200: {"description": "Routes to the nearest targets, soonest first"},
+        404: {"description": "Unknown target, no tagged nodes, or no target reachable"},
+        422: {"description": "Validation error in request body"},
+    },
+)
+def route_nearest_v1(req: NearestRequest):
+    if req.tag is not None:
+        targets = graph.nodes_with_tag(req.tag)
+        if not targets:
+            raise HTTPException(status_code=404, detail=f"No nodes tagged '{req.tag}'")
+    else:
+        unknown = sorted(t for t in set(req.targets) if t not in graph.nodes)
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Unknown target nodes: {unknown}")
+        targets = req.targets
+
+    start_node = graph.nearest_node((req.current_location.lat, req.current_location.lon))
+    depart_dt = _ensure_utc(req.departure_time) if req.departure_time else _now_utc()
+    spec = _mask_spec(req.constraints)
+    fn = nearest_targets_dijkstra if req.algorithm == "dijkstra" else nearest_targets_a_star
+    results = fn(graph, start_node, targets, depart_dt, req.k, mask_for(graph, spec))
+    if not results:
+        raise HTTPException(status_code=404, detail="No target reachable from the given location")
+
+    if req.ambulance_id:
+        best = results[0]
+        _store_route(
+            req.ambulance_id,
+            best.path,
+            best.per_segment_times,
+            depart_dt,
+            best.arrival,
+            req.current_location.lat,
+            req.current_location.lon,
+            mask_spec=spec,
+        )
+        log.info(
+            "Route stored: ambulance_id=%s algorithm=%s nearest=%d eta=%s",
+            req.ambulance_id,
+            req.algorithm,
+            best.path[-1],
+            best.arrival.isoformat(),
+        )
+
+    routes = []
+    for result in results:
+        steps, total_sec = _build_route_steps(graph, result)
+        target = result.path[-1]
+        routes.append(
+            {
+                "node": target,
+                "name": graph.nodes[target]["name"],
+                "total_time_minutes": {"minutes": total_sec // 60, "seconds": total_sec % 60},
+                "estimated_arrival": result.arrival.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "route_steps": steps,
+                "path": result.path,
+            }
+        )
+    return {"ambulance_id": req.ambulance_id, "algorithm": req.algorithm, "results": routes}
+
+
+@app.post(
+    "/api/v1/eta",
+    response_model=ETAResponse,
+    summary="Travel-time estimate (hub labels)",
+    description=(
+        "ETA only, no path: answered by intersecting precomputed hub labels, with lower and "
+        "upper bounds the live time-dependent ETA is guaranteed to lie in. Falls back to a "
+        "full search when exact=true, for non-default constraints, or while the labels are "
+        "being (re)built after a topology change or a traffic update outside their bounds."
+    ),
+    tags=["routing"],
+    responses={
+        200: {"description": "ETA estimated from labels or computed by search"},
+        404: {"description": "No route found between the given locations"},
+        422: {"description": "Validation error in request body"},
+    },
+)
+def eta_v1(req: ETARequest):
+    start_node = graph.nearest_node((req.current_location.lat, req.current_location.lon))
+    end_node = graph.nearest_node((req.destination.lat, req.destination.lon))
+    depart_dt = _ensure_utc(req.departure_time) if req.departure_time else _now_utc()
+    spec = _mask_spec(req.constraints)
+
+    estimate = None
+    if not req.exact:
+        estimate = hub_labels.estimate(start_node, end_node, depart_dt, spec)
+    if estimate is not None:
+        eta, lower, upper, source = (
+            estimate.eta_seconds,
+            estimate.lower_seconds,
+            estimate.upper_seconds,
+            "labels",
+        )
+    else:
+        result = workspace_dijkstra_route(
+            graph, start_node, end_node, depart_dt, mask_for(graph, spec)
+        )
+        if not result.found:
+            raise HTTPException(
+                status_code=404, detail="No route found between the given locations"
+            )
+        eta = lower = upper = result.total_seconds
+        source = "search"
+
+    arrival = depart_dt + datetime.timedelta(seconds=eta)
+    return {
+        "eta_seconds": eta,
+        "lower_bound_seconds": lower,
+        "upper_bound_seconds": upper,
+        "max_error_seconds": max(eta - lower, upper - eta),
+        "estimated_arrival": arrival.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "source": source,
+    }
+
+
+@app.get(
+    "/api/v1/catchments",
+    response_model=CatchmentResponse,
+    summary="Travel-time catchments",
+    description=(
+        "For every node, the closest source (e.g. hospital) by travel time, from one "
+        "multi-source search over the edges the constraints allow. Cached per time-bucket "
+        "period until traffic changes; pass node for a single lookup."
+    ),
+    tags=["routing"],
+    responses={
+        200: {"description": "Catchment computed or served from cache"},
+        404: {"description": "Unknown source or node, or no nodes with the tag"},
+        422: {"description": "Give exactly one of tag or sources"},
+    },
+)
+def catchments_v1(
+    tag: Optional[str] = None,
+    sources: Optional[List[int]] = Query(None),
+    direction: Literal["to_source", "from_source"] = "to_source",
+    node: Optional[int] = None,
+    departure_time: Optional[datetime.datetime] = None,
+    emergency_only: bool = True,
+    avoid_closures: bool = False,
+    vehicle_height_m: Optional[float] = Query(None, gt=0, le=10),
+):
+    if (tag is None) == (sources is None):
+        raise HTTPException(status_code=422, detail="Give exactly one of tag or sources")
+    if tag is not None:
+        sources = graph.nodes_with_tag(tag)
+        if not sources:
+            raise HTTPException(status_code=404, detail=f"No nodes tagged '{tag}'")
+    requested = set(sources) | ({node} if node is not None else set())
+    unknown = sorted(n for n in requested if n not in graph.nodes)
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown nodes: {unknown}")
+
+    depart_dt = _ensure_utc(departure_time) if departure_time else _now_utc()
+    spec = _mask_spec(
+        RouteConstraints(
+            emergency_only=emergency_only,
+            avoid_closures=avoid_closures,
+            vehicle_height_m=vehicle_height_m,
+        )
+    )
+    catchment = catchment_for(graph, sources, depart_dt, spec, direction)
+
+    nodes = [node] if node is not None else list(graph.nodes)
+    assignments, unreachable = [], []
+    for n in nodes:
+        hit = catchment.lookup(n)
+        if hit is None:
+            unreachable.append(n)
+        else:
+            assignments.append({"node": n, "source": hit[0], "eta_seconds": hit[1]})
+
+    summary = catchment.summary()
+    return {
+        "direction": direction,
+        "period_start_sec": catchment.period[0],
+        "period_end_sec": catchment.period[1],
+        "computed_for": datetime.datetime.fromtimestamp(catchment.depart_ts, UTC).isoformat(),
+        "sources": [
+            {
+                "node": src,
+                "name": graph.nodes[src]["name"],
+                "nodes": int(info["nodes"]),
+                "max_eta_seconds": info["max_seconds"],
+            }
+            for src, info in summary.items()
+        ],
+        "assignments": assignments,
+        "unreachable": unreachable,
+    }
+
+
+@app.get(
+    "/api/v1/criticality",
+    response_model=CriticalityResponse,
+    summary="Edge criticality for active routes",
+    description=(
+        "For every edge on the remaining part of an active route, the ETA penalty if that "
+        "edge closed now, summed over the routes using it. Edges that would leave a route "
+        "with no alternative come first. Only routes affected by traffic changes since the "
+        "last call are recomputed."
+    ),
+    tags=["traffic"],
+    responses={200: {"description": "Ranked critical edges"}},
+)
+def criticality_v1(limit: int = Query(20, ge=1, le=1000)):
+    now = _now_utc()
+    routes = {}
+    for amb_id, route in list(active_routes.items()):
+        if route["status"] == RouteStatus.ARRIVED or len(route["path"]) < 2:
+            continue
+        remaining = route["path"][_current_node_index(route, now) :]
+        routes[amb_id] = (remaining, route.get("mask_spec") or MaskSpec())
+    ranked = criticality.analyze(routes, now)
+
+    def seconds(value: float) -> Optional[float]:
+        return None if value == float("inf") else value
+
+    return {
+        "computed_for": now.isoformat(),
+        "routes_analyzed": len(routes),
+        "edges": [
+            {
+                "edge_id": c.edge_id,
+                "u": graph.edges[c.edge_id]["u"],
+                "v": graph.edges[c.edge_id]["v"],
+                "routes": c.routes,
+                "total_penalty_seconds": seconds(c.total_penalty_seconds),
+                "max_penalty_seconds": seconds(c.max_penalty_seconds),
+                "disconnected_routes": c.disconnected_routes,
+            }
+            for c in ranked[:limit]
+        ],
+    }
 
 
 @app.post(
@@ -437,19 +1031,24 @@ def traffic_snapshot_v1(snapshot: TrafficSnapshot):
             log.warning("Traffic update failed: %s", ex)
 
     log.info("Traffic snapshot processed: applied=%s errors=%d", applied, len(errors))
+    if applied:
+        cch_router.recustomize_async()
+        mld_router.recustomize_async()
 
     auto_reroutes = []
     now = _now_utc()
+    trees = _hot_destination_trees(now)
     for amb_id, route in list(active_routes.items()):
         if route["status"] == RouteStatus.ARRIVED:
             continue
-        result = _recalculate_eta(graph, amb_id, now)
+        tree = trees.get((route["path"][-1], route.get("mask_spec") or MaskSpec()))
+        result = _recalculate_eta(graph, amb_id, now, tree=tree)
         if result is None:
             continue
         if result["time_saved"] >= REROUTE_THRESHOLD_SEC:
             old_path = route["path"]
             route["path"] = [result["current_node"]] + result["new_path"]
-            route["per_segment_times"] = result["new_per_seg"]
+            route["per_segment_times"] = result["new_route"].per_segment_times
             route["eta"] = result["new_eta"]
             route["remaining_seconds"] = result["new_remaining"]
             route["status"] = RouteStatus.REROUTED
@@ -545,7 +1144,7 @@ def reroute_check_v1(req: RerouteCheck):
     if should_reroute:
         old_path = old_route["path"]
         old_route["path"] = [result["current_node"]] + result["new_path"]
-        old_route["per_segment_times"] = result["new_per_seg"]
+        old_route["per_segment_times"] = result["new_route"].per_segment_times
         old_route["eta"] = result["new_eta"]
         old_route["remaining_seconds"] = result["new_remaining"]
         old_route["status"] = RouteStatus.REROUTED
@@ -603,7 +1202,10 @@ def reroute_check_v1(req: RerouteCheck):
 @app.post(
     "/api/v1/update_position",
     summary="Update ambulance position",
-    description="Report current GPS position for an active ambulance. Updates estimated segment and remaining time.",
+    description=(
+        "Report current GPS position for an active ambulance. The ping is map-matched to a road "
+        "edge; remaining time counts only the untravelled part of the current edge."
+    ),
     tags=["routing"],
     responses={
         200: {"description": "Position updated"},
@@ -619,26 +1221,52 @@ def update_position_v1(update: PositionUpdate):
         )
 
     ts = _ensure_utc(update.timestamp) if update.timestamp else _now_utc()
-    nearest = graph.nearest_node((update.lat, update.lon))
+    path = route["path"]
+    positions = _route_edge_positions(graph, route)
+    match = map_matcher.match(update.ambulance_id, update.lat, update.lon, positions)
     seg_idx, _ = _estimate_segment(route["per_segment_times"], ts)
+    on_route = match is not None and match.edge_id in positions
 
-    path = route["path"]
-    per_seg_t = route["per_segment_times"]
-    if ts < per_seg_t[0][0]:
-        node_idx = 0
+    if match is not None:
+        edge = graph.edges[match.edge_id]
+        nearest = edge["v"] if match.fraction >= 0.5 else edge["u"]
+    else:
+        nearest = graph.nearest_node((update.lat, update.lon))
+
+    travel_time = _route_travel_time(graph, route)
+    if on_route:
+        # The unfinished part of the current edge plus everything after it.
+        node_idx = positions[match.edge_id]
+        partial = (1.0 - match.fraction) * travel_time(match.edge_id, ts.timestamp())
+        rest = _compute_remaining_path_cost(
+            graph, path, node_idx + 1, ts + datetime.timedelta(seconds=partial), travel_time
+        )
+        seg_idx = node_idx
+        remaining = partial + rest
     else:
-        node_idx = min(seg_idx + 1, len(path) - 2)
+        # Off the route or no road nearby: fall back to the schedule estimate.
+        per_seg_t = route["per_segment_times"]
+        if ts < per_seg_t[0][0]:
+            node_idx = 0
+        else:
+            node_idx = min(seg_idx + 1, len(path) - 2)
+        remaining = _compute_remaining_path_cost(graph, path, node_idx, ts, travel_time)
 
     route["current_lat"] = update.lat
     route["current_lon"] = update.lon
     route["current_node"] = nearest
     route["current_segment_index"] = seg_idx
     route["last_update_time"] = ts
-    route["remaining_seconds"] = _compute_remaining_path_cost(graph, path, node_idx, ts)
+    route["remaining_seconds"] = remaining
+    route["matched_edge_id"] = match.edge_id if match is not None else None
+    route["edge_fraction"] = match.fraction if match is not None else None
 
+    # On the route, arrival means the end of the last edge has been reached;
+    # being past the middle of it is not enough.
     dest_node = route["path"][-1]
-    if nearest == dest_node or route["remaining_seconds"] == 0:
+    if remaining == 0 or (not on_route and nearest == dest_node):
         route["status"] = RouteStatus.ARRIVED
+        map_matcher.forget(update.ambulance_id)
         log.info("Ambulance arrived: ambulance_id=%s", update.ambulance_id)
 
     log.debug(
@@ -652,6 +1280,8 @@ def update_position_v1(update: PositionUpdate):
         "ambulance_id": update.ambulance_id,
         "status": route["status"],
         "current_node": nearest,
+        "matched_edge_id": route["matched_edge_id"],
+        "edge_fraction": route["edge_fraction"],
         "remaining_seconds": route["remaining_seconds"],
         "eta": _ensure_utc(route["eta"]).isoformat(),
     }
@@ -717,6 +1347,30 @@ def debug_reroute_events_v1():
     return {"events": reroute_events}
 
 
+@app.get(
+    "/api/v1/metrics",
+    summary="Service metrics",
+    description=(
+        "Request coalescing counters: how many route requests were served by another "
+        "request's in-flight search. With APSP_PRECOMPUTE / ARC_FLAGS, table and flag sizes "
+        "and hit counts. Hub-label size and hit counts for /api/v1/eta. Overlay cells "
+        "re-customized after traffic updates. "
+        "Criticality routes recomputed vs reused across traffic updates."
+    ),
+    tags=["debug"],
+)
+def metrics_v1():
+    return {
+        "singleflight": route_flight.stats(),
+        "eta_tables": eta_tables.stats() if eta_tables is not None else None,
+        "arc_flags": arc_flags.stats() if arc_flags is not None else None,
+        "hub_labels": hub_labels.stats(),
+        "mld": mld_router.stats(),
+        "engines": engines.stats(MaskSpec()),
+        "criticality": criticality.stats(),
+    }
+
+
 # ---------------------------------------------------------------------------
 # Legacy root-level aliases (backward compatibility — no breaking changes)
 # ---------------------------------------------------------------------------
@@ -4,9 +4,9 @@ Pydantic request / response schemas for the ambulance routing API.
 
 import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 from core.config import (
     ABSOLUTE_TIME_MIN,
@@ -18,8 +18,11 @@ from core.config import (
     MAX_EDGE_UPDATES_PER_SNAPSHOT,
     MULTIPLIER_MAX,
     MULTIPLIER_MIN,
+    NEAREST_MAX_K,
+    NEAREST_MAX_TARGETS,
 )
 from core.graph import EdgeUpdate
+from core.profiles import PROFILES
 
 # ---------------------------------------------------------------------------
 # Shared sub-models
@@ -41,6 +44,24 @@ class TimeDuration(BaseModel):
 # ---------------------------------------------------------------------------
 
 
+class RouteConstraints(BaseModel):
+    emergency_only: bool = Field(
+        True,
+        description="Only use edges open to emergency vehicles (is_emergency_allowed).",
+    )
+    avoid_closures: bool = Field(
+        False,
+        description="Skip edges whose absolute_time override marks a road closure.",
+    )
+    vehicle_height_m: Optional[float] = Field(
+        None,
+        gt=0,
+        le=10,
+        description="Vehicle height in metres; edges with a lower max_height are skipped.",
+        examples=[3.2],
+    )
+
+
 class RouteRequest(BaseModel):
     ambulance_id: Optional[str] = Field(
         None,
@@ -55,9 +76,17 @@ class RouteRequest(BaseModel):
         description="UTC departure time (ISO-8601). Defaults to now if omitted.",
         examples=["2026-06-12T08:00:00Z"],
     )
-    constraints: Optional[Dict[str, Any]] = Field(
+    constraints: Optional[RouteConstraints] = Field(
         None,
-        description="Reserved for future constraint extensions (ignored currently).",
+        description="Edge restrictions for this route. Defaults to emergency-allowed edges only.",
+    )
+    profile: Optional[str] = Field(
+        None,
+        description=(
+            "Vehicle profile (e.g. 'bls', 'als', 'motorcycle') whose costs and road restrictions "
+            "apply. Defaults to the graph's own costs. Supported by dijkstra and astar."
+        ),
+        examples=["motorcycle"],
     )
 
     @field_validator("ambulance_id")
@@ -67,14 +96,204 @@ class RouteRequest(BaseModel):
             raise ValueError("ambulance_id must contain only printable characters")
         return v
 
+    @field_validator("profile")
+    @classmethod
+    def profile_known(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in PROFILES:
+            raise ValueError(f"profile must be one of {sorted(PROFILES)}")
+        return v
+
+
+class SearchStatsInfo(BaseModel):
+    settled: int = Field(..., description="Nodes settled (popped with a final label)")
+    pushes: int = Field(..., description="Priority-queue pushes")
+    stale_pops: int = Field(..., description="Pops of outdated queue entries")
+    relaxations: int = Field(..., description="Edges examined")
+    peak_heap: int = Field(..., description="Largest queue size seen")
+    settled_nodes: Optional[List[int]] = Field(
+        None, description="Settled node ids in settle order (only with explain_settled=true)"
+    )
+
+
+class RouteExplain(BaseModel):
+    phases_ms: Dict[str, float] = Field(
+        ...,
+        description="Wall time per phase: snapping, search, segment_build, serialization",
+    )
+    stats: SearchStatsInfo = Field(..., description="Search kernel work counters")
+
+
+class AutoSelectionInfo(BaseModel):
+    reason: Literal["fastest", "exploring"] = Field(
+        ...,
+        description="'fastest': lowest observed latency for this distance; "
+        "'exploring': the engine still needs latency samples",
+    )
+    distance_m: float = Field(..., description="Straight-line distance used to pick the band")
+    expected_ms: Optional[float] = Field(
+        None, description="Smoothed latency of the chosen engine in this band, if measured"
+    )
+
 
 class RouteResponse(BaseModel):
     ambulance_id: Optional[str] = Field(None, description="Echo of the requested ambulance_id")
-    algorithm: str = Field(..., description="Algorithm used: 'dijkstra' or 'astar'")
+    algorithm: str = Field(
+        ..., description="Engine used: 'dijkstra', 'astar', 'cch', 'mld' or another registered one"
+    )
+    auto_selection: Optional[AutoSelectionInfo] = Field(
+        None, description="Why the engine was picked (only with algorithm=auto)"
+    )
+    profile: Optional[str] = Field(None, description="Vehicle profile used, if any")
     total_time_minutes: TimeDuration = Field(..., description="Estimated total travel time")
     estimated_arrival: str = Field(..., description="UTC arrival datetime (ISO-8601)")
     route_steps: List[str] = Field(..., description="Human-readable per-segment descriptions")
     path: List[int] = Field(..., description="Ordered list of node IDs from origin to destination")
+    explain: Optional[RouteExplain] = Field(
+        None, description="Search counters and phase timings (only with explain=true)"
+    )
+
+
+class NearestRequest(BaseModel):
+    ambulance_id: Optional[str] = Field(
+        None,
+        max_length=AMBULANCE_ID_MAX_LEN,
+        description="If given, the route to the soonest-reachable target is stored for tracking.",
+        examples=["AMB-001"],
+    )
+    current_location: LatLon = Field(..., description="Current GPS location of the ambulance")
+    targets: Optional[List[int]] = Field(
+        None,
+        min_length=1,
+        max_length=NEAREST_MAX_TARGETS,
+        description="Candidate destination node ids. Give either targets or tag.",
+        examples=[[3, 4]],
+    )
+    tag: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=64,
+        description="Use every node carrying this tag as a candidate destination.",
+        examples=["hospital"],
+    )
+    k: int = Field(1, ge=1, le=NEAREST_MAX_K, description="Number of nearest targets to return")
+    algorithm: Literal["dijkstra", "astar"] = Field(
+        "dijkstra", description="Search kernel: 'dijkstra' or 'astar'"
+    )
+    departure_time: Optional[datetime.datetime] = Field(
+        None,
+        description="UTC departure time (ISO-8601). Defaults to now if omitted.",
+        examples=["2026-06-12T08:00:00Z"],
+    )
+    constraints: Optional[RouteConstraints] = Field(
+        None,
+        description="Edge restrictions for this route. Defaults to emergency-allowed edges only.",
+    )
+
+    @field_validator("ambulance_id")
+    @classmethod
+    def ambulance_id_printable(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and not v.isprintable():
+            raise ValueError("ambulance_id must contain only printable characters")
+        return v
+
+    @model_validator(mode="after")
+    def targets_or_tag(self) -> "NearestRequest":
+        if (self.targets is None) == (self.tag is None):
+            raise ValueError("give exactly one of targets or tag")
+        return self
+
+
+class NearestTargetRoute(BaseModel):
+    node: int = Field(..., description="Target node id")
+    name: str = Field(..., description="Target node name")
+    total_time_minutes: TimeDuration = Field(..., description="Estimated total travel time")
+    estimated_arrival: str = Field(..., description="UTC arrival datetime (ISO-8601)")
+    route_steps: List[str] = Field(..., description="Human-readable per-segment descriptions")
+    path: List[int] = Field(..., description="Ordered list of node IDs from origin to target")
+
+
+class NearestResponse(BaseModel):
+    ambulance_id: Optional[str] = Field(None, description="Echo of the requested ambulance_id")
+    algorithm: str = Field(..., description="Algorithm used: 'dijkstra' or 'astar'")
+    results: List[NearestTargetRoute] = Field(
+        ..., description="Reachable targets, soonest arrival first (at most k)"
+    )
+
+
+class CatchmentSource(BaseModel):
+    node: int = Field(..., description="Source node id")
+    name: str = Field(..., description="Source node name")
+    nodes: int = Field(..., description="Number of nodes this source is closest to")
+    max_eta_seconds: float = Field(..., description="Largest travel time within the catchment")
+
+
+class CatchmentAssignment(BaseModel):
+    node: int = Field(..., description="Node id")
+    source: int = Field(..., description="Closest source by travel time")
+    eta_seconds: float = Field(..., description="Travel time between node and source")
+
+
+class CatchmentResponse(BaseModel):
+    direction: str = Field(..., description="'to_source' or 'from_source'")
+    period_start_sec: int = Field(..., description="Start of the time-bucket period (s of day)")
+    period_end_sec: int = Field(..., description="End of the time-bucket period (s of day)")
+    computed_for: str = Field(..., description="Departure time the catchment was computed for")
+    sources: List[CatchmentSource] = Field(..., description="Per-source catchment summary")
+    assignments: List[CatchmentAssignment] = Field(
+        ..., description="Closest source per node (only the requested node if one was given)"
+    )
+    unreachable: List[int] = Field(..., description="Nodes with no reachable source")
+
+
+class CriticalEdge(BaseModel):
+    edge_id: int = Field(..., description="Edge id")
+    u: int = Field(..., description="Edge tail node")
+    v: int = Field(..., description="Edge head node")
+    routes: List[str] = Field(..., description="Ambulances whose remaining route uses the edge")
+    total_penalty_seconds: Optional[float] = Field(
+        ..., description="Summed ETA increase if the edge closed; null if some route disconnects"
+    )
+    max_penalty_seconds: Optional[float] = Field(
+        ..., description="Largest ETA increase for one route; null if some route disconnects"
+    )
+    disconnected_routes: int = Field(..., description="Routes left with no alternative path")
+
+
+class CriticalityResponse(BaseModel):
+    computed_for: str = Field(..., description="Time at which closures were evaluated")
+    routes_analyzed: int = Field(..., description="Active routes included in the ranking")
+    edges: List[CriticalEdge] = Field(..., description="Most critical edges first")
+
+
+class ETARequest(BaseModel):
+    current_location: LatLon = Field(..., description="Current GPS location of the ambulance")
+    destination: LatLon = Field(..., description="Destination GPS location")
+    departure_time: Optional[datetime.datetime] = Field(
+        None,
+        description="UTC departure time (ISO-8601). Defaults to now if omitted.",
+        examples=["2026-06-12T08:00:00Z"],
+    )
+    constraints: Optional[RouteConstraints] = Field(
+        None,
+        description="Edge restrictions. Hub labels only cover the default constraints.",
+    )
+    exact: bool = Field(
+        False,
+        description="Run a full time-dependent search instead of answering from hub labels.",
+    )
+
+
+class ETAResponse(BaseModel):
+    eta_seconds: float = Field(..., description="Estimated travel time")
+    lower_bound_seconds: float = Field(..., description="The live ETA is at least this")
+    upper_bound_seconds: float = Field(..., description="The live ETA is at most this")
+    max_error_seconds: float = Field(
+        ..., description="Largest possible difference between eta_seconds and the live ETA"
+    )
+    estimated_arrival: str = Field(..., description="UTC arrival datetime (ISO-8601)")
+    source: Literal["labels", "search"] = Field(
+        ..., description="'labels' (hub-label lookup) or 'search' (exact time-dependent search)"
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,85 @@
+"""
+Arc-flag preprocessing and query benchmark.
+
+For road grids of increasing size reports flag build time, flag storage,
+the average share of edges flagged per region, and median settled nodes and
+query time for plain Dijkstra vs flag-pruned Dijkstra and A*.
+
+Usage:
+    PYTHONPATH=. python benchmarks/arc_flags.py [--regions 32] [--workers N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.benchmark import DEPART  # noqa: E402
+from benchmarks.cch import make_road_grid  # noqa: E402
+from core.arc_flags import ArcFlags  # noqa: E402
+from core.masks import MaskSpec, mask_for  # noqa: E402
+from core.routing import SearchStats, dijkstra_route  # noqa: E402
+
+SIDES = [20, 40, 60]
+QUERIES = 100
+
+
+def _median_query(fn, pairs):
+    settled, ms = [], []
+    for s, t in pairs:
+        stats = SearchStats()
+        start = time.perf_counter()
+        fn(s, t, stats)
+        ms.append((time.perf_counter() - start) * 1000)
+        settled.append(stats.settled)
+    return statistics.median(settled), statistics.median(ms)
+
+
+def run_benchmarks(regions: int, workers: int):
+    header = (
+        f"{'Nodes':>6} {'Build s':>8} {'KiB':>6} {'Flagged':>8} {'Algorithm':>12} "
+        f"{'Settled':>8} {'ms':>7}"
+    )
+    print()
+    print(f"{regions} regions, {workers} worker(s)")
+    print(header)
+    print("-" * len(header))
+    for side in SIDES:
+        g = make_road_grid(side)
+        start = time.perf_counter()
+        flags = ArcFlags(g, regions=regions, workers=workers)
+        build = time.perf_counter() - start
+        flagged = statistics.mean(flags.flagged_fraction(r) for r in range(flags.n_regions))
+
+        rng = random.Random(side)
+        pairs = [tuple(rng.sample(list(g.nodes), 2)) for _ in range(QUERIES)]
+        mask = mask_for(g, MaskSpec())
+        rows = [
+            ("dijkstra", lambda s, t, st: dijkstra_route(g, s, t, DEPART, mask, st)),
+            ("flags", lambda s, t, st: flags.route(g, s, t, DEPART, st)),
+            ("flags+astar", lambda s, t, st: flags.route(g, s, t, DEPART, st, "astar")),
+        ]
+        for name, fn in rows:
+            settled, ms = _median_query(fn, pairs)
+            print(
+                f"{len(g.nodes):>6} {build:>8.1f} {flags.nbytes / 1024:>6.0f} {flagged:>7.0%} "
+                f"{name:>12} {settled:>8.0f} {ms:>7.2f}"
+            )
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arc flags benchmark")
+    parser.add_argument("--regions", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    run_benchmarks(args.regions, args.workers)
+
+
+if __name__ == "__main__":
+    main()
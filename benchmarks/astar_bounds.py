@@ -0,0 +1,71 @@
+"""
+A* pruning benchmark: graph-derived max speed vs the old fixed 15 m/s heuristic.
+
+For each graph reports median settled nodes and query time for Dijkstra,
+A* with a fixed 15 m/s speed and A* with the speed derived from per-edge
+lower bounds, plus how many fixed-speed routes were slower than Dijkstra's.
+
+Usage:
+    PYTHONPATH=. python benchmarks/astar_bounds.py
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.benchmark import DEPART, make_large_graph  # noqa: E402
+from benchmarks.cch import make_road_grid  # noqa: E402
+from core.lower_bounds import cached_lower_bounds  # noqa: E402
+from core.routing import SearchStats, a_star_route, dijkstra_route  # noqa: E402
+
+QUERIES = 100
+FIXED_SPEED_MS = 15.0
+
+
+def _run(fn, g, pairs, **kw):
+    settled, ms, totals = [], [], []
+    for s, t in pairs:
+        stats = SearchStats()
+        start = time.perf_counter()
+        result = fn(g, s, t, DEPART, stats=stats, **kw)
+        ms.append((time.perf_counter() - start) * 1000)
+        settled.append(stats.settled)
+        totals.append(result.total_seconds)
+    return statistics.median(settled), statistics.median(ms), totals
+
+
+def run_benchmarks():
+    graphs = [
+        ("road grid 40x40", make_road_grid(40)),
+        ("road grid 80x80", make_road_grid(80)),
+        ("make_large_graph 2000", make_large_graph(2000)),
+    ]
+    header = (
+        f"{'Graph':<24} {'v_max m/s':>9} {'Algorithm':>14} "
+        f"{'Settled':>8} {'ms':>7} {'Slower routes':>14}"
+    )
+    print()
+    print(header)
+    print("-" * len(header))
+    for label, g in graphs:
+        rng = random.Random(7)
+        pairs = [tuple(rng.sample(list(g.nodes), 2)) for _ in range(QUERIES)]
+        vmax = cached_lower_bounds(g).max_speed_ms
+        base_settled, base_ms, want = _run(dijkstra_route, g, pairs)
+        rows = [("dijkstra", base_settled, base_ms, 0)]
+        for name, kw in (("a* 15 m/s", {"max_speed_ms": FIXED_SPEED_MS}), ("a* derived", {})):
+            settled, ms, got = _run(a_star_route, g, pairs, **kw)
+            slower = sum(1 for a, b in zip(got, want) if a > b + 1e-6)
+            rows.append((name, settled, ms, slower))
+        for name, settled, ms, slower in rows:
+            print(f"{label:<24} {vmax:>9.1f} {name:>14} {settled:>8.0f} {ms:>7.2f} {slower:>14}")
+        print()
+
+
+if __name__ == "__main__":
+    run_benchmarks()
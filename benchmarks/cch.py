@@ -0,0 +1,91 @@
+"""
+CCH benchmark: preprocessing, customization and query time vs time-dependent Dijkstra.
+
+Uses road-like grids (two-way streets, independent costs per direction)
+rather than make_large_graph: its random long-range edges leave no small
+separators, which is not what city road networks look like.
+
+Usage:
+    PYTHONPATH=. python benchmarks/cch.py
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.benchmark import DEPART  # noqa: E402
+from core.cch import CCH  # noqa: E402
+from core.graph import EdgeUpdate, Graph  # noqa: E402
+from core.routing import dijkstra_route  # noqa: E402
+
+SIDES = [30, 60, 100]
+QUERIES = 30
+
+
+def make_road_grid(side: int, seed: int = 1) -> Graph:
+    rng = random.Random(seed)
+    g = Graph()
+    for r in range(side):
+        for c in range(side):
+            jitter = rng.uniform(-0.001, 0.001)
+            g.add_node(r * side + c + 1, 12.90 + r * 0.005 + jitter, 77.50 + c * 0.005 - jitter)
+    for r in range(side):
+        for c in range(side):
+            u = r * side + c + 1
+            for v in (u + 1 if c + 1 < side else None, u + side if r + 1 < side else None):
+                if v is not None:
+                    g.add_edge(u, v, rng.uniform(30, 180), 500)
+                    g.add_edge(v, u, rng.uniform(30, 180), 500)
+    return g
+
+
+def run_benchmarks():
+    header = (
+        f"{'Nodes':>7} {'Arcs':>8} {'Prep s':>7} {'Custom ms':>10} "
+        f"{'CCH ms':>8} {'Dijkstra ms':>12} {'Match':>6}"
+    )
+    print()
+    print(header)
+    print("-" * len(header))
+
+    for side in SIDES:
+        g = make_road_grid(side)
+        rng = random.Random(side)
+
+        start = time.perf_counter()
+        cch = CCH(g)
+        prep_s = time.perf_counter() - start
+
+        # One minute of traffic: a few percent of edges change multiplier.
+        for eid in rng.sample(list(g.edges), len(g.edges) // 20):
+            g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=rng.uniform(0.5, 3.0)))
+        start = time.perf_counter()
+        metric = cch.customize(g, DEPART)
+        custom_ms = (time.perf_counter() - start) * 1000
+
+        cch_ms, dij_ms, mismatches = [], [], 0
+        for _ in range(QUERIES):
+            s, t = rng.sample(list(g.nodes), 2)
+            start = time.perf_counter()
+            got = metric.route(s, t, DEPART)
+            cch_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            want = dijkstra_route(g, s, t, DEPART)
+            dij_ms.append((time.perf_counter() - start) * 1000)
+            if abs(got.total_seconds - want.total_seconds) > 1e-6:
+                mismatches += 1
+
+        print(
+            f"{len(g.nodes):>7} {cch.n_arcs:>8} {prep_s:>7.2f} {custom_ms:>10.1f} "
+            f"{statistics.median(cch_ms):>8.2f} {statistics.median(dij_ms):>12.2f} "
+            f"{'yes' if not mismatches else 'NO':>6}"
+        )
+
+
+if __name__ == "__main__":
+    run_benchmarks()
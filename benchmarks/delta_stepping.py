@@ -0,0 +1,72 @@
+"""
+One-to-all benchmark: scalar time-dependent Dijkstra vs vectorised delta-stepping.
+
+Runs both on random grid graphs of increasing size and reports the smallest
+graph on which delta-stepping beats the scalar heap loop (the crossover).
+
+Usage:
+    PYTHONPATH=. python benchmarks/delta_stepping.py
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.benchmark import DEPART, make_large_graph  # noqa: E402
+from core.csr import cached_csr  # noqa: E402
+from core.delta_stepping import delta_stepping  # noqa: E402
+from core.graph import Graph  # noqa: E402
+from core.routing import dijkstra_one_to_all  # noqa: E402
+
+SIZES = [100, 400, 1600, 6400, 25600]
+SOURCES_PER_SIZE = 5
+
+
+def _median_ms(fn: Callable, g: Graph, sources: List[int]) -> float:
+    samples = []
+    for src in sources:
+        start = time.perf_counter()
+        fn(g, src, DEPART)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run_benchmarks():
+    header = f"{'Nodes':>7} {'Edges':>7} {'Dijkstra ms':>12} {'Delta ms':>10} {'Speedup':>8}"
+    print()
+    print(header)
+    print("-" * len(header))
+
+    crossover = None
+    for n in SIZES:
+        g = make_large_graph(n_nodes=n)
+        cached_csr(g)  # build outside the timed region, as a long-lived service would
+        rng = random.Random(n)
+        # Low ids sit in the top-left corner of the grid and reach most of it.
+        sources = [rng.randint(1, max(1, n // 20)) for _ in range(SOURCES_PER_SIZE)]
+
+        scalar_ms = _median_ms(dijkstra_one_to_all, g, sources)
+        vector_ms = _median_ms(delta_stepping, g, sources)
+        speedup = scalar_ms / vector_ms if vector_ms else float("inf")
+        print(
+            f"{len(g.nodes):>7} {len(g.edges):>7} {scalar_ms:>12.2f} "
+            f"{vector_ms:>10.2f} {speedup:>7.2f}x"
+        )
+        if crossover is None and speedup > 1.0:
+            crossover = len(g.nodes)
+
+    print()
+    if crossover is None:
+        print("Delta-stepping did not beat the scalar loop on any tested size.")
+    else:
+        print(f"Crossover: delta-stepping wins from ~{crossover} nodes upward.")
+
+
+if __name__ == "__main__":
+    run_benchmarks()
@@ -0,0 +1,99 @@
+"""
+Fleet simulator throughput benchmark.
+
+Simulates an hour of a city: scheduled trips to a handful of hospitals,
+incidents dispatched to a standing fleet (with transport to a hospital),
+and a traffic injection every minute touching 20 random edges. Reports
+ambulance-trips simulated per minute of wall-clock time on one core.
+
+Usage:
+    PYTHONPATH=. python benchmarks/fleet.py [--trips 10000] [--algorithm dijkstra]
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.hub_labels import make_rush_grid  # noqa: E402
+from core.fleet import FleetSimulator, Incident, Trip  # noqa: E402
+from core.graph import EdgeUpdate  # noqa: E402
+from core.simulator import TrafficInjection  # noqa: E402
+
+UTC = datetime.timezone.utc
+START = datetime.datetime(2026, 6, 12, 7, 0, 0, tzinfo=UTC)  # into the morning rush
+SIDES = [20, 30]
+HOSPITALS = 5
+FLEET = 50
+INCIDENT_SHARE = 0.1  # of --trips, dispatched to the fleet instead of scheduled
+
+
+def make_scenario(g, n_trips: int, seed: int = 1):
+    rng = random.Random(seed)
+    nodes = list(g.nodes)
+    hospitals = rng.sample(nodes, HOSPITALS)
+
+    def at():
+        return START + datetime.timedelta(seconds=rng.uniform(0, 3600))
+
+    n_incidents = int(n_trips * INCIDENT_SHARE)
+    trips = [
+        Trip(f"T{i}", rng.choice(nodes), rng.choice(hospitals), at())
+        for i in range(n_trips - 2 * n_incidents)
+    ]
+    incidents = [
+        Incident(at(), rng.choice(nodes), rng.choice(hospitals), 600.0, f"I{i}")
+        for i in range(n_incidents)
+    ]
+    fleet = {f"U{i}": rng.choice(nodes) for i in range(FLEET)}
+    edges = list(g.edges)
+    injections = [
+        TrafficInjection(
+            START + datetime.timedelta(minutes=m),
+            [
+                EdgeUpdate(edge_id=e, multiplier=rng.choice([0.5, 2.0, 4.0]))
+                for e in rng.sample(edges, 20)
+            ],
+        )
+        for m in range(60)
+    ]
+    return trips, incidents, fleet, injections
+
+
+def run_benchmarks(n_trips: int, algorithm: str):
+    header = (
+        f"{'Nodes':>6} {'Legs':>7} {'Checks':>7} {'Reroutes':>9} {'Unserved':>9} "
+        f"{'Wall s':>7} {'Legs/min':>9}"
+    )
+    print()
+    print(f"algorithm {algorithm}")
+    print(header)
+    print("-" * len(header))
+    for side in SIDES:
+        g = make_rush_grid(side)
+        trips, incidents, fleet, injections = make_scenario(g, n_trips)
+        result = FleetSimulator(g, algorithm=algorithm).run(
+            trips=trips, traffic_injections=injections, incidents=incidents, ambulances=fleet
+        )
+        s = result.summary()
+        print(
+            f"{len(g.nodes):>6} {s['trips']:>7} {s['reroute_checks']:>7} {s['reroutes']:>9} "
+            f"{s['unserved_incidents']:>9} {s['wall_seconds']:>7.1f} "
+            f"{s['trips_per_wall_minute']:>9.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet simulator throughput benchmark")
+    parser.add_argument("--trips", type=int, default=10000)
+    parser.add_argument("--algorithm", default="dijkstra", choices=["dijkstra", "astar"])
+    args = parser.parse_args()
+    run_benchmarks(args.trips, args.algorithm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Hub-label ETA benchmark.
+
+For road grids of increasing size (a share of edges with a rush-hour bucket,
+departing in the rush) reports label build time, average label
+size, median query time for a label lookup vs a full time-dependent
+Dijkstra, the median / max error bound (upper - lower) and the median actual
+error of the estimate, both relative to the live ETA.
+
+Usage:
+    PYTHONPATH=. python benchmarks/hub_labels.py [--per-period]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.benchmark import DEPART  # noqa: E402
+from benchmarks.cch import make_road_grid  # noqa: E402
+from core.graph import Graph  # noqa: E402
+from core.hub_labels import HubLabelIndex  # noqa: E402
+from core.masks import MaskSpec, mask_for  # noqa: E402
+from core.workspace import workspace_dijkstra_route  # noqa: E402
+
+SIDES = [10, 20, 30]
+QUERIES = 200
+RUSH_SHARE = 0.3  # edges that slow to 2x base time from 07:30 to 10:00
+
+
+def make_rush_grid(side: int, seed: int = 1) -> Graph:
+    """make_road_grid with a morning rush-hour bucket on RUSH_SHARE of the edges."""
+    grid = make_road_grid(side, seed)
+    rng = random.Random(seed)
+    g = Graph()
+    for nid, node in grid.nodes.items():
+        g.add_node(nid, node["lat"], node["lon"])
+    for e in grid.edges.values():
+        rush = [{"start": 27000, "end": 36000, "avg_time": 2 * e["base_time"]}]
+        buckets = rush if rng.random() < RUSH_SHARE else None
+        g.add_edge(e["u"], e["v"], e["base_time"], e["distance"], buckets)
+    return g
+
+
+def _timed(fn, pairs):
+    """Median microseconds per call and the results."""
+    us, results = [], []
+    for s, t in pairs:
+        start = time.perf_counter()
+        results.append(fn(s, t))
+        us.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(us), results
+
+
+def run_benchmarks(per_period: bool):
+    header = (
+        f"{'Nodes':>6} {'Build s':>8} {'Label':>6} {'Labels us':>10} {'Search us':>10} "
+        f"{'Bound p50':>10} {'Bound max':>10} {'Error p50':>10}"
+    )
+    print()
+    print(f"per-period labels: {per_period}")
+    print(header)
+    print("-" * len(header))
+    for side in SIDES:
+        g = make_rush_grid(side)
+        start = time.perf_counter()
+        index = HubLabelIndex(g, per_period=per_period)
+        build = time.perf_counter() - start
+
+        rng = random.Random(side)
+        pairs = [tuple(rng.sample(list(g.nodes), 2)) for _ in range(QUERIES)]
+        mask = mask_for(g, MaskSpec())
+        label_us, estimates = _timed(lambda s, t: index.estimate(s, t, DEPART), pairs)
+        search_us, routes = _timed(
+            lambda s, t: workspace_dijkstra_route(g, s, t, DEPART, mask), pairs
+        )
+        found = [
+            (e, r.total_seconds)
+            for e, r in zip(estimates, routes)
+            if e is not None and r.found and r.total_seconds > 0
+        ]
+        bounds = [(e.upper_seconds - e.lower_seconds) / live for e, live in found]
+        errors = [abs(e.eta_seconds - live) / live for e, live in found]
+        print(
+            f"{len(g.nodes):>6} {build:>8.1f} {index.average_label_size:>6.0f} "
+            f"{label_us:>10.0f} {search_us:>10.0f} "
+            f"{statistics.median(bounds):>10.1%} {max(bounds):>10.1%} "
+            f"{statistics.median(errors):>10.1%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hub labels benchmark")
+    parser.add_argument("--per-period", action="store_true")
+    args = parser.parse_args()
+    run_benchmarks(args.per_period)
+
+
+if __name__ == "__main__":
+    main()
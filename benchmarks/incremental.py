@@ -0,0 +1,130 @@
+"""
+Reroute benchmark: incremental repair vs a fresh time-dependent Dijkstra.
+
+For each trial a route is planned, a traffic snapshot touches 1-3 edges
+(at least one on the current path), and the new route is computed both by
+IncrementalRoute.route() and by a fresh search. Reports median latency and
+checks the two agree.
+
+The moving table does the same for an ambulance driving its route on a
+grid with a morning rush hour: at every node it reports its position up to
+half a minute off the predicted time (as the API's wall clock does) and
+IncrementalRoute.reroute_from() re-roots the search there. Full searches
+counts the from-scratch searches that took, the first route included.
+
+Usage:
+    PYTHONPATH=. python benchmarks/incremental.py
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.benchmark import DEPART, make_large_graph  # noqa: E402
+from benchmarks.hub_labels import make_rush_grid  # noqa: E402
+from core.graph import EdgeUpdate  # noqa: E402
+from core.incremental import IncrementalRoute  # noqa: E402
+from core.routing import dijkstra_route  # noqa: E402
+
+SIZES = [1000, 5000, 20000]
+SIDES = [32, 71, 141]
+TRIALS = 20
+JITTER_SEC = 30.0
+
+
+def run_benchmarks():
+    header = f"{'Nodes':>7} {'Fresh ms':>10} {'Repair ms':>10} {'Speedup':>8} {'Match':>6}"
+    print()
+    print(header)
+    print("-" * len(header))
+
+    for n in SIZES:
+        g = make_large_graph(n_nodes=n)
+        rng = random.Random(n)
+        src, dst = 1, len(g.nodes)
+        router = IncrementalRoute(g, src, dst, DEPART)
+        current = router.route()
+        edge_ids = list(g.edges)
+
+        fresh_ms, repair_ms = [], []
+        mismatches = 0
+        for _ in range(TRIALS):
+            touched = {rng.choice(current.edge_ids)}
+            touched.update(rng.sample(edge_ids, rng.randint(0, 2)))
+            for eid in touched:
+                g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=rng.uniform(0.5, 4.0)))
+
+            start = time.perf_counter()
+            current = router.route()
+            repair_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            fresh = dijkstra_route(g, src, dst, DEPART)
+            fresh_ms.append((time.perf_counter() - start) * 1000)
+
+            if abs(fresh.total_seconds - current.total_seconds) > 1e-3:
+                mismatches += 1
+
+        fresh_med = statistics.median(fresh_ms)
+        repair_med = statistics.median(repair_ms)
+        speedup = fresh_med / repair_med if repair_med else float("inf")
+        print(
+            f"{len(g.nodes):>7} {fresh_med:>10.2f} {repair_med:>10.2f} "
+            f"{speedup:>7.2f}x {'yes' if not mismatches else 'NO':>6}"
+        )
+
+
+def run_moving_benchmarks():
+    header = (
+        f"{'Nodes':>7} {'Hops':>5} {'Fresh ms':>10} {'Reroute ms':>11} {'Speedup':>8} "
+        f"{'Full':>5} {'Match':>6}"
+    )
+    print()
+    print("moving ambulance, rush-hour grid")
+    print(header)
+    print("-" * len(header))
+
+    for side in SIDES:
+        g = make_rush_grid(side)
+        rng = random.Random(side)
+        src, dst = 1, len(g.nodes)
+        router = IncrementalRoute(g, src, dst, DEPART)
+        current = router.route()
+        edge_ids = list(g.edges)
+
+        fresh_ms, reroute_ms = [], []
+        mismatches = 0
+        while len(current.path) > 2:
+            node = current.path[1]
+            ts = current.node_times[1] + rng.uniform(-JITTER_SEC, JITTER_SEC)
+            for eid in rng.sample(edge_ids, rng.randint(1, 3)):
+                g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=rng.uniform(0.5, 4.0)))
+
+            start = time.perf_counter()
+            current = router.reroute_from(node, ts)
+            reroute_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            fresh = dijkstra_route(g, node, dst, ts)
+            fresh_ms.append((time.perf_counter() - start) * 1000)
+
+            if abs(fresh.total_seconds - current.total_seconds) > 1e-3:
+                mismatches += 1
+
+        fresh_med = statistics.median(fresh_ms)
+        reroute_med = statistics.median(reroute_ms)
+        speedup = fresh_med / reroute_med if reroute_med else float("inf")
+        print(
+            f"{len(g.nodes):>7} {len(reroute_ms):>5} {fresh_med:>10.2f} {reroute_med:>11.2f} "
+            f"{speedup:>7.2f}x {router.full_searches:>5} {'yes' if not mismatches else 'NO':>6}"
+        )
+
+
+if __name__ == "__main__":
+    run_benchmarks()
+    run_moving_benchmarks()
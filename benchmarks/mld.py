@@ -0,0 +1,93 @@
+"""
+Multi-level overlay benchmark.
+
+For road grids of increasing size reports overlay build and full
+customization time, the time and number of cells re-customized after a
+one-edge traffic update, and median settled nodes and query time for the
+overlay vs plain Dijkstra. Routes are checked against Dijkstra.
+
+Usage:
+    PYTHONPATH=. python benchmarks/mld.py [--cell-sizes 64,1024]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.benchmark import DEPART  # noqa: E402
+from benchmarks.cch import make_road_grid  # noqa: E402
+from core.graph import EdgeUpdate  # noqa: E402
+from core.mld import Overlay  # noqa: E402
+from core.routing import SearchStats, dijkstra_route  # noqa: E402
+
+SIDES = [30, 60, 100]
+QUERIES = 50
+
+
+def _median_query(fn, pairs):
+    settled, ms, results = [], [], []
+    for s, t in pairs:
+        stats = SearchStats()
+        start = time.perf_counter()
+        results.append(fn(s, t, stats))
+        ms.append((time.perf_counter() - start) * 1000)
+        settled.append(stats.settled)
+    return statistics.median(settled), statistics.median(ms), results
+
+
+def run_benchmarks(cell_sizes):
+    header = (
+        f"{'Nodes':>6} {'Cells':>10} {'Build s':>8} {'Custom s':>9} {'Update ms':>10} "
+        f"{'Cells upd':>10} {'MLD settled':>12} {'MLD ms':>7} {'Dij settled':>12} "
+        f"{'Dij ms':>7} {'Match':>6}"
+    )
+    print()
+    print(f"cell sizes {cell_sizes}")
+    print(header)
+    print("-" * len(header))
+    for side in SIDES:
+        g = make_road_grid(side)
+        start = time.perf_counter()
+        overlay = Overlay(g, cell_sizes)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        metric = overlay.customize(g, DEPART)
+        custom = time.perf_counter() - start
+
+        rng = random.Random(side)
+        g.apply_edge_update(EdgeUpdate(edge_id=rng.choice(list(g.edges)), multiplier=2.0))
+        start = time.perf_counter()
+        metric = metric.update(DEPART)
+        update = (time.perf_counter() - start) * 1000
+
+        pairs = [tuple(rng.sample(list(g.nodes), 2)) for _ in range(QUERIES)]
+        m_settled, m_ms, m_res = _median_query(
+            lambda s, t, st: metric.route(s, t, DEPART, st), pairs
+        )
+        d_settled, d_ms, d_res = _median_query(
+            lambda s, t, st: dijkstra_route(g, s, t, DEPART, None, st), pairs
+        )
+        match = all(abs(a.total_seconds - b.total_seconds) < 1e-6 for a, b in zip(m_res, d_res))
+        cells = "/".join(str(n) for n in overlay.n_cells)
+        print(
+            f"{len(g.nodes):>6} {cells:>10} {build:>8.2f} {custom:>9.2f} {update:>10.1f} "
+            f"{metric.cells_customized:>10} {m_settled:>12.0f} {m_ms:>7.2f} {d_settled:>12.0f} "
+            f"{d_ms:>7.2f} {'yes' if match else 'NO':>6}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-level overlay benchmark")
+    parser.add_argument("--cell-sizes", default="64,1024")
+    args = parser.parse_args()
+    run_benchmarks([int(s) for s in args.cell_sizes.split(",")])
+
+
+if __name__ == "__main__":
+    main()
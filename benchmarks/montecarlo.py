@@ -0,0 +1,82 @@
+"""
+Monte Carlo scenario runner benchmark.
+
+Compares isolating each scenario with copy.deepcopy(graph) against a
+TrafficOverlay (setup cost per scenario), then runs the same scenario set
+through run_scenarios with 1..N worker processes and reports scenarios per
+second. Every scenario departs into the morning rush with injections of 40
+random edges within ten minutes of departure.
+
+Usage:
+    PYTHONPATH=. python benchmarks/montecarlo.py [--scenarios 2000] [--max-workers 4]
+"""
+
+import argparse
+import copy
+import datetime
+import os
+import sys
+import time
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.hub_labels import make_rush_grid  # noqa: E402
+from core.graph import TrafficOverlay  # noqa: E402
+from core.montecarlo import random_scenarios, run_scenarios  # noqa: E402
+from core.simulator import SimulationEngine  # noqa: E402
+
+UTC = datetime.timezone.utc
+START = datetime.datetime(2026, 6, 12, 7, 0, 0, tzinfo=UTC)  # into the morning rush
+SIDES = [20, 40]
+THRESHOLD_SEC = 30.0
+ISOLATION_SAMPLE = 20  # scenarios timed per isolation strategy
+
+
+def _isolation_ms(g, scenarios, isolate):
+    """Mean milliseconds per scenario (setup + simulation) with the given isolation."""
+    start = time.perf_counter()
+    for s in scenarios:
+        engine = SimulationEngine(isolate(g), THRESHOLD_SEC)
+        engine.run("bench", s.start_node, s.end_node, s.depart_dt, s.traffic_injections)
+    return (time.perf_counter() - start) / len(scenarios) * 1000
+
+
+def run_benchmarks(n_scenarios: int, max_workers: int):
+    header = (
+        f"{'Nodes':>6} {'Deepcopy ms':>12} {'Overlay ms':>11} {'Workers':>8} "
+        f"{'Wall s':>7} {'Scen/s':>8} {'Reroutes':>9}"
+    )
+    print()
+    print(header)
+    print("-" * len(header))
+    for side in SIDES:
+        g = make_rush_grid(side)
+        scenarios = random_scenarios(
+            g, n_scenarios, START, seed=1, edges_per_injection=40, window_sec=600
+        )
+        sample = scenarios[:ISOLATION_SAMPLE]
+        deep = _isolation_ms(g, sample, copy.deepcopy)
+        overlay = _isolation_ms(g, sample, TrafficOverlay)
+        workers = 1
+        while workers <= max_workers:
+            result = run_scenarios(g, scenarios, THRESHOLD_SEC, workers=workers)
+            reroutes = sum(o.reroutes for o in result.outcomes)
+            print(
+                f"{len(g.nodes):>6} {deep:>12.1f} {overlay:>11.1f} {workers:>8} "
+                f"{result.wall_seconds:>7.2f} {n_scenarios / result.wall_seconds:>8.0f} "
+                f"{reroutes:>9}"
+            )
+            workers *= 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo scenario runner benchmark")
+    parser.add_argument("--scenarios", type=int, default=2000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    run_benchmarks(args.scenarios, args.max_workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Traffic feed replay benchmark.
+
+Writes a synthetic day of archived TrafficSnapshots (one per minute, each
+updating --edges random edges) as gzipped JSONL, then replays it through
+the fleet simulator: traffic alone, and with --trips scheduled trips to a
+handful of hospitals spread over the day, per snapshot and coalesced into
+five-minute windows. Reports simulated hours per wall-clock second.
+
+Usage:
+    PYTHONPATH=. python benchmarks/replay.py [--trips 2000] [--edges 200]
+"""
+
+import argparse
+import datetime
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.hub_labels import make_rush_grid  # noqa: E402
+from core.fleet import Trip  # noqa: E402
+from core.replay import read_injections, replay  # noqa: E402
+
+UTC = datetime.timezone.utc
+DAY = datetime.datetime(2026, 6, 12, 0, 0, 0, tzinfo=UTC)
+SIDES = [20, 30]
+HOSPITALS = 5
+SNAPSHOT_EVERY_SEC = 60
+COALESCE_SEC = 300
+
+
+def write_day(path: str, g, edges_per_snapshot: int, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    edges = list(g.edges)
+    with gzip.open(path, "wt") as fp:
+        for i in range(86400 // SNAPSHOT_EVERY_SEC):
+            at = DAY + datetime.timedelta(seconds=i * SNAPSHOT_EVERY_SEC)
+            updates = [
+                {"edge_id": e, "multiplier": rng.choice([0.8, 1.0, 1.5, 2.0, 4.0])}
+                for e in rng.sample(edges, edges_per_snapshot)
+            ]
+            snapshot = {"timestamp": at.isoformat(), "edge_updates": updates}
+            fp.write(json.dumps(snapshot) + "\n")
+
+
+def make_trips(g, n: int, seed: int = 1):
+    rng = random.Random(seed)
+    nodes = list(g.nodes)
+    hospitals = rng.sample(nodes, HOSPITALS)
+    return [
+        Trip(
+            f"T{i}",
+            rng.choice(nodes),
+            rng.choice(hospitals),
+            DAY + datetime.timedelta(seconds=rng.uniform(0, 86000)),
+        )
+        for i in range(n)
+    ]
+
+
+def run_benchmarks(n_trips: int, edges_per_snapshot: int):
+    header = (
+        f"{'Nodes':>6} {'Trips':>6} {'Coalesce':>9} {'Snapshots':>10} {'Updates':>8} "
+        f"{'Read s':>7} {'Wall s':>7} {'Reroutes':>9} {'Sim h / wall s':>15}"
+    )
+    print()
+    print(header)
+    print("-" * len(header))
+    with tempfile.TemporaryDirectory() as tmp:
+        for side in SIDES:
+            g = make_rush_grid(side)
+            path = os.path.join(tmp, f"feed-{side}.jsonl.gz")
+            write_day(path, g, edges_per_snapshot)
+            start = time.perf_counter()
+            for _ in read_injections(path):
+                pass
+            read = time.perf_counter() - start
+            trips = make_trips(g, n_trips)
+            for n, coalesce_sec in ((0, 0), (n_trips, 0), (n_trips, COALESCE_SEC)):
+                result = replay(g, path, trips=trips[:n], coalesce_sec=coalesce_sec)
+                print(
+                    f"{len(g.nodes):>6} {n:>6} {coalesce_sec:>9} {result.snapshots:>10} "
+                    f"{result.edge_updates:>8} {read:>7.2f} {result.wall_seconds:>7.2f} "
+                    f"{result.fleet.reroutes:>9} {result.sim_hours_per_wall_second:>15.1f}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traffic feed replay benchmark")
+    parser.add_argument("--trips", type=int, default=2000)
+    parser.add_argument("--edges", type=int, default=200)
+    args = parser.parse_args()
+    run_benchmarks(args.trips, args.edges)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Scaling curve for core.routing.route_many.
+
+Routes the same batch of random pairs with 1, 2, 4, ... workers (up to the
+CPU count) and reports throughput and speedup relative to one worker.
+
+Usage:
+    PYTHONPATH=. python benchmarks/route_many.py [--nodes 2000] [--routes 2000] [--max-workers N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.benchmark import DEPART, make_large_graph, random_pairs  # noqa: E402
+from core.routing import route_many  # noqa: E402
+
+
+def _worker_counts(max_workers: int):
+    n = 1
+    while n < max_workers:
+        yield n
+        n *= 2
+    yield max_workers
+
+
+def run_benchmarks(n_nodes: int, n_routes: int, max_workers: int, algorithm: str):
+    g = make_large_graph(n_nodes=n_nodes)
+    pairs = random_pairs(g, n_routes)
+
+    header = f"{'Workers':>7} {'Total s':>9} {'Routes/s':>10} {'Speedup':>8}"
+    print()
+    print(f"{len(g.nodes)} nodes, {len(g.edges)} edges, {n_routes} {algorithm} routes")
+    print(header)
+    print("-" * len(header))
+
+    baseline = None
+    for workers in _worker_counts(max_workers):
+        start = time.perf_counter()
+        solved = sum(1 for _, r in route_many(g, pairs, DEPART, algorithm, workers) if r.found)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(
+            f"{workers:>7} {elapsed:>9.2f} {n_routes / elapsed:>10.0f} "
+            f"{baseline / elapsed:>7.2f}x  ({solved} solved)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="route_many scaling benchmark")
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--routes", type=int, default=2000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--algorithm", default="dijkstra", choices=["dijkstra", "astar"])
+    args = parser.parse_args()
+    run_benchmarks(args.nodes, args.routes, args.max_workers, args.algorithm)
+
+
+if __name__ == "__main__":
+    main()
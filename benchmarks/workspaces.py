@@ -0,0 +1,107 @@
+"""
+Per-query allocation and tail latency: dict-based kernels vs reusable workspaces.
+
+For dijkstra_route / a_star_route and their core.workspace counterparts
+reports, per query, the peak memory traced by tracemalloc and the number of
+generation-0 garbage collections, then fires 1000 concurrent queries at a
+thread pool (the size of the FastAPI / AnyIO default worker pool) and reports
+p50 / p99 latency from submission to completion.
+
+Usage:
+    PYTHONPATH=. python benchmarks/workspaces.py [--nodes 2000] [--concurrent 1000]
+"""
+
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+# Allow running from project root without installing as package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.benchmark import DEPART, make_large_graph  # noqa: E402
+from core.routing import a_star_route, dijkstra_route  # noqa: E402
+from core.workspace import workspace_a_star_route, workspace_dijkstra_route  # noqa: E402
+
+POOL_THREADS = 40
+KERNELS = [
+    ("dijkstra", dijkstra_route),
+    ("dijkstra+ws", workspace_dijkstra_route),
+    ("astar", a_star_route),
+    ("astar+ws", workspace_a_star_route),
+]
+
+
+def _allocation(fn, g, pairs):
+    """Median tracemalloc peak (KiB) per query and garbage collections per 100 queries."""
+    peaks = []
+    runs = sum(gen["collections"] for gen in gc.get_stats())
+    for s, t in pairs:
+        tracemalloc.start()
+        fn(g, s, t, DEPART)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    runs = sum(gen["collections"] for gen in gc.get_stats()) - runs
+    return statistics.median(peaks), runs * 100 / len(pairs)
+
+
+def _latency(fn, g, pairs, concurrent):
+    """
+    With all queries in flight: p50 / p99 milliseconds from submission to
+    completion, and p99 of the search itself (excluding time queued).
+    """
+
+    def one(pair, submitted):
+        started = time.perf_counter()
+        fn(g, pair[0], pair[1], DEPART)
+        done = time.perf_counter()
+        return (done - submitted) * 1000, (done - started) * 1000
+
+    with ThreadPoolExecutor(POOL_THREADS) as pool:
+        pool.submit(fn, g, pairs[0][0], pairs[0][1], DEPART).result()  # warm caches
+        futures = [
+            pool.submit(one, pairs[i % len(pairs)], time.perf_counter()) for i in range(concurrent)
+        ]
+        results = [f.result() for f in futures]
+    total = sorted(r[0] for r in results)
+    search = sorted(r[1] for r in results)
+    p99 = int(len(total) * 0.99) - 1
+    return total[len(total) // 2], total[p99], search[p99]
+
+
+def run_benchmarks(n_nodes: int, concurrent: int):
+    g = make_large_graph(n_nodes=n_nodes)
+    rng = random.Random(7)
+    pairs = [tuple(rng.sample(list(g.nodes), 2)) for _ in range(200)]
+    for _, fn in KERNELS:
+        fn(g, pairs[0][0], pairs[0][1], DEPART)  # build CSR / lower-bound caches
+
+    header = (
+        f"{'Kernel':<12} {'Peak KiB/query':>15} {'GC runs/100q':>13} "
+        f"{'p50 ms':>9} {'p99 ms':>9} {'p99 search':>11}"
+    )
+    print()
+    print(f"{len(g.nodes)} nodes, {len(g.edges)} edges, {concurrent} concurrent queries")
+    print(header)
+    print("-" * len(header))
+    for name, fn in KERNELS:
+        peak, gcs = _allocation(fn, g, pairs)
+        p50, p99, search_p99 = _latency(fn, g, pairs, concurrent)
+        print(f"{name:<12} {peak:>15.1f} {gcs:>13.1f} {p50:>9.1f} {p99:>9.1f} {search_p99:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search workspace benchmark")
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--concurrent", type=int, default=1000)
+    args = parser.parse_args()
+    run_benchmarks(args.nodes, args.concurrent)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Precomputed all-pairs ETA tables for small service areas.
+
+Edge costs only change at time-bucket boundaries, so the day splits into
+periods during which every edge has a fixed baseline cost (no traffic
+overrides). For each period one Floyd–Warshall pass builds a float32
+distance matrix and an int32 first-edge matrix; a route lookup then walks
+first edges in O(path length) with no search.
+
+A table answer is only used when it is provably what a live search would
+return; otherwise route() returns None and the caller searches:
+
+  - a traffic override made some edge cheaper than its baseline
+    (any path might now be better than the tabled one)
+  - an edge on the tabled path has an override (its cost is not the baseline)
+  - the trip would not finish before the period ends (later buckets apply)
+
+Overrides that only slow down edges off the path cannot produce a better
+path, so the table stays valid for those. The returned ETA is always
+re-timed along the path with live time-dependent costs.
+
+Usage:
+    router = ETATableRouter(graph)
+    router.refresh_async()                      # build in the background
+    result = router.route(s, t, depart_dt)      # RouteResult, or None -> search
+"""
+
+import bisect
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from core.config import APSP_MAX_BYTES
+from core.graph import Graph
+from core.lower_bounds import edge_lower_bound
+from core.masks import MaskSpec, mask_for
+from core.refreshing import RefreshingRouter
+from core.routing import RouteResult, _ensure_utc, _time_edges
+
+SECONDS_PER_DAY = 86400
+
+
+def _baseline_cost(edge: dict, t: float) -> float:
+    """Edge cost at seconds-of-day t with no traffic overrides."""
+    for b in edge["time_buckets"]:
+        if b["start"] <= t < b["end"]:
+            return float(b["avg_time"])
+    return float(edge["base_time"])
+
+
+def _is_overridden(edge: dict) -> bool:
+    return edge.get("absolute_time") is not None or edge.get("multiplier", 1.0) != 1.0
+
+
+def _is_cheaper(edge: dict) -> bool:
+    """True if the edge's live cost can be below its baseline cost."""
+    if edge.get("absolute_time") is not None:
+        baseline = edge_lower_bound({**edge, "absolute_time": None, "multiplier": 1.0})
+        return edge["absolute_time"] < baseline
+    return edge.get("multiplier", 1.0) < 1.0
+
+
+class ETATables:
+    """Distance and first-edge matrices for every time-of-day period of one graph."""
+
+    def __init__(self, graph: Graph, mask_spec: MaskSpec = MaskSpec()):
+        if mask_spec.depends_on_traffic:
+            raise ValueError("ETA tables cannot precompute traffic-dependent masks")
+        self.topology_epoch = graph.topology_epoch
+        self.mask_spec = mask_spec
+        self.node_ids = list(graph.nodes)
+        self.index = {nid: i for i, nid in enumerate(self.node_ids)}
+        self.periods = graph.time_periods()
+        self._starts = [start for start, _ in self.periods]
+
+        n = len(self.node_ids)
+        nbytes = n * n * 8 * len(self.periods)
+        if nbytes > APSP_MAX_BYTES:
+            raise ValueError(
+                f"ETA tables need {nbytes} bytes for {n} nodes x {len(self.periods)} periods "
+                f"(APSP_MAX_BYTES={APSP_MAX_BYTES})"
+            )
+
+        mask = mask_for(graph, mask_spec)
+        edges = [
+            (eid, self.index[e["u"]], self.index[e["v"]], e)
+            for eid, e in graph.edges.items()
+            if mask is None or not mask[eid]
+        ]
+        self.dist: List[np.ndarray] = []
+        self.first_edge: List[np.ndarray] = []
+        for start, _ in self.periods:
+            dist, first = self._floyd_warshall(n, edges, start)
+            self.dist.append(dist)
+            self.first_edge.append(first)
+
+        # Live overrides, kept current from the graph's change log.
+        self.epoch = -1
+        self._overridden: Set[int] = set()
+        self._cheaper: Set[int] = set()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(d.nbytes + f.nbytes for d, f in zip(self.dist, self.first_edge))
+
+    @staticmethod
+    def _floyd_warshall(n: int, edges, t: float) -> Tuple[np.ndarray, np.ndarray]:
+        dist = np.full((n, n), np.inf, dtype=np.float32)
+        first = np.full((n, n), -1, dtype=np.int32)
+        np.fill_diagonal(dist, 0.0)
+        for eid, i, j, e in edges:
+            cost = _baseline_cost(e, t)
+            if i != j and cost < dist[i, j]:
+                dist[i, j] = cost
+                first[i, j] = eid
+        for k in range(n):
+            via = dist[:, k : k + 1] + dist[k : k + 1, :]
+            better = via < dist
+            if better.any():
+                np.copyto(dist, via, where=better)
+                np.copyto(first, np.broadcast_to(first[:, k : k + 1], (n, n)), where=better)
+        return dist, first
+
+    def route(
+        self, graph: Graph, source: int, target: int, depart_time_dt
+    ) -> Optional[RouteResult]:
+        """Answer from the tables, or None when a live search is needed."""
+        if graph.topology_epoch != self.topology_epoch:
+            return None
+        i, j = self.index.get(source), self.index.get(target)
+        if i is None or j is None:
+            return None
+        self._sync_overrides(graph)
+        if self._cheaper:
+            return None
+
+        depart_ts = _ensure_utc(depart_time_dt).timestamp()
+        day_t = depart_ts % SECONDS_PER_DAY
+        p = bisect.bisect_right(self._starts, day_t) - 1
+        first = self.first_edge[p]
+        if not np.isfinite(self.dist[p][i, j]):
+            return RouteResult()
+
+        edge_ids: List[int] = []
+        node = source
+        while node != target:
+            if len(edge_ids) >= len(self.node_ids):  # defensive: no simple path is longer
+                return None
+            eid = int(first[self.index[node], j])
+            if eid in self._overridden:
+                return None
+            edge_ids.append(eid)
+            node = graph.edges[eid]["v"]
+
+        result = _time_edges(graph, source, edge_ids, depart_ts)
+        period_end = depart_ts - day_t + self.periods[p][1]
+        if result.arrival_ts >= period_end:
+            return None
+        return result
+
+    def _sync_overrides(self, graph: Graph) -> None:
+        if graph.epoch == self.epoch:
+            return
+        changed = graph.changed_edges_since(self.epoch) if self.epoch >= 0 else None
+        if changed is None:
+            changed = graph.edges.keys()
+        for eid in changed:
+            e = graph.edges[eid]
+            for flag, group in (
+                (_is_overridden(e), self._overridden),
+                (_is_cheaper(e), self._cheaper),
+            ):
+                if flag:
+                    group.add(eid)
+                else:
+                    group.discard(eid)
+        self.epoch = graph.epoch
+
+
+class ETATableRouter(RefreshingRouter):
+    """
+    Keeps ETATables current for one graph.
+
+    Tables depend only on topology and baseline costs, so they are rebuilt
+    (on a background thread) only when the topology changes; until then
+    route() returns None and callers search live.
+    """
+
+    thread_name = "eta-tables"
+
+    def __init__(self, graph: Graph, mask_spec: MaskSpec = MaskSpec()):
+        super().__init__(graph, mask_spec)
+        self.tables: Optional[ETATables] = None
+
+    def route(
+        self, source: int, target: int, depart_time_dt, mask_spec: Optional[MaskSpec] = None
+    ) -> Optional[RouteResult]:
+        tables = self.tables
+        if not self._serves(mask_spec) or tables is None:
+            return self._count(None)
+        if tables.topology_epoch != self.graph.topology_epoch:
+            self.refresh_async()
+        return self._count(tables.route(self.graph, source, target, depart_time_dt))
+
+    def refresh(self) -> None:
+        """Rebuild the tables from the current topology and swap them in."""
+        self.tables = ETATables(self.graph, self.mask_spec)
+
+    def _index_stats(self) -> Dict[str, object]:
+        tables = self.tables
+        return {
+            "ready": tables is not None,
+            "nodes": len(tables.node_ids) if tables else 0,
+            "periods": len(tables.periods) if tables else 0,
+            "bytes": tables.nbytes if tables else 0,
+        }
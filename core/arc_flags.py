@@ -0,0 +1,284 @@
+"""
+Arc flags over a geometric partition.
+
+The graph is split into regions with core.partition.recursive_bisection.
+Every edge gets one bit per region: set if the edge can lie on a shortest
+path into that region. A query towards a target in region r then only
+relaxes edges whose bit r is set, which cuts off everything that leads away
+from the target — the goal direction the haversine heuristic lacks on long
+cross-city routes.
+
+Edge costs are time-dependent, so flags are computed from per-edge bounds
+(core.lower_bounds): lb = the cheapest the edge gets at any time of day,
+ub = the most expensive, times ARC_FLAG_SLACK. An earliest-arrival path into
+region r enters it through a boundary node b (a node of r with an incoming
+edge from outside), and in a FIFO network its prefix is an earliest-arrival
+path to b. So edge (u, v) can only be on it if
+
+    lb(u, v) + LB(v -> b) <= UB(u -> b)
+
+with LB / UB the shortest-path distances under lb / ub costs. One backward
+search per bound from each boundary node evaluates this for all edges at
+once; edges inside r are always flagged. Routes are therefore exact as long
+as every live edge cost stays within the bounds used, which is checked from
+the graph's change log: a speed-up below lb or a slowdown past the slack
+marks the flags stale and callers search without them.
+
+Regions are processed in parallel worker processes; flags are stored as a
+uint64 bitset per edge (one word per 64 regions), not per-edge sets.
+
+Usage:
+    router = ArcFlagRouter(graph)
+    router.refresh_async()                      # build in the background
+    result = router.route(s, t, depart_dt)      # RouteResult, or None -> search
+"""
+
+import heapq
+import math
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import ARC_FLAG_REGIONS, ARC_FLAG_SLACK
+from core.csr import cached_csr
+from core.graph import Graph
+from core.lower_bounds import EPS, edge_lower_bound, edge_upper_bound, within_bounds
+from core.masks import MaskSpec, mask_for
+from core.partition import recursive_bisection
+from core.refreshing import RefreshingRouter
+from core.routing import RouteResult, SearchStats, _heuristic_speed
+from core.workspace import _search
+
+# ---------------------------------------------------------------------------
+# Preprocessing (runs in worker processes)
+# ---------------------------------------------------------------------------
+
+
+def _backward_distances(rev: List[List[Tuple[int, int]]], costs: List[float], b: int) -> np.ndarray:
+    """Shortest distance from every node index to b under fixed per-edge costs."""
+    dist = [math.inf] * len(rev)
+    dist[b] = 0.0
+    heap = [(0.0, b)]
+    while heap:
+        d, v = heapq.heappop(heap)
+        if d > dist[v]:
+            continue
+        for u, k in rev[v]:
+            nd = d + costs[k]
+            if nd < dist[u]:
+                dist[u] = nd
+                heapq.heappush(heap, (nd, u))
+    return np.asarray(dist)
+
+
+def _region_flags(data: Dict[str, Any], r: int) -> Tuple[int, np.ndarray]:
+    """Packed flag bits of region r for every CSR edge position."""
+    region, heads, tails = data["region"], data["heads"], data["tails"]
+    lb, allowed = data["lb"], data["allowed"]
+    flagged = (region[tails] == r) & (region[heads] == r)
+    for b in data["boundary"][r]:
+        lb_to_b = _backward_distances(data["rev"], data["lb_list"], b)
+        ub_to_b = _backward_distances(data["rev"], data["ub_list"], b)[tails]
+        flagged |= np.isfinite(ub_to_b) & (lb + lb_to_b[heads] <= ub_to_b * (1 + EPS))
+    return r, np.packbits(flagged & allowed)
+
+
+_worker_data: Optional[Dict[str, Any]] = None
+
+
+def _init_flag_worker(data: Dict[str, Any]) -> None:
+    global _worker_data
+    _worker_data = data
+
+
+def _region_task(r: int) -> Tuple[int, np.ndarray]:
+    return _region_flags(_worker_data, r)
+
+
+def _flag_all_regions(
+    data: Dict[str, Any], n_regions: int, workers: Optional[int]
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (region, packed bits) for every region, on up to workers processes."""
+    workers = min(workers or os.cpu_count() or 1, n_regions)
+    if workers <= 1:
+        for r in range(n_regions):
+            yield _region_flags(data, r)
+        return
+
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_flag_worker, initargs=(data,)) as pool:
+        yield from pool.imap_unordered(_region_task, range(n_regions))
+
+
+# ---------------------------------------------------------------------------
+# Flags
+# ---------------------------------------------------------------------------
+
+
+class ArcFlags:
+    """Per-edge region bitsets for one graph, valid while live costs stay within their bounds."""
+
+    def __init__(
+        self,
+        graph: Graph,
+        regions: int = ARC_FLAG_REGIONS,
+        mask_spec: MaskSpec = MaskSpec(),
+        slack: float = ARC_FLAG_SLACK,
+        workers: Optional[int] = None,
+    ):
+        if mask_spec.depends_on_traffic:
+            raise ValueError("Arc flags cannot precompute traffic-dependent masks")
+        if regions < 1:
+            raise ValueError("regions must be >= 1")
+        csr = cached_csr(graph)
+        self.csr = csr
+        self.mask_spec = mask_spec
+        self.topology_epoch = graph.topology_epoch
+        self.epoch = graph.epoch
+        self.stale = False
+
+        n, m = csr.n_nodes, csr.n_edges
+        cells = recursive_bisection(graph, max(1, math.ceil(n / regions)))
+        self.region = np.asarray([cells[nid] for nid in csr.node_ids.tolist()], dtype=np.int64)
+        self.n_regions = int(self.region.max()) + 1 if n else 0
+
+        edge_ids = csr.edge_ids.tolist()
+        self.lb = np.asarray([edge_lower_bound(graph.edges[e]) for e in edge_ids], dtype=float)
+        self.ub = np.asarray([edge_upper_bound(graph.edges[e]) for e in edge_ids], dtype=float)
+        self.ub *= slack
+        mask = mask_for(graph, mask_spec)
+        allowed = np.ones(m, dtype=bool)
+        if mask is not None:
+            allowed[[k for k, e in enumerate(edge_ids) if mask[e]]] = False
+
+        heads, tails = csr.heads, csr.tails
+        rev: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+        for k in np.flatnonzero(allowed).tolist():
+            rev[int(heads[k])].append((int(tails[k]), k))
+        entering = allowed & (self.region[heads] != self.region[tails])
+        boundary = [
+            np.unique(heads[entering & (self.region[heads] == r)]).tolist()
+            for r in range(self.n_regions)
+        ]
+        data = {
+            "region": self.region,
+            "heads": heads,
+            "tails": tails,
+            "lb": self.lb,
+            "allowed": allowed,
+            "lb_list": self.lb.tolist(),
+            "ub_list": self.ub.tolist(),
+            "rev": rev,
+            "boundary": boundary,
+        }
+
+        self.flags = np.zeros((m, (self.n_regions + 63) // 64), dtype=np.uint64)
+        for r, packed in _flag_all_regions(data, self.n_regions, workers):
+            bits = np.unpackbits(packed, count=m).astype(np.uint64)
+            self.flags[:, r >> 6] |= bits << np.uint64(r & 63)
+        self._columns: Dict[int, List[int]] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return self.flags.nbytes
+
+    def flagged_fraction(self, r: int) -> float:
+        """Share of edges whose flag for region r is set."""
+        column = self.flags[:, r >> 6] >> np.uint64(r & 63) & np.uint64(1)
+        return float(column.mean()) if len(column) else 0.0
+
+    def usable(self, graph: Graph) -> bool:
+        """True if flags still describe graph (same topology, live costs within bounds)."""
+        if graph.topology_epoch != self.topology_epoch or self.stale:
+            return False
+        if graph.epoch != self.epoch:
+            changed = graph.changed_edges_since(self.epoch)
+            if changed is None:
+                self.stale = True
+                return False
+            index = self.csr.edge_index
+            for eid in changed:
+                k = index[eid]
+                if not within_bounds(graph.edges[eid], self.lb[k], self.ub[k]):
+                    self.stale = True
+                    return False
+            self.epoch = graph.epoch
+        return True
+
+    def edge_filter(self, target: int) -> Tuple[List[int], int]:
+        """(words, bit) for the kernel: edge k may be relaxed iff words[k] & bit."""
+        r = int(self.region[self.csr.index_of(target)])
+        word = r >> 6
+        column = self._columns.get(word)
+        if column is None:
+            column = self._columns[word] = self.flags[:, word].tolist()
+        return column, 1 << (r & 63)
+
+    def route(
+        self,
+        graph: Graph,
+        source: int,
+        target: int,
+        depart_time_dt,
+        stats: Optional[SearchStats] = None,
+        algorithm: str = "dijkstra",
+    ) -> Optional[RouteResult]:
+        """Flag-pruned Dijkstra or A*, or None when the flags are no longer valid."""
+        if not self.usable(graph) or target not in self.csr.index:
+            return None
+        speed = _heuristic_speed(graph, None) if algorithm == "astar" else 0.0
+        mask = mask_for(graph, self.mask_spec)
+        return _search(
+            graph, source, target, depart_time_dt, mask, stats, speed, self.edge_filter(target)
+        )
+
+
+class ArcFlagRouter(RefreshingRouter):
+    """
+    Keeps ArcFlags current for one graph.
+
+    Flags are rebuilt on a background thread when the topology changes or
+    traffic pushes a cost outside its bounds; until then route() returns
+    None and callers search without flags.
+    """
+
+    thread_name = "arc-flags"
+
+    def __init__(
+        self, graph: Graph, mask_spec: MaskSpec = MaskSpec(), workers: Optional[int] = None
+    ):
+        super().__init__(graph, mask_spec)
+        self.workers = workers
+        self.flags: Optional[ArcFlags] = None
+
+    def route(
+        self,
+        source: int,
+        target: int,
+        depart_time_dt,
+        mask_spec: Optional[MaskSpec] = None,
+        stats: Optional[SearchStats] = None,
+        algorithm: str = "dijkstra",
+    ) -> Optional[RouteResult]:
+        flags = self.flags
+        if not self._serves(mask_spec) or flags is None:
+            return self._count(None)
+        result = flags.route(self.graph, source, target, depart_time_dt, stats, algorithm)
+        if result is None:
+            self.refresh_async()
+        return self._count(result)
+
+    def refresh(self) -> None:
+        """Recompute flags from the current graph and swap them in."""
+        self.flags = ArcFlags(self.graph, mask_spec=self.mask_spec, workers=self.workers)
+
+    def _index_stats(self) -> Dict[str, object]:
+        flags = self.flags
+        return {
+            "ready": flags is not None,
+            "regions": flags.n_regions if flags else 0,
+            "bytes": flags.nbytes if flags else 0,
+        }
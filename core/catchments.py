@@ -0,0 +1,132 @@
+"""
+Travel-time catchments: which source (hospital, station) owns each node.
+
+One multi-source Dijkstra labels every node with its closest source and the
+travel time, instead of one route per (node, source) pair. Baseline edge
+costs only change at time-bucket boundaries, so a catchment is cached per
+(sources, direction, constraints, time-bucket period) and reused until the
+graph epoch changes; lookups afterwards are dictionary reads.
+
+Directions:
+  to_source   -> time from the node to its closest source (patient to hospital)
+  from_source -> time from the closest source to the node (station dispatch)
+
+Usage:
+    from core.catchments import catchment_for
+    c = catchment_for(graph, hospitals, now)
+    c.lookup(node)          # (owning source, seconds) or None
+"""
+
+import bisect
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from core.config import CATCHMENT_CACHE_SIZE
+from core.graph import Graph
+from core.masks import MaskSpec, mask_for
+from core.routing import _ensure_utc, dijkstra_multi_source
+
+DIRECTIONS = ("to_source", "from_source")
+
+
+class Catchment:
+    """Closest source and travel time for every node that can reach (or be reached by) one."""
+
+    def __init__(
+        self,
+        graph: Graph,
+        sources: Iterable[int],
+        depart_time_dt,
+        mask_spec: Optional[MaskSpec] = None,
+        direction: str = "to_source",
+        period: Tuple[int, int] = (0, 86400),
+    ):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}")
+        self.sources = tuple(sorted(set(sources)))
+        self.direction = direction
+        self.period = period
+        self.epoch = graph.epoch
+        self.depart_ts = _ensure_utc(depart_time_dt).timestamp()
+        self.seconds, self.owner = dijkstra_multi_source(
+            graph,
+            self.sources,
+            depart_time_dt,
+            mask_for(graph, mask_spec),
+            reverse=direction == "to_source",
+        )
+
+    def lookup(self, node: int) -> Optional[Tuple[int, float]]:
+        """(owning source, seconds) for node, or None if no source is reachable."""
+        owner = self.owner.get(node)
+        if owner is None:
+            return None
+        return owner, self.seconds[node]
+
+    def summary(self) -> Dict[int, Dict[str, float]]:
+        """Per source: how many nodes it owns and the largest travel time among them."""
+        out: Dict[int, Dict[str, float]] = {
+            s: {"nodes": 0, "max_seconds": 0.0} for s in self.sources
+        }
+        for node, src in self.owner.items():
+            entry = out[src]
+            entry["nodes"] += 1
+            entry["max_seconds"] = max(entry["max_seconds"], self.seconds[node])
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+_CatchmentKey = Tuple[Tuple[int, ...], str, Optional[MaskSpec], int]
+
+
+class _GraphCatchments:
+    def __init__(self, graph: Graph):
+        self.topology_epoch = graph.topology_epoch
+        self.periods = graph.time_periods()
+        self.starts = [start for start, _ in self.periods]
+        self.entries: "OrderedDict[_CatchmentKey, Catchment]" = OrderedDict()
+
+
+_catchment_cache: "weakref.WeakKeyDictionary[Graph, _GraphCatchments]" = weakref.WeakKeyDictionary()
+_cache_lock = threading.Lock()
+
+
+def catchment_for(
+    graph: Graph,
+    sources: Iterable[int],
+    depart_time_dt,
+    mask_spec: Optional[MaskSpec] = None,
+    direction: str = "to_source",
+) -> Catchment:
+    """
+    Return the cached catchment for the time-bucket period containing
+    depart_time_dt, computing it if the graph changed since it was built.
+    """
+    key_sources = tuple(sorted(set(sources)))
+    day_t = _ensure_utc(depart_time_dt).timestamp() % 86400
+    with _cache_lock:
+        per_graph = _catchment_cache.get(graph)
+        if per_graph is None or per_graph.topology_epoch != graph.topology_epoch:
+            per_graph = _catchment_cache[graph] = _GraphCatchments(graph)
+        p = bisect.bisect_right(per_graph.starts, day_t) - 1
+        key = (key_sources, direction, mask_spec, p)
+        cached = per_graph.entries.get(key)
+        if cached is not None and cached.epoch == graph.epoch:
+            per_graph.entries.move_to_end(key)
+            return cached
+        # Catchments from an older epoch can never be reused.
+        for k in [k for k, c in per_graph.entries.items() if c.epoch != graph.epoch]:
+            del per_graph.entries[k]
+        period = per_graph.periods[p]
+
+    catchment = Catchment(graph, key_sources, depart_time_dt, mask_spec, direction, period)
+    with _cache_lock:
+        per_graph.entries[key] = catchment
+        while len(per_graph.entries) > CATCHMENT_CACHE_SIZE:
+            per_graph.entries.popitem(last=False)
+    return catchment
@@ -0,0 +1,333 @@
+"""
+Customizable Contraction Hierarchies (CCH).
+
+Preprocessing is split in two so traffic updates stay cheap:
+
+  CCH(graph)            metric-independent, once per topology: a
+                        nested-dissection order, the contracted (chordal)
+                        arc set and every lower triangle of it.
+  CCH.customize(...)    per metric: reads current edge costs, then settles
+                        shortcut weights triangle by triangle. Triangles are
+                        grouped by elimination level so each level is one
+                        vectorised NumPy pass.
+
+Queries walk the elimination tree upwards from source and target, meet at
+the best common ancestor, and unpack shortcuts back to original edges.
+
+Customization evaluates time-dependent edge costs at one instant (like the
+reverse trees in core.reverse_tree), so the hierarchy picks the path and the
+returned RouteResult is re-timed forward with full time-dependent costs.
+
+CCHRouter owns one hierarchy per graph and keeps one customization per time
+period (core.customizing), swapping in new ones built on a background
+thread, so queries keep using the previous metric until the new one is
+ready.
+
+Usage:
+    router = CCHRouter(graph)
+    result = router.route(src, dst, depart_dt)        # RouteResult
+    graph.apply_edge_update(...)
+    router.recustomize_async()                        # queries keep serving
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.customizing import CustomizingRouter
+from core.graph import Graph
+from core.masks import MaskSpec, mask_for
+from core.partition import nested_dissection_order, undirected_neighbors
+from core.routing import RouteResult, SearchStats, _ensure_utc, _settled_recorder, _time_edges
+
+INF = math.inf
+
+
+class CCH:
+    """Metric-independent part of a CCH: order, arcs and lower triangles."""
+
+    def __init__(self, graph: Graph, order: Optional[List[int]] = None):
+        order = order if order is not None else nested_dissection_order(graph)
+        n = len(order)
+        self.topology_epoch = graph.topology_epoch
+        self.node_ids = list(order)
+        self.rank: Dict[int, int] = {nid: r for r, nid in enumerate(order)}
+        rank = self.rank
+
+        # Elimination game in rank space: contracting x links all of its
+        # higher-ranked neighbours to each other.
+        up: List[set] = [set() for _ in range(n)]
+        for nid, ns in undirected_neighbors(graph).items():
+            r = rank[nid]
+            up[r].update(q for q in (rank[m] for m in ns) if q > r)
+        level = [0] * n
+        upward: List[List[int]] = []
+        for x in range(n):
+            ups = sorted(up[x])
+            upward.append(ups)
+            for i, v in enumerate(ups):
+                level[v] = max(level[v], level[x] + 1)
+                up[v].update(ups[i + 1 :])
+        del up
+
+        arc_ptr = [0]
+        arc_head: List[int] = []
+        for ups in upward:
+            arc_head.extend(ups)
+            arc_ptr.append(len(arc_head))
+        self.arc_ptr = arc_ptr
+        self.arc_head = arc_head
+        self.arc_tail = [x for x, ups in enumerate(upward) for _ in ups]
+        self.parent = [ups[0] if ups else -1 for ups in upward]  # elimination tree
+        # Arcs are laid out by (tail, head), so tail * n + head is sorted and
+        # searchsorted maps any (v, w) pair to its arc id.
+        self._arc_keys = np.asarray(self.arc_tail, dtype=np.int64) * n + np.asarray(
+            arc_head, dtype=np.int64
+        )
+
+        # Lower triangles (x, v, w) with x < v < w: the path v -> x -> w can
+        # shortcut arc (v, w) and w -> x -> v its reverse.
+        tri_xv, tri_xw, tri_v, tri_w, tri_level = [], [], [], [], []
+        for x, ups in enumerate(upward):
+            k = len(ups)
+            if k < 2:
+                continue
+            i, j = np.triu_indices(k, 1)
+            heads = np.asarray(ups, dtype=np.int64)
+            tri_xv.append(arc_ptr[x] + i)
+            tri_xw.append(arc_ptr[x] + j)
+            tri_v.append(heads[i])
+            tri_w.append(heads[j])
+            tri_level.append(np.full(len(i), level[x], dtype=np.int64))
+        if tri_xv:
+            xv, xw = np.concatenate(tri_xv), np.concatenate(tri_xw)
+            vw = self._arc_ids(np.concatenate(tri_v), np.concatenate(tri_w))
+            levels = np.concatenate(tri_level)
+        else:
+            xv = xw = vw = levels = np.empty(0, dtype=np.int64)
+
+        # Sorted by level: arcs written at one level are only read at later ones.
+        by_level = np.argsort(levels, kind="stable")
+        self.tri_vw = vw[by_level].astype(np.int32)
+        self.tri_xv = xv[by_level].astype(np.int32)
+        self.tri_xw = xw[by_level].astype(np.int32)
+        levels = levels[by_level]
+        bounds = (np.flatnonzero(np.diff(levels)) + 1).tolist()
+        self.level_slices = list(zip([0, *bounds], [*bounds, len(levels)]))
+
+        # Triangles grouped by the arc they can shortcut, for path unpacking.
+        self.tri_by_arc = np.argsort(self.tri_vw, kind="stable").astype(np.int32)
+        self.tri_ptr = np.searchsorted(
+            self.tri_vw[self.tri_by_arc], np.arange(len(arc_head) + 1)
+        ).tolist()
+
+        # Original edges onto arcs: upward if tail rank < head rank.
+        edge_ids, lo, hi, edge_up = [], [], [], []
+        for eid, e in graph.edges.items():
+            ru, rv = rank[e["u"]], rank[e["v"]]
+            if ru == rv:
+                continue
+            edge_ids.append(eid)
+            lo.append(min(ru, rv))
+            hi.append(max(ru, rv))
+            edge_up.append(ru < rv)
+        self.edge_ids = np.asarray(edge_ids, dtype=np.int64)
+        self.edge_arc = self._arc_ids(
+            np.asarray(lo, dtype=np.int64), np.asarray(hi, dtype=np.int64)
+        )
+        self.edge_up = np.asarray(edge_up, dtype=bool)
+
+    def _arc_ids(self, tails: np.ndarray, heads: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self._arc_keys, tails * len(self.node_ids) + heads)
+
+    @property
+    def n_arcs(self) -> int:
+        return len(self.arc_head)
+
+    @property
+    def n_triangles(self) -> int:
+        return len(self.tri_vw)
+
+    def customize(self, graph: Graph, at_dt, edge_mask: Optional[bytearray] = None) -> "CCHMetric":
+        """Compute up/down arc weights from graph's edge costs at at_dt."""
+        at_ts = _ensure_utc(at_dt).timestamp()
+        epoch = graph.epoch  # read first: a concurrent update then marks this metric stale
+        costs = np.fromiter(
+            (graph.edge_travel_time(eid, at_ts) for eid in self.edge_ids.tolist()),
+            dtype=np.float64,
+            count=len(self.edge_ids),
+        )
+        if edge_mask is not None:
+            costs[np.frombuffer(edge_mask, dtype=np.uint8)[self.edge_ids] != 0] = INF
+
+        weights, edges = [], []
+        for direction in (self.edge_up, ~self.edge_up):
+            arcs, c, ids = self.edge_arc[direction], costs[direction], self.edge_ids[direction]
+            w = np.full(self.n_arcs, INF)
+            np.minimum.at(w, arcs, c)
+            best = np.full(self.n_arcs, -1, dtype=np.int64)
+            hit = np.isfinite(c) & (c == w[arcs])
+            best[arcs[hit]] = ids[hit]
+            weights.append(w)
+            edges.append(best)
+        up, down = weights
+        base_up, base_down = up.copy(), down.copy()
+
+        for start, end in self.level_slices:
+            vw = self.tri_vw[start:end]
+            xv = self.tri_xv[start:end]
+            xw = self.tri_xw[start:end]
+            np.minimum.at(up, vw, down[xv] + up[xw])
+            np.minimum.at(down, vw, down[xw] + up[xv])
+
+        return CCHMetric(
+            self, graph, up, down, base_up, base_down, edges[0], edges[1], epoch, at_ts
+        )
+
+
+class CCHMetric:
+    """One customization of a CCH; immutable once built, so safe to share."""
+
+    def __init__(
+        self,
+        cch: CCH,
+        graph: Graph,
+        up: np.ndarray,
+        down: np.ndarray,
+        base_up: np.ndarray,
+        base_down: np.ndarray,
+        up_edge: np.ndarray,
+        down_edge: np.ndarray,
+        epoch: int,
+        at_ts: float,
+    ):
+        self.cch = cch
+        self.graph = graph
+        self.epoch = epoch
+        self.at_ts = at_ts
+        # Plain lists: queries index single elements, which is faster than NumPy.
+        self.up = up.tolist()
+        self.down = down.tolist()
+        self.base_up = base_up.tolist()
+        self.base_down = base_down.tolist()
+        self.up_edge = up_edge.tolist()
+        self.down_edge = down_edge.tolist()
+
+    def route(
+        self, source: int, target: int, depart_time_dt, stats: Optional[SearchStats] = None
+    ) -> RouteResult:
+        """
+        Shortest route under this metric, re-timed with time-dependent costs.
+
+        In stats, settled counts elimination-tree nodes scanned by both
+        upward searches; the walk needs no heap, so pushes and stale_pops
+        stay 0.
+        """
+        cch = self.cch
+        if source not in cch.rank or target not in cch.rank:
+            return RouteResult()
+        depart_ts = _ensure_utc(depart_time_dt).timestamp()
+        s, t = cch.rank[source], cch.rank[target]
+        if s == t:
+            return RouteResult([source], [], [depart_ts])
+
+        dist_f, pred_f = self._upward(s, self.up, stats)
+        dist_b, pred_b = self._upward(t, self.down, stats)
+        meet, best = -1, INF
+        for v, d in dist_f.items():
+            total = d + dist_b.get(v, INF)
+            if total < best:
+                meet, best = v, total
+        if meet < 0:
+            return RouteResult()
+
+        arcs: List[Tuple[int, bool]] = []
+        v = meet
+        while v != s:
+            a = pred_f[v]
+            arcs.append((a, True))
+            v = cch.arc_tail[a]
+        arcs.reverse()
+        v = meet
+        while v != t:
+            a = pred_b[v]
+            arcs.append((a, False))
+            v = cch.arc_tail[a]
+        return _time_edges(self.graph, source, self._unpack(arcs), depart_ts)
+
+    def _upward(
+        self, start: int, weights: List[float], stats: Optional[SearchStats] = None
+    ) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """Relax upward arcs along the elimination-tree ancestors of start."""
+        cch = self.cch
+        ptr, head, parent = cch.arc_ptr, cch.arc_head, cch.parent
+        dist = {start: 0.0}
+        pred: Dict[int, int] = {}
+        record = _settled_recorder(stats)
+        settled = relaxed = 0
+        v = start
+        while v != -1:
+            dv = dist.get(v)
+            if dv is not None:
+                settled += 1
+                relaxed += ptr[v + 1] - ptr[v]
+                if record is not None:
+                    record(cch.node_ids[v])
+                for a in range(ptr[v], ptr[v + 1]):
+                    nd = dv + weights[a]
+                    w = head[a]
+                    if nd < dist.get(w, INF):
+                        dist[w] = nd
+                        pred[w] = a
+            v = parent[v]
+        if stats is not None:
+            stats.add(settled=settled, relaxations=relaxed)
+        return dist, pred
+
+    def _unpack(self, arcs: List[Tuple[int, bool]]) -> List[int]:
+        """Expand (arc, upward?) hops into original edge ids, in travel order."""
+        cch = self.cch
+        up, down = self.up, self.down
+        edge_ids: List[int] = []
+        stack = list(reversed(arcs))
+        while stack:
+            a, upward = stack.pop()
+            if upward and self.up_edge[a] >= 0 and self.base_up[a] == up[a]:
+                edge_ids.append(self.up_edge[a])
+                continue
+            if not upward and self.down_edge[a] >= 0 and self.base_down[a] == down[a]:
+                edge_ids.append(self.down_edge[a])
+                continue
+            # Shortcut: find the lower triangle that produced this weight.
+            for k in range(cch.tri_ptr[a], cch.tri_ptr[a + 1]):
+                tri = cch.tri_by_arc[k]
+                xv, xw = int(cch.tri_xv[tri]), int(cch.tri_xw[tri])
+                if upward and down[xv] + up[xw] == up[a]:
+                    stack.extend(((xw, True), (xv, False)))  # v -> x -> w
+                    break
+                if not upward and down[xw] + up[xv] == down[a]:
+                    stack.extend(((xv, True), (xw, False)))  # w -> x -> v
+                    break
+            else:
+                raise RuntimeError(f"CCH arc {a} has no witness; customization is inconsistent")
+        return edge_ids
+
+
+class CCHRouter(CustomizingRouter):
+    """
+    Serves CCH queries for one graph while customizations are rebuilt.
+
+    The metric-independent CCH is rebuilt when the graph topology changes;
+    customizations, one per MaskSpec and time period in use, are managed by
+    CustomizingRouter.
+    """
+
+    thread_name = "cch-customize"
+
+    def _build(self) -> CCH:
+        return CCH(self.graph)
+
+    def _customize(self, cch: CCH, spec: Optional[MaskSpec], at_dt) -> CCHMetric:
+        self.customizations += 1
+        return cch.customize(self.graph, at_dt, mask_for(self.graph, spec))
@@ -6,6 +6,7 @@ environment variables or test fixtures.
 """
 
 import os
+from typing import Optional
 
 # ---------------------------------------------------------------------------
 # Routing / rerouting
@@ -14,9 +15,12 @@ import os
 # Minimum time saving (seconds) required to trigger an automatic reroute.
 REROUTE_THRESHOLD_SEC: float = float(os.getenv("REROUTE_THRESHOLD_SEC", "120"))
 
-# Maximum ambulance speed used as the A* haversine heuristic (metres / second).
-# 15 m/s ≈ 54 km/h — conservative for urban emergency driving.
-A_STAR_MAX_SPEED_MS: float = float(os.getenv("A_STAR_MAX_SPEED_MS", "15.0"))
+# Speed (metres / second) used by the A* haversine heuristic. Unset by default:
+# the fastest speed any edge allows is derived from the graph, which keeps A*
+# exact. Setting a lower value prunes more but may return slower routes.
+A_STAR_MAX_SPEED_MS: Optional[float] = (
+    float(os.environ["A_STAR_MAX_SPEED_MS"]) if os.getenv("A_STAR_MAX_SPEED_MS") else None
+)
 
 # How many upcoming segments to inspect for slowdown detection in reroute_check.
 SLOWDOWN_LOOKAHEAD: int = int(os.getenv("SLOWDOWN_LOOKAHEAD", "3"))
@@ -24,6 +28,102 @@ SLOWDOWN_LOOKAHEAD: int = int(os.getenv("SLOWDOWN_LOOKAHEAD", "3"))
 # Ratio of current travel time to baseline that triggers a slowdown flag.
 SLOWDOWN_RATIO: float = float(os.getenv("SLOWDOWN_RATIO", "1.5"))
 
+# A destination shared by at least this many active routes gets a reverse
+# shortest-path tree on traffic updates instead of one forward search per route.
+REVERSE_TREE_MIN_ROUTES: int = int(os.getenv("REVERSE_TREE_MIN_ROUTES", "2"))
+
+# Reverse trees freeze edge costs at build time; rebuild them after this many
+# seconds even if traffic has not changed, so time buckets stay current.
+REVERSE_TREE_MAX_AGE_SEC: float = float(os.getenv("REVERSE_TREE_MAX_AGE_SEC", "300"))
+
+# Cells at or below this many nodes are not dissected further when computing the
+# nested-dissection order for Customizable Contraction Hierarchies.
+ND_LEAF_SIZE: int = int(os.getenv("ND_LEAF_SIZE", "32"))
+
+# algorithm=auto (core.routing.EngineRegistry): queries are grouped by straight-
+# line distance into doubling bands starting at AUTO_DISTANCE_BAND_M; each valid
+# engine is tried AUTO_MIN_SAMPLES times per band, then the one with the lowest
+# smoothed latency (EWMA weight AUTO_LATENCY_ALPHA) is picked, except that every
+# AUTO_EXPLORE_EVERY-th pick in a band re-measures the least-sampled engine.
+AUTO_DISTANCE_BAND_M: float = float(os.getenv("AUTO_DISTANCE_BAND_M", "500"))
+AUTO_MIN_SAMPLES: int = int(os.getenv("AUTO_MIN_SAMPLES", "3"))
+AUTO_LATENCY_ALPHA: float = float(os.getenv("AUTO_LATENCY_ALPHA", "0.2"))
+AUTO_EXPLORE_EVERY: int = int(os.getenv("AUTO_EXPLORE_EVERY", "50"))
+
+# Maximum nodes per cell at each level of the multi-level overlay (core.mld),
+# comma-separated. Levels nest: every cell lies inside one cell of the next size.
+MLD_CELL_SIZES: tuple = tuple(
+    sorted(int(s) for s in os.getenv("MLD_CELL_SIZES", "64,1024").split(","))
+)
+
+# Identical route requests (same snapped nodes, algorithm, constraints and graph
+# epoch) whose departure times fall in the same bucket of this many seconds share
+# one in-flight search. 0 disables coalescing.
+SINGLEFLIGHT_DEPART_BUCKET_SEC: float = float(os.getenv("SINGLEFLIGHT_DEPART_BUCKET_SEC", "1"))
+
+# Precompute all-pairs ETA and next-hop tables (one per time-bucket period) in
+# the background at startup, so default-constraint routes need no search.
+# Only sensible for small service areas; see APSP_MAX_BYTES.
+APSP_PRECOMPUTE: bool = os.getenv("APSP_PRECOMPUTE", "0").lower() in ("1", "true", "yes")
+
+# Refuse to build ETA tables larger than this (nodes² × 8 bytes × periods).
+APSP_MAX_BYTES: int = int(os.getenv("APSP_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Run Dijkstra / A* route requests on reusable per-thread search workspaces
+# (core.workspace) instead of fresh per-query dicts. Same routes, far fewer
+# allocations per query.
+SEARCH_WORKSPACES: bool = os.getenv("SEARCH_WORKSPACES", "1").lower() in ("1", "true", "yes")
+
+# Build arc flags (core.arc_flags) in the background at startup so default-
+# constraint routes skip edges that cannot lead towards the target's region.
+ARC_FLAGS: bool = os.getenv("ARC_FLAGS", "0").lower() in ("1", "true", "yes")
+
+# Number of regions the graph is partitioned into for arc flags.
+ARC_FLAG_REGIONS: int = int(os.getenv("ARC_FLAG_REGIONS", "32"))
+
+# Per-edge upper bounds are inflated by this factor when flags are computed, so
+# traffic slowdowns up to this factor keep the flags valid without a rebuild.
+# Pruning degrades quickly: on a 40x40 grid 1.0 flags 35% of edges per region,
+# 1.1 flags 88%.
+ARC_FLAG_SLACK: float = float(os.getenv("ARC_FLAG_SLACK", "1.0"))
+
+# Also build hub labels on the costs at the start of every time-bucket period,
+# so /api/v1/eta estimates reflect the departure's bucket instead of returning
+# the lower bound. Costs one extra label set per period.
+HUB_LABELS_PER_PERIOD: bool = os.getenv("HUB_LABELS_PER_PERIOD", "0").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Catchments (closest source per node) kept per graph, one per combination of
+# sources, direction, constraints and time-bucket period.
+CATCHMENT_CACHE_SIZE: int = int(os.getenv("CATCHMENT_CACHE_SIZE", "32"))
+
+# ---------------------------------------------------------------------------
+# GPS map matching
+# ---------------------------------------------------------------------------
+
+# Side length (degrees) of the grid cells indexing edge geometries.
+# 0.005° ≈ 550 m of latitude.
+EDGE_GRID_CELL_DEG: float = float(os.getenv("EDGE_GRID_CELL_DEG", "0.005"))
+
+# Standard deviation of GPS position error (metres).
+GPS_SIGMA_M: float = float(os.getenv("GPS_SIGMA_M", "10"))
+
+# Only edges within this distance of a ping are considered as match candidates.
+MATCH_RADIUS_M: float = float(os.getenv("MATCH_RADIUS_M", "50"))
+
+# At most this many nearest candidate edges are kept per ping.
+MATCH_MAX_CANDIDATES: int = int(os.getenv("MATCH_MAX_CANDIDATES", "8"))
+
+# Scale (metres) of the transition penalty on the difference between network
+# distance and straight-line distance between consecutive pings.
+MATCH_BETA_M: float = float(os.getenv("MATCH_BETA_M", "50"))
+
+# Log-probability penalty for matching to an edge that is not on the planned route.
+MATCH_OFF_ROUTE_PENALTY: float = float(os.getenv("MATCH_OFF_ROUTE_PENALTY", "2.0"))
+
 # ---------------------------------------------------------------------------
 # Traffic / edge updates
 # ---------------------------------------------------------------------------
@@ -39,6 +139,20 @@ MULTIPLIER_MAX: float = float(os.getenv("MULTIPLIER_MAX", "1000.0"))
 # are valid for simulating road closures (e.g. 99999s).
 ABSOLUTE_TIME_MIN: float = float(os.getenv("ABSOLUTE_TIME_MIN", "0.0"))
 
+# absolute_time at or above this value marks the edge as closed for routes that
+# request avoid_closures.
+ROAD_CLOSURE_THRESHOLD_SEC: float = float(os.getenv("ROAD_CLOSURE_THRESHOLD_SEC", "86400"))
+
+# Vehicle height classes (metres, comma-separated). A vehicle is rounded up to the
+# next class so edge masks can be precompiled and shared per class.
+VEHICLE_HEIGHT_CLASSES_M: tuple = tuple(
+    sorted(float(h) for h in os.getenv("VEHICLE_HEIGHT_CLASSES_M", "2.5,3.0,3.5,4.0").split(","))
+)
+
+# Number of recent edge-cost changes the graph remembers so incremental consumers
+# (rerouting engines, caches) can repair instead of rebuilding.
+EDGE_CHANGE_LOG_SIZE: int = int(os.getenv("EDGE_CHANGE_LOG_SIZE", "10000"))
+
 # ---------------------------------------------------------------------------
 # Input validation
 # ---------------------------------------------------------------------------
@@ -46,6 +160,11 @@ ABSOLUTE_TIME_MIN: float = float(os.getenv("ABSOLUTE_TIME_MIN", "0.0"))
 # Maximum length for ambulance_id strings.
 AMBULANCE_ID_MAX_LEN: int = int(os.getenv("AMBULANCE_ID_MAX_LEN", "64"))
 
+# Limits for nearest-target queries: explicit target ids per request, and how
+# many of the soonest-reachable targets may be returned.
+NEAREST_MAX_TARGETS: int = int(os.getenv("NEAREST_MAX_TARGETS", "1000"))
+NEAREST_MAX_K: int = int(os.getenv("NEAREST_MAX_K", "10"))
+
 # Valid latitude / longitude ranges.
 LAT_MIN: float = -90.0
 LAT_MAX: float = 90.0
@@ -0,0 +1,232 @@
+"""
+Edge criticality for active routes: the ETA penalty if an edge closed.
+
+Removing each route edge and rerunning a full search costs one search per
+edge. This module computes the same replacement paths with far less work:
+
+  - one reverse shortest-path tree per destination (shared by every route
+    to it and every edge on those routes) gives exact remaining times,
+    used as an A* heuristic that stays consistent when an edge is removed;
+  - the route prefix before the removed edge is unaffected, so its nodes
+    seed the replacement search with their known arrival times and only
+    the detour is explored.
+
+Costs are frozen at analysis time (as in core.reverse_tree), so penalties
+describe closing the edge now.
+
+Results are kept per route and recomputed incrementally: after a traffic
+update, only routes whose replacement searches touched a changed edge are
+redone, unless some edge got cheaper (which can open new detours anywhere)
+or the time-of-day bucket changed.
+
+Usage:
+    analyzer = CriticalityAnalyzer(graph)
+    ranked = analyzer.analyze({"AMB-1": (remaining_path, mask_spec)}, now)
+    ranked[0].edge_id, ranked[0].total_penalty_seconds
+"""
+
+import bisect
+import heapq
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.graph import Graph
+from core.masks import MaskSpec, mask_for
+from core.reverse_tree import ReverseTree, reverse_tree_for
+from core.routing import _ensure_utc
+
+INF = math.inf
+
+
+@dataclass
+class EdgeCriticality:
+    """Impact of closing one edge on the routes that use it."""
+
+    edge_id: int
+    routes: List[str] = field(default_factory=list)
+    total_penalty_seconds: float = 0.0
+    max_penalty_seconds: float = 0.0
+    disconnected_routes: int = 0  # routes with no replacement path at all
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "edge_id": self.edge_id,
+            "routes": self.routes,
+            "total_penalty_seconds": self.total_penalty_seconds,
+            "max_penalty_seconds": self.max_penalty_seconds,
+            "disconnected_routes": self.disconnected_routes,
+        }
+
+
+@dataclass
+class _RouteAnalysis:
+    key: Tuple[Tuple[int, ...], Optional[MaskSpec]]
+    penalties: Dict[int, float]  # edge id -> extra seconds (inf: no replacement)
+    touched: Set[int]  # edges whose cost the result depends on
+
+
+class CriticalityAnalyzer:
+    """Ranks edges on active routes by the delay their closure would cause."""
+
+    def __init__(self, graph: Graph):
+        self.graph = graph
+        self.epoch = -1
+        self.topology_epoch = -1
+        self.period = -1
+        self.recomputed = 0
+        self.reused = 0
+        self._entries: Dict[str, _RouteAnalysis] = {}
+        self._costs: Dict[int, float] = {}
+        self._starts: List[int] = []
+        self._lock = threading.Lock()
+
+    def analyze(
+        self,
+        routes: Dict[str, Tuple[List[int], Optional[MaskSpec]]],
+        at_dt,
+    ) -> List[EdgeCriticality]:
+        """
+        routes maps a route id to (remaining node path, mask spec). Returns
+        one entry per edge on any route, most critical first: edges that
+        disconnect a route, then by total penalty.
+        """
+        at_ts = _ensure_utc(at_dt).timestamp()
+        with self._lock:
+            self._invalidate(at_ts)
+            for rid in [rid for rid in self._entries if rid not in routes]:
+                del self._entries[rid]
+            for rid, (path, spec) in routes.items():
+                key = (tuple(path), spec)
+                entry = self._entries.get(rid)
+                if entry is not None and entry.key == key:
+                    self.reused += 1
+                    continue
+                self._entries[rid] = self._analyze_route(key, at_dt)
+                self.recomputed += 1
+            entries = list(self._entries.items())
+
+        by_edge: Dict[int, EdgeCriticality] = {}
+        for rid, entry in entries:
+            for eid, penalty in entry.penalties.items():
+                crit = by_edge.setdefault(eid, EdgeCriticality(eid))
+                crit.routes.append(rid)
+                crit.total_penalty_seconds += penalty
+                crit.max_penalty_seconds = max(crit.max_penalty_seconds, penalty)
+                if penalty == INF:
+                    crit.disconnected_routes += 1
+        return sorted(
+            by_edge.values(),
+            key=lambda c: (-c.disconnected_routes, -c.total_penalty_seconds, c.edge_id),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {"routes_recomputed": self.recomputed, "routes_reused": self.reused}
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def _invalidate(self, at_ts: float) -> None:
+        graph = self.graph
+        if graph.topology_epoch != self.topology_epoch:
+            self._starts = [start for start, _ in graph.time_periods()]
+            self.topology_epoch = graph.topology_epoch
+            self.period = -1
+        period = self._period_of(at_ts)
+        if period == self.period and graph.epoch == self.epoch:
+            return
+        changed = None
+        if period == self.period and self.epoch >= 0:
+            changed = graph.changed_edges_since(self.epoch)
+        if changed is None:
+            self._entries.clear()
+            self._costs = {eid: graph.edge_travel_time(eid, at_ts) for eid in graph.edges}
+        else:
+            cheaper = False
+            for eid in changed:
+                cost = graph.edge_travel_time(eid, at_ts)
+                if cost < self._costs.get(eid, INF):
+                    cheaper = True
+                self._costs[eid] = cost
+            if cheaper:
+                self._entries.clear()
+            else:
+                # Slower edges only matter to searches that examined them.
+                for rid in [
+                    r for r, e in self._entries.items() if not e.touched.isdisjoint(changed)
+                ]:
+                    del self._entries[rid]
+        self.epoch = graph.epoch
+        self.period = period
+
+    # ------------------------------------------------------------------
+    # Replacement paths
+    # ------------------------------------------------------------------
+
+    def _analyze_route(self, key, at_dt) -> _RouteAnalysis:
+        path, spec = key
+        graph, costs = self.graph, self._costs
+        mask = mask_for(graph, spec)
+
+        # Collapse repeated nodes (a reroute can prepend the current node twice).
+        nodes = [n for i, n in enumerate(path) if i == 0 or n != path[i - 1]]
+        edges = [graph.edge_id_between(u, v) for u, v in zip(nodes, nodes[1:])]
+        touched: Set[int] = {e for e in edges if e is not None}
+        if not edges or None in edges:
+            return _RouteAnalysis(key, {}, touched)
+
+        prefix = [0.0]
+        for eid in edges:
+            prefix.append(prefix[-1] + costs[eid])
+        base = prefix[-1]
+        target = nodes[-1]
+        remaining = self._tree(target, spec, at_dt, mask).remaining
+
+        penalties: Dict[int, float] = {}
+        for i, removed in enumerate(edges):
+            best = self._replacement(nodes, prefix, i, removed, target, mask, remaining, touched)
+            # Parallel edges can make the replacement as fast as the original.
+            penalties[removed] = max(0.0, best - base) if best < INF else INF
+        return _RouteAnalysis(key, penalties, touched)
+
+    def _tree(self, target, spec, at_dt, mask) -> ReverseTree:
+        # The heuristic is only exact if the tree froze costs in the same period.
+        tree = reverse_tree_for(self.graph, target, at_dt, spec)
+        if self._period_of(tree.at_ts) != self.period:
+            tree = ReverseTree(self.graph, target, at_dt, mask)
+        return tree
+
+    def _period_of(self, ts: float) -> int:
+        return bisect.bisect_right(self._starts, ts % 86400) - 1
+
+    def _replacement(self, nodes, prefix, i, removed, target, mask, remaining, touched) -> float:
+        """Cost of the best s->t path avoiding removed, from a search seeded with the prefix."""
+        graph, costs = self.graph, self._costs
+        dist: Dict[int, float] = {}
+        pq = []
+        for j in range(i + 1):
+            h = remaining.get(nodes[j], INF)
+            if h < INF and prefix[j] < dist.get(nodes[j], INF):
+                dist[nodes[j]] = prefix[j]
+                pq.append((prefix[j] + h, prefix[j], nodes[j]))
+        heapq.heapify(pq)
+        while pq:
+            _, g, u = heapq.heappop(pq)
+            if u == target:
+                return g
+            if g > dist[u]:
+                continue
+            for v, eid in graph.neighbors(u):
+                if eid == removed or (mask is not None and mask[eid]):
+                    continue
+                h = remaining.get(v)
+                if h is None:
+                    continue  # v cannot reach the target at all
+                touched.add(eid)
+                nd = g + costs[eid]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    heapq.heappush(pq, (nd + h, nd, v))
+        return INF
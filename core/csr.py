@@ -0,0 +1,402 @@
+"""
+Array-backed (CSR) snapshot of a Graph.
+
+The dict-of-lists Graph is convenient to mutate, but every relaxation goes
+through Python objects. CSRGraph packs the same topology and costs into flat
+NumPy arrays so whole frontiers can be relaxed with gather / scatter
+operations.
+
+Usage:
+    from core.csr import cached_csr
+    csr = cached_csr(graph)            # rebuilt only when graph.epoch moves
+    costs = csr.travel_times(edge_idx, depart_ts)
+"""
+
+import copy
+import math
+import weakref
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.graph import Graph, NodeNotFoundError, TrafficOverlay
+
+SECONDS_PER_DAY = 86400.0
+
+# Every array that makes up a CSRGraph; dicts are derived from these.
+ARRAY_FIELDS = (
+    "node_ids",
+    "lat",
+    "lon",
+    "indptr",
+    "heads",
+    "tails",
+    "edge_ids",
+    "base_time",
+    "distance",
+    "emergency_allowed",
+    "max_height",
+    "bucket_start",
+    "bucket_end",
+    "bucket_avg",
+    "multiplier",
+    "absolute_time",
+)
+
+
+class CSRGraph:
+    """
+    Compressed sparse row view of a Graph.
+
+    Edges are stored in CSR order: the out-edges of node index i occupy
+    positions indptr[i]:indptr[i + 1] of every per-edge array. Edge costs
+    follow exactly the same priority rules as Graph.edge_travel_time.
+    """
+
+    def __init__(self, graph: Graph):
+        self.node_ids = np.fromiter(graph.nodes.keys(), dtype=np.int64, count=len(graph.nodes))
+        self.lat = np.asarray([nd["lat"] for nd in graph.nodes.values()], dtype=np.float64)
+        self.lon = np.asarray([nd["lon"] for nd in graph.nodes.values()], dtype=np.float64)
+        self.index: Dict[int, int] = {nid: i for i, nid in enumerate(self.node_ids.tolist())}
+
+        n = len(self.node_ids)
+        counts = np.zeros(n, dtype=np.int64)
+        order: List[int] = []
+        heads: List[int] = []
+        for i, nid in enumerate(self.node_ids.tolist()):
+            out = graph.adj.get(nid, [])
+            counts[i] = len(out)
+            for v, eid in out:
+                heads.append(self.index[v])
+                order.append(eid)
+
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+        self.heads = np.asarray(heads, dtype=np.int64)
+        self.tails = np.repeat(np.arange(n, dtype=np.int64), counts)
+        self.edge_ids = np.asarray(order, dtype=np.int64)
+        self.edge_index: Dict[int, int] = {eid: k for k, eid in enumerate(order)}
+
+        m = len(order)
+        self.base_time = np.empty(m, dtype=np.float64)
+        self.distance = np.empty(m, dtype=np.float64)
+        self.emergency_allowed = np.ones(m, dtype=bool)
+        self.max_height = np.full(m, np.nan)
+        width = max((len(graph.edges[eid]["time_buckets"]) for eid in order), default=0)
+        # Padding rows can never match: start=+inf, end=-inf.
+        self.bucket_start = np.full((m, width), np.inf)
+        self.bucket_end = np.full((m, width), -np.inf)
+        self.bucket_avg = np.zeros((m, width))
+        for k, eid in enumerate(order):
+            e = graph.edges[eid]
+            self.base_time[k] = e["base_time"]
+            self.distance[k] = e["distance"]
+            self.emergency_allowed[k] = e["is_emergency_allowed"]
+            if e.get("max_height") is not None:
+                self.max_height[k] = e["max_height"]
+            for j, b in enumerate(e["time_buckets"]):
+                self.bucket_start[k, j] = b["start"]
+                self.bucket_end[k, j] = b["end"]
+                self.bucket_avg[k, j] = b["avg_time"]
+
+        self.multiplier = np.ones(m, dtype=np.float64)
+        self.absolute_time = np.full(m, np.nan)
+        self.topology_epoch = graph.topology_epoch
+        self.epoch = -1
+        self.refresh_weights(graph)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def refresh_weights(self, graph: Graph, changed: Optional[Iterable[int]] = None) -> None:
+        """
+        Re-read live multipliers and absolute overrides from graph: all of
+        them, or only those of the changed edge ids.
+        """
+        if changed is None:
+            positions: Iterable[Tuple[int, int]] = enumerate(self.edge_ids.tolist())
+        else:
+            index = self.edge_index
+            positions = [(index[eid], eid) for eid in changed if eid in index]
+        for k, eid in positions:
+            e = graph.edges[eid]
+            self.multiplier[k] = e.get("multiplier", 1.0)
+            at = e.get("absolute_time")
+            self.absolute_time[k] = np.nan if at is None else float(at)
+        self.epoch = graph.epoch
+
+    def for_overlay(self, overlay: TrafficOverlay) -> "CSRGraph":
+        """
+        Snapshot of overlay sharing this one's topology and static arrays.
+
+        self must be a snapshot of overlay.base; only the live cost arrays
+        are copied, then re-read from the overlay.
+        """
+        csr = copy.copy(self)
+        csr.__dict__.pop("_cost_views", None)
+        csr.multiplier = self.multiplier.copy()
+        csr.absolute_time = self.absolute_time.copy()
+        csr.refresh_weights(overlay)
+        return csr
+
+    # ------------------------------------------------------------------
+    # Conversion
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: Dict[str, np.ndarray], epoch: int = 0, topology_epoch: int = 0
+    ) -> "CSRGraph":
+        """Wrap existing arrays (e.g. views into shared memory) without copying."""
+        csr = cls.__new__(cls)
+        for name in ARRAY_FIELDS:
+            setattr(csr, name, arrays[name])
+        csr.index = {nid: i for i, nid in enumerate(csr.node_ids.tolist())}
+        csr.edge_index = {eid: k for k, eid in enumerate(csr.edge_ids.tolist())}
+        csr.epoch = epoch
+        csr.topology_epoch = topology_epoch
+        return csr
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in ARRAY_FIELDS}
+
+    def to_graph(self) -> Graph:
+        """Rebuild a dict-backed Graph with identical nodes, edges and live overrides."""
+        g = Graph()
+        for i, nid in enumerate(self.node_ids.tolist()):
+            g.add_node(nid, float(self.lat[i]), float(self.lon[i]))
+        for k, eid in enumerate(self.edge_ids.tolist()):
+            buckets = [
+                {
+                    "start": float(self.bucket_start[k, j]),
+                    "end": float(self.bucket_end[k, j]),
+                    "avg_time": float(self.bucket_avg[k, j]),
+                }
+                for j in range(self.bucket_start.shape[1])
+                if np.isfinite(self.bucket_start[k, j])
+            ]
+            g.add_edge(
+                int(self.node_ids[self.tails[k]]),
+                int(self.node_ids[self.heads[k]]),
+                float(self.base_time[k]),
+                float(self.distance[k]),
+                buckets,
+                bool(self.emergency_allowed[k]),
+                edge_id=eid,
+                max_height=None if np.isnan(self.max_height[k]) else float(self.max_height[k]),
+            )
+            e = g.edges[eid]
+            e["multiplier"] = float(self.multiplier[k])
+            if not np.isnan(self.absolute_time[k]):
+                e["absolute_time"] = float(self.absolute_time[k])
+        return g
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.edge_ids)
+
+    def scalar_view(
+        self,
+    ) -> Tuple[List[List[Tuple[int, int, int]]], List[int], List[int], List[int]]:
+        """
+        Plain-Python copy of the topology for scalar kernels that touch one
+        element at a time: (out, tails, edge_ids, node_ids), where out[i]
+        lists (head index, edge id, CSR position) for node index i. Built
+        once per snapshot.
+        """
+        view = getattr(self, "_scalar_view", None)
+        if view is None:
+            indptr, heads = self.indptr.tolist(), self.heads.tolist()
+            edge_ids = self.edge_ids.tolist()
+            out = [
+                [(heads[k], edge_ids[k], k) for k in range(indptr[i], indptr[i + 1])]
+                for i in range(self.n_nodes)
+            ]
+            view = self._scalar_view = (out, self.tails.tolist(), edge_ids, self.node_ids.tolist())
+        return view
+
+    def index_of(self, node_id: int) -> int:
+        try:
+            return self.index[node_id]
+        except KeyError:
+            raise NodeNotFoundError(f"Node {node_id} not found") from None
+
+    def out_edges(self, idx: np.ndarray) -> np.ndarray:
+        """Return the CSR positions of every out-edge of the node indices in idx."""
+        starts = self.indptr[idx]
+        counts = self.indptr[idx + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(starts, counts) + (np.arange(total, dtype=np.int64) - offsets)
+
+    def travel_times(self, edge_idx: np.ndarray, depart_ts: np.ndarray) -> np.ndarray:
+        """
+        Vectorised Graph.edge_travel_time over CSR edge positions.
+
+        depart_ts holds one departure epoch per entry of edge_idx.
+        """
+        mult = self.multiplier[edge_idx]
+        cost = self.base_time[edge_idx] * mult
+
+        if self.bucket_start.shape[1]:
+            t = np.mod(depart_ts, SECONDS_PER_DAY)[:, None]
+            hit = (self.bucket_start[edge_idx] <= t) & (t < self.bucket_end[edge_idx])
+            matched = hit.any(axis=1)
+            if matched.any():
+                # argmax returns the first matching bucket, like the scalar loop.
+                first = hit.argmax(axis=1)
+                avg = self.bucket_avg[edge_idx, first]
+                cost = np.where(matched, avg * mult, cost)
+
+        absolute = self.absolute_time[edge_idx]
+        return np.where(np.isnan(absolute), cost, absolute)
+
+    def edge_travel_time(self, edge_id: int, depart_time_seconds: float) -> float:
+        """Graph.edge_travel_time read from the arrays, for scalar kernels without a Graph."""
+        views = getattr(self, "_cost_views", None)
+        if views is None:
+            # memoryviews index to plain floats about twice as fast as arrays.
+            views = self._cost_views = tuple(
+                memoryview(arr)
+                for arr in (
+                    self.absolute_time,
+                    self.multiplier,
+                    self.base_time,
+                    self.bucket_start,
+                    self.bucket_end,
+                    self.bucket_avg,
+                )
+            )
+        absolute, multiplier, base_time, starts, ends, avgs = views
+        k = self.edge_index[edge_id]
+        if not math.isnan(absolute[k]):
+            return absolute[k]
+        t = depart_time_seconds % SECONDS_PER_DAY
+        for j in range(self.bucket_start.shape[1]):
+            if starts[k, j] <= t < ends[k, j]:
+                return avgs[k, j] * multiplier[k]
+        return base_time[k] * multiplier[k]
+
+
+# ---------------------------------------------------------------------------
+# Shortest-path trees over CSR arrays
+# ---------------------------------------------------------------------------
+
+
+class ShortestPathTree:
+    """One-to-all search result: arrival epoch and predecessor edge per node."""
+
+    def __init__(
+        self, csr: CSRGraph, source: int, depart_ts: float, arrival: np.ndarray, pred: np.ndarray
+    ):
+        self.csr = csr
+        self.source = source
+        self.depart_ts = depart_ts
+        self.arrival = arrival
+        self.pred = pred  # CSR edge position of the tree edge into each node, -1 if none
+
+    def arrival_ts(self, node_id: int) -> Optional[float]:
+        t = self.arrival[self.csr.index_of(node_id)]
+        return float(t) if np.isfinite(t) else None
+
+    def path_to(self, node_id: int) -> Optional[List[int]]:
+        idx = self.csr.index_of(node_id)
+        if not np.isfinite(self.arrival[idx]):
+            return None
+        src = self.csr.index_of(self.source)
+        path = [idx]
+        while idx != src:
+            idx = int(self.csr.tails[self.pred[idx]])
+            path.append(idx)
+        path.reverse()
+        return [int(self.csr.node_ids[i]) for i in path]
+
+    def to_dict(self) -> Dict[int, float]:
+        """Return {node_id: arrival_ts} for every reachable node."""
+        reached = np.flatnonzero(np.isfinite(self.arrival))
+        return dict(zip(self.csr.node_ids[reached].tolist(), self.arrival[reached].tolist()))
+
+
+# ---------------------------------------------------------------------------
+# Shared memory
+# ---------------------------------------------------------------------------
+
+
+def publish_shared(csr: CSRGraph) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """
+    Copy csr into one shared-memory block.
+
+    Returns (shm, handle). The handle is a small picklable dict that
+    attach_shared uses in other processes; the caller owns shm and must
+    close() and unlink() it when done.
+    """
+    layout = []
+    offset = 0
+    for name in ARRAY_FIELDS:
+        arr = np.ascontiguousarray(getattr(csr, name))
+        offset = (offset + 7) & ~7  # keep every array 8-byte aligned
+        layout.append((name, arr.dtype.str, arr.shape, offset))
+        offset += arr.nbytes
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, dtype, shape, off in layout:
+        view: np.ndarray = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=off)
+        view[...] = getattr(csr, name)
+
+    handle = {
+        "name": shm.name,
+        "layout": layout,
+        "epoch": csr.epoch,
+        "topology_epoch": csr.topology_epoch,
+    }
+    return shm, handle
+
+
+def attach_shared(handle: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, CSRGraph]:
+    """Map a block created by publish_shared; arrays are zero-copy views into it."""
+    shm = shared_memory.SharedMemory(name=handle["name"])
+    arrays = {
+        name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=off)
+        for name, dtype, shape, off in handle["layout"]
+    }
+    return shm, CSRGraph.from_arrays(arrays, handle["epoch"], handle["topology_epoch"])
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+_csr_cache: "weakref.WeakKeyDictionary[Graph, CSRGraph]" = weakref.WeakKeyDictionary()
+
+
+def cached_csr(graph: Graph) -> CSRGraph:
+    """
+    Return a CSRGraph for graph, rebuilding only what changed since last call.
+
+    Topology changes trigger a full rebuild; traffic updates only refresh the
+    multiplier / absolute_time entries of the edges changed since (all of
+    them if the graph's change log no longer reaches back that far). A
+    TrafficOverlay shares the topology arrays of its base's snapshot.
+    """
+    csr = _csr_cache.get(graph)
+    if csr is None or csr.topology_epoch != graph.topology_epoch:
+        if isinstance(graph, TrafficOverlay):
+            csr = cached_csr(graph.base).for_overlay(graph)
+        else:
+            csr = CSRGraph(graph)
+        _csr_cache[graph] = csr
+    elif csr.epoch != graph.epoch:
+        csr.refresh_weights(graph, graph.changed_edges_since(csr.epoch))
+    return csr
@@ -0,0 +1,222 @@
+"""
+Background customization shared by the CCH and MLD routers.
+
+Both split preprocessing into a metric-independent structure, rebuilt when
+the graph topology changes, and metrics customized from the edge costs at
+one instant. CustomizingRouter runs that life cycle for one graph:
+
+  * one metric per (MaskSpec, time period). Edge costs only change with
+    traffic updates and at the Graph.time_periods() boundaries, so a metric
+    customized anywhere in a period is exact for every departure in it;
+    each query is answered from the metric of its departure's period.
+  * metrics are built without holding the router lock and swapped in by
+    assigning a new dict, so queries never wait for a background pass and
+    never see a half-built metric.
+  * after traffic updates the previous metrics keep serving while a
+    background thread rebuilds them; requests arriving meanwhile are folded
+    into one follow-up pass.
+
+Subclasses provide _build() and _customize(); _refresh() may be overridden
+to bring a stale metric up to date more cheaply than customizing anew.
+Metrics need epoch (the graph epoch they reflect) and at_ts attributes.
+"""
+
+import bisect
+import datetime
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from core.graph import Graph
+from core.masks import MaskSpec
+from core.routing import RouteResult, SearchStats, _ensure_utc
+
+# (mask spec, index into Graph.time_periods())
+MetricKey = Tuple[Optional[MaskSpec], int]
+
+
+def period_starts(graph: Graph) -> List[int]:
+    return [start for start, _ in graph.time_periods()]
+
+
+def period_index(starts: List[int], ts: float) -> int:
+    """Index of the time period containing epoch ts, given period_starts()."""
+    return bisect.bisect_right(starts, ts % 86400) - 1
+
+
+class CustomizingRouter(ABC):
+    """Per-period metrics for one graph, re-customized on a background thread."""
+
+    thread_name = "customize"
+
+    def __init__(self, graph: Graph):
+        self.graph = graph
+        self.customizations = 0
+        self._current: Optional[Tuple[Any, List[int]]] = None  # (structure, period starts)
+        self._metrics: Dict[MetricKey, Any] = {}
+        self._lock = threading.Lock()  # guards the swaps and the worker state below
+        self._build_lock = threading.Lock()  # one structure build at a time
+        self._dirty = False
+        self._worker: Optional[threading.Thread] = None
+        self._wanted: Set[Tuple[Optional[MaskSpec], float]] = set()
+
+    @property
+    def structure(self) -> Any:
+        """The metric-independent structure, or None before the first build."""
+        current = self._current
+        return current[0] if current else None
+
+    def route(
+        self,
+        source: int,
+        target: int,
+        depart_time_dt,
+        mask_spec: Optional[MaskSpec] = None,
+        stats: Optional[SearchStats] = None,
+    ) -> RouteResult:
+        metric = self.metric(mask_spec, depart_time_dt)
+        return metric.route(source, target, depart_time_dt, stats)
+
+    def metric(self, mask_spec: Optional[MaskSpec] = None, depart_dt=None) -> Any:
+        """
+        Metric for mask_spec in depart_dt's period (default: now). Builds one
+        synchronously only if there is none; a stale one is served while the
+        background thread replaces it.
+        """
+        structure, starts = self._structure()
+        at_dt = _ensure_utc(depart_dt) if depart_dt else _now()
+        key = (mask_spec, period_index(starts, at_dt.timestamp()))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._customize(structure, mask_spec, at_dt)
+            self._publish(structure, {key: metric})
+        elif metric.epoch != self.graph.epoch:
+            self.recustomize_async()
+        return metric
+
+    def fresh(self, mask_spec: Optional[MaskSpec] = None, depart_dt=None) -> bool:
+        """
+        Whether the metric for mask_spec in depart_dt's period (default: now)
+        reflects current costs. Never builds one.
+        """
+        current = self._current
+        if current is None or current[0].topology_epoch != self.graph.topology_epoch:
+            return False
+        at_ts = _ensure_utc(depart_dt).timestamp() if depart_dt else _now().timestamp()
+        metric = self._metrics.get((mask_spec, period_index(current[1], at_ts)))
+        return metric is not None and metric.epoch == self.graph.epoch
+
+    def recustomize(self, at_dt=None) -> None:
+        """
+        Bring every metric in use (or asked for) up to date with current
+        edge costs, then swap. With at_dt, every mask spec in use also gets
+        a metric for at_dt's period.
+        """
+        structure, starts = self._structure()
+        with self._lock:
+            metrics = self._metrics
+            wanted, self._wanted = self._wanted, set()
+        targets = {key: _utc(m.at_ts) for key, m in metrics.items()}
+        extra = list(wanted)
+        if at_dt is not None:
+            at_ts = _ensure_utc(at_dt).timestamp()
+            extra += [(spec, at_ts) for spec in {spec for spec, _ in metrics} or {MaskSpec()}]
+        elif not targets and not extra:
+            extra.append((MaskSpec(), _now().timestamp()))
+        for spec, at_ts in extra:
+            targets.setdefault((spec, period_index(starts, at_ts)), _utc(at_ts))
+
+        built = {}
+        for key, target_dt in targets.items():
+            old = metrics.get(key)
+            if old is None or old.epoch != self.graph.epoch:
+                built[key] = self._refresh(structure, key[0], target_dt, old)
+        self._publish(structure, built)
+
+    def prepare_async(
+        self, mask_spec: Optional[MaskSpec] = None, depart_dt=None
+    ) -> Optional[threading.Thread]:
+        """Customize for mask_spec in depart_dt's period in the background unless already fresh."""
+        if self.fresh(mask_spec, depart_dt):
+            return None
+        at_ts = _ensure_utc(depart_dt).timestamp() if depart_dt else _now().timestamp()
+        with self._lock:
+            self._wanted.add((mask_spec, at_ts))
+            return self._schedule()
+
+    def recustomize_async(self) -> Optional[threading.Thread]:
+        """
+        Schedule recustomize() on a background thread and return it.
+
+        Requests that arrive while one is running are folded into a single
+        follow-up pass, so a burst of traffic updates costs at most two.
+        Does nothing (returns None) until the router has served a query.
+        """
+        if not self._metrics:
+            return None
+        with self._lock:
+            return self._schedule()
+
+    def _schedule(self) -> threading.Thread:
+        # Caller holds self._lock.
+        self._dirty = True
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._customize_loop, name=self.thread_name, daemon=True
+            )
+            self._worker.start()
+        return self._worker
+
+    def _customize_loop(self) -> None:
+        while True:
+            with self._lock:
+                if not self._dirty:
+                    self._worker = None
+                    return
+                self._dirty = False
+            self.recustomize()
+
+    def _publish(self, structure: Any, built: Dict[MetricKey, Any]) -> None:
+        # Swap in metrics built on structure, unless it was replaced meanwhile
+        # or a concurrent build got further.
+        with self._lock:
+            if self._current is None or self._current[0] is not structure:
+                return
+            metrics = dict(self._metrics)
+            for key, metric in built.items():
+                old = metrics.get(key)
+                if old is None or old.epoch <= metric.epoch:
+                    metrics[key] = metric
+            self._metrics = metrics
+
+    def _structure(self) -> Tuple[Any, List[int]]:
+        current = self._current
+        if current is None or current[0].topology_epoch != self.graph.topology_epoch:
+            with self._build_lock:
+                current = self._current
+                if current is None or current[0].topology_epoch != self.graph.topology_epoch:
+                    current = (self._build(), period_starts(self.graph))
+                    with self._lock:
+                        self._metrics = {}
+                        self._current = current
+        return current
+
+    @abstractmethod
+    def _build(self) -> Any:
+        """The metric-independent structure for the current topology."""
+
+    @abstractmethod
+    def _customize(self, structure: Any, spec: Optional[MaskSpec], at_dt) -> Any:
+        """A new metric for spec from the edge costs at at_dt."""
+
+    def _refresh(self, structure: Any, spec: Optional[MaskSpec], at_dt, old: Optional[Any]) -> Any:
+        """Replace old (stale, or None) with a metric for spec at at_dt."""
+        return self._customize(structure, spec, at_dt)
+
+
+def _utc(ts: float) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
@@ -0,0 +1,115 @@
+"""
+Vectorised delta-stepping for one-to-all time-dependent searches.
+
+Instead of popping one node at a time from a heap, delta-stepping groups
+tentative arrival times into buckets of width delta and relaxes every
+out-edge of the current bucket at once with NumPy gather / scatter
+operations over the CSR arrays in core.csr.
+
+This pays off for one-to-all workloads (isochrones, catchments, landmark
+preprocessing) on graphs large enough to amortise the per-bucket array
+overhead; see benchmarks/delta_stepping.py for the crossover point.
+Point-to-point queries should keep using dijkstra_route / a_star_route.
+
+Like the scalar kernels, edge costs are evaluated at the arrival time at the
+edge's tail, so results match time-dependent Dijkstra on FIFO networks.
+"""
+
+from typing import Optional, Union
+
+import numpy as np
+
+from core.csr import CSRGraph, ShortestPathTree, cached_csr
+from core.graph import Graph
+from core.routing import SearchStats, _ensure_utc
+
+
+def default_delta(csr: CSRGraph) -> float:
+    """Mean positive free-flow edge cost — a reasonable bucket width for road graphs."""
+    costs = csr.base_time * csr.multiplier
+    costs = costs[costs > 0]
+    return float(costs.mean()) if costs.size else 1.0
+
+
+def delta_stepping(
+    graph: Union[Graph, CSRGraph],
+    source: int,
+    depart_time_dt,
+    delta: Optional[float] = None,
+    stats: Optional[SearchStats] = None,
+    edge_mask: Optional[bytearray] = None,
+) -> ShortestPathTree:
+    """
+    Time-dependent one-to-all search from source.
+
+    graph may be a Graph (its cached CSR view is used) or a CSRGraph.
+    Returns a ShortestPathTree with the earliest arrival epoch at every node
+    (inf where unreachable) and the predecessor edge of each reached node.
+    Edges whose id is set in edge_mask (core.masks.mask_for) are never
+    relaxed.
+
+    In stats, pushes counts label improvements and peak_heap the largest
+    bucket frontier; there is no heap, so stale_pops stays 0.
+    """
+    csr = graph if isinstance(graph, CSRGraph) else cached_csr(graph)
+    start_ts = _ensure_utc(depart_time_dt).timestamp()
+    src = csr.index_of(source)
+    if delta is None:
+        delta = default_delta(csr)
+    if delta <= 0:
+        raise ValueError("delta must be positive")
+
+    masked = None
+    if edge_mask is not None:
+        masked = np.frombuffer(edge_mask, dtype=np.uint8)[csr.edge_ids] != 0
+
+    n = csr.n_nodes
+    dist = np.full(n, np.inf)
+    pred = np.full(n, -1, dtype=np.int64)
+    done = np.zeros(n, dtype=bool)
+    dist[src] = start_ts
+    pushes = relaxed = peak = 0
+
+    while True:
+        open_ = ~done & np.isfinite(dist)
+        if not open_.any():
+            break
+        bucket = np.floor((dist[open_].min() - start_ts) / delta)
+        upper = start_ts + (bucket + 1) * delta
+
+        # Relax the bucket to a fixed point; nodes whose label drops back into
+        # the bucket are re-relaxed on the next pass.
+        active = np.flatnonzero(open_ & (dist < upper))
+        while active.size:
+            peak = max(peak, int(active.size))
+            eidx = csr.out_edges(active)
+            if masked is not None:
+                eidx = eidx[~masked[eidx]]
+            relaxed += int(eidx.size)
+            if not eidx.size:
+                break
+            u = csr.tails[eidx]
+            v = csr.heads[eidx]
+            cand = dist[u] + csr.travel_times(eidx, dist[u])
+
+            better = cand < dist[v]
+            if not better.any():
+                break
+            eidx, v, cand = eidx[better], v[better], cand[better]
+            pushes += int(eidx.size)
+
+            np.minimum.at(dist, v, cand)
+            won = cand == dist[v]
+            pred[v[won]] = eidx[won]
+
+            touched = np.unique(v)
+            active = touched[dist[touched] < upper]
+
+        newly = ~done & (dist < upper)
+        if stats is not None and stats.record_settled:
+            stats.settled_nodes.extend(csr.node_ids[newly].tolist())
+        done |= newly
+
+    if stats is not None:
+        stats.add(settled=int(done.sum()), pushes=pushes, relaxations=relaxed, peak_heap=peak)
+    return ShortestPathTree(csr, source, start_ts, dist, pred)
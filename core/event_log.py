@@ -0,0 +1,146 @@
+"""
+Compact event logs for the simulators.
+
+A sink is a callable taking one SimEvent; pass it as on_event to
+SimulationEngine.run (or FleetSimulator) with record_events=False and
+events go to disk as they happen instead of accumulating in memory.
+
+  JsonlEventSink   one compact JSON object per line: {"t", "k", "d"[, "m"]}
+                   (epoch seconds, kind, data, optional message)
+  BinaryEventSink  length-prefixed records; SEGMENT events packed as
+                   (from, to, duration_sec), others as compact JSON
+
+Messages are dropped unless JsonlEventSink(messages=True): they are
+human-readable renderings of the data. Paths ending in .gz are gzipped.
+read_events streams either format back as SimEvents.
+
+Usage:
+    with JsonlEventSink("run.jsonl.gz") as sink:
+        engine.run(amb, s, t, depart, injections, on_event=sink, record_events=False)
+    for ev in read_events("run.jsonl.gz"):
+        ...
+"""
+
+import datetime
+import gzip
+import json
+import os
+import struct
+from typing import IO, Any, Dict, Iterator, Union
+
+from core.simulator import SimEvent
+
+UTC = datetime.timezone.utc
+
+MAGIC = b"SIMEV\x01"
+# Kind codes of the binary format; other kinds are stored by name.
+KINDS = ("DEPART", "SEGMENT", "TRAFFIC", "REROUTE", "ARRIVE", "DISPATCH")
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+_OTHER = 255
+_RECORD = struct.Struct("<dBI")  # sim time (epoch s), kind code, payload bytes
+_SEGMENT = struct.Struct("<qqd")  # from node, to node, duration_sec
+
+Target = Union[str, "os.PathLike[str]", IO]
+
+
+def _open(target: Target, mode: str):
+    """(file, owned): opens paths (gzip for .gz), passes file objects through."""
+    if not isinstance(target, (str, os.PathLike)):
+        return target, False
+    if os.fspath(target).endswith(".gz"):
+        return gzip.open(target, mode), True
+    return open(target, mode), True
+
+
+def _compact(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+class _Sink:
+    def __init__(self, target: Target, mode: str):
+        self._fp, self._owned = _open(target, mode)
+        self.count = 0
+
+    def close(self) -> None:
+        if self._owned:
+            self._fp.close()
+        else:
+            self._fp.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JsonlEventSink(_Sink):
+    def __init__(self, target: Target, messages: bool = False):
+        super().__init__(target, "wt")
+        self.messages = messages
+
+    def __call__(self, ev: SimEvent) -> None:
+        record: Dict[str, Any] = {"t": ev.sim_time.timestamp(), "k": ev.kind}
+        if ev.data:
+            record["d"] = ev.data
+        if self.messages:
+            record["m"] = ev.message
+        self._fp.write(_compact(record) + "\n")
+        self.count += 1
+
+
+class BinaryEventSink(_Sink):
+    def __init__(self, target: Target):
+        super().__init__(target, "wb")
+        self._fp.write(MAGIC)
+
+    def __call__(self, ev: SimEvent) -> None:
+        code = _KIND_CODES.get(ev.kind, _OTHER)
+        if code == _KIND_CODES["SEGMENT"]:
+            d = ev.data
+            payload = _SEGMENT.pack(d["from"], d["to"], d["duration_sec"])
+        else:
+            record: Dict[str, Any] = {"d": ev.data} if ev.data else {}
+            if code == _OTHER:
+                record["k"] = ev.kind
+            payload = _compact(record).encode()
+        self._fp.write(_RECORD.pack(ev.sim_time.timestamp(), code, len(payload)) + payload)
+        self.count += 1
+
+
+def read_events(source: Target) -> Iterator[SimEvent]:
+    """Stream events back from a JsonlEventSink or BinaryEventSink file."""
+    fp, owned = _open(source, "rb")
+    try:
+        if fp.read(len(MAGIC)) == MAGIC:
+            yield from _read_binary(fp)
+            return
+        fp.seek(0)
+        for line in fp:
+            if line.strip():
+                r = json.loads(line)
+                yield SimEvent(_dt(r["t"]), r["k"], r.get("m", ""), r.get("d", {}))
+    finally:
+        if owned:
+            fp.close()
+
+
+def _read_binary(fp) -> Iterator[SimEvent]:
+    segment = _KIND_CODES["SEGMENT"]
+    while True:
+        header = fp.read(_RECORD.size)
+        if len(header) < _RECORD.size:
+            return
+        ts, code, size = _RECORD.unpack(header)
+        payload = fp.read(size)
+        if code == segment:
+            u, v, duration = _SEGMENT.unpack(payload)
+            yield SimEvent(_dt(ts), "SEGMENT", "", {"from": u, "to": v, "duration_sec": duration})
+        else:
+            r = json.loads(payload) if payload else {}
+            kind = r.get("k") if code == _OTHER else KINDS[code]
+            yield SimEvent(_dt(ts), kind, "", r.get("d", {}))
+
+
+def _dt(ts: float) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(ts, UTC)
@@ -0,0 +1,500 @@
+"""
+Fleet discrete-event simulator.
+
+Where SimulationEngine follows one ambulance segment by segment, the
+FleetSimulator runs many ambulances, traffic injections and incident
+arrivals over one graph, interleaved in virtual time on a single heap of
+events:
+
+  ARRIVE    a leg reaches its end node (scene, hospital or trip end)
+  INJECT    a TrafficInjection is applied to the graph
+  INCIDENT  an incident is reported and dispatched to an idle ambulance
+  DEPART    a scheduled trip (or the transport leg after a scene) starts
+
+Ambulances do not generate an event per segment: a moving ambulance is its
+RouteResult, whose node_times say where it is at any instant. When traffic
+changes, every leg whose remaining edges were touched (or every moving leg,
+after any edge got faster, or with reroute_scope="all") is re-checked in one batch: legs sharing a
+destination are answered from one reverse shortest-path tree, the rest with
+one forward search each. The ambulance finishes the edge it is on; its
+remaining route is re-timed under the new costs and replaced by the new one
+when that saves at least the reroute threshold. Its ARRIVE event is then
+re-queued; the superseded one is skipped when popped (lazy deletion, as in
+the search kernels).
+
+Incidents go to the idle ambulance closest in straight-line distance, or
+wait in FIFO order for the next one to become idle. An incident with a
+destination (e.g. a hospital) continues there after scene_seconds. A unit
+is busy from its departure until it is idle again; scheduled trips that
+fall due meanwhile are held and start, in order, from wherever it is then.
+
+Like SimulationEngine, injections are applied to the graph itself (run on a
+core.graph.TrafficOverlay to keep the graph untouched).
+
+Usage:
+    sim = FleetSimulator(graph)
+    result = sim.run(trips=trips, traffic_injections=injections)
+    result.summary()
+"""
+
+import bisect
+import datetime
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from core.config import REROUTE_THRESHOLD_SEC, REVERSE_TREE_MIN_ROUTES, SEARCH_WORKSPACES
+from core.graph import Graph
+from core.masks import MaskSpec, mask_for
+from core.reverse_tree import reverse_tree_for
+from core.routing import (
+    RouteResult,
+    _ensure_utc,
+    _time_edges,
+    a_star_route,
+    dijkstra_route,
+    haversine_distance,
+)
+from core.simulator import SimEvent, TrafficInjection
+from core.workspace import workspace_a_star_route, workspace_dijkstra_route
+
+UTC = datetime.timezone.utc
+log = logging.getLogger("ambulance_routing.fleet")
+
+# Event kinds, in the order they are handled at the same instant: an
+# ambulance arriving exactly when traffic changes is not rerouted.
+_ARRIVE, _INJECT, _INCIDENT, _DEPART = range(4)
+
+_KERNELS = {
+    "dijkstra": (dijkstra_route, workspace_dijkstra_route),
+    "astar": (a_star_route, workspace_a_star_route),
+}
+
+
+# ---------------------------------------------------------------------------
+# Data classes
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Trip:
+    """A scheduled trip: ambulance_id drives start_node -> end_node from depart_dt."""
+
+    ambulance_id: str
+    start_node: int
+    end_node: int
+    depart_dt: datetime.datetime
+
+
+@dataclass
+class Incident:
+    """An emergency reported at `at` on node; optionally transported to destination."""
+
+    at: datetime.datetime
+    node: int
+    destination: Optional[int] = None
+    scene_seconds: float = 0.0
+    label: str = ""
+
+
+@dataclass
+class TripResult:
+    ambulance_id: str
+    start_node: int
+    end_node: int
+    departed: datetime.datetime
+    arrived: datetime.datetime
+    total_seconds: float
+    reroutes: int
+    saved_seconds: float
+    incident: Optional[str] = None  # label of the incident this leg served
+    response_seconds: Optional[float] = None  # report -> on scene, scene legs only
+
+
+@dataclass
+class FleetResult:
+    trips: List[TripResult]
+    injections: int
+    reroute_checks: int
+    reroutes: int
+    unroutable: int
+    unserved_incidents: int
+    wall_seconds: float
+    events: List[SimEvent] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        n = len(self.trips)
+        response = sorted(t.response_seconds for t in self.trips if t.response_seconds is not None)
+        return {
+            "trips": n,
+            "mean_trip_seconds": sum(t.total_seconds for t in self.trips) / n if n else None,
+            "median_response_seconds": response[len(response) // 2] if response else None,
+            "injections": self.injections,
+            "reroute_checks": self.reroute_checks,
+            "reroutes": self.reroutes,
+            "saved_seconds": sum(t.saved_seconds for t in self.trips),
+            "unroutable": self.unroutable,
+            "unserved_incidents": self.unserved_incidents,
+            "wall_seconds": self.wall_seconds,
+            "trips_per_wall_minute": n * 60 / self.wall_seconds if self.wall_seconds else None,
+        }
+
+
+class _Leg:
+    """One ambulance moving along one route."""
+
+    __slots__ = (
+        "ambulance_id",
+        "route",
+        "version",
+        "reroutes",
+        "saved",
+        "incident",
+        "to_scene",
+    )
+
+    def __init__(self, ambulance_id: str, route: RouteResult, incident, to_scene: bool):
+        self.ambulance_id = ambulance_id
+        self.route = route
+        self.version = 0
+        self.reroutes = 0
+        self.saved = 0.0
+        self.incident: Optional[Incident] = incident
+        self.to_scene = to_scene
+
+
+# ---------------------------------------------------------------------------
+# Simulator
+# ---------------------------------------------------------------------------
+
+
+class FleetSimulator:
+    def __init__(
+        self,
+        graph: Graph,
+        reroute_threshold_sec: float = REROUTE_THRESHOLD_SEC,
+        mask_spec: Optional[MaskSpec] = None,
+        algorithm: str = "dijkstra",
+        reroute_scope: str = "affected",
+        record_events: bool = False,
+        on_event: Optional[Callable[[SimEvent], None]] = None,
+    ):
+        if algorithm not in _KERNELS:
+            raise ValueError(f"Unknown algorithm {algorithm!r}")
+        if reroute_scope not in ("affected", "all"):
+            raise ValueError("reroute_scope must be 'affected' or 'all'")
+        self.graph = graph
+        self.threshold = reroute_threshold_sec
+        self.mask_spec = mask_spec or MaskSpec()
+        self.reroute_scope = reroute_scope
+        self.record_events = record_events
+        self.on_event = on_event  # called with each event as it happens, e.g. an event_log sink
+        self._search = _KERNELS[algorithm][1 if SEARCH_WORKSPACES else 0]
+
+    def run(
+        self,
+        trips: Optional[List[Trip]] = None,
+        traffic_injections: Optional[Iterable[TrafficInjection]] = None,
+        incidents: Optional[List[Incident]] = None,
+        ambulances: Optional[Dict[str, int]] = None,
+    ) -> FleetResult:
+        """
+        Simulate until every event has been handled, in virtual time.
+
+        ambulances maps the id of each unit available for incidents to its
+        starting node. A unit on a scheduled trip becomes available at the
+        trip's end node; a trip due while its unit is busy starts when the
+        unit is free, from where it then is. Incidents left waiting when the
+        events run out are counted as unserved, as are those whose unit
+        cannot reach the scene.
+
+        traffic_injections may be any iterable. Lists are sorted by
+        trigger_at; other iterables (e.g. core.replay.read_injections) must
+        already be in time order and are read one injection at a time, as
+        the clock reaches them.
+        """
+        wall0 = time.perf_counter()
+        self._heap: List[Tuple[float, int, int, Any]] = []
+        self._seq = itertools.count()
+        self._moving: Dict[str, _Leg] = {}
+        self._idle: Dict[str, int] = dict(ambulances or {})
+        # Busy units -> end nodes of the scheduled trips held until they are free.
+        self._busy: Dict[str, Deque[int]] = {}
+        self._waiting: Deque[Incident] = deque()
+        self._trips: List[TripResult] = []
+        self._events: List[SimEvent] = []
+        self._checks = self._reroutes = self._unroutable = self._stranded = 0
+
+        for trip in trips or []:
+            ts = _ensure_utc(trip.depart_dt).timestamp()
+            self._push(
+                ts, _DEPART, (trip.ambulance_id, trip.start_node, trip.end_node, None, False)
+            )
+        if isinstance(traffic_injections, list):
+            traffic_injections = sorted(traffic_injections, key=lambda inj: inj.trigger_at)
+        self._injections = iter(traffic_injections or ())
+        self._injected = 0
+        self._next_injection(-math.inf)
+        for incident in incidents or []:
+            self._push(_ensure_utc(incident.at).timestamp(), _INCIDENT, incident)
+
+        handlers = {
+            _ARRIVE: self._on_arrive,
+            _INJECT: self._on_inject,
+            _INCIDENT: self._on_incident,
+            _DEPART: self._on_depart,
+        }
+        heap = self._heap
+        while heap:
+            ts, kind, _, payload = heapq.heappop(heap)
+            handlers[kind](ts, payload)
+
+        result = FleetResult(
+            trips=self._trips,
+            injections=self._injected,
+            reroute_checks=self._checks,
+            reroutes=self._reroutes,
+            unroutable=self._unroutable,
+            unserved_incidents=len(self._waiting) + self._stranded,
+            wall_seconds=time.perf_counter() - wall0,
+            events=self._events,
+        )
+        log.info(
+            "Fleet simulation completed: trips=%d reroutes=%d wall=%.2fs",
+            len(result.trips),
+            result.reroutes,
+            result.wall_seconds,
+        )
+        return result
+
+    # ------------------------------------------------------------------
+    # Event handlers
+    # ------------------------------------------------------------------
+
+    def _on_depart(self, ts: float, payload) -> None:
+        ambulance_id, start, end, incident, to_scene = payload
+        if incident is None:
+            # A scheduled trip; dispatched and transport legs are already busy.
+            held = self._busy.get(ambulance_id)
+            if held is not None:
+                held.append(end)
+                return
+            self._idle.pop(ambulance_id, None)
+            self._busy[ambulance_id] = deque()
+        self._drive(ts, ambulance_id, start, end, incident, to_scene)
+
+    def _drive(
+        self, ts: float, ambulance_id: str, start: int, end: int, incident, to_scene: bool
+    ) -> None:
+        route = self._search(self.graph, start, end, ts, mask_for(self.graph, self.mask_spec))
+        if not route.found:
+            self._unroutable += 1
+            self._stranded += to_scene
+            self._event(ts, "DEPART", f"No route for {ambulance_id} from {start} to {end}")
+            self._release(ts, ambulance_id, start)
+            return
+        leg = _Leg(ambulance_id, route, incident, to_scene)
+        self._moving[ambulance_id] = leg
+        self._event(
+            ts,
+            "DEPART",
+            f"Ambulance {ambulance_id} departed node {start} -> destination {end}",
+            {"eta_seconds": route.total_seconds},
+        )
+        self._push(route.arrival_ts, _ARRIVE, (leg, leg.version))
+
+    def _on_arrive(self, ts: float, payload) -> None:
+        leg, version = payload
+        if version != leg.version:
+            return  # superseded by a reroute or re-timing
+        route = leg.route
+        if self._moving.get(leg.ambulance_id) is leg:
+            del self._moving[leg.ambulance_id]
+        incident = leg.incident
+        self._trips.append(
+            TripResult(
+                ambulance_id=leg.ambulance_id,
+                start_node=route.path[0],
+                end_node=route.path[-1],
+                departed=datetime.datetime.fromtimestamp(route.depart_ts, UTC),
+                arrived=datetime.datetime.fromtimestamp(ts, UTC),
+                total_seconds=route.total_seconds,
+                reroutes=leg.reroutes,
+                saved_seconds=leg.saved,
+                incident=incident.label if incident is not None else None,
+                response_seconds=(
+                    ts - _ensure_utc(incident.at).timestamp() if leg.to_scene else None
+                ),
+            )
+        )
+        self._event(
+            ts,
+            "ARRIVE",
+            f"Ambulance {leg.ambulance_id} arrived at node {route.path[-1]}",
+            {"total_seconds": route.total_seconds},
+        )
+        if leg.to_scene and incident.destination is not None:
+            self._push(
+                ts + incident.scene_seconds,
+                _DEPART,
+                (leg.ambulance_id, incident.node, incident.destination, incident, False),
+            )
+            return
+        self._release(ts, leg.ambulance_id, route.path[-1])
+
+    def _on_incident(self, ts: float, incident: Incident) -> None:
+        self._waiting.append(incident)
+        self._dispatch_waiting(ts)
+
+    def _on_inject(self, ts: float, inj: TrafficInjection) -> None:
+        graph = self.graph
+        changed = set()
+        faster = False
+        for eu in inj.edge_updates:
+            try:
+                before = graph.edge_travel_time(eu.edge_id, ts)
+                graph.apply_edge_update(eu)
+            except Exception as e:
+                self._event(ts, "TRAFFIC", f"Edge update failed: {e}")
+                continue
+            changed.add(eu.edge_id)
+            faster = faster or graph.edge_travel_time(eu.edge_id, ts) < before
+        label = inj.label or f"{len(inj.edge_updates)} edge(s)"
+        self._event(ts, "TRAFFIC", f"Traffic update applied: {label}", {"edges": len(changed)})
+        if changed:
+            self._recheck(ts, changed, faster)
+        self._injected += 1
+        self._next_injection(ts)
+
+    # ------------------------------------------------------------------
+    # Batched reroute evaluation
+    # ------------------------------------------------------------------
+
+    def _recheck(self, ts: float, changed: set, faster: bool) -> None:
+        """
+        Re-time and re-route, in one batch, every leg the traffic change can affect.
+
+        A slower edge only matters to legs still to cross it; a faster one may
+        offer any leg a shortcut, so then every moving leg is checked.
+        """
+        everything = faster or self.reroute_scope == "all"
+        # (leg, index of the node it reaches next) for each leg to re-check.
+        batch: List[Tuple[_Leg, int]] = []
+        for leg in self._moving.values():
+            route = leg.route
+            j = bisect.bisect_right(route.node_times, ts)
+            if j >= len(route.path) - 1:
+                continue  # on its last edge
+            if everything or not changed.isdisjoint(route.edge_ids[j:]):
+                batch.append((leg, j))
+        if not batch:
+            return
+        self._checks += len(batch)
+
+        by_target: Dict[int, int] = {}
+        for leg, _ in batch:
+            target = leg.route.path[-1]
+            by_target[target] = by_target.get(target, 0) + 1
+        at_dt = datetime.datetime.fromtimestamp(ts, UTC)
+        mask = mask_for(self.graph, self.mask_spec)
+
+        for leg, j in batch:
+            route = leg.route
+            node, node_ts, target = route.path[j], route.node_times[j], route.path[-1]
+            # The edge in progress keeps its committed time; the rest is re-timed.
+            current = _time_edges(self.graph, node, route.edge_ids[j:], node_ts)
+            if by_target[target] >= REVERSE_TREE_MIN_ROUTES:
+                tree = reverse_tree_for(self.graph, target, at_dt, self.mask_spec)
+                new = tree.route_from(node, node_ts)
+            else:
+                new = self._search(self.graph, node, target, node_ts, mask)
+            saved = current.arrival_ts - new.arrival_ts if new.found else 0.0
+            if saved >= self.threshold:
+                tail = new
+                leg.reroutes += 1
+                leg.saved += saved
+                self._reroutes += 1
+                self._event(
+                    ts,
+                    "REROUTE",
+                    f"Rerouted {leg.ambulance_id}: save {int(saved)}s",
+                    {"time_saved_sec": saved},
+                )
+            else:
+                tail = current
+            if tail.arrival_ts == route.arrival_ts and tail.edge_ids == route.edge_ids[j:]:
+                continue
+            leg.route = RouteResult(
+                route.path[:j] + tail.path,
+                route.edge_ids[:j] + tail.edge_ids,
+                route.node_times[:j] + tail.node_times,
+            )
+            leg.version += 1
+            self._push(leg.route.arrival_ts, _ARRIVE, (leg, leg.version))
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _dispatch_waiting(self, ts: float) -> None:
+        nodes = self.graph.nodes
+        while self._waiting and self._idle:
+            incident = self._waiting.popleft()
+            scene = nodes.get(incident.node)
+            if scene is None:
+                self._event(ts, "DISPATCH", f"Unknown incident node {incident.node}")
+                continue
+
+            def distance(item) -> float:
+                n = nodes.get(item[1])
+                if n is None:
+                    return float("inf")
+                return haversine_distance(n["lat"], n["lon"], scene["lat"], scene["lon"])
+
+            ambulance_id, at_node = min(self._idle.items(), key=distance)
+            del self._idle[ambulance_id]
+            self._busy[ambulance_id] = deque()
+            self._event(
+                ts,
+                "DISPATCH",
+                f"Ambulance {ambulance_id} dispatched to {incident.label or incident.node}",
+                {"wait_seconds": ts - _ensure_utc(incident.at).timestamp()},
+            )
+            self._push(ts, _DEPART, (ambulance_id, at_node, incident.node, incident, True))
+
+    def _release(self, ts: float, ambulance_id: str, node: int) -> None:
+        """A busy unit is free at node: start its next held trip, or make it idle."""
+        held = self._busy[ambulance_id]
+        if held:
+            self._drive(ts, ambulance_id, node, held.popleft(), None, False)
+            return
+        del self._busy[ambulance_id]
+        self._idle[ambulance_id] = node
+        self._dispatch_waiting(ts)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _next_injection(self, now: float) -> None:
+        """Queue the next injection; one read out of order is applied at once."""
+        inj = next(self._injections, None)
+        if inj is not None:
+            self._push(max(_ensure_utc(inj.trigger_at).timestamp(), now), _INJECT, inj)
+
+    def _push(self, ts: float, kind: int, payload) -> None:
+        heapq.heappush(self._heap, (ts, kind, next(self._seq), payload))
+
+    def _event(self, ts: float, kind: str, message: str, data: Optional[dict] = None) -> None:
+        if not (self.record_events or self.on_event):
+            return
+        ev = SimEvent(datetime.datetime.fromtimestamp(ts, UTC), kind, message, data or {})
+        if self.on_event is not None:
+            self.on_event(ev)
+        if self.record_events:
+            self._events.append(ev)
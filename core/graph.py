@@ -1,8 +1,11 @@
 import json
-from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
 
 from pydantic import BaseModel
 
+from core.config import EDGE_CHANGE_LOG_SIZE
+
 
 class EdgeUpdate(BaseModel):
     edge_id: int
@@ -25,17 +28,38 @@ class InvalidGraphError(Exception):
 class Graph:
     def __init__(self):
         self.adj: Dict[int, List[Tuple[int, int]]] = {}
+        self.radj: Dict[int, List[Tuple[int, int]]] = {}  # v -> [(u, edge_id)] incoming
         self.edges: Dict[int, Dict[str, Any]] = {}
         self.nodes: Dict[int, Dict[str, Any]] = {}
         self._next_edge_id = 1
+        # Bumped on every mutation so derived structures (CSR arrays, caches)
+        # can tell whether they are still current.
+        self.epoch = 0
+        self.topology_epoch = 0
+        self._topology_changed_at = 0
+        self._edge_log: Deque[Tuple[int, int]] = deque(maxlen=EDGE_CHANGE_LOG_SIZE)
 
     # ------------------------------------------------------------------
     # Construction
     # ------------------------------------------------------------------
 
-    def add_node(self, node_id: int, lat: float, lon: float, name: str = "") -> None:
-        self.nodes[node_id] = {"lat": lat, "lon": lon, "name": name or str(node_id)}
+    def add_node(
+        self,
+        node_id: int,
+        lat: float,
+        lon: float,
+        name: str = "",
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.nodes[node_id] = {
+            "lat": lat,
+            "lon": lon,
+            "name": name or str(node_id),
+            "tags": sorted(set(tags or ())),  # POI categories, e.g. "hospital"
+        }
         self.adj.setdefault(node_id, [])
+        self.radj.setdefault(node_id, [])
+        self._touch(topology=True)
 
     def add_edge(
         self,
@@ -46,6 +70,7 @@ class Graph:
         time_buckets: Optional[List[dict]] = None,
         is_emergency_allowed: bool = True,
         edge_id: Optional[int] = None,
+        max_height: Optional[float] = None,
     ) -> int:
         if u not in self.nodes:
             raise InvalidGraphError(f"Source node {u} not found")
@@ -63,6 +88,7 @@ class Graph:
             self._next_edge_id = eid + 1
 
         self.adj.setdefault(u, []).append((v, eid))
+        self.radj.setdefault(v, []).append((u, eid))
         self.edges[eid] = {
             "u": u,
             "v": v,
@@ -70,16 +96,18 @@ class Graph:
             "distance": distance,
             "time_buckets": time_buckets or [],
             "is_emergency_allowed": is_emergency_allowed,
+            "max_height": max_height,  # metres; None = no clearance limit
             "multiplier": 1.0,
             "absolute_time": None,
         }
+        self._touch(topology=True)
         return eid
 
     def load_from_file(self, path: str) -> None:
         with open(path, "r") as f:
             j = json.load(f)
         for n in j.get("nodes", []):
-            self.add_node(n["id"], n["lat"], n["lon"], n.get("name", ""))
+            self.add_node(n["id"], n["lat"], n["lon"], n.get("name", ""), n.get("tags"))
         for e in j.get("edges", []):
             explicit_id = e.get("edge_id")
             self.add_edge(
@@ -90,12 +118,17 @@ class Graph:
                 e.get("time_buckets"),
                 e.get("is_emergency_allowed", True),
                 edge_id=explicit_id,
+                max_height=e.get("max_height"),
             )
 
     # ------------------------------------------------------------------
     # Queries
     # ------------------------------------------------------------------
 
+    def nodes_with_tag(self, tag: str) -> List[int]:
+        """Ids of nodes carrying tag, in ascending order."""
+        return sorted(nid for nid, nd in self.nodes.items() if tag in nd.get("tags", ()))
+
     def nearest_node(self, latlon: Tuple[float, float]) -> int:
         lat, lon = latlon
         best, bd = None, float("inf")
@@ -131,9 +164,24 @@ class Graph:
 
         return e["base_time"] * e.get("multiplier", 1.0)
 
+    def time_periods(self) -> List[Tuple[int, int]]:
+        """
+        Consecutive [start, end) seconds-of-day intervals inside which no edge
+        changes time bucket, so baseline edge costs are constant.
+        """
+        cuts = {0, 86400}
+        for e in self.edges.values():
+            for b in e["time_buckets"]:
+                cuts.update(c for c in (b["start"], b["end"]) if 0 < c < 86400)
+        ordered = sorted(cuts)
+        return list(zip(ordered[:-1], ordered[1:]))
+
     def neighbors(self, u: int) -> List[Tuple[int, int]]:
         return self.adj.get(u, [])
 
+    def in_neighbors(self, v: int) -> List[Tuple[int, int]]:
+        return self.radj.get(v, [])
+
     def edge_id_between(self, u: int, v: int) -> Optional[int]:
         for x, eid in self.adj.get(u, []):
             if x == v:
@@ -153,6 +201,7 @@ class Graph:
             self.edges[edge_id]["multiplier"] = edge_update.multiplier
         if edge_update.absolute_time is not None:
             self.edges[edge_id]["absolute_time"] = edge_update.absolute_time
+        self._touch(edges=(edge_id,))
 
     def reset_edge_overrides(self, edge_id: Optional[int] = None) -> None:
         """Reset absolute_time and multiplier. If edge_id is None, reset all edges."""
@@ -161,6 +210,36 @@ class Graph:
             if eid in self.edges:
                 self.edges[eid]["absolute_time"] = None
                 self.edges[eid]["multiplier"] = 1.0
+        self._touch(edges=(eid for eid in targets if eid in self.edges))
+
+    def changed_edges_since(self, epoch: int) -> Optional[Set[int]]:
+        """
+        Return ids of edges whose live cost changed after epoch.
+
+        Returns None when the answer is unknown — the topology changed or the
+        bounded change log no longer reaches back that far — so callers
+        must rebuild from scratch.
+        """
+        if epoch < self._topology_changed_at:
+            return None
+        log = self._edge_log
+        if len(log) == log.maxlen and log[0][0] > epoch:
+            return None
+        # Entries are in epoch order: walk back from the newest and stop early.
+        changed = set()
+        for e, eid in reversed(log):
+            if e <= epoch:
+                break
+            changed.add(eid)
+        return changed
+
+    def _touch(self, topology: bool = False, edges: Iterable[int] = ()) -> None:
+        self.epoch += 1
+        if topology:
+            self.topology_epoch += 1
+            self._topology_changed_at = self.epoch
+        for eid in edges:
+            self._edge_log.append((self.epoch, eid))
 
     # ------------------------------------------------------------------
     # Debug
@@ -180,7 +259,64 @@ class Graph:
                     "absolute_time": e["absolute_time"],
                     "time_buckets": e["time_buckets"],
                     "is_emergency_allowed": e["is_emergency_allowed"],
+                    "max_height": e["max_height"],
                 }
                 for eid, e in self.edges.items()
             ],
         }
+
+
+class TrafficOverlay(Graph):
+    """
+    Copy-on-write traffic layer over a read-only base Graph.
+
+    Nodes and adjacency lists are the base's own objects, and so is every
+    edge record until an update touches it; only then is that one record
+    copied into the overlay. The base is never modified, so any number of
+    overlays (one per simulated scenario) can share one graph. Creating an
+    overlay copies the edge-id -> record table (one pointer per edge), not
+    the records themselves.
+
+    The topology is the base's: adding nodes or edges raises, and the base
+    must not change while overlays of it are in use.
+    """
+
+    def __init__(self, base: Graph):
+        super().__init__()
+        self.base = base
+        self.nodes = base.nodes
+        self.adj = base.adj
+        self.radj = base.radj
+        self.edges = dict(base.edges)
+        self._next_edge_id = base._next_edge_id
+        self.topology_epoch = base.topology_epoch
+        # Continue the base's epoch; changes before the overlay existed are unknown.
+        self.epoch = self._topology_changed_at = base.epoch
+        self._owned: Set[int] = set()
+
+    @property
+    def overridden_edges(self) -> Set[int]:
+        """Ids of edges whose record this overlay has copied from the base."""
+        return set(self._owned)
+
+    def add_node(self, *args, **kwargs) -> None:
+        raise InvalidGraphError("TrafficOverlay topology is read-only")
+
+    def add_edge(self, *args, **kwargs) -> int:
+        raise InvalidGraphError("TrafficOverlay topology is read-only")
+
+    def apply_edge_update(self, edge_update: "EdgeUpdate") -> None:
+        self._own(edge_update.edge_id)
+        super().apply_edge_update(edge_update)
+
+    def reset_edge_overrides(self, edge_id: Optional[int] = None) -> None:
+        for eid in [edge_id] if edge_id is not None else list(self.edges):
+            self._own(eid)
+        super().reset_edge_overrides(edge_id)
+
+    def _own(self, edge_id: int) -> None:
+        if edge_id in self._owned or edge_id not in self.edges:
+            return
+        # time_buckets stay shared: nothing mutates them in place.
+        self.edges[edge_id] = dict(self.edges[edge_id])
+        self._owned.add(edge_id)
@@ -0,0 +1,247 @@
+"""
+Hub labels for ETA-only queries.
+
+Every node u gets two small labels: out(u) = {hub: distance u -> hub} and
+in(u) = {hub: distance hub -> u}, chosen so that for any pair some hub on a
+shortest s -> t path appears in both out(s) and in(t). A distance query is
+then one intersection of two dicts — microseconds, no search.
+
+Labels are built by pruned landmark labeling (Akiba et al., 2013): nodes are
+processed most important first (reverse nested-dissection order, so
+separators become hubs), and each one runs a forward and a backward Dijkstra
+that stops wherever the labels built so far already give the distance.
+
+Edge costs are time-dependent, so labels are built for fixed per-edge costs:
+
+  lower  -> per-edge lower bounds (core.lower_bounds): never above the live ETA
+  upper  -> per-edge upper bounds: never below the live ETA
+  period -> costs at the start of each time-bucket period (optional); the
+            estimate closest to a live search departing in that period
+
+The live time-dependent ETA therefore always lies in [lower, upper], which
+is the error bound returned with every estimate. Bounds stay valid until a
+traffic update makes some edge cheaper than its lower bound or slower than
+its upper bound (checked from the graph's change log); then the index is
+stale and callers search instead while it is rebuilt.
+
+Usage:
+    router = HubLabelRouter(graph)
+    router.refresh_async()                      # build in the background
+    est = router.estimate(s, t, depart_dt)      # ETAEstimate, or None -> search
+"""
+
+import bisect
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.config import HUB_LABELS_PER_PERIOD
+from core.graph import Graph
+from core.lower_bounds import edge_lower_bound, edge_upper_bound, within_bounds
+from core.masks import MaskSpec, mask_for
+from core.partition import nested_dissection_order
+from core.refreshing import RefreshingRouter
+from core.routing import _ensure_utc
+
+INF = math.inf
+
+Label = Dict[int, float]
+
+
+def _meet(a: Label, b: Label) -> float:
+    """Shortest distance through a hub present in both labels."""
+    if len(a) > len(b):
+        a, b = b, a
+    best = INF
+    for hub, d in a.items():
+        other = b.get(hub)
+        if other is not None and d + other < best:
+            best = d + other
+    return best
+
+
+class HubLabels:
+    """Out / in labels for one fixed cost per edge."""
+
+    def __init__(
+        self,
+        n: int,
+        fwd: List[List[Tuple[int, int]]],
+        rev: List[List[Tuple[int, int]]],
+        costs: Sequence[float],
+        order: Sequence[int],
+    ):
+        self.out: List[Label] = [{} for _ in range(n)]
+        self.into: List[Label] = [{} for _ in range(n)]
+        for rank, v in enumerate(order):
+            # Forward from v fills in(u) with v -> u; backward fills out(u) with u -> v.
+            self._pruned_search(v, rank, fwd, costs, self.out[v], self.into)
+            self._pruned_search(v, rank, rev, costs, self.into[v], self.out)
+
+    @staticmethod
+    def _pruned_search(root, rank, adj, costs, root_label, labels) -> None:
+        dist = {root: 0.0}
+        heap = [(0.0, root)]
+        done = set()
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            if _meet(root_label, labels[u]) <= d:
+                continue  # an earlier hub already covers root <-> u
+            labels[u][rank] = d
+            for w, k in adj[u]:
+                nd = d + costs[k]
+                if nd < dist.get(w, INF):
+                    dist[w] = nd
+                    heapq.heappush(heap, (nd, w))
+
+    def distance(self, s: int, t: int) -> float:
+        return _meet(self.out[s], self.into[t])
+
+    @property
+    def average_size(self) -> float:
+        n = len(self.out)
+        return sum(len(a) + len(b) for a, b in zip(self.out, self.into)) / (2 * n) if n else 0.0
+
+
+@dataclass(frozen=True)
+class ETAEstimate:
+    """Label-based ETA; the live time-dependent ETA lies in [lower_seconds, upper_seconds]."""
+
+    eta_seconds: float
+    lower_seconds: float
+    upper_seconds: float
+
+    @property
+    def max_error_seconds(self) -> float:
+        return max(self.eta_seconds - self.lower_seconds, self.upper_seconds - self.eta_seconds)
+
+
+class HubLabelIndex:
+    """Lower-, upper- and optional per-period hub labels for one graph."""
+
+    def __init__(
+        self,
+        graph: Graph,
+        mask_spec: MaskSpec = MaskSpec(),
+        per_period: bool = HUB_LABELS_PER_PERIOD,
+    ):
+        if mask_spec.depends_on_traffic:
+            raise ValueError("Hub labels cannot precompute traffic-dependent masks")
+        self.mask_spec = mask_spec
+        self.topology_epoch = graph.topology_epoch
+        self.epoch = graph.epoch
+        self.stale = False
+        self.node_ids = list(graph.nodes)
+        self.index = {nid: i for i, nid in enumerate(self.node_ids)}
+        n = len(self.node_ids)
+
+        mask = mask_for(graph, mask_spec)
+        self.edge_ids = [eid for eid in graph.edges if mask is None or not mask[eid]]
+        fwd: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+        rev: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+        for k, eid in enumerate(self.edge_ids):
+            u, v = self.index[graph.edges[eid]["u"]], self.index[graph.edges[eid]["v"]]
+            fwd[u].append((v, k))
+            rev[v].append((u, k))
+        order = [self.index[nid] for nid in reversed(nested_dissection_order(graph))]
+
+        edges = [graph.edges[eid] for eid in self.edge_ids]
+        self.lb = [edge_lower_bound(e) for e in edges]
+        self.ub = [edge_upper_bound(e) for e in edges]
+        self.lower = HubLabels(n, fwd, rev, self.lb, order)
+        self.upper = HubLabels(n, fwd, rev, self.ub, order)
+
+        self.periods = graph.time_periods() if per_period else []
+        self._starts = [start for start, _ in self.periods]
+        self.by_period = [
+            HubLabels(n, fwd, rev, [graph.edge_travel_time(e, start) for e in self.edge_ids], order)
+            for start, _ in self.periods
+        ]
+
+    def usable(self, graph: Graph) -> bool:
+        """True if the bounds still hold (same topology, live costs within the label bounds)."""
+        if graph.topology_epoch != self.topology_epoch or self.stale:
+            return False
+        if graph.epoch != self.epoch:
+            changed = graph.changed_edges_since(self.epoch)
+            if changed is None:
+                self.stale = True
+                return False
+            position = getattr(self, "_position", None)
+            if position is None:
+                position = self._position = {eid: k for k, eid in enumerate(self.edge_ids)}
+            for eid in changed:
+                k = position.get(eid)
+                if k is None:
+                    continue  # masked out
+                if not within_bounds(graph.edges[eid], self.lb[k], self.ub[k]):
+                    self.stale = True
+                    return False
+            self.epoch = graph.epoch
+        return True
+
+    def estimate(self, source: int, target: int, depart_time_dt) -> Optional[ETAEstimate]:
+        """Label ETA for source -> target; None if either node is unknown or unreachable."""
+        s, t = self.index.get(source), self.index.get(target)
+        if s is None or t is None:
+            return None
+        lower = self.lower.distance(s, t)
+        if lower == INF:
+            return None
+        upper = self.upper.distance(s, t)
+        eta = lower
+        if self.by_period:
+            day_t = _ensure_utc(depart_time_dt).timestamp() % 86400
+            p = bisect.bisect_right(self._starts, day_t) - 1
+            eta = min(max(self.by_period[p].distance(s, t), lower), upper)
+        return ETAEstimate(eta, lower, upper)
+
+    @property
+    def average_label_size(self) -> float:
+        return self.lower.average_size
+
+
+class HubLabelRouter(RefreshingRouter):
+    """
+    Keeps a HubLabelIndex current for one graph.
+
+    The index is built on a background thread on first use and rebuilt when
+    the topology changes or traffic moves a cost outside its bounds; until
+    then estimate() returns None and callers search.
+    """
+
+    thread_name = "hub-labels"
+
+    def __init__(
+        self, graph: Graph, mask_spec: MaskSpec = MaskSpec(), per_period: Optional[bool] = None
+    ):
+        super().__init__(graph, mask_spec)
+        self.per_period = HUB_LABELS_PER_PERIOD if per_period is None else per_period
+        self.index: Optional[HubLabelIndex] = None
+
+    def estimate(
+        self, source: int, target: int, depart_time_dt, mask_spec: Optional[MaskSpec] = None
+    ) -> Optional[ETAEstimate]:
+        index = self.index
+        if not self._serves(mask_spec):
+            return self._count(None)
+        if index is None or not index.usable(self.graph):
+            self.refresh_async()
+            return self._count(None)
+        return self._count(index.estimate(source, target, depart_time_dt))
+
+    def refresh(self) -> None:
+        """Rebuild the labels from the current graph and swap them in."""
+        self.index = HubLabelIndex(self.graph, self.mask_spec, self.per_period)
+
+    def _index_stats(self) -> Dict[str, object]:
+        index = self.index
+        return {
+            "ready": index is not None,
+            "average_label_size": index.average_label_size if index else 0.0,
+            "periods": len(index.periods) if index else 0,
+        }
@@ -0,0 +1,261 @@
+"""
+Incremental route maintenance (Lifelong Planning A* style repair).
+
+A fresh search per traffic update re-settles every node closer than the
+destination even when one edge changed. IncrementalRoute keeps the search
+state of one active route — g (settled arrival epoch), rhs (one-step
+lookahead) and the best incoming edge per node — and, when edges change,
+re-examines only the nodes whose rhs moved, exactly like LPA* with a zero
+heuristic.
+
+Edge costs stay time-dependent: rhs(v) = min over incoming (u, e) of
+g(u) + edge_travel_time(e, g(u)), so repaired routes match a fresh
+time-dependent Dijkstra on FIFO networks.
+
+As the ambulance moves, advance() re-roots the state at its current node:
+the subtree below the new root is kept and only the rest is re-derived.
+When it reaches that node earlier or later than the tree predicts, the kept
+labels are shifted by the difference; edges whose cost differs at the
+shifted time (their tail's label crossed a time-period boundary) are then
+re-evaluated like traffic changes, so the state is only rebuilt when the
+node is not settled in the current tree.
+
+Usage:
+    router = IncrementalRoute(graph, source, target, depart_dt)
+    result = router.route()                       # first call = full search
+    graph.apply_edge_update(...)
+    result = router.reroute_from(current_node, now)   # repairs only what changed
+"""
+
+import heapq
+import math
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.customizing import period_index, period_starts
+from core.graph import Graph
+from core.masks import MaskSpec, mask_for
+from core.routing import RouteResult, SearchStats, _ensure_utc, _settled_recorder
+
+INF = math.inf
+
+# Arrival epochs this close are treated as the same instant (datetime rounding).
+TIME_EPS = 1e-3
+
+
+class IncrementalRoute:
+    def __init__(
+        self,
+        graph: Graph,
+        source: int,
+        target: int,
+        depart_time_dt,
+        mask_spec: Optional[MaskSpec] = None,
+    ):
+        self.graph = graph
+        self.target = target
+        self.mask_spec = mask_spec
+        self.full_searches = 0
+        self.repairs = 0
+        self._lock = threading.Lock()
+        self._reset(source, _ensure_utc(depart_time_dt).timestamp())
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def reroute_from(
+        self, node: int, depart_time_dt, stats: Optional[SearchStats] = None
+    ) -> RouteResult:
+        """advance() then route(), atomically with respect to other callers."""
+        with self._lock:
+            self.advance(node, depart_time_dt)
+            return self.route(stats)
+
+    def route(self, stats: Optional[SearchStats] = None) -> RouteResult:
+        """Bring the state up to date with the graph and return the best route."""
+        self._sync()
+        self._compute(stats)
+        t = self.target
+        if self.g.get(t, INF) == INF:
+            return RouteResult()
+        path = [t]
+        edge_ids: List[int] = []
+        while path[-1] != self.root:
+            u, eid = self.parent[path[-1]]
+            path.append(u)
+            edge_ids.append(eid)
+        path.reverse()
+        edge_ids.reverse()
+        return RouteResult(path, edge_ids, [self.g[v] for v in path])
+
+    def advance(self, node: int, depart_time_dt) -> None:
+        """Re-root the search at node, departing at depart_time_dt."""
+        ts = _ensure_utc(depart_time_dt).timestamp()
+        if node == self.root and abs(ts - self.depart_ts) <= TIME_EPS:
+            return
+        self._sync()
+        self._compute()
+        g_node = self.g.get(node, INF)
+        if g_node == INF or g_node != self.rhs.get(node, INF):
+            self._reset(node, ts)
+            return
+        delta = ts - g_node
+        self._reroot(node, delta if abs(delta) > TIME_EPS else 0.0)
+
+    # ------------------------------------------------------------------
+    # State management
+    # ------------------------------------------------------------------
+
+    def _reset(self, source: int, depart_ts: float) -> None:
+        self.root = source
+        self.depart_ts = depart_ts
+        self.epoch = self.graph.epoch
+        self.topology_epoch = self.graph.topology_epoch
+        self.mask = mask_for(self.graph, self.mask_spec)
+        self._starts = period_starts(self.graph)
+        self._time_invariant = len(self._starts) == 1
+        self.g: Dict[int, float] = {}
+        self.rhs: Dict[int, float] = {source: depart_ts}
+        self.parent: Dict[int, Tuple[int, int]] = {}
+        self.heap: List[Tuple[float, int]] = [(depart_ts, source)]
+        self.full_searches += 1
+
+    def _sync(self) -> None:
+        """Pull edge changes from the graph and re-evaluate their heads."""
+        if self.graph.epoch == self.epoch:
+            return
+        changed = self.graph.changed_edges_since(self.epoch)
+        mask = mask_for(self.graph, self.mask_spec)
+        if changed is None or mask is not self.mask:
+            self._reset(self.root, self.depart_ts)
+            return
+        self.epoch = self.graph.epoch
+        if not changed:
+            return
+        self.repairs += 1
+        for eid in changed:
+            self._update_rhs(self.graph.edges[eid]["v"])
+
+    def _reroot(self, node: int, delta: float = 0.0) -> None:
+        """
+        Keep node's subtree, shifted by delta seconds, forget everything else,
+        and re-derive the frontier.
+        """
+        children: Dict[int, List[int]] = {}
+        for v, (u, _) in self.parent.items():
+            children.setdefault(u, []).append(v)
+        keep: Set[int] = {node}
+        stack = [node]
+        while stack:
+            for c in children.get(stack.pop(), ()):
+                keep.add(c)
+                stack.append(c)
+
+        # A uniform shift keeps every label exact except across edges whose
+        # cost differs at the shifted time; their heads are re-evaluated.
+        dirty: Set[int] = set()
+        if delta and not self._time_invariant:
+            graph, starts = self.graph, self._starts
+            for u in keep:
+                gu = self.g.get(u, INF)
+                if gu == INF or period_index(starts, gu) == period_index(starts, gu + delta):
+                    continue
+                for v, eid in graph.neighbors(u):
+                    if graph.edge_travel_time(eid, gu) != graph.edge_travel_time(eid, gu + delta):
+                        dirty.add(v)
+
+        self.root = node
+        self.g = {v: x + delta for v, x in self.g.items() if v in keep}
+        self.rhs = {v: x + delta for v, x in self.rhs.items() if v in keep}
+        self.parent = {v: p for v, p in self.parent.items() if v in keep and v != node}
+        self.depart_ts = self.g[node]
+
+        # Nodes outside the subtree can only be reached through it now.
+        frontier = {
+            v for u in keep for v, _ in self.graph.neighbors(u) if v not in keep and v != node
+        }
+        for v in frontier | dirty:
+            self._update_rhs(v, push=False)
+        self.heap = [(min(self.g.get(v, INF), r), v) for v, r in self.rhs.items()]
+        self.heap = [(k, v) for k, v in self.heap if self.g.get(v, INF) != self.rhs[v]]
+        heapq.heapify(self.heap)
+
+    # ------------------------------------------------------------------
+    # LPA* core
+    # ------------------------------------------------------------------
+
+    def _key(self, v: int) -> float:
+        return min(self.g.get(v, INF), self.rhs.get(v, INF))
+
+    def _update_rhs(self, v: int, push: bool = True) -> None:
+        if v == self.root:
+            return
+        best, best_parent = INF, None
+        mask = self.mask
+        for u, eid in self.graph.in_neighbors(v):
+            gu = self.g.get(u, INF)
+            if gu == INF or (mask is not None and mask[eid]):
+                continue
+            cand = gu + self.graph.edge_travel_time(eid, gu)
+            if cand < best:
+                best, best_parent = cand, (u, eid)
+        if best_parent is None:
+            self.rhs.pop(v, None)
+            self.parent.pop(v, None)
+        else:
+            self.rhs[v] = best
+            self.parent[v] = best_parent
+        if push and self.g.get(v, INF) != best:
+            heapq.heappush(self.heap, (self._key(v), v))
+
+    def _compute(self, stats: Optional[SearchStats] = None) -> None:
+        """
+        Process inconsistent nodes until the target is settled.
+
+        In stats, pushes counts only this kernel's heap pushes (not those
+        queued by _update_rhs) and peak_heap the heap size it observed.
+        """
+        g, rhs, heap, graph, mask = self.g, self.rhs, self.heap, self.graph, self.mask
+        t = self.target
+        record = _settled_recorder(stats)
+        settled = pushes = stale = relaxed = 0
+        peak = len(heap)
+        while heap:
+            k, u = heap[0]
+            target_key = self._key(t)
+            if k >= target_key and g.get(t, INF) == rhs.get(t, INF):
+                break
+            heapq.heappop(heap)
+            gu, ru = g.get(u, INF), rhs.get(u, INF)
+            if gu == ru or k != min(gu, ru):
+                stale += 1
+                continue  # stale entry
+            settled += 1
+            if record is not None:
+                record(u)
+            if gu > ru:
+                g[u] = ru
+                for v, eid in graph.neighbors(u):
+                    if v == self.root or (mask is not None and mask[eid]):
+                        continue
+                    relaxed += 1
+                    cand = ru + graph.edge_travel_time(eid, ru)
+                    if cand < rhs.get(v, INF):
+                        rhs[v] = cand
+                        self.parent[v] = (u, eid)
+                        heapq.heappush(heap, (min(g.get(v, INF), cand), v))
+                        pushes += 1
+            else:
+                g.pop(u, None)
+                if ru != INF:
+                    heapq.heappush(heap, (ru, u))
+                for v, _ in graph.neighbors(u):
+                    p = self.parent.get(v)
+                    if p is not None and p[0] == u:
+                        relaxed += 1
+                        self._update_rhs(v)
+            if len(heap) > peak:
+                peak = len(heap)
+        if stats is not None:
+            stats.add(settled, pushes, stale, relaxed, peak)
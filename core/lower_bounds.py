@@ -0,0 +1,182 @@
+"""
+Per-edge lower-bound travel times and the graph's maximum speed.
+
+An edge's cost varies with its time bucket and with traffic updates. Its
+lower bound is the cheapest it can be at any time of day under the current
+overrides:
+
+  absolute_time set -> absolute_time
+  otherwise         -> min(avg_time over time_buckets, base_time if some part
+                       of the day has no bucket) * multiplier
+
+Dividing each edge's straight-line length by its lower bound gives the
+fastest speed any edge allows. Straight-line distance to the target divided
+by that speed never overestimates the remaining time (triangle inequality),
+so it is an admissible A* heuristic, and it is as tight as a single speed
+can be on this graph.
+
+Bounds are maintained from the graph's edge change log: a traffic update
+touching k edges costs O(k), plus a full max-speed scan only when the
+fastest edge itself slowed down.
+
+Usage:
+    from core.lower_bounds import cached_lower_bounds
+    bounds = cached_lower_bounds(graph)
+    bounds.edge_lb[edge_id], bounds.max_speed_ms
+"""
+
+import math
+import threading
+import weakref
+from typing import Any, Dict, Iterable, Tuple
+
+from core.graph import Graph
+from core.routing import haversine_distance
+
+SECONDS_PER_DAY = 86400
+
+# Relative tolerance for float comparisons between stored and live bounds.
+EPS = 1e-9
+
+
+def _buckets_cover_day(buckets) -> bool:
+    covered = 0.0
+    for b in sorted(buckets, key=lambda b: b["start"]):
+        if b["start"] > covered:
+            return False
+        covered = max(covered, b["end"])
+    return covered >= SECONDS_PER_DAY
+
+
+def edge_lower_bound(edge: Dict[str, Any]) -> float:
+    """Smallest travel time edge can have at any departure time under its current overrides."""
+    if edge.get("absolute_time") is not None:
+        return float(edge["absolute_time"])
+    buckets = edge["time_buckets"]
+    times = [b["avg_time"] for b in buckets]
+    if not buckets or not _buckets_cover_day(buckets):
+        times.append(edge["base_time"])
+    return min(times) * edge.get("multiplier", 1.0)
+
+
+def edge_upper_bound(edge: Dict[str, Any]) -> float:
+    """Largest travel time edge can have at any departure time under its current overrides."""
+    if edge.get("absolute_time") is not None:
+        return float(edge["absolute_time"])
+    buckets = edge["time_buckets"]
+    times = [b["avg_time"] for b in buckets]
+    if not buckets or not _buckets_cover_day(buckets):
+        times.append(edge["base_time"])
+    return max(times) * edge.get("multiplier", 1.0)
+
+
+def within_bounds(edge: Dict[str, Any], lb: float, ub: float) -> bool:
+    """True if edge's current bounds still lie within [lb, ub], up to EPS."""
+    return edge_lower_bound(edge) >= lb * (1 - EPS) and edge_upper_bound(edge) <= ub * (1 + EPS)
+
+
+class LowerBoundIndex:
+    """Lower-bound cost per edge and the resulting maximum speed, kept current incrementally."""
+
+    def __init__(self, graph: Graph):
+        self._lock = threading.Lock()
+        self.rebuild(graph)
+
+    def rebuild(self, graph: Graph) -> None:
+        # The epochs are published last: refresh() skips work once they match,
+        # so a concurrent reader must never see them ahead of the bounds.
+        epoch, topology_epoch = graph.epoch, graph.topology_epoch
+        length_m: Dict[int, float] = {}
+        for eid, e in graph.edges.items():
+            a, b = graph.nodes[e["u"]], graph.nodes[e["v"]]
+            length_m[eid] = haversine_distance(a["lat"], a["lon"], b["lat"], b["lon"])
+        edge_lb: Dict[int, float] = {}
+        speed: Dict[int, float] = {}
+        _bounds_into(graph, graph.edges, length_m, edge_lb, speed, 0.0)
+        self.length_m, self.edge_lb, self.speed = length_m, edge_lb, speed
+        self._max_speed = max(speed.values(), default=0.0)
+        self.topology_epoch = topology_epoch
+        self.epoch = epoch
+
+    def refresh(self, graph: Graph) -> None:
+        """Bring the bounds up to date with graph's current epoch."""
+        if graph.epoch == self.epoch:
+            return
+        with self._lock:
+            if graph.epoch == self.epoch:
+                return
+            epoch = graph.epoch
+            changed = graph.changed_edges_since(self.epoch)
+            if changed is None:
+                self.rebuild(graph)
+                return
+            max_speed, fastest_slowed = _bounds_into(
+                graph, changed, self.length_m, self.edge_lb, self.speed, self._max_speed
+            )
+            if fastest_slowed:
+                max_speed = max(self.speed.values(), default=0.0)
+            self._max_speed = max_speed
+            self.epoch = epoch
+
+    @property
+    def max_speed_ms(self) -> float:
+        """Fastest straight-line speed any edge allows; inf if some edge is free."""
+        return self._max_speed
+
+    def heuristic_seconds(self, graph: Graph, u: int, target: int) -> float:
+        """Admissible estimate of the travel time from u to target."""
+        if self._max_speed == 0.0:
+            return 0.0
+        a, b = graph.nodes[u], graph.nodes[target]
+        return haversine_distance(a["lat"], a["lon"], b["lat"], b["lon"]) / self._max_speed
+
+
+def _bounds_into(
+    graph: Graph,
+    edge_ids: Iterable[int],
+    length_m: Dict[int, float],
+    edge_lb: Dict[int, float],
+    speeds: Dict[int, float],
+    current_max: float,
+) -> Tuple[float, bool]:
+    """
+    Write the bounds and speeds of edge_ids into edge_lb / speeds. Returns the
+    new maximum speed, valid unless the second value (the fastest edge got
+    slower) asks for a rescan.
+    """
+    fastest_slowed = False
+    for eid in edge_ids:
+        lb = edge_lower_bound(graph.edges[eid])
+        length = length_m[eid]
+        if length == 0.0:
+            speed = 0.0
+        elif lb <= 0.0:
+            speed = math.inf
+        else:
+            speed = length / lb
+        old = speeds.get(eid, 0.0)
+        edge_lb[eid] = lb
+        speeds[eid] = speed
+        if speed > current_max:
+            current_max = speed
+        elif old == current_max and speed < old:
+            fastest_slowed = True
+    return current_max, fastest_slowed
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+_bounds_cache: "weakref.WeakKeyDictionary[Graph, LowerBoundIndex]" = weakref.WeakKeyDictionary()
+
+
+def cached_lower_bounds(graph: Graph) -> LowerBoundIndex:
+    """Return the LowerBoundIndex for graph, applying only the edge changes since last call."""
+    bounds = _bounds_cache.get(graph)
+    if bounds is None or bounds.topology_epoch != graph.topology_epoch:
+        bounds = LowerBoundIndex(graph)
+        _bounds_cache[graph] = bounds
+    else:
+        bounds.refresh(graph)
+    return bounds
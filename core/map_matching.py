@@ -0,0 +1,156 @@
+"""
+Online HMM map matching of GPS pings to road edges.
+
+Each ping's hidden state is the point on the road network the vehicle is
+actually at; candidates are the nearby edges from the spatial index.
+
+  emission   -> Gaussian in the ping's distance to the candidate edge
+  transition -> exponential in |network distance - straight-line distance|
+                between consecutive pings (Newson & Krumm, 2009)
+
+Network distance is only evaluated between candidates that are on the same
+edge or within two edges of each other; anything further apart gets a fixed
+penalty. Together with a bounded candidate set this keeps every ping at
+O(candidates²) with a small constant — no shortest-path search per ping.
+
+The matcher runs the Viterbi forward pass one ping at a time and reports
+the best state so far, keeping only the previous ping's candidates and
+scores per vehicle.
+
+Usage:
+    matcher = MapMatcher(graph)
+    match = matcher.match("AMB-1", lat, lon, preferred_edges=route_edges)
+    if match is not None:
+        match.edge_id, match.fraction
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Collection, Dict, Hashable, List, Optional
+
+from core.config import (
+    GPS_SIGMA_M,
+    MATCH_BETA_M,
+    MATCH_MAX_CANDIDATES,
+    MATCH_OFF_ROUTE_PENALTY,
+    MATCH_RADIUS_M,
+)
+from core.graph import Graph
+from core.routing import haversine_distance
+from core.spatial import EdgeCandidate, EdgeGrid, cached_edge_grid
+
+# Log-probability of a transition between candidates more than two edges apart.
+UNCONNECTED_LOG_PROB = -10.0
+
+
+@dataclass
+class _Track:
+    topology_epoch: int
+    lat: float
+    lon: float
+    candidates: List[EdgeCandidate]
+    scores: List[float]
+
+
+class MapMatcher:
+    """Per-vehicle incremental Viterbi over nearby edge candidates."""
+
+    def __init__(
+        self,
+        graph: Graph,
+        sigma_m: float = GPS_SIGMA_M,
+        beta_m: float = MATCH_BETA_M,
+        radius_m: float = MATCH_RADIUS_M,
+        max_candidates: int = MATCH_MAX_CANDIDATES,
+        off_route_penalty: float = MATCH_OFF_ROUTE_PENALTY,
+    ):
+        self.graph = graph
+        self.sigma_m = sigma_m
+        self.beta_m = beta_m
+        self.radius_m = radius_m
+        self.max_candidates = max_candidates
+        self.off_route_penalty = off_route_penalty
+        self._tracks: Dict[Hashable, _Track] = {}
+        self._lock = threading.Lock()
+
+    def match(
+        self,
+        key: Hashable,
+        lat: float,
+        lon: float,
+        preferred_edges: Optional[Collection[int]] = None,
+    ) -> Optional[EdgeCandidate]:
+        """
+        Feed one ping for vehicle key and return its most likely position.
+
+        preferred_edges (e.g. the vehicle's planned route) are favoured over
+        other candidates. Returns None when no edge is within radius_m; the
+        vehicle's previous state is kept so one bad fix does not reset it.
+        """
+        grid = cached_edge_grid(self.graph)
+        cands = grid.candidates(lat, lon, self.radius_m, self.max_candidates)
+        if not cands:
+            return None
+
+        emissions = []
+        for c in cands:
+            score = -0.5 * (c.distance_m / self.sigma_m) ** 2
+            if preferred_edges is not None and c.edge_id not in preferred_edges:
+                score -= self.off_route_penalty
+            emissions.append(score)
+
+        with self._lock:
+            prev = self._tracks.get(key)
+            if prev is None or prev.topology_epoch != grid.topology_epoch:
+                scores = emissions
+            else:
+                straight = haversine_distance(prev.lat, prev.lon, lat, lon)
+                scores = [
+                    max(
+                        s + self._transition(grid, p, c, straight)
+                        for p, s in zip(prev.candidates, prev.scores)
+                    )
+                    + em
+                    for c, em in zip(cands, emissions)
+                ]
+            # Renormalise so scores do not drift towards -inf over a long trip.
+            top = max(scores)
+            scores = [s - top for s in scores]
+            self._tracks[key] = _Track(grid.topology_epoch, lat, lon, cands, scores)
+        return cands[scores.index(0.0)]
+
+    def forget(self, key: Hashable) -> None:
+        """Drop the matching state for key (trip finished or reassigned)."""
+        with self._lock:
+            self._tracks.pop(key, None)
+
+    def _transition(
+        self, grid: EdgeGrid, prev: EdgeCandidate, cur: EdgeCandidate, straight_m: float
+    ) -> float:
+        network = self._network_distance(grid, prev, cur)
+        if network is None:
+            return UNCONNECTED_LOG_PROB
+        return -abs(network - straight_m) / self.beta_m
+
+    def _network_distance(
+        self, grid: EdgeGrid, prev: EdgeCandidate, cur: EdgeCandidate
+    ) -> Optional[float]:
+        """Driving distance from prev to cur if it is at most two edges, else None."""
+        lengths = grid.lengths_m
+        if prev.edge_id == cur.edge_id:
+            # Small backwards moves are GPS jitter, not U-turns.
+            return abs(cur.fraction - prev.fraction) * lengths[cur.edge_id]
+        edges = self.graph.edges
+        head = edges[prev.edge_id]["v"]
+        tail = edges[cur.edge_id]["u"]
+        leave = (1.0 - prev.fraction) * lengths[prev.edge_id]
+        enter = cur.fraction * lengths[cur.edge_id]
+        if head == tail:
+            return leave + enter
+        best = None
+        for v, eid in self.graph.neighbors(head):
+            if v == tail:
+                via = leave + lengths[eid] + enter
+                if best is None or via < best:
+                    best = via
+        return best
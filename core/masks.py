@@ -0,0 +1,101 @@
+"""
+Precompiled edge masks for constrained routing.
+
+A mask is a bytearray indexed by edge id where a non-zero byte means "do not
+use this edge". Search kernels test it with a single index per relaxation,
+and masks are cached per graph so every query with the same constraints
+shares one compiled mask.
+
+Usage:
+    from core.masks import MaskSpec, mask_for
+    mask = mask_for(graph, MaskSpec(avoid_closures=True, vehicle_height_m=3.2))
+    result = dijkstra_route(graph, src, dst, depart, edge_mask=mask)
+"""
+
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from core.config import ROAD_CLOSURE_THRESHOLD_SEC, VEHICLE_HEIGHT_CLASSES_M
+from core.graph import Graph, TrafficOverlay
+
+
+def height_class_for(height_m: float) -> float:
+    """Round a vehicle height up to the nearest configured class."""
+    for h in VEHICLE_HEIGHT_CLASSES_M:
+        if height_m <= h:
+            return h
+    return height_m
+
+
+@dataclass(frozen=True)
+class MaskSpec:
+    """Which edges a route may not use. Hashable, so it doubles as the cache key."""
+
+    emergency_only: bool = True  # skip edges with is_emergency_allowed=False
+    avoid_closures: bool = False  # skip edges whose absolute_time marks a closure
+    height_class: Optional[float] = None  # skip edges with max_height below this
+
+    @classmethod
+    def build(
+        cls,
+        emergency_only: bool = True,
+        avoid_closures: bool = False,
+        vehicle_height_m: Optional[float] = None,
+    ) -> "MaskSpec":
+        height = height_class_for(vehicle_height_m) if vehicle_height_m else None
+        return cls(emergency_only, avoid_closures, height)
+
+    @property
+    def depends_on_traffic(self) -> bool:
+        return self.avoid_closures
+
+
+def compile_mask(graph: Graph, spec: MaskSpec) -> Optional[bytearray]:
+    """Build the mask for spec. Returns None when no edge is blocked."""
+    blocked = bytearray(max(graph.edges, default=0) + 1)
+    any_blocked = False
+    for eid, e in graph.edges.items():
+        if (
+            (spec.emergency_only and not e["is_emergency_allowed"])
+            or (
+                spec.avoid_closures
+                and e["absolute_time"] is not None
+                and e["absolute_time"] >= ROAD_CLOSURE_THRESHOLD_SEC
+            )
+            or (
+                spec.height_class is not None
+                and e.get("max_height") is not None
+                and e["max_height"] < spec.height_class
+            )
+        ):
+            blocked[eid] = 1
+            any_blocked = True
+    return blocked if any_blocked else None
+
+
+_mask_cache: "weakref.WeakKeyDictionary[Graph, Dict[MaskSpec, Tuple[int, Optional[bytearray]]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def mask_for(graph: Graph, spec: Optional[MaskSpec]) -> Optional[bytearray]:
+    """
+    Return the cached mask for spec, recompiling only when it may be stale.
+
+    Masks that only read static edge attributes are keyed on the topology
+    epoch; closure masks also depend on traffic and are keyed on graph.epoch.
+    A TrafficOverlay shares its base's masks for static specs.
+    """
+    if spec is None:
+        return None
+    if isinstance(graph, TrafficOverlay) and not spec.depends_on_traffic:
+        return mask_for(graph.base, spec)
+    stamp = graph.epoch if spec.depends_on_traffic else graph.topology_epoch
+    per_graph = _mask_cache.setdefault(graph, {})
+    cached = per_graph.get(spec)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    mask = compile_mask(graph, spec)
+    per_graph[spec] = (stamp, mask)
+    return mask
@@ -0,0 +1,353 @@
+"""
+Multi-level overlay routing (MLD style).
+
+The graph is partitioned recursively (core.partition.recursive_bisection at
+each size in MLD_CELL_SIZES; the cells nest because the bisection is
+deterministic). A node is a boundary node of its level-l cell if an edge
+enters or leaves the cell there.
+
+  Overlay(graph)          metric-independent, once per topology: cells,
+                          boundary nodes and the arcs each cell is built
+                          from (original edges at level 0, sub-cell cliques
+                          and edges between sub-cells above).
+  Overlay.customize(...)  per metric: for every cell, shortest distances
+                          between all of its boundary nodes (a clique),
+                          built bottom-up from the level below.
+  MLDMetric.update(...)   after traffic updates: only cells containing a
+                          changed edge are re-customized, level by level.
+
+A query from s to t runs Dijkstra where each node u uses the highest level
+whose cell contains neither s nor t: there it relaxes the cell's clique and
+the edges leaving the cell, so only the source and target cells are
+searched edge by edge.
+
+Like core.cch, customization evaluates time-dependent costs at one instant,
+so the overlay picks the path and the RouteResult is re-timed forward with
+full time-dependent costs. MLDRouter keeps one metric per time-bucket
+period (core.customizing); traffic updates within a period are applied to
+its metric cell by cell.
+
+Usage:
+    router = MLDRouter(graph)
+    result = router.route(src, dst, depart_dt)        # RouteResult
+    graph.apply_edge_update(...)
+    router.recustomize_async()                        # re-customizes touched cells
+"""
+
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from core.config import MLD_CELL_SIZES
+from core.customizing import CustomizingRouter, period_index, period_starts
+from core.graph import Graph
+from core.masks import MaskSpec, mask_for
+from core.partition import recursive_bisection
+from core.routing import RouteResult, SearchStats, _ensure_utc, _settled_recorder, _time_edges
+
+INF = math.inf
+
+# How a node was reached: an original edge id, or (level, cell) for a clique arc.
+Step = Union[int, Tuple[int, int]]
+
+
+class Overlay:
+    """Metric-independent part of the overlay: nested cells and their boundaries."""
+
+    def __init__(self, graph: Graph, cell_sizes: Sequence[int] = MLD_CELL_SIZES):
+        sizes = sorted(set(cell_sizes))
+        if not sizes or sizes[0] < 1:
+            raise ValueError("cell sizes must be >= 1")
+        self.topology_epoch = graph.topology_epoch
+        self.cell_sizes = sizes
+        self.cells: List[Dict[int, int]] = [recursive_bisection(graph, s) for s in sizes]
+        self.n_cells = [max(cells.values(), default=-1) + 1 for cells in self.cells]
+        self._starts = period_starts(graph)
+
+        # Per level: boundary nodes per cell, arcs a cell's clique is built from,
+        # and per node the edges leaving its cell.
+        self.boundary: List[List[List[int]]] = []
+        self.local: List[List[Dict[int, List[Tuple[int, int]]]]] = []
+        self.cut: List[Dict[int, List[Tuple[int, int]]]] = []
+        for level, cells in enumerate(self.cells):
+            lower = self.cells[level - 1] if level else None
+            boundary: List[Set[int]] = [set() for _ in range(self.n_cells[level])]
+            local: List[Dict[int, List[Tuple[int, int]]]] = [{} for _ in range(self.n_cells[level])]
+            cut: Dict[int, List[Tuple[int, int]]] = {}
+            for eid, e in graph.edges.items():
+                u, v = e["u"], e["v"]
+                cu, cv = cells[u], cells[v]
+                if cu != cv:
+                    boundary[cu].add(u)
+                    boundary[cv].add(v)
+                    cut.setdefault(u, []).append((v, eid))
+                elif lower is None or lower[u] != lower[v]:
+                    local[cu].setdefault(u, []).append((v, eid))
+            self.boundary.append([sorted(b) for b in boundary])
+            self.local.append(local)
+            self.cut.append(cut)
+
+    @property
+    def n_levels(self) -> int:
+        return len(self.cells)
+
+    def period_of(self, ts: float) -> int:
+        return period_index(self._starts, ts)
+
+    def cells_containing(self, edge_ids: Iterable[int], graph: Graph) -> List[Set[int]]:
+        """Per level, the cells that contain both ends of some edge in edge_ids."""
+        dirty: List[Set[int]] = [set() for _ in self.cells]
+        for eid in edge_ids:
+            e = graph.edges.get(eid)
+            if e is None:
+                continue
+            for level, cells in enumerate(self.cells):
+                if cells[e["u"]] == cells[e["v"]]:
+                    dirty[level].add(cells[e["u"]])
+        return dirty
+
+    def customize(self, graph: Graph, at_dt, edge_mask: Optional[bytearray] = None) -> "MLDMetric":
+        """Build every cell's clique from graph's edge costs at at_dt."""
+        at_ts = _ensure_utc(at_dt).timestamp()
+        epoch = graph.epoch  # read first: a concurrent update then marks this metric stale
+        costs = {eid: _edge_cost(graph, eid, at_ts, edge_mask) for eid in graph.edges}
+        cliques: List[List[Optional[_Clique]]] = [[None] * n for n in self.n_cells]
+        metric = MLDMetric(self, graph, costs, cliques, epoch, at_ts)
+        metric._customize_cells([set(range(n)) for n in self.n_cells])
+        return metric
+
+
+class _Clique:
+    """Boundary-to-boundary distances of one cell, with the search trees to unpack them."""
+
+    __slots__ = ("dist", "pred")
+
+    def __init__(self):
+        self.dist: Dict[int, Dict[int, float]] = {}
+        self.pred: Dict[int, Dict[int, Tuple[int, Step]]] = {}
+
+
+class MLDMetric:
+    """One customization of an Overlay; never modified once published, so safe to share."""
+
+    def __init__(
+        self,
+        overlay: Overlay,
+        graph: Graph,
+        costs: Dict[int, float],
+        cliques: List[List[Optional[_Clique]]],
+        epoch: int,
+        at_ts: float,
+    ):
+        self.overlay = overlay
+        self.graph = graph
+        self.costs = costs
+        self.cliques = cliques
+        self.epoch = epoch
+        self.at_ts = at_ts
+        self.period = overlay.period_of(at_ts)
+        self.cells_customized = 0
+
+    def update(self, at_dt, edge_mask: Optional[bytearray] = None) -> Optional["MLDMetric"]:
+        """
+        A new metric with the cells touched by traffic changes since this one
+        re-customized, or None if that is not possible (topology or period
+        changed, or the change log no longer reaches back this far).
+        """
+        graph, overlay = self.graph, self.overlay
+        at_ts = _ensure_utc(at_dt).timestamp()
+        if (
+            graph.topology_epoch != overlay.topology_epoch
+            or overlay.period_of(at_ts) != self.period
+        ):
+            return None
+        epoch = graph.epoch
+        changed = graph.changed_edges_since(self.epoch)
+        if changed is None:
+            return None
+        costs = dict(self.costs)
+        for eid in changed:
+            if eid in costs:
+                costs[eid] = _edge_cost(graph, eid, at_ts, edge_mask)
+        cliques = [list(level) for level in self.cliques]
+        metric = MLDMetric(overlay, graph, costs, cliques, epoch, at_ts)
+        metric._customize_cells(overlay.cells_containing(changed, graph))
+        return metric
+
+    def _customize_cells(self, dirty: List[Set[int]]) -> None:
+        # Bottom-up: a cell's clique is built from the cliques one level below.
+        for level, cells in enumerate(dirty):
+            for cell in sorted(cells):
+                self.cliques[level][cell] = self._customize_cell(level, cell)
+                self.cells_customized += 1
+
+    def _customize_cell(self, level: int, cell: int) -> _Clique:
+        overlay, costs = self.overlay, self.costs
+        local = overlay.local[level][cell]
+        below = overlay.cells[level - 1] if level else None
+        sub_cliques = self.cliques[level - 1] if level else None
+        boundary = overlay.boundary[level][cell]
+        clique = _Clique()
+        for b in boundary:
+            dist = {b: 0.0}
+            pred: Dict[int, Tuple[int, Step]] = {}
+            heap = [(0.0, b)]
+            while heap:
+                d, x = heapq.heappop(heap)
+                if d > dist[x]:
+                    continue
+                arcs: List[Tuple[int, float, Step]] = [
+                    (y, costs[eid], eid) for y, eid in local.get(x, ())
+                ]
+                if below is not None:
+                    sub = below[x]
+                    for y, w in sub_cliques[sub].dist.get(x, {}).items():
+                        arcs.append((y, w, (level - 1, sub)))
+                for y, w, step in arcs:
+                    nd = d + w
+                    if nd < dist.get(y, INF):
+                        dist[y] = nd
+                        pred[y] = (x, step)
+                        heapq.heappush(heap, (nd, y))
+            clique.dist[b] = {t: dist[t] for t in boundary if t != b and t in dist}
+            clique.pred[b] = pred
+        return clique
+
+    def route(
+        self, source: int, target: int, depart_time_dt, stats: Optional[SearchStats] = None
+    ) -> RouteResult:
+        """Shortest route under this metric, re-timed with time-dependent costs."""
+        overlay, graph, costs = self.overlay, self.graph, self.costs
+        levels = overlay.cells
+        if source not in levels[0] or target not in levels[0]:
+            return RouteResult()
+        depart_ts = _ensure_utc(depart_time_dt).timestamp()
+        top = range(overlay.n_levels - 1, -1, -1)
+        s_cells = [cells[source] for cells in levels]
+        t_cells = [cells[target] for cells in levels]
+        no_clique: Dict[int, float] = {}
+
+        dist = {source: 0.0}
+        pred: Dict[int, Tuple[int, Step]] = {}
+        heap = [(0.0, source)]
+        record = _settled_recorder(stats)
+        settled = pushes = stale = relaxed = peak = 0
+        while heap:
+            d, x = heapq.heappop(heap)
+            if x == target:
+                break
+            if d > dist[x]:
+                stale += 1
+                continue
+            settled += 1
+            if record is not None:
+                record(x)
+            # Highest level whose cell around x holds neither endpoint.
+            for level in top:
+                cell = levels[level][x]
+                if cell != s_cells[level] and cell != t_cells[level]:
+                    edges = overlay.cut[level].get(x, ())
+                    clique = self.cliques[level][cell].dist.get(x, no_clique)
+                    step = (level, cell)
+                    break
+            else:
+                edges, clique = graph.neighbors(x), no_clique
+            for y, eid in edges:
+                relaxed += 1
+                nd = d + costs[eid]
+                if nd < dist.get(y, INF):
+                    dist[y] = nd
+                    pred[y] = (x, eid)
+                    heapq.heappush(heap, (nd, y))
+                    pushes += 1
+            for y, w in clique.items():
+                relaxed += 1
+                nd = d + w
+                if nd < dist.get(y, INF):
+                    dist[y] = nd
+                    pred[y] = (x, step)
+                    heapq.heappush(heap, (nd, y))
+                    pushes += 1
+            if len(heap) > peak:
+                peak = len(heap)
+
+        if stats is not None:
+            stats.add(settled, pushes, stale, relaxed, peak)
+        if target not in dist or dist[target] == INF:
+            return RouteResult()
+        return _time_edges(graph, source, self._unpack(pred, source, target), depart_ts)
+
+    def _unpack(self, pred, source: int, target: int) -> List[int]:
+        """Expand the overlay path into original edge ids, in travel order."""
+        hops: List[Tuple[int, int, Step]] = []
+        v = target
+        while v != source:
+            u, step = pred[v]
+            hops.append((u, v, step))
+            v = u
+        edge_ids: List[int] = []
+        stack = hops  # reversed travel order: pop() yields the first hop
+        while stack:
+            u, v, step = stack.pop()
+            if isinstance(step, int):
+                edge_ids.append(step)
+                continue
+            level, cell = step
+            tree = self.cliques[level][cell].pred[u]
+            w = v
+            while w != u:
+                x, inner = tree[w]
+                stack.append((x, w, inner))
+                w = x
+        return edge_ids
+
+
+class MLDRouter(CustomizingRouter):
+    """
+    Serves overlay queries for one graph while customizations are updated.
+
+    The Overlay is rebuilt when the graph topology changes. Metrics, one per
+    MaskSpec and time period in use, are managed by CustomizingRouter; after
+    traffic updates only the touched cells are re-customized.
+    """
+
+    thread_name = "mld-customize"
+
+    def __init__(self, graph: Graph, cell_sizes: Optional[Sequence[int]] = None):
+        super().__init__(graph)
+        self.cell_sizes = tuple(cell_sizes) if cell_sizes else MLD_CELL_SIZES
+        self.updates = 0
+        self.cells_customized = 0
+
+    def stats(self) -> Dict[str, object]:
+        overlay = self.structure
+        return {
+            "levels": overlay.n_levels if overlay else 0,
+            "cells": overlay.n_cells if overlay else [],
+            "customizations": self.customizations,
+            "updates": self.updates,
+            "cells_recustomized": self.cells_customized,
+        }
+
+    def _build(self) -> Overlay:
+        return Overlay(self.graph, self.cell_sizes)
+
+    def _customize(self, overlay: Overlay, spec: Optional[MaskSpec], at_dt) -> MLDMetric:
+        self.customizations += 1
+        return overlay.customize(self.graph, at_dt, mask_for(self.graph, spec))
+
+    def _refresh(
+        self, overlay: Overlay, spec: Optional[MaskSpec], at_dt, old: Optional[MLDMetric]
+    ) -> MLDMetric:
+        new = old.update(at_dt, mask_for(self.graph, spec)) if old is not None else None
+        if new is None:
+            return self._customize(overlay, spec, at_dt)
+        self.updates += 1
+        self.cells_customized += new.cells_customized
+        return new
+
+
+def _edge_cost(graph: Graph, eid: int, at_ts: float, edge_mask: Optional[bytearray]) -> float:
+    if edge_mask is not None and edge_mask[eid]:
+        return INF
+    return graph.edge_travel_time(eid, at_ts)
@@ -0,0 +1,291 @@
+"""
+Monte Carlo scenario runner.
+
+Runs many randomized SimulationEngine scenarios — one ambulance trip and
+its TrafficInjections each — to tune REROUTE_THRESHOLD_SEC or test surge
+plans. Every scenario runs on its own TrafficOverlay of one shared base
+graph, so injections never leak between scenarios and no graph is copied.
+
+With workers > 1 the base graph is published once into shared memory (as
+route_many does) and each worker process rebuilds it at start-up; tasks
+carry only the scenario, results only a few numbers. Scenarios need a
+mutable Graph under their overlays, so unlike route_many every worker
+holds a private dict Graph for the whole run: shared memory only saves
+pickling the graph to each worker, and the mapping is released once the
+copy is built. Outcomes are aggregated into distributions of ETA, reroute
+count and time saved.
+
+Usage:
+    scenarios = random_scenarios(graph, 1000, depart_dt, seed=1)
+    result = run_scenarios(graph, scenarios, reroute_threshold_sec=90, workers=8)
+    result.summary()
+    by_threshold = sweep_thresholds(graph, scenarios, [30, 60, 120, 240])
+"""
+
+import datetime
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from core.config import REROUTE_THRESHOLD_SEC
+from core.graph import EdgeUpdate, Graph, TrafficOverlay
+from core.masks import MaskSpec
+from core.routing import _ensure_utc
+from core.simulator import NoRouteError, SimulationEngine, TrafficInjection
+
+# ---------------------------------------------------------------------------
+# Data classes
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Scenario:
+    start_node: int
+    end_node: int
+    depart_dt: datetime.datetime
+    traffic_injections: List[TrafficInjection] = field(default_factory=list)
+    label: str = ""
+
+
+@dataclass
+class ScenarioOutcome:
+    index: int  # position of the scenario in the input
+    found: bool  # False when there was no route at departure
+    eta_seconds: Optional[float]
+    reroutes: int
+    saved_seconds: float
+
+
+@dataclass
+class Distribution:
+    count: int
+    mean: Optional[float]
+    minimum: Optional[float]
+    p50: Optional[float]
+    p90: Optional[float]
+    p95: Optional[float]
+    p99: Optional[float]
+    maximum: Optional[float]
+
+    @classmethod
+    def of(cls, values: Iterable[float]) -> "Distribution":
+        ordered = sorted(values)
+        n = len(ordered)
+        if not n:
+            return cls(0, None, None, None, None, None, None, None)
+
+        def pct(p: float) -> float:
+            # Nearest-rank percentile.
+            return ordered[min(n - 1, max(0, int(p * n + 0.5) - 1))]
+
+        return cls(
+            n,
+            sum(ordered) / n,
+            ordered[0],
+            pct(0.5),
+            pct(0.9),
+            pct(0.95),
+            pct(0.99),
+            ordered[-1],
+        )
+
+
+@dataclass
+class MonteCarloResult:
+    reroute_threshold_sec: float
+    outcomes: List[ScenarioOutcome]  # in input order
+    wall_seconds: float
+
+    @property
+    def unroutable(self) -> int:
+        return sum(not o.found for o in self.outcomes)
+
+    @property
+    def eta(self) -> Distribution:
+        return Distribution.of(o.eta_seconds for o in self.outcomes if o.found)
+
+    @property
+    def reroutes(self) -> Distribution:
+        return Distribution.of(o.reroutes for o in self.outcomes if o.found)
+
+    @property
+    def saved(self) -> Distribution:
+        return Distribution.of(o.saved_seconds for o in self.outcomes if o.found)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "reroute_threshold_sec": self.reroute_threshold_sec,
+            "scenarios": len(self.outcomes),
+            "unroutable": self.unroutable,
+            "eta_seconds": self.eta.__dict__,
+            "reroutes": self.reroutes.__dict__,
+            "saved_seconds": self.saved.__dict__,
+            "wall_seconds": self.wall_seconds,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Scenario generation
+# ---------------------------------------------------------------------------
+
+
+def random_scenarios(
+    graph: Graph,
+    n: int,
+    depart_dt,
+    seed: int = 0,
+    injections_per_scenario: int = 3,
+    edges_per_injection: int = 5,
+    multiplier_range: Tuple[float, float] = (0.5, 5.0),
+    window_sec: float = 1800.0,
+    edges: Optional[Sequence[int]] = None,
+) -> List[Scenario]:
+    """
+    n scenarios with random endpoints, departing at depart_dt, each with
+    injections at random times within window_sec of departure that set
+    random multipliers on edges drawn from edges (default: all edges).
+    """
+    rng = random.Random(seed)
+    depart_dt = _ensure_utc(depart_dt)
+    nodes = list(graph.nodes)
+    pool = list(edges if edges is not None else graph.edges)
+    k = min(edges_per_injection, len(pool))
+    lo, hi = multiplier_range
+    scenarios = []
+    for i in range(n):
+        start, end = rng.sample(nodes, 2)
+        injections = [
+            TrafficInjection(
+                trigger_at=depart_dt + datetime.timedelta(seconds=rng.uniform(0, window_sec)),
+                edge_updates=[
+                    EdgeUpdate(edge_id=eid, multiplier=rng.uniform(lo, hi))
+                    for eid in rng.sample(pool, k)
+                ],
+            )
+            for _ in range(injections_per_scenario)
+        ]
+        injections.sort(key=lambda inj: inj.trigger_at)
+        scenarios.append(Scenario(start, end, depart_dt, injections, f"scenario-{i}"))
+    return scenarios
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+
+def run_scenario(
+    base: Graph,
+    index: int,
+    scenario: Scenario,
+    reroute_threshold_sec: float = REROUTE_THRESHOLD_SEC,
+    mask_spec: Optional[MaskSpec] = None,
+) -> ScenarioOutcome:
+    """Simulate one scenario on a fresh overlay of base; base is left untouched."""
+    engine = SimulationEngine(TrafficOverlay(base), reroute_threshold_sec, mask_spec)
+    saved = [0.0]
+
+    def on_event(ev) -> None:
+        if ev.kind == "REROUTE":
+            saved[0] += ev.data.get("time_saved_sec", 0.0)
+
+    try:
+        result = engine.run(
+            scenario.label or f"scenario-{index}",
+            scenario.start_node,
+            scenario.end_node,
+            scenario.depart_dt,
+            scenario.traffic_injections,
+            on_event=on_event,
+            record_events=False,
+            segment_events=False,
+        )
+    except NoRouteError:
+        return ScenarioOutcome(index, False, None, 0, 0.0)
+    return ScenarioOutcome(index, True, result.total_seconds, result.reroutes, saved[0])
+
+
+def run_scenarios(
+    graph: Graph,
+    scenarios: Sequence[Scenario],
+    reroute_threshold_sec: float = REROUTE_THRESHOLD_SEC,
+    workers: Optional[int] = None,
+    chunksize: int = 8,
+    mask_spec: Optional[MaskSpec] = None,
+) -> MonteCarloResult:
+    """
+    Simulate every scenario, each on its own overlay of graph.
+
+    workers=None uses every CPU; workers=1 runs in-process.
+    """
+    return sweep_thresholds(
+        graph, scenarios, [reroute_threshold_sec], workers, chunksize, mask_spec
+    )[reroute_threshold_sec]
+
+
+def sweep_thresholds(
+    graph: Graph,
+    scenarios: Sequence[Scenario],
+    thresholds: Sequence[float],
+    workers: Optional[int] = None,
+    chunksize: int = 8,
+    mask_spec: Optional[MaskSpec] = None,
+) -> Dict[float, MonteCarloResult]:
+    """Run every scenario at every reroute threshold in one pool; results by threshold."""
+    start = time.perf_counter()
+    tasks = [(i, s, th) for th in thresholds for i, s in enumerate(scenarios)]
+    by_threshold: Dict[float, List[ScenarioOutcome]] = {th: [] for th in thresholds}
+    for th, outcome in _run(graph, tasks, workers, chunksize, mask_spec):
+        by_threshold[th].append(outcome)
+    wall = time.perf_counter() - start
+    return {
+        th: MonteCarloResult(th, sorted(outcomes, key=lambda o: o.index), wall)
+        for th, outcomes in by_threshold.items()
+    }
+
+
+# Per-worker state, set once by _init_worker.
+_worker_graph = None
+_worker_mask_spec = None
+
+
+def _init_worker(handle: dict, mask_spec) -> None:
+    global _worker_graph, _worker_mask_spec
+    from core.csr import attach_shared
+
+    shm, csr = attach_shared(handle)
+    _worker_graph = csr.to_graph()
+    _worker_mask_spec = mask_spec
+    # The Graph is a private copy; drop the views before unmapping the block.
+    del csr
+    shm.close()
+
+
+def _scenario_task(task: Tuple[int, Scenario, float]) -> Tuple[float, ScenarioOutcome]:
+    index, scenario, threshold = task
+    return threshold, run_scenario(_worker_graph, index, scenario, threshold, _worker_mask_spec)
+
+
+def _run(graph, tasks, workers, chunksize, mask_spec) -> Iterator[Tuple[float, ScenarioOutcome]]:
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        for index, scenario, threshold in tasks:
+            yield threshold, run_scenario(graph, index, scenario, threshold, mask_spec)
+        return
+
+    import multiprocessing
+
+    from core.csr import cached_csr, publish_shared
+
+    shm, handle = publish_shared(cached_csr(graph))
+    ctx = multiprocessing.get_context("spawn")
+    pool = ctx.Pool(workers, initializer=_init_worker, initargs=(handle, mask_spec))
+    try:
+        yield from pool.imap_unordered(_scenario_task, tasks, chunksize=chunksize)
+    finally:
+        pool.terminate()
+        pool.join()
+        shm.close()
+        shm.unlink()
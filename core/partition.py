@@ -0,0 +1,94 @@
+"""
+Geometric graph partitioning.
+
+Road networks are close to planar, so splitting a node set at the median of
+its wider coordinate axis gives balanced cells with small boundaries. This
+module provides the two building blocks speed-up techniques need:
+
+  recursive_bisection()     -> cell id per node, cells of at most max_cell_size
+  nested_dissection_order() -> contraction order with separators ranked last
+
+Usage:
+    from core.partition import nested_dissection_order
+    order = nested_dissection_order(graph)      # node ids, least important first
+"""
+
+from typing import Dict, List, Set, Tuple
+
+from core.config import ND_LEAF_SIZE
+from core.graph import Graph
+
+
+def undirected_neighbors(graph: Graph) -> Dict[int, Set[int]]:
+    """Neighbour sets ignoring edge direction and self loops."""
+    nbrs: Dict[int, Set[int]] = {nid: set() for nid in graph.nodes}
+    for e in graph.edges.values():
+        if e["u"] != e["v"]:
+            nbrs[e["u"]].add(e["v"])
+            nbrs[e["v"]].add(e["u"])
+    return nbrs
+
+
+def coordinate_bisection(graph: Graph, nodes: List[int]) -> Tuple[List[int], List[int]]:
+    """Split nodes into two halves at the median of their wider coordinate axis."""
+    lats = [graph.nodes[n]["lat"] for n in nodes]
+    lons = [graph.nodes[n]["lon"] for n in nodes]
+    axis = "lat" if max(lats) - min(lats) >= max(lons) - min(lons) else "lon"
+    ordered = sorted(nodes, key=lambda n: (graph.nodes[n][axis], n))
+    mid = len(ordered) // 2
+    return ordered[:mid], ordered[mid:]
+
+
+def recursive_bisection(graph: Graph, max_cell_size: int) -> Dict[int, int]:
+    """Assign every node a cell id so that no cell has more than max_cell_size nodes."""
+    if max_cell_size < 1:
+        raise ValueError("max_cell_size must be >= 1")
+    cells: Dict[int, int] = {}
+    stack = [list(graph.nodes)]
+    next_cell = 0
+    while stack:
+        nodes = stack.pop()
+        if len(nodes) <= max_cell_size:
+            for n in nodes:
+                cells[n] = next_cell
+            next_cell += 1
+            continue
+        left, right = coordinate_bisection(graph, nodes)
+        stack.append(right)
+        stack.append(left)
+    return cells
+
+
+def nested_dissection_order(graph: Graph, leaf_size: int = ND_LEAF_SIZE) -> List[int]:
+    """
+    Return all node ids in nested-dissection order.
+
+    Each node set is bisected; the smaller side's boundary becomes a vertex
+    separator that is ordered after both halves, so contracting in this order
+    only creates shortcuts inside cells and across separators.
+    """
+    if leaf_size < 1:
+        raise ValueError("leaf_size must be >= 1")
+    nbrs = undirected_neighbors(graph)
+    order: List[int] = []
+    # Explicit stack of (nodes, separator-to-emit-afterwards) keeps deep graphs
+    # clear of the recursion limit.
+    stack: List[Tuple[str, List[int]]] = [("split", list(graph.nodes))]
+    while stack:
+        kind, nodes = stack.pop()
+        if kind == "emit":
+            order.extend(nodes)
+            continue
+        if len(nodes) <= leaf_size:
+            order.extend(sorted(nodes, key=lambda n: (len(nbrs[n]), n)))
+            continue
+        left, right = coordinate_bisection(graph, nodes)
+        left_set, right_set = set(left), set(right)
+        sep_left = [u for u in left if not nbrs[u].isdisjoint(right_set)]
+        sep_right = [u for u in right if not nbrs[u].isdisjoint(left_set)]
+        sep = sep_left if len(sep_left) <= len(sep_right) else sep_right
+        sep_set = set(sep)
+        stack.append(("emit", sep))
+        stack.append(("split", [u for u in right if u not in sep_set]))
+        stack.append(("split", [u for u in left if u not in sep_set]))
+    return order
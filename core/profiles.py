@@ -0,0 +1,189 @@
+"""
+Vehicle profiles and their per-edge cost layers.
+
+The fleet mixes basic life support vans, advanced life support trucks and
+motorcycle first responders. A VehicleProfile derives each vehicle's edge
+cost from the graph's own cost (base_time, time buckets, multipliers and
+absolute overrides, as in Graph.edge_travel_time):
+
+  live <= base_time  -> live * free_flow_factor
+  live >  base_time  -> base_time * free_flow_factor
+                        + (live - base_time) * congestion_factor
+
+so a motorcycle (congestion_factor < 1) loses less time in rush hour and
+jams than a truck, then floors it at distance / max_speed_kmh. Closures
+(absolute_time >= ROAD_CLOSURE_THRESHOLD_SEC) are passed through unchanged.
+Height and emergency-access restrictions become the profile's MaskSpec.
+
+A CostLayer holds one compact column (array of doubles indexed by edge id)
+per time-bucket period, built on first use. Graph costs are constant within
+a period, so travel_time(eid, ts) is one bisect and one index — the search
+kernels take it in place of graph.edge_travel_time at no extra cost per
+relaxation. After traffic updates only the changed edges (from the graph's
+change log) are recomputed in the columns already built.
+
+Usage:
+    layer = cost_layer(graph, PROFILES["motorcycle"])
+    result = dijkstra_route(graph, s, t, depart_dt, mask, travel_time=layer.travel_time)
+"""
+
+import bisect
+import math
+import threading
+import weakref
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from core.config import ROAD_CLOSURE_THRESHOLD_SEC
+from core.graph import Graph
+from core.masks import MaskSpec
+from core.routing import _heuristic_speed
+
+INF = math.inf
+
+
+@dataclass(frozen=True)
+class VehicleProfile:
+    """How one vehicle type's edge costs differ from the graph's. Hashable."""
+
+    name: str
+    free_flow_factor: float = 1.0  # scales uncongested time
+    congestion_factor: float = 1.0  # scales delay above base_time
+    max_speed_kmh: Optional[float] = None  # never faster than this over an edge
+    height_m: Optional[float] = None  # edges with a lower max_height are masked
+    emergency_only: bool = True  # only edges open to emergency vehicles
+
+    def edge_cost(self, edge: Dict[str, Any], live: float) -> float:
+        """This vehicle's cost for edge, given the graph's live cost for it."""
+        at = edge.get("absolute_time")
+        if at is not None and at >= ROAD_CLOSURE_THRESHOLD_SEC:
+            return live
+        base = edge["base_time"]
+        if live <= base:
+            cost = live * self.free_flow_factor
+        else:
+            cost = base * self.free_flow_factor + (live - base) * self.congestion_factor
+        if self.max_speed_kmh:
+            cost = max(cost, edge["distance"] / (self.max_speed_kmh / 3.6))
+        return cost
+
+    def mask_spec(
+        self, avoid_closures: bool = False, vehicle_height_m: Optional[float] = None
+    ) -> MaskSpec:
+        return MaskSpec.build(
+            self.emergency_only, avoid_closures, vehicle_height_m or self.height_m
+        )
+
+    @property
+    def speedup(self) -> float:
+        """Largest factor by which this profile's cost can undercut the graph's."""
+        return 1.0 / min(self.free_flow_factor, self.congestion_factor, 1.0)
+
+
+# Built-in profiles; add entries here to support more vehicle types.
+PROFILES: Dict[str, VehicleProfile] = {
+    # Basic life support van: the graph's costs as they are.
+    "bls": VehicleProfile("bls"),
+    # Advanced life support truck: heavier and taller, slower on every road.
+    "als": VehicleProfile("als", free_flow_factor=1.15, max_speed_kmh=80.0, height_m=3.5),
+    # Motorcycle first responder: filters through congestion.
+    "motorcycle": VehicleProfile("motorcycle", free_flow_factor=0.9, congestion_factor=0.4),
+}
+
+
+class CostLayer:
+    """One profile's edge costs for one graph, a column per time-bucket period."""
+
+    def __init__(self, graph: Graph, profile: VehicleProfile):
+        self.graph = graph
+        self.profile = profile
+        self.rebuilds = 0
+        self.edges_recomputed = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        # The epochs go last: sync() returns without the lock once they
+        # match, so they must never be ahead of the columns.
+        graph = self.graph
+        epoch, topology_epoch = graph.epoch, graph.topology_epoch
+        periods = graph.time_periods()
+        self._columns: List[Optional[array]] = [None] * len(periods)
+        self._starts = [start for start, _ in periods]
+        self._size = max(graph.edges, default=-1) + 1
+        self.epoch = epoch
+        self.topology_epoch = topology_epoch
+
+    def sync(self) -> None:
+        """Apply graph changes since the last call; only changed edges are recomputed."""
+        graph = self.graph
+        if graph.epoch == self.epoch and graph.topology_epoch == self.topology_epoch:
+            return
+        with self._lock:
+            if graph.topology_epoch != self.topology_epoch:
+                self._reset()
+                return
+            if graph.epoch == self.epoch:
+                return
+            epoch = graph.epoch
+            changed = graph.changed_edges_since(self.epoch)
+            if changed is None:
+                self._columns = [None] * len(self._columns)
+            else:
+                for p, column in enumerate(self._columns):
+                    if column is None:
+                        continue
+                    for eid in changed:
+                        column[eid] = self._cost(eid, self._starts[p])
+                    self.edges_recomputed += len(changed)
+            self.epoch = epoch
+
+    def travel_time(self, edge_id: int, depart_time_seconds: float) -> float:
+        """Drop-in for Graph.edge_travel_time under this profile."""
+        p = bisect.bisect_right(self._starts, depart_time_seconds % 86400) - 1
+        column = self._columns[p]
+        if column is None:
+            column = self._build(p)
+        return column[edge_id]
+
+    @property
+    def max_speed_ms(self) -> float:
+        """Admissible A* heuristic speed for this profile's costs."""
+        return _heuristic_speed(self.graph, None) * self.profile.speedup
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.buffer_info()[1] * c.itemsize for c in self._columns if c is not None)
+
+    def _build(self, p: int) -> array:
+        with self._lock:
+            column = self._columns[p]
+            if column is None:
+                column = array("d", [INF]) * self._size
+                start = self._starts[p]
+                for eid in self.graph.edges:
+                    column[eid] = self._cost(eid, start)
+                self._columns[p] = column
+                self.rebuilds += 1
+            return column
+
+    def _cost(self, eid: int, at: float) -> float:
+        graph = self.graph
+        return self.profile.edge_cost(graph.edges[eid], graph.edge_travel_time(eid, at))
+
+
+_layer_cache: "weakref.WeakKeyDictionary[Graph, Dict[VehicleProfile, CostLayer]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def cost_layer(graph: Graph, profile: VehicleProfile) -> CostLayer:
+    """Return the cached CostLayer for (graph, profile), brought up to date with graph."""
+    per_graph = _layer_cache.setdefault(graph, {})
+    layer = per_graph.get(profile)
+    if layer is None:
+        layer = per_graph[profile] = CostLayer(graph, profile)
+    else:
+        layer.sync()
+    return layer
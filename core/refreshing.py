@@ -0,0 +1,72 @@
+"""
+Background refresh shared by the ETA table, arc flag and hub label routers.
+
+Each keeps one precomputed index for one graph and MaskSpec. Queries read
+whatever index is current and report hits and fallbacks; when the index is
+missing or no longer describes the graph, the router schedules refresh() on
+a background thread (one at a time) and callers search live meanwhile.
+
+Subclasses implement refresh(), which builds a new index from the current
+graph and swaps it in with a single assignment, and _index_stats().
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, TypeVar
+
+from core.graph import Graph
+from core.masks import MaskSpec
+
+T = TypeVar("T")
+
+
+class RefreshingRouter(ABC):
+    """One index for one graph and MaskSpec, rebuilt on a background thread."""
+
+    thread_name = "refresh"
+
+    def __init__(self, graph: Graph, mask_spec: MaskSpec = MaskSpec()):
+        self.graph = graph
+        self.mask_spec = mask_spec
+        self.hits = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    @abstractmethod
+    def refresh(self) -> None:
+        """Build the index from the current graph and swap it in."""
+
+    def refresh_async(self) -> threading.Thread:
+        """Run refresh() on a background thread unless one is already running."""
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._refresh_once, name=self.thread_name, daemon=True
+                )
+                self._worker.start()
+            return self._worker
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._index_stats(), "hits": self.hits, "fallbacks": self.fallbacks}
+
+    @abstractmethod
+    def _index_stats(self) -> Dict[str, Any]:
+        """Size and readiness of the current index."""
+
+    def _serves(self, mask_spec: Optional[MaskSpec]) -> bool:
+        return (mask_spec or MaskSpec()) == self.mask_spec
+
+    def _count(self, result: Optional[T]) -> Optional[T]:
+        if result is None:
+            self.fallbacks += 1
+        else:
+            self.hits += 1
+        return result
+
+    def _refresh_once(self) -> None:
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._worker = None
@@ -0,0 +1,146 @@
+"""
+Per-destination reverse shortest-path trees.
+
+Most active routes end at one of a few hospitals. Instead of one forward
+search per ambulance after a traffic update, one backward Dijkstra from each
+hot destination gives every node its remaining time and next hop; each
+ambulance then needs only a walk along its tree path.
+
+The backward search freezes edge costs at the time the tree is built (time
+buckets cannot be evaluated backwards without knowing the arrival time), so
+the tree picks the path. The ETA is then recomputed forward along that path
+with full time-dependent costs, so reported times are always achievable.
+On graphs without time buckets the result matches a forward search exactly.
+
+Usage:
+    from core.reverse_tree import reverse_tree_for
+    tree = reverse_tree_for(graph, hospital_node, now, mask_spec)
+    result = tree.route_from(ambulance_node, now)     # RouteResult
+"""
+
+import heapq
+import math
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import REVERSE_TREE_MAX_AGE_SEC
+from core.csr import cached_csr
+from core.graph import Graph, NodeNotFoundError
+from core.masks import MaskSpec, mask_for
+from core.routing import RouteResult, SearchStats, _ensure_utc, _settled_recorder, _time_edges
+
+INF = math.inf
+
+
+class ReverseTree:
+    """Remaining seconds and next hop to one target, for every node that can reach it."""
+
+    def __init__(
+        self,
+        graph: Graph,
+        target: int,
+        at_dt,
+        edge_mask: Optional[bytearray] = None,
+        stats: Optional[SearchStats] = None,
+    ):
+        if target not in graph.nodes:
+            raise NodeNotFoundError(f"Node {target} not found")
+        self.graph = graph
+        self.target = target
+        self.at_ts = _ensure_utc(at_dt).timestamp()
+        self.epoch = graph.epoch
+        self.remaining: Dict[int, float] = {target: 0.0}
+        self.next_hop: Dict[int, Tuple[int, int]] = {}
+
+        at_ts = self.at_ts
+        # Every edge is costed at at_ts, so cost them all in one vectorised pass.
+        csr = cached_csr(graph)
+        m = csr.n_edges
+        costs = csr.travel_times(np.arange(m), np.full(m, at_ts)).tolist()
+        cost = dict(zip(csr.edge_ids.tolist(), costs))
+        heap: List[Tuple[float, int]] = [(0.0, target)]
+        done = set()
+        record = _settled_recorder(stats)
+        pushes = stale = relaxed = peak = 0
+        # Hot loop: bind attribute lookups to locals.
+        remaining, next_hop, radj = self.remaining, self.next_hop, graph.radj
+        heappop, heappush = heapq.heappop, heapq.heappush
+        while heap:
+            d, v = heappop(heap)
+            if v in done:
+                stale += 1
+                continue
+            done.add(v)
+            if record is not None:
+                record(v)
+            for u, eid in radj.get(v, ()):
+                if edge_mask is not None and edge_mask[eid]:
+                    continue
+                relaxed += 1
+                nd = d + cost[eid]
+                if nd < remaining.get(u, INF):
+                    remaining[u] = nd
+                    next_hop[u] = (v, eid)
+                    heappush(heap, (nd, u))
+                    pushes += 1
+            if len(heap) > peak:
+                peak = len(heap)
+        if stats is not None:
+            stats.add(len(done), pushes, stale, relaxed, peak)
+
+    def path_from(self, node: int) -> Optional[List[int]]:
+        """Tree path node -> target, or None if node cannot reach the target."""
+        if node not in self.remaining:
+            return None
+        path = [node]
+        while path[-1] != self.target:
+            path.append(self.next_hop[path[-1]][0])
+        return path
+
+    def route_from(self, node: int, depart_time_dt) -> RouteResult:
+        """Follow the tree from node, timing each edge at its actual entry time."""
+        if node not in self.remaining:
+            return RouteResult()
+        edge_ids = []
+        v = node
+        while v != self.target:
+            v, eid = self.next_hop[v]
+            edge_ids.append(eid)
+        return _time_edges(self.graph, node, edge_ids, _ensure_utc(depart_time_dt).timestamp())
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+_TreeKey = Tuple[int, Optional[MaskSpec]]
+_tree_cache: "weakref.WeakKeyDictionary[Graph, Dict[_TreeKey, ReverseTree]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def reverse_tree_for(
+    graph: Graph, target: int, at_dt, mask_spec: Optional[MaskSpec] = None
+) -> ReverseTree:
+    """
+    Return the cached tree for (target, mask_spec), rebuilding it once per
+    graph epoch or when it is older than REVERSE_TREE_MAX_AGE_SEC.
+    """
+    at_ts = _ensure_utc(at_dt).timestamp()
+    per_graph = _tree_cache.setdefault(graph, {})
+    key = (target, mask_spec)
+    tree = per_graph.get(key)
+    if (
+        tree is not None
+        and tree.epoch == graph.epoch
+        and abs(at_ts - tree.at_ts) <= REVERSE_TREE_MAX_AGE_SEC
+    ):
+        return tree
+    # Trees from an older epoch can never be reused; drop them with this rebuild.
+    for k in [k for k, t in per_graph.items() if t.epoch != graph.epoch]:
+        del per_graph[k]
+    tree = ReverseTree(graph, target, at_dt, mask_for(graph, mask_spec))
+    per_graph[key] = tree
+    return tree
@@ -1,9 +1,18 @@
 import datetime
 import heapq
 import math
-from typing import List, Optional, Tuple
-
-from core.config import A_STAR_MAX_SPEED_MS
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.config import (
+    A_STAR_MAX_SPEED_MS,
+    AUTO_DISTANCE_BAND_M,
+    AUTO_EXPLORE_EVERY,
+    AUTO_LATENCY_ALPHA,
+    AUTO_MIN_SAMPLES,
+)
 
 UTC = datetime.timezone.utc
 
@@ -56,6 +65,156 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
+# ---------------------------------------------------------------------------
+# Route result
+# ---------------------------------------------------------------------------
+
+
+class RouteResult:
+    """
+    Outcome of a point-to-point search.
+
+    Holds only what the search already computed: the node path, the edge id
+    of every hop and the arrival epoch (float seconds) at every path node.
+    Datetime segment tuples are built on first access, so callers that only
+    need the ETA or the path never pay for them.
+
+    Unpacks like the original (arrival_dt, path, per_segment_times) triple;
+    an empty result (no route) unpacks as (None, None, None).
+    """
+
+    __slots__ = ("path", "edge_ids", "node_times", "_per_seg")
+
+    def __init__(
+        self,
+        path: Optional[List[int]] = None,
+        edge_ids: Optional[List[int]] = None,
+        node_times: Optional[List[float]] = None,
+    ):
+        self.path = path
+        self.edge_ids = edge_ids
+        self.node_times = node_times
+        self._per_seg: Optional[List[Tuple[datetime.datetime, datetime.datetime]]] = None
+
+    @property
+    def found(self) -> bool:
+        return self.path is not None
+
+    @property
+    def depart_ts(self) -> Optional[float]:
+        return self.node_times[0] if self.node_times else None
+
+    @property
+    def arrival_ts(self) -> Optional[float]:
+        return self.node_times[-1] if self.node_times else None
+
+    @property
+    def arrival(self) -> Optional[datetime.datetime]:
+        if not self.node_times:
+            return None
+        return datetime.datetime.fromtimestamp(self.node_times[-1], tz=UTC)
+
+    @property
+    def total_seconds(self) -> Optional[float]:
+        if not self.node_times:
+            return None
+        return self.node_times[-1] - self.node_times[0]
+
+    def segment_seconds(self) -> List[float]:
+        t = self.node_times or []
+        return [t[i + 1] - t[i] for i in range(len(t) - 1)]
+
+    @property
+    def per_segment_times(
+        self,
+    ) -> Optional[List[Tuple[datetime.datetime, datetime.datetime]]]:
+        if self.node_times is None:
+            return None
+        if self._per_seg is None:
+            stamps = [datetime.datetime.fromtimestamp(t, tz=UTC) for t in self.node_times]
+            self._per_seg = list(zip(stamps[:-1], stamps[1:]))
+        return self._per_seg
+
+    def __iter__(self):
+        return iter((self.arrival, self.path, self.per_segment_times))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RouteResult):
+            return NotImplemented
+        return (self.path, self.edge_ids, self.node_times) == (
+            other.path,
+            other.edge_ids,
+            other.node_times,
+        )
+
+    def __getstate__(self):
+        return self.path, self.edge_ids, self.node_times
+
+    def __setstate__(self, state) -> None:
+        self.path, self.edge_ids, self.node_times = state
+        self._per_seg = None
+
+    def __repr__(self) -> str:
+        return f"RouteResult(path={self.path}, arrival_ts={self.arrival_ts})"
+
+
+# ---------------------------------------------------------------------------
+# Search instrumentation
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class SearchStats:
+    """
+    Work counters for one search. Pass an instance as stats= to any kernel.
+
+    Kernels count in local ints and add them here once when they finish, so
+    the hot loop never touches this object; with stats=None nothing is
+    written. Set record_settled to also collect the settled node ids.
+    """
+
+    settled: int = 0
+    pushes: int = 0
+    stale_pops: int = 0
+    relaxations: int = 0
+    peak_heap: int = 0
+    record_settled: bool = False
+    settled_nodes: List[int] = field(default_factory=list)
+
+    def add(
+        self,
+        settled: int = 0,
+        pushes: int = 0,
+        stale_pops: int = 0,
+        relaxations: int = 0,
+        peak_heap: int = 0,
+    ) -> None:
+        self.settled += settled
+        self.pushes += pushes
+        self.stale_pops += stale_pops
+        self.relaxations += relaxations
+        self.peak_heap = max(self.peak_heap, peak_heap)
+
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {
+            "settled": self.settled,
+            "pushes": self.pushes,
+            "stale_pops": self.stale_pops,
+            "relaxations": self.relaxations,
+            "peak_heap": self.peak_heap,
+        }
+        if self.record_settled:
+            d["settled_nodes"] = self.settled_nodes
+        return d
+
+
+def _settled_recorder(stats: Optional[SearchStats]):
+    """Return settled_nodes.append when stats asks for it, else None."""
+    if stats is not None and stats.record_settled:
+        return stats.settled_nodes.append
+    return None
+
+
 # ---------------------------------------------------------------------------
 # Dijkstra (true time-dependent label-setting)
 # ---------------------------------------------------------------------------
@@ -66,11 +225,10 @@ def dijkstra_route(
     source: int,
     target: int,
     depart_time_dt,
-) -> Tuple[
-    Optional[datetime.datetime],
-    Optional[List[int]],
-    Optional[List[Tuple[datetime.datetime, datetime.datetime]]],
-]:
+    edge_mask: Optional[bytearray] = None,
+    stats: Optional[SearchStats] = None,
+    travel_time: Optional[Callable[[int, float], float]] = None,
+) -> RouteResult:
     """
     Time-dependent Dijkstra.
 
@@ -78,43 +236,166 @@ def dijkstra_route(
     node, not at the global departure time — this is the correct FIFO
     time-dependent label-setting algorithm.
 
-    Returns (arrival_dt_utc, path, per_segment_times)
-    where per_segment_times is a list of (start_utc, end_utc) tuples.
+    edge_mask (see core.masks) marks edge ids that must not be used; stats,
+    if given, receives the search's work counters. travel_time replaces
+    graph.edge_travel_time, e.g. with a vehicle profile's cost layer
+    (core.profiles).
+
+    Returns a RouteResult, which unpacks as (arrival_dt_utc, path,
+    per_segment_times) where per_segment_times is a list of
+    (start_utc, end_utc) tuples.
     """
     depart_dt = _ensure_utc(depart_time_dt)
     start_ts = depart_dt.timestamp()
 
+    travel_time = travel_time or graph.edge_travel_time
     dist: dict = {source: start_ts}
     prev: dict = {}
+    prev_edge: dict = {}
     pq = [(start_ts, source)]
+    record = _settled_recorder(stats)
+    settled = pushes = stale = relaxed = peak = 0
 
     while pq:
         curr_ts, u = heapq.heappop(pq)
         if u == target:
             break
         if curr_ts > dist.get(u, 1e18):
+            stale += 1
             continue
+        settled += 1
+        if record is not None:
+            record(u)
         for v, eid in graph.neighbors(u):
-            travel = graph.edge_travel_time(eid, curr_ts)
+            if edge_mask is not None and edge_mask[eid]:
+                continue
+            relaxed += 1
+            travel = travel_time(eid, curr_ts)
             arrival = curr_ts + travel
             if arrival < dist.get(v, 1e18):
                 dist[v] = arrival
                 prev[v] = u
+                prev_edge[v] = eid
                 heapq.heappush(pq, (arrival, v))
+                pushes += 1
+        if len(pq) > peak:
+            peak = len(pq)
 
+    if stats is not None:
+        stats.add(settled, pushes, stale, relaxed, peak)
     if target not in dist:
-        return None, None, None
-
-    path = _reconstruct_path(prev, source, target)
-    per_seg = _build_segments(graph, path, start_ts)
-    arrival_dt = datetime.datetime.fromtimestamp(dist[target], tz=UTC)
-    return arrival_dt, path, per_seg
+        return RouteResult()
+    return _make_result(dist, prev, prev_edge, source, target)
 
 
 # Alias — exposed publicly so callers that want explicit time-dependence
 # use this name; the implementation IS time-dependent.
-def time_dependent_dijkstra(graph, source, target, depart_time_dt):
-    return dijkstra_route(graph, source, target, depart_time_dt)
+def time_dependent_dijkstra(graph, source, target, depart_time_dt, edge_mask=None, stats=None):
+    return dijkstra_route(graph, source, target, depart_time_dt, edge_mask, stats)
+
+
+def dijkstra_one_to_all(
+    graph,
+    source: int,
+    depart_time_dt,
+    edge_mask: Optional[bytearray] = None,
+    stats: Optional[SearchStats] = None,
+) -> Dict[int, float]:
+    """
+    Time-dependent Dijkstra without a target.
+
+    Returns {node_id: arrival_epoch_seconds} for every node reachable from
+    source. Scalar reference for core.delta_stepping.
+    """
+    start_ts = _ensure_utc(depart_time_dt).timestamp()
+
+    dist: dict = {source: start_ts}
+    pq = [(start_ts, source)]
+    record = _settled_recorder(stats)
+    settled = pushes = stale = relaxed = peak = 0
+
+    while pq:
+        curr_ts, u = heapq.heappop(pq)
+        if curr_ts > dist.get(u, 1e18):
+            stale += 1
+            continue
+        settled += 1
+        if record is not None:
+            record(u)
+        for v, eid in graph.neighbors(u):
+            if edge_mask is not None and edge_mask[eid]:
+                continue
+            relaxed += 1
+            arrival = curr_ts + graph.edge_travel_time(eid, curr_ts)
+            if arrival < dist.get(v, 1e18):
+                dist[v] = arrival
+                heapq.heappush(pq, (arrival, v))
+                pushes += 1
+        if len(pq) > peak:
+            peak = len(pq)
+
+    if stats is not None:
+        stats.add(settled, pushes, stale, relaxed, peak)
+    return dist
+
+
+def dijkstra_multi_source(
+    graph,
+    sources: Iterable[int],
+    depart_time_dt,
+    edge_mask: Optional[bytearray] = None,
+    stats: Optional[SearchStats] = None,
+    reverse: bool = False,
+) -> Tuple[Dict[int, float], Dict[int, int]]:
+    """
+    One search from all sources at once: every node's closest source and its ETA.
+
+    Returns ({node: seconds}, {node: owning source}) for every reachable node.
+    Forward (default) gives travel time from the closest source to the node
+    with full time-dependent costs. reverse=True gives travel time from the
+    node to its closest source, searching incoming edges with costs frozen at
+    departure (exact while the trips stay inside one time bucket).
+    """
+    start_ts = _ensure_utc(depart_time_dt).timestamp()
+
+    dist: dict = {}
+    owner: dict = {}
+    pq = []
+    for s in sources:
+        if s in graph.nodes and s not in dist:
+            dist[s] = 0.0
+            owner[s] = s
+            pq.append((0.0, s))
+    heapq.heapify(pq)
+    expand = graph.in_neighbors if reverse else graph.neighbors
+    record = _settled_recorder(stats)
+    settled = pushes = stale = relaxed = peak = 0
+
+    while pq:
+        d, u = heapq.heappop(pq)
+        if d > dist[u]:
+            stale += 1
+            continue
+        settled += 1
+        if record is not None:
+            record(u)
+        at = start_ts if reverse else start_ts + d
+        for v, eid in expand(u):
+            if edge_mask is not None and edge_mask[eid]:
+                continue
+            relaxed += 1
+            nd = d + graph.edge_travel_time(eid, at)
+            if nd < dist.get(v, 1e18):
+                dist[v] = nd
+                owner[v] = owner[u]
+                heapq.heappush(pq, (nd, v))
+                pushes += 1
+        if len(pq) > peak:
+            peak = len(pq)
+
+    if stats is not None:
+        stats.add(settled, pushes, stale, relaxed, peak)
+    return dist, owner
 
 
 # ---------------------------------------------------------------------------
@@ -122,18 +403,36 @@ def time_dependent_dijkstra(graph, source, target, depart_time_dt):
 # ---------------------------------------------------------------------------
 
 
+def _heuristic_speed(graph, max_speed_ms: Optional[float]) -> float:
+    """Explicit speed, else A_STAR_MAX_SPEED_MS, else the graph-derived admissible bound."""
+    if max_speed_ms is None:
+        max_speed_ms = A_STAR_MAX_SPEED_MS
+    if max_speed_ms is None:
+        from core.lower_bounds import cached_lower_bounds
+
+        max_speed_ms = cached_lower_bounds(graph).max_speed_ms
+    return max_speed_ms
+
+
 def a_star_route(
     graph,
     source: int,
     target: int,
     depart_time_dt,
-) -> Tuple[
-    Optional[datetime.datetime],
-    Optional[List[int]],
-    Optional[List[Tuple[datetime.datetime, datetime.datetime]]],
-]:
+    edge_mask: Optional[bytearray] = None,
+    stats: Optional[SearchStats] = None,
+    max_speed_ms: Optional[float] = None,
+    travel_time: Optional[Callable[[int, float], float]] = None,
+) -> RouteResult:
     """
-    Time-dependent A* with haversine heuristic (max speed 15 m/s ≈ 54 km/h).
+    Time-dependent A* with haversine heuristic.
+
+    The heuristic divides straight-line distance by max_speed_ms, which
+    defaults to A_STAR_MAX_SPEED_MS or, when that is unset, to the fastest
+    speed any edge of the graph allows under current traffic (see
+    core.lower_bounds). The derived speed is admissible, so routes match
+    Dijkstra exactly. With a custom travel_time, pass a max_speed_ms that is
+    admissible for it (see core.profiles.CostLayer.max_speed_ms).
 
     Returns identical output format to dijkstra_route so callers can swap
     implementations transparently.
@@ -141,38 +440,428 @@ def a_star_route(
     depart_dt = _ensure_utc(depart_time_dt)
     start_ts = depart_dt.timestamp()
 
+    max_speed_ms = _heuristic_speed(graph, max_speed_ms)
+    target_node = graph.nodes.get(target)
+
     def heuristic(u: int) -> float:
-        if target not in graph.nodes or u not in graph.nodes:
+        if target_node is None or u not in graph.nodes or max_speed_ms <= 0:
             return 0.0
         n1 = graph.nodes[u]
-        n2 = graph.nodes[target]
-        return haversine_distance(n1["lat"], n1["lon"], n2["lat"], n2["lon"]) / A_STAR_MAX_SPEED_MS
+        return (
+            haversine_distance(n1["lat"], n1["lon"], target_node["lat"], target_node["lon"])
+            / max_speed_ms
+        )
 
+    travel_time = travel_time or graph.edge_travel_time
     g_score: dict = {source: start_ts}
     came_from: dict = {}
+    came_by: dict = {}
     pq = [(start_ts + heuristic(source), start_ts, source)]
+    record = _settled_recorder(stats)
+    settled = pushes = stale = relaxed = peak = 0
 
     while pq:
         _, curr_ts, u = heapq.heappop(pq)
         if u == target:
             break
         if curr_ts > g_score.get(u, 1e18):
+            stale += 1
             continue
+        settled += 1
+        if record is not None:
+            record(u)
         for v, eid in graph.neighbors(u):
-            travel = graph.edge_travel_time(eid, curr_ts)
+            if edge_mask is not None and edge_mask[eid]:
+                continue
+            relaxed += 1
+            travel = travel_time(eid, curr_ts)
             arrival = curr_ts + travel
             if arrival < g_score.get(v, 1e18):
                 g_score[v] = arrival
                 came_from[v] = u
+                came_by[v] = eid
                 heapq.heappush(pq, (arrival + heuristic(v), arrival, v))
+                pushes += 1
+        if len(pq) > peak:
+            peak = len(pq)
 
+    if stats is not None:
+        stats.add(settled, pushes, stale, relaxed, peak)
     if target not in g_score:
-        return None, None, None
+        return RouteResult()
+    return _make_result(g_score, came_from, came_by, source, target)
+
+
+# ---------------------------------------------------------------------------
+# Multi-target search
+# ---------------------------------------------------------------------------
+
+
+def nearest_targets_dijkstra(
+    graph,
+    source: int,
+    targets: Iterable[int],
+    depart_time_dt,
+    k: int = 1,
+    edge_mask: Optional[bytearray] = None,
+    stats: Optional[SearchStats] = None,
+) -> List[RouteResult]:
+    """
+    Routes to the k targets reachable soonest from source, fastest first.
 
-    path = _reconstruct_path(came_from, source, target)
-    per_seg = _build_segments(graph, path, start_ts)
-    arrival_dt = datetime.datetime.fromtimestamp(g_score[target], tz=UTC)
-    return arrival_dt, path, per_seg
+    One time-dependent Dijkstra that stops when the k-th target is settled,
+    however many targets there are. Returns fewer than k results when fewer
+    targets are reachable.
+    """
+    return _nearest_targets(graph, source, targets, depart_time_dt, k, edge_mask, stats, None)
+
+
+def nearest_targets_a_star(
+    graph,
+    source: int,
+    targets: Iterable[int],
+    depart_time_dt,
+    k: int = 1,
+    edge_mask: Optional[bytearray] = None,
+    stats: Optional[SearchStats] = None,
+    max_speed_ms: Optional[float] = None,
+) -> List[RouteResult]:
+    """
+    A* variant of nearest_targets_dijkstra.
+
+    The heuristic is the minimum over all targets of the single-target
+    estimate; a minimum of consistent heuristics is consistent, so targets
+    are still settled in order of arrival time and results are exact.
+    """
+    targets = list(targets)
+    max_speed_ms = _heuristic_speed(graph, max_speed_ms)
+    coords = [(graph.nodes[t]["lat"], graph.nodes[t]["lon"]) for t in targets if t in graph.nodes]
+
+    def heuristic(u: int) -> float:
+        if not coords or u not in graph.nodes or max_speed_ms <= 0:
+            return 0.0
+        n = graph.nodes[u]
+        nearest = min(haversine_distance(n["lat"], n["lon"], lat, lon) for lat, lon in coords)
+        return nearest / max_speed_ms
+
+    return _nearest_targets(graph, source, targets, depart_time_dt, k, edge_mask, stats, heuristic)
+
+
+def _nearest_targets(
+    graph, source, targets, depart_time_dt, k, edge_mask, stats, heuristic
+) -> List[RouteResult]:
+    if k < 1:
+        raise ValueError("k must be >= 1")
+    start_ts = _ensure_utc(depart_time_dt).timestamp()
+    remaining = set(targets)
+    found: List[int] = []
+
+    dist: dict = {source: start_ts}
+    prev: dict = {}
+    prev_edge: dict = {}
+    h0 = heuristic(source) if heuristic is not None else 0.0
+    pq = [(start_ts + h0, start_ts, source)]
+    record = _settled_recorder(stats)
+    settled = pushes = stale = relaxed = peak = 0
+
+    while pq and remaining:
+        _, curr_ts, u = heapq.heappop(pq)
+        if curr_ts > dist.get(u, 1e18):
+            stale += 1
+            continue
+        settled += 1
+        if record is not None:
+            record(u)
+        if u in remaining:
+            remaining.discard(u)
+            found.append(u)
+            if len(found) == k:
+                break
+        for v, eid in graph.neighbors(u):
+            if edge_mask is not None and edge_mask[eid]:
+                continue
+            relaxed += 1
+            arrival = curr_ts + graph.edge_travel_time(eid, curr_ts)
+            if arrival < dist.get(v, 1e18):
+                dist[v] = arrival
+                prev[v] = u
+                prev_edge[v] = eid
+                f = arrival + heuristic(v) if heuristic is not None else arrival
+                heapq.heappush(pq, (f, arrival, v))
+                pushes += 1
+        if len(pq) > peak:
+            peak = len(pq)
+
+    if stats is not None:
+        stats.add(settled, pushes, stale, relaxed, peak)
+    return [_make_result(dist, prev, prev_edge, source, t) for t in found]
+
+
+# ---------------------------------------------------------------------------
+# Batch routing (process pool over a shared-memory graph)
+# ---------------------------------------------------------------------------
+
+_ALGORITHMS = {"dijkstra": time_dependent_dijkstra, "astar": a_star_route}
+
+# Per-worker state, set once by _init_route_worker.
+_worker_csr = None
+_worker_shm = None
+_worker_mask = None
+_worker_speed = 0.0
+_worker_route = None
+
+
+def _init_route_worker(handle: dict, mask: Optional[bytearray], speed: float) -> None:
+    global _worker_csr, _worker_shm, _worker_mask, _worker_speed, _worker_route
+    from core.csr import attach_shared
+    from core.workspace import csr_route
+
+    # Spawned workers share the parent's resource tracker, so attaching does
+    # not hand ownership of the block to this process.
+    _worker_shm, _worker_csr = attach_shared(handle)
+    _worker_mask, _worker_speed, _worker_route = mask, speed, csr_route
+
+
+def _route_task(task: Tuple[int, int, int, float, str]):
+    i, source, target, depart_ts, algorithm = task
+    speed = _worker_speed if algorithm == "astar" else 0.0
+    return i, _worker_route(_worker_csr, source, target, depart_ts, _worker_mask, None, speed)
+
+
+def route_many(
+    graph,
+    pairs: Iterable[Tuple[int, int]],
+    depart_time_dt,
+    algorithm: str = "dijkstra",
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+    mask_spec=None,
+) -> Iterator[Tuple[int, RouteResult]]:
+    """
+    Route many (source, target) pairs, yielding (index, result) as each finishes.
+
+    index is the position of the pair in pairs; result is a RouteResult.
+    Results arrive in completion order, not input order.
+
+    With workers > 1 the graph's CSR arrays are copied once into a
+    shared-memory block that every worker maps at start-up, and workers
+    search those arrays directly (core.workspace.csr_route), so edge costs
+    and coordinates are never duplicated and tasks only carry node ids.
+    Each worker still builds private node / edge id indexes and adjacency
+    lists, a bit under half the memory a dict Graph would take.
+    workers=None uses every CPU; workers=1 routes in-process. mask_spec is
+    an optional core.masks.MaskSpec, compiled once and sent to each worker.
+    """
+    if algorithm not in _ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}")
+    depart_ts = _ensure_utc(depart_time_dt).timestamp()
+    tasks = ((i, s, t, depart_ts, algorithm) for i, (s, t) in enumerate(pairs))
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        from core.masks import mask_for
+
+        fn = _ALGORITHMS[algorithm]
+        mask = mask_for(graph, mask_spec)
+        for i, s, t, ts, _ in tasks:
+            yield i, fn(graph, s, t, ts, mask)
+        return
+
+    import multiprocessing
+
+    from core.csr import cached_csr, publish_shared
+    from core.masks import mask_for
+
+    speed = _heuristic_speed(graph, None) if algorithm == "astar" else 0.0
+    shm, handle = publish_shared(cached_csr(graph))
+    ctx = multiprocessing.get_context("spawn")
+    initargs = (handle, mask_for(graph, mask_spec), speed)
+    pool = ctx.Pool(workers, initializer=_init_route_worker, initargs=initargs)
+    try:
+        yield from pool.imap_unordered(_route_task, tasks, chunksize=chunksize)
+    finally:
+        pool.terminate()
+        pool.join()
+        shm.close()
+        shm.unlink()
+
+
+# ---------------------------------------------------------------------------
+# Engine registry and algorithm=auto
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Engine:
+    """
+    A named point-to-point routing engine.
+
+    route(graph, source, target, depart_dt, mask_spec, stats, layer) returns a
+    RouteResult; layer is a core.profiles.CostLayer or None and is only ever
+    passed when profiles is True.
+
+    Engines that need preprocessing declare it with fresh(mask_spec, depart_dt),
+    which says without building anything whether the prepared data reflects
+    the graph's current costs for a departure at depart_dt (None: now), and
+    prepare(mask_spec, depart_dt), which starts building or refreshing it in
+    the background. Engines without them are always valid.
+    """
+
+    name: str
+    route: Callable[..., RouteResult]
+    preprocessing: Optional[str] = None
+    fresh: Optional[Callable[[Any, Any], bool]] = None
+    prepare: Optional[Callable[[Any, Any], Any]] = None
+    profiles: bool = False
+
+    def valid(self, mask_spec=None, depart_dt=None) -> bool:
+        return self.fresh is None or self.fresh(mask_spec, depart_dt)
+
+
+@dataclass
+class _Latency:
+    """Smoothed search latency of one engine in one distance band."""
+
+    samples: int = 0
+    ewma_seconds: float = 0.0
+    last_seconds: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.ewma_seconds = (
+            seconds
+            if self.samples == 0
+            else self.ewma_seconds + AUTO_LATENCY_ALPHA * (seconds - self.ewma_seconds)
+        )
+        self.last_seconds = seconds
+        self.samples += 1
+
+
+@dataclass
+class EngineChoice:
+    """What algorithm=auto picked, and why: 'fastest' or 'exploring'."""
+
+    engine: Engine
+    reason: str
+    band: int
+    expected_seconds: Optional[float]
+
+
+def distance_band(distance_m: float) -> int:
+    """0 below AUTO_DISTANCE_BAND_M, then one band per doubling of distance."""
+    if distance_m < AUTO_DISTANCE_BAND_M:
+        return 0
+    return int(math.log2(distance_m / AUTO_DISTANCE_BAND_M)) + 1
+
+
+class EngineRegistry:
+    """
+    Routing engines by name, with the latencies each has shown per distance band.
+
+    observe() records how long a search took; select() is algorithm=auto: of
+    the engines valid for the query's constraints, departure (and profile),
+    it tries each one AUTO_MIN_SAMPLES times per distance band, then picks
+    the lowest smoothed latency. Every AUTO_EXPLORE_EVERY-th pick in a band
+    re-measures the least-sampled valid engine instead, so the choice follows
+    load and traffic. Engines that are not fresh are asked to prepare, and
+    join the candidates once they are.
+    """
+
+    def __init__(self):
+        self._engines: Dict[str, Engine] = {}
+        self._latency: Dict[Tuple[str, int], _Latency] = {}
+        self._picks: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.auto_selections: Dict[str, int] = {}
+
+    def register(self, engine: Engine) -> Engine:
+        if engine.name == "auto" or engine.name in self._engines:
+            raise ValueError(f"Engine name {engine.name!r} is reserved or already registered")
+        self._engines[engine.name] = engine
+        self.auto_selections[engine.name] = 0
+        return engine
+
+    def get(self, name: str) -> Engine:
+        """The engine registered as name; raises KeyError for unknown names."""
+        return self._engines[name]
+
+    def names(self) -> List[str]:
+        return list(self._engines)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._engines
+
+    def observe(self, name: str, distance_m: float, seconds: float) -> None:
+        with self._lock:
+            key = (name, distance_band(distance_m))
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = _Latency()
+            latency.add(seconds)
+
+    def select(
+        self, distance_m: float, mask_spec=None, profile: bool = False, depart_dt=None
+    ) -> EngineChoice:
+        """
+        Pick an engine for one query departing at depart_dt (None: now).
+        Engines without preprocessing are always valid, so there is a
+        candidate as long as one such engine is registered.
+        """
+        candidates = []
+        for engine in self._engines.values():
+            if profile and not engine.profiles:
+                continue
+            if engine.valid(mask_spec, depart_dt):
+                candidates.append(engine)
+            elif engine.prepare is not None:
+                engine.prepare(mask_spec, depart_dt)
+        if not candidates:
+            raise LookupError("No routing engine is valid for this query")
+
+        band = distance_band(distance_m)
+        with self._lock:
+            latencies = [self._latency.get((e.name, band)) or _Latency() for e in candidates]
+            picks = self._picks[band] = self._picks.get(band, 0) + 1
+            least = min(range(len(candidates)), key=lambda i: latencies[i].samples)
+            if latencies[least].samples < AUTO_MIN_SAMPLES or (
+                AUTO_EXPLORE_EVERY > 0 and picks % AUTO_EXPLORE_EVERY == 0
+            ):
+                i, reason = least, "exploring"
+            else:
+                i = min(range(len(candidates)), key=lambda i: latencies[i].ewma_seconds)
+                reason = "fastest"
+            engine = candidates[i]
+            self.auto_selections[engine.name] += 1
+        expected = latencies[i].ewma_seconds if latencies[i].samples else None
+        return EngineChoice(engine, reason, band, expected)
+
+    def stats(self, mask_spec=None) -> Dict[str, Any]:
+        """Per-engine latencies by band; fresh is judged for mask_spec."""
+        with self._lock:
+            latency = {
+                name: {
+                    str(band): {
+                        "samples": lat.samples,
+                        "ewma_ms": lat.ewma_seconds * 1000,
+                        "last_ms": lat.last_seconds * 1000,
+                    }
+                    for (n, band), lat in sorted(self._latency.items())
+                    if n == name
+                }
+                for name in self._engines
+            }
+        return {
+            "distance_band_m": AUTO_DISTANCE_BAND_M,
+            "engines": {
+                name: {
+                    "preprocessing": engine.preprocessing,
+                    "fresh": engine.valid(mask_spec),
+                    "profiles": engine.profiles,
+                    "auto_selections": self.auto_selections[name],
+                    "latency_by_band": latency[name],
+                }
+                for name, engine in self._engines.items()
+            },
+        }
 
 
 # ---------------------------------------------------------------------------
@@ -191,17 +880,18 @@ def _reconstruct_path(prev: dict, source: int, target: int) -> List[int]:
     return path
 
 
-def _build_segments(
-    graph, path: List[int], start_ts: float
-) -> List[Tuple[datetime.datetime, datetime.datetime]]:
-    """Build per-segment UTC datetime tuples from a path."""
-    per_seg = []
-    t = start_ts
-    for i in range(len(path) - 1):
-        eid = graph.edge_id_between(path[i], path[i + 1])
-        w = graph.edge_travel_time(eid, t)
-        eta_start = datetime.datetime.fromtimestamp(t, tz=UTC)
-        t += w
-        eta_end = datetime.datetime.fromtimestamp(t, tz=UTC)
-        per_seg.append((eta_start, eta_end))
-    return per_seg
+def _make_result(dist: dict, prev: dict, prev_edge: dict, source: int, target: int):
+    path = _reconstruct_path(prev, source, target)
+    edge_ids = [prev_edge[v] for v in path[1:]]
+    return RouteResult(path, edge_ids, [dist[v] for v in path])
+
+
+def _time_edges(graph, source: int, edge_ids: List[int], depart_ts: float) -> RouteResult:
+    """Time an already chosen edge sequence from source, each edge at its entry time."""
+    t = depart_ts
+    path, node_times = [source], [t]
+    for eid in edge_ids:
+        t += graph.edge_travel_time(eid, t)
+        path.append(graph.edges[eid]["v"])
+        node_times.append(t)
+    return RouteResult(path, list(edge_ids), node_times)
@@ -16,15 +16,13 @@ Usage (as library):
 import datetime
 import logging
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional
 
 from core.config import REROUTE_THRESHOLD_SEC
 from core.graph import EdgeUpdate, Graph
-from core.routing import (
-    _ensure_utc,
-    _remaining_seconds,
-    time_dependent_dijkstra,
-)
+from core.incremental import IncrementalRoute
+from core.masks import MaskSpec
+from core.routing import _ensure_utc, _remaining_seconds
 
 UTC = datetime.timezone.utc
 log = logging.getLogger("ambulance_routing.simulator")
@@ -35,6 +33,10 @@ log = logging.getLogger("ambulance_routing.simulator")
 # ---------------------------------------------------------------------------
 
 
+class NoRouteError(ValueError):
+    pass
+
+
 @dataclass
 class SimEvent:
     sim_time: datetime.datetime
@@ -84,9 +86,15 @@ class TrafficInjection:
 
 
 class SimulationEngine:
-    def __init__(self, graph: Graph, reroute_threshold_sec: float = REROUTE_THRESHOLD_SEC):
+    def __init__(
+        self,
+        graph: Graph,
+        reroute_threshold_sec: float = REROUTE_THRESHOLD_SEC,
+        mask_spec: Optional[MaskSpec] = None,
+    ):
         self.graph = graph
         self.threshold = reroute_threshold_sec
+        self.mask_spec = mask_spec or MaskSpec()
 
     def run(
         self,
@@ -94,24 +102,74 @@ class SimulationEngine:
         start_node: int,
         end_node: int,
         depart_dt: Optional[datetime.datetime] = None,
-        traffic_injections: Optional[List[TrafficInjection]] = None,
+        traffic_injections: Optional[Iterable[TrafficInjection]] = None,
         speed_multiplier: float = 1.0,  # >1 to run faster in wall-clock; sim is virtual time
+        on_event: Optional[Callable[[SimEvent], None]] = None,
+        record_events: bool = True,
+        segment_events: bool = True,
     ) -> SimResult:
         """
         Run a complete simulation in virtual time (no real sleeping).
 
         The simulator advances virtual time segment-by-segment, checks for
         pending traffic injections, and evaluates rerouting after each injection.
+
+        on_event is called with every event as it happens (e.g. an event_log
+        sink). With record_events=False the result's events list stays empty,
+        so memory does not grow with the trip; segment_events=False skips
+        the per-segment SEGMENT events altogether.
+
+        traffic_injections may be a list (sorted here) or any iterable in
+        trigger_at order, such as core.replay.read_injections, which is
+        only read as far as the trip lasts.
         """
-        depart_dt = _ensure_utc(depart_dt) if depart_dt else datetime.datetime.now(tz=UTC)
-        injections = list(traffic_injections or [])
         events: List[SimEvent] = []
+        stream = self.stream(
+            ambulance_id, start_node, end_node, depart_dt, traffic_injections, segment_events
+        )
+        while True:
+            try:
+                ev = next(stream)
+            except StopIteration as done:
+                result = done.value
+                break
+            if on_event is not None:
+                on_event(ev)
+            if record_events:
+                events.append(ev)
+        result.events = events
+        return result
+
+    def stream(
+        self,
+        ambulance_id: str,
+        start_node: int,
+        end_node: int,
+        depart_dt: Optional[datetime.datetime] = None,
+        traffic_injections: Optional[Iterable[TrafficInjection]] = None,
+        segment_events: bool = True,
+    ) -> Generator[SimEvent, None, SimResult]:
+        """
+        Generator form of run: yields each SimEvent as it happens, then
+        returns the SimResult (with an empty events list) as its value.
+
+        Raises NoRouteError on the first next() when there is no route.
+        """
+        depart_dt = _ensure_utc(depart_dt) if depart_dt else datetime.datetime.now(tz=UTC)
+        if isinstance(traffic_injections, list):
+            traffic_injections = sorted(traffic_injections, key=lambda inj: inj.trigger_at)
+        # Other iterables are read lazily and must already be in trigger_at order.
+        pending = iter(traffic_injections or ())
+        inj = next(pending, None)
         reroute_count = 0
 
         # --- Initial route ---
-        eta, path, per_seg = time_dependent_dijkstra(self.graph, start_node, end_node, depart_dt)
+        # The router keeps its search state so each reroute check only repairs
+        # what the injected traffic changed.
+        router = IncrementalRoute(self.graph, start_node, end_node, depart_dt, self.mask_spec)
+        eta, path, per_seg = router.route()
         if path is None:
-            raise ValueError(f"No route from {start_node} to {end_node}")
+            raise NoRouteError(f"No route from {start_node} to {end_node}")
 
         sim_time = depart_dt
         log.info(
@@ -121,13 +179,11 @@ class SimulationEngine:
             end_node,
             eta.isoformat(),
         )
-        events.append(
-            SimEvent(
-                sim_time,
-                "DEPART",
-                f"Ambulance {ambulance_id} departed node {start_node} -> destination {end_node}",
-                {"path": path, "eta": eta.isoformat()},
-            )
+        yield SimEvent(
+            sim_time,
+            "DEPART",
+            f"Ambulance {ambulance_id} departed node {start_node} -> destination {end_node}",
+            {"path": path, "eta": eta.isoformat()},
         )
 
         seg_index = 0
@@ -138,54 +194,40 @@ class SimulationEngine:
             v = path[seg_index + 1]
             seg_duration = (seg_end - seg_start).total_seconds()
 
-            events.append(
-                SimEvent(
+            if segment_events:
+                yield SimEvent(
                     sim_time,
                     "SEGMENT",
                     f"Travelling segment {seg_index+1}/{len(per_seg)}: "
                     f"node {u} -> node {v} ({int(seg_duration)}s)",
                     {"from": u, "to": v, "duration_sec": seg_duration},
                 )
-            )
 
             # Advance virtual time to end of this segment
             sim_time = seg_end
 
             # Apply any traffic injections that fire during this segment
-            fired_injections = [inj for inj in injections if inj.trigger_at <= sim_time]
-            for inj in fired_injections:
-                injections.remove(inj)
-                label = inj.label or f"{len(inj.edge_updates)} edge(s)"
-                events.append(
-                    SimEvent(
-                        sim_time,
-                        "TRAFFIC",
-                        f"Traffic update applied: {label}",
-                        {"updates": [u.model_dump() for u in inj.edge_updates]},
-                    )
+            while inj is not None and inj.trigger_at <= sim_time:
+                fired, inj = inj, next(pending, None)
+                label = fired.label or f"{len(fired.edge_updates)} edge(s)"
+                yield SimEvent(
+                    sim_time,
+                    "TRAFFIC",
+                    f"Traffic update applied: {label}",
+                    {"updates": [u.model_dump() for u in fired.edge_updates]},
                 )
-                for eu in inj.edge_updates:
+                for eu in fired.edge_updates:
                     try:
                         self.graph.apply_edge_update(eu)
                     except Exception as e:
-                        events.append(
-                            SimEvent(
-                                sim_time,
-                                "TRAFFIC",
-                                f"Edge update failed: {e}",
-                            )
-                        )
+                        yield SimEvent(sim_time, "TRAFFIC", f"Edge update failed: {e}")
 
                 # Evaluate reroute from current position
                 current_node = v  # we just arrived at v
-                remaining_path = path[seg_index + 1 :]
-                if len(remaining_path) < 2:
+                if len(path) - (seg_index + 1) < 2:
                     continue  # at or near destination
 
-                dest = path[-1]
-                new_eta, new_path, new_per_seg = time_dependent_dijkstra(
-                    self.graph, current_node, dest, sim_time
-                )
+                new_eta, new_path, new_per_seg = router.reroute_from(current_node, sim_time)
 
                 if new_path is None:
                     continue
@@ -196,30 +238,26 @@ class SimulationEngine:
 
                 if saved >= self.threshold:
                     reroute_count += 1
-                    events.append(
-                        SimEvent(
-                            sim_time,
-                            "REROUTE",
-                            f"Rerouted: save {int(saved)}s "
-                            f"({int(old_remaining)}s -> {int(new_remaining)}s remaining)",
-                            {
-                                "old_path": path[seg_index + 1 :],
-                                "new_path": new_path,
-                                "time_saved_sec": saved,
-                            },
-                        )
+                    yield SimEvent(
+                        sim_time,
+                        "REROUTE",
+                        f"Rerouted: save {int(saved)}s "
+                        f"({int(old_remaining)}s -> {int(new_remaining)}s remaining)",
+                        {
+                            "old_path": path[seg_index + 1 :],
+                            "new_path": new_path,
+                            "time_saved_sec": saved,
+                        },
                     )
                     # Update route state
                     path = path[: seg_index + 1] + new_path
                     per_seg = per_seg[: seg_index + 1] + new_per_seg
                     eta = new_eta
                 else:
-                    events.append(
-                        SimEvent(
-                            sim_time,
-                            "REROUTE",
-                            f"Reroute not beneficial (would save {int(saved)}s < {int(self.threshold)}s threshold)",
-                        )
+                    yield SimEvent(
+                        sim_time,
+                        "REROUTE",
+                        f"Reroute not beneficial (would save {int(saved)}s < {int(self.threshold)}s threshold)",
                     )
 
             seg_index += 1
@@ -231,23 +269,21 @@ class SimulationEngine:
             total_s,
             reroute_count,
         )
-        events.append(
-            SimEvent(
-                sim_time,
-                "ARRIVE",
-                f"Ambulance {ambulance_id} arrived at node {path[-1]}",
-                {"total_seconds": total_s},
-            )
+        yield SimEvent(
+            sim_time,
+            "ARRIVE",
+            f"Ambulance {ambulance_id} arrived at node {path[-1]}",
+            {"total_seconds": total_s},
         )
 
         return SimResult(
             ambulance_id=ambulance_id,
             departed=depart_dt,
             arrived=sim_time,
-            total_seconds=(sim_time - depart_dt).total_seconds(),
+            total_seconds=total_s,
             path=path,
             reroutes=reroute_count,
-            events=events,
+            events=[],
         )
 
 
@@ -0,0 +1,77 @@
+"""
+In-flight deduplication of identical concurrent computations.
+
+When many callers ask for the same thing at the same moment (dispatch
+consoles after a major incident all requesting one route), only the first
+caller runs the computation; the others block until it finishes and share
+its result or exception. Nothing is cached afterwards — once the call
+completes the next request with that key starts a fresh one.
+
+Usage:
+    flight = SingleFlight()
+    result, shared = flight.do(key, lambda: expensive(...))
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time; concurrent callers share it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return (result, shared). shared is True when the result was computed
+        by another caller's in-flight call with the same key.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+                "coalesce_ratio": self.coalesced / self.calls if self.calls else 0.0,
+            }
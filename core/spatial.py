@@ -0,0 +1,128 @@
+"""
+Uniform-grid spatial index over edge geometries.
+
+Each edge is treated as a straight segment between its endpoint nodes and is
+registered in every grid cell its bounding box overlaps. A lookup only
+inspects the cells within the search radius, so the cost depends on local
+road density rather than graph size.
+
+Distances use an equirectangular projection around the query point, which is
+accurate to well under a metre at city scale.
+
+Usage:
+    from core.spatial import cached_edge_grid
+    grid = cached_edge_grid(graph)
+    for c in grid.candidates(lat, lon, radius_m=50):
+        c.edge_id, c.fraction, c.distance_m
+"""
+
+import math
+import weakref
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from core.config import EDGE_GRID_CELL_DEG
+from core.graph import Graph
+from core.routing import haversine_distance
+
+# Metres per degree of latitude, and of longitude at the equator.
+M_PER_DEG_LAT = 110_574.0
+M_PER_DEG_LON = 111_320.0
+
+
+@dataclass(frozen=True)
+class EdgeCandidate:
+    """Projection of a point onto one edge."""
+
+    edge_id: int
+    fraction: float  # 0.0 at the edge's tail node, 1.0 at its head node
+    distance_m: float
+    lat: float
+    lon: float
+
+
+class EdgeGrid:
+    """Edge ids bucketed by the grid cells their segments overlap."""
+
+    def __init__(self, graph: Graph, cell_deg: float = EDGE_GRID_CELL_DEG):
+        if cell_deg <= 0:
+            raise ValueError("cell_deg must be > 0")
+        self.cell_deg = cell_deg
+        self.topology_epoch = graph.topology_epoch
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        # edge_id -> (tail lat, tail lon, head lat, head lon)
+        self.segments: Dict[int, Tuple[float, float, float, float]] = {}
+        self.lengths_m: Dict[int, float] = {}
+
+        for eid, e in graph.edges.items():
+            a, b = graph.nodes[e["u"]], graph.nodes[e["v"]]
+            seg = (a["lat"], a["lon"], b["lat"], b["lon"])
+            self.segments[eid] = seg
+            self.lengths_m[eid] = haversine_distance(*seg)
+            r0, r1 = sorted((self._cell(seg[0]), self._cell(seg[2])))
+            c0, c1 = sorted((self._cell(seg[1]), self._cell(seg[3])))
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    self.cells.setdefault((r, c), []).append(eid)
+
+    def _cell(self, deg: float) -> int:
+        return math.floor(deg / self.cell_deg)
+
+    def candidates(
+        self, lat: float, lon: float, radius_m: float, limit: Optional[int] = None
+    ) -> List[EdgeCandidate]:
+        """Edges within radius_m of (lat, lon), nearest first, at most limit of them."""
+        kx = M_PER_DEG_LON * math.cos(math.radians(lat))
+        dlat = radius_m / M_PER_DEG_LAT
+        dlon = radius_m / kx if kx > 0 else 180.0
+
+        seen = set()
+        found: List[EdgeCandidate] = []
+        for r in range(self._cell(lat - dlat), self._cell(lat + dlat) + 1):
+            for c in range(self._cell(lon - dlon), self._cell(lon + dlon) + 1):
+                for eid in self.cells.get((r, c), ()):
+                    if eid in seen:
+                        continue
+                    seen.add(eid)
+                    cand = self.project(eid, lat, lon, kx)
+                    if cand.distance_m <= radius_m:
+                        found.append(cand)
+        found.sort(key=lambda cand: (cand.distance_m, cand.edge_id))
+        return found if limit is None else found[:limit]
+
+    def project(
+        self, edge_id: int, lat: float, lon: float, kx: Optional[float] = None
+    ) -> EdgeCandidate:
+        """Closest point on edge_id's segment to (lat, lon)."""
+        if kx is None:
+            kx = M_PER_DEG_LON * math.cos(math.radians(lat))
+        lat1, lon1, lat2, lon2 = self.segments[edge_id]
+        # Local metric coordinates with the tail node at the origin.
+        sx, sy = (lon2 - lon1) * kx, (lat2 - lat1) * M_PER_DEG_LAT
+        px, py = (lon - lon1) * kx, (lat - lat1) * M_PER_DEG_LAT
+        seg_sq = sx * sx + sy * sy
+        t = 0.0 if seg_sq == 0 else min(1.0, max(0.0, (px * sx + py * sy) / seg_sq))
+        dx, dy = px - t * sx, py - t * sy
+        return EdgeCandidate(
+            edge_id=edge_id,
+            fraction=t,
+            distance_m=math.hypot(dx, dy),
+            lat=lat1 + t * (lat2 - lat1),
+            lon=lon1 + t * (lon2 - lon1),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+_grid_cache: "weakref.WeakKeyDictionary[Graph, EdgeGrid]" = weakref.WeakKeyDictionary()
+
+
+def cached_edge_grid(graph: Graph) -> EdgeGrid:
+    """Return the EdgeGrid for graph, rebuilding it only after topology changes."""
+    grid = _grid_cache.get(graph)
+    if grid is None or grid.topology_epoch != graph.topology_epoch:
+        grid = EdgeGrid(graph)
+        _grid_cache[graph] = grid
+    return grid
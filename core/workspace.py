@@ -0,0 +1,251 @@
+"""
+Reusable per-thread search workspaces over CSR graphs.
+
+dijkstra_route and a_star_route build fresh dist / prev / prev_edge dicts
+on every call, and the dicts grow to the size of the search space. Under load
+that is steady allocator and garbage-collector churn.
+
+A SearchWorkspace preallocates one slot per node of a CSR snapshot:
+
+  dist[i]   best arrival epoch found for node index i
+  pred[i]   CSR position of the edge that reached i
+  stamp[i]  generation in which dist[i] / pred[i] were written
+
+A slot is only valid when stamp[i] equals the workspace's current
+generation, so resetting between queries is one integer increment instead
+of clearing n entries. Each thread keeps its own workspace (threading.local),
+so concurrent requests never share one and need no locking.
+
+The kernels here take a Graph, relax edges in exactly the same order as
+dijkstra_route / a_star_route and break ties on node id the same way, so
+they return the same routes. csr_route runs the same kernel on a CSRGraph
+alone, e.g. one attached from shared memory in a worker process.
+
+Usage:
+    from core.workspace import workspace_dijkstra_route
+    result = workspace_dijkstra_route(graph, s, t, depart_dt, edge_mask)
+"""
+
+import heapq
+import threading
+from typing import Callable, List, Optional
+
+from core.csr import CSRGraph, cached_csr
+from core.routing import (
+    RouteResult,
+    SearchStats,
+    _ensure_utc,
+    _heuristic_speed,
+    _settled_recorder,
+    haversine_distance,
+)
+
+
+class SearchWorkspace:
+    """Preallocated per-node search state with O(1) generation-stamped reset."""
+
+    __slots__ = ("dist", "pred", "stamp", "generation", "heap")
+
+    def __init__(self, n_nodes: int = 0):
+        self.dist: List[float] = [0.0] * n_nodes
+        self.pred: List[int] = [-1] * n_nodes
+        self.stamp: List[int] = [0] * n_nodes
+        self.generation = 0
+        self.heap: list = []
+
+    def __len__(self) -> int:
+        return len(self.stamp)
+
+    def reset(self, n_nodes: int) -> int:
+        """Invalidate every slot and make room for n_nodes; returns the new generation."""
+        grow = n_nodes - len(self.stamp)
+        if grow > 0:
+            self.dist.extend([0.0] * grow)
+            self.pred.extend([-1] * grow)
+            self.stamp.extend([0] * grow)
+        self.generation += 1
+        self.heap.clear()
+        return self.generation
+
+
+_local = threading.local()
+
+
+def workspace_for(n_nodes: int) -> SearchWorkspace:
+    """Reset and return the calling thread's workspace, sized for n_nodes."""
+    ws = getattr(_local, "workspace", None)
+    if ws is None:
+        ws = _local.workspace = SearchWorkspace(n_nodes)
+    ws.reset(n_nodes)
+    return ws
+
+
+def workspace_dijkstra_route(
+    graph,
+    source: int,
+    target: int,
+    depart_time_dt,
+    edge_mask: Optional[bytearray] = None,
+    stats: Optional[SearchStats] = None,
+    travel_time: Optional[Callable[[int, float], float]] = None,
+) -> RouteResult:
+    """Time-dependent Dijkstra on the thread's workspace; same results as dijkstra_route."""
+    return _search(
+        graph, source, target, depart_time_dt, edge_mask, stats, 0.0, travel_time=travel_time
+    )
+
+
+def workspace_a_star_route(
+    graph,
+    source: int,
+    target: int,
+    depart_time_dt,
+    edge_mask: Optional[bytearray] = None,
+    stats: Optional[SearchStats] = None,
+    max_speed_ms: Optional[float] = None,
+    travel_time: Optional[Callable[[int, float], float]] = None,
+) -> RouteResult:
+    """Time-dependent A* on the thread's workspace; same results as a_star_route."""
+    speed = _heuristic_speed(graph, max_speed_ms)
+    return _search(
+        graph, source, target, depart_time_dt, edge_mask, stats, speed, travel_time=travel_time
+    )
+
+
+def csr_route(
+    csr: CSRGraph,
+    source: int,
+    target: int,
+    depart_ts: float,
+    edge_mask: Optional[bytearray] = None,
+    stats: Optional[SearchStats] = None,
+    max_speed_ms: float = 0.0,
+) -> RouteResult:
+    """
+    Dijkstra, or A* when max_speed_ms > 0, on a CSRGraph alone: costs and
+    coordinates are read from its arrays, so it also runs on a snapshot
+    attached from shared memory. Same results as the Graph kernels.
+    """
+    lat, lon = csr.lat, csr.lon
+    t = csr.index.get(target)
+
+    def straight_line(i: int) -> float:
+        return haversine_distance(float(lat[i]), float(lon[i]), t_lat, t_lon) / max_speed_ms
+
+    heuristic = None
+    if max_speed_ms > 0 and t is not None:
+        t_lat, t_lon = float(lat[t]), float(lon[t])
+        heuristic = straight_line
+    return _search_csr(
+        csr, source, target, depart_ts, edge_mask, stats, heuristic, None, csr.edge_travel_time
+    )
+
+
+def _search(
+    graph,
+    source,
+    target,
+    depart_time_dt,
+    edge_mask,
+    stats,
+    speed,
+    edge_filter=None,
+    travel_time=None,
+) -> RouteResult:
+    """
+    Shared Dijkstra / A* kernel. edge_filter, if given, is (words, bit): the
+    edge at CSR position k is only relaxed when words[k] & bit (arc flags).
+    travel_time, if given, replaces graph.edge_travel_time (vehicle profiles).
+    """
+    start_ts = _ensure_utc(depart_time_dt).timestamp()
+    csr = cached_csr(graph)
+    nodes, ids = graph.nodes, csr.scalar_view()[3]
+
+    def straight_line(i: int) -> float:
+        n1 = nodes[ids[i]]
+        return haversine_distance(n1["lat"], n1["lon"], t_lat, t_lon) / speed
+
+    heuristic = None  # None: plain Dijkstra
+    if speed > 0 and target in nodes:
+        t_lat, t_lon = nodes[target]["lat"], nodes[target]["lon"]
+        heuristic = straight_line
+    return _search_csr(
+        csr,
+        source,
+        target,
+        start_ts,
+        edge_mask,
+        stats,
+        heuristic,
+        edge_filter,
+        travel_time or graph.edge_travel_time,
+    )
+
+
+def _search_csr(
+    csr, source, target, start_ts, edge_mask, stats, heuristic, edge_filter, travel_time
+) -> RouteResult:
+    """
+    The kernel itself. heuristic(i) estimates the remaining seconds from node
+    index i (None: plain Dijkstra); travel_time(edge_id, ts) gives edge costs.
+    """
+    src, dst = csr.index.get(source), csr.index.get(target)
+    if src is None or dst is None:
+        return RouteResult()
+    out, tails, edge_ids, ids = csr.scalar_view()
+
+    ws = workspace_for(csr.n_nodes)
+    gen = ws.generation
+    dist, pred, stamp, pq = ws.dist, ws.pred, ws.stamp, ws.heap
+    dist[src], pred[src], stamp[src] = start_ts, -1, gen
+    # (key, arrival, node id, index): the node id breaks ties like the dict kernels.
+    pq.append((start_ts + (heuristic(src) if heuristic else 0.0), start_ts, source, src))
+    words, bit = edge_filter if edge_filter is not None else (None, 0)
+    record = _settled_recorder(stats)
+    settled = pushes = stale = relaxed = peak = 0
+
+    while pq:
+        _, curr_ts, u_id, u = heapq.heappop(pq)
+        if u == dst:
+            break
+        if curr_ts > dist[u]:
+            stale += 1
+            continue
+        settled += 1
+        if record is not None:
+            record(u_id)
+        for v, eid, k in out[u]:
+            if edge_mask is not None and edge_mask[eid]:
+                continue
+            if words is not None and not words[k] & bit:
+                continue
+            relaxed += 1
+            arrival = curr_ts + travel_time(eid, curr_ts)
+            if stamp[v] != gen or arrival < dist[v]:
+                dist[v], pred[v], stamp[v] = arrival, k, gen
+                v_id = ids[v]
+                key = arrival + heuristic(v) if heuristic else arrival
+                heapq.heappush(pq, (key, arrival, v_id, v))
+                pushes += 1
+        if len(pq) > peak:
+            peak = len(pq)
+
+    if stats is not None:
+        stats.add(settled, pushes, stale, relaxed, peak)
+    if stamp[dst] != gen:
+        return RouteResult()
+
+    edges: List[int] = []
+    times: List[float] = [dist[dst]]
+    path: List[int] = [target]
+    i = dst
+    while i != src:
+        k = pred[i]
+        edges.append(edge_ids[k])
+        i = tails[k]
+        path.append(ids[i])
+        times.append(dist[i])
+    path.reverse()
+    edges.reverse()
+    times.reverse()
+    return RouteResult(path, edges, times)
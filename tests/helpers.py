@@ -0,0 +1,76 @@
+"""Random graphs shared by the test modules."""
+
+import random
+from typing import Optional, Sequence, Tuple
+
+from core.graph import Graph
+
+RUSH = [{"start": 27000, "end": 36000, "avg_time": 150}]  # 07:30 - 10:00
+
+
+def random_graph(
+    n: int = 60,
+    m: int = 240,
+    seed: int = 7,
+    spine: bool = False,
+    both_ways: bool = False,
+    rush: float = 0.0,
+    window: Tuple[int, int] = (25200, 43200),
+    emergency: float = 1.0,
+    stride: int = 1,
+    costs: Optional[Sequence[float]] = None,
+) -> Graph:
+    """
+    n nodes around Bengaluru with ids stride, 2 * stride, ... and up to m
+    random edges (never parallel ones).
+
+    spine adds i -> i + 1 along the ids (and back with both_ways) so every
+    node is reachable. A share rush of the random edges gets one time bucket
+    over window, emergency is the share open to emergency vehicles, and
+    costs, if given, are the only base times used (to force ties). With
+    stride > 1 nodes are inserted in descending id order, so CSR indexes
+    and node ids differ.
+    """
+    rng = random.Random(seed)
+    g = Graph()
+    ids = [i * stride for i in range(1, n + 1)]
+    for nid in reversed(ids) if stride > 1 else ids:
+        g.add_node(nid, rng.uniform(12.9, 13.0), rng.uniform(77.5, 77.6))
+    if spine:
+        for u, v in zip(ids, ids[1:]):
+            g.add_edge(u, v, rng.uniform(100, 300), 1000)
+            if both_ways:
+                g.add_edge(v, u, rng.uniform(100, 300), 1000)
+    for _ in range(m):
+        u, v = rng.sample(ids, 2)
+        buckets = None
+        if rng.random() < rush:
+            buckets = [{"start": window[0], "end": window[1], "avg_time": rng.uniform(30, 400)}]
+        base = rng.choice(costs) if costs else rng.uniform(10, 300)
+        allowed = rng.random() < emergency
+        if g.edge_id_between(u, v) is None:
+            g.add_edge(u, v, base, 1000, buckets, allowed)
+    return g
+
+
+def grid_graph(side: int = 12, seed: int = 2, rush: float = 0.0) -> Graph:
+    """
+    side x side grid, ids 1.. row by row, with both directions of every
+    street at 30-120 s. A share rush of the edges gets the RUSH bucket
+    and 5% are closed to emergency vehicles.
+    """
+    rng = random.Random(seed)
+    g = Graph()
+    for r in range(side):
+        for c in range(side):
+            g.add_node(r * side + c + 1, 12.9 + r * 0.005, 77.5 + c * 0.005)
+    for r in range(side):
+        for c in range(side):
+            u = r * side + c + 1
+            for v in (u + 1 if c + 1 < side else None, u + side if r + 1 < side else None):
+                if v is None:
+                    continue
+                for a, b in ((u, v), (v, u)):
+                    buckets = RUSH if rng.random() < rush else None
+                    g.add_edge(a, b, rng.uniform(30, 120), 500, buckets, rng.random() > 0.05)
+    return g
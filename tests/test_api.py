@@ -2,6 +2,9 @@
 
 import datetime
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 from fastapi.testclient import TestClient
@@ -9,7 +12,17 @@ from fastapi.testclient import TestClient
 # Ensure the sample graph exists before importing the app
 os.environ.setdefault("PYTHONPATH", ".")
 
-from api.main import active_routes, app, graph, reroute_events  # noqa: E402
+from api.main import (  # noqa: E402
+    active_routes,
+    app,
+    cch_router,
+    engines,
+    graph,
+    mld_router,
+    reroute_events,
+)
+from core.graph import EdgeUpdate  # noqa: E402
+from core.masks import MaskSpec  # noqa: E402
 
 UTC = datetime.timezone.utc
 client = TestClient(app)
@@ -86,6 +99,85 @@ class TestRouteAmbulance:
         r = client.post("/route_ambulance", json=payload)
         assert r.status_code == 200
 
+    def test_avoid_closures_constraint(self):
+        for eid in (1, 3):  # every edge out of node 1
+            graph.apply_edge_update(EdgeUpdate(edge_id=eid, absolute_time=99999))
+        payload = self._payload()
+        assert client.post("/route_ambulance", json=payload).status_code == 200
+        payload["constraints"] = {"avoid_closures": True}
+        assert client.post("/route_ambulance", json=payload).status_code == 404
+
+    def test_constraints_stored_for_rerouting(self):
+        payload = self._payload("A1")
+        payload["constraints"] = {"avoid_closures": True, "vehicle_height_m": 3.2}
+        client.post("/route_ambulance", json=payload)
+        spec = active_routes["A1"]["mask_spec"]
+        assert spec.avoid_closures and spec.height_class == 3.5
+
+    def test_invalid_vehicle_height_rejected(self):
+        payload = self._payload()
+        payload["constraints"] = {"vehicle_height_m": -1}
+        assert client.post("/route_ambulance", json=payload).status_code == 422
+
+    def test_no_explain_by_default(self):
+        r = client.post("/api/v1/route_ambulance", json=self._payload())
+        assert r.json()["explain"] is None
+
+    @pytest.mark.parametrize(
+        "endpoint",
+        ["route_ambulance", "route_ambulance_astar", "route_ambulance_cch", "route_ambulance_mld"],
+    )
+    def test_explain_returns_stats_and_phases(self, endpoint):
+        r = client.post(f"/api/v1/{endpoint}?explain=true", json=self._payload())
+        assert r.status_code == 200
+        explain = r.json()["explain"]
+        assert set(explain["phases_ms"]) == {
+            "snapping",
+            "search",
+            "segment_build",
+            "serialization",
+        }
+        assert explain["stats"]["settled"] >= 1
+        assert explain["stats"]["settled_nodes"] is None
+
+    def test_explain_settled_nodes(self):
+        r = client.post(
+            "/api/v1/route_ambulance?explain=true&explain_settled=true", json=self._payload()
+        )
+        data = r.json()
+        settled = data["explain"]["stats"]["settled_nodes"]
+        assert settled[0] == data["path"][0]
+        assert len(settled) == data["explain"]["stats"]["settled"]
+
+    @pytest.mark.parametrize("endpoint", ["route_ambulance", "route_ambulance_astar"])
+    def test_vehicle_profile(self, endpoint):
+        payload = self._payload("P1")
+        payload["departure_time"] = "2026-06-12T08:00:00Z"  # both requests depart together
+        r_plain = client.post(f"/api/v1/{endpoint}", json=payload)
+        payload["profile"] = "bls"
+        r = client.post(f"/api/v1/{endpoint}", json=payload)
+        assert r.status_code == 200
+        assert r.json()["profile"] == "bls"
+        assert r.json()["estimated_arrival"] == r_plain.json()["estimated_arrival"]
+        assert active_routes["P1"]["profile"] == "bls"
+        assert client.post("/reroute_check", json={"ambulance_id": "P1"}).status_code == 200
+
+    def test_profile_height_applies_without_constraints(self):
+        payload = self._payload("P2")
+        payload["profile"] = "als"
+        client.post("/api/v1/route_ambulance", json=payload)
+        assert active_routes["P2"]["mask_spec"].height_class == 3.5
+
+    def test_unknown_profile_rejected(self):
+        payload = self._payload()
+        payload["profile"] = "hovercraft"
+        assert client.post("/api/v1/route_ambulance", json=payload).status_code == 422
+
+    def test_profile_unsupported_by_cch(self):
+        payload = self._payload()
+        payload["profile"] = "motorcycle"
+        assert client.post("/api/v1/route_ambulance_cch", json=payload).status_code == 422
+
 
 # ------------------------------------------------------------------
 # POST /route_ambulance_astar
@@ -118,6 +210,106 @@ class TestRouteAmbulanceAstar:
         assert r_d.json()["estimated_arrival"] == r_a.json()["estimated_arrival"]
 
 
+class TestRouteAmbulanceCCH:
+    PAYLOAD = {
+        "current_location": {"lat": 12.97, "lon": 77.59},
+        "destination": {"lat": 12.965, "lon": 77.60},
+        "departure_time": "2026-06-12T08:00:00Z",
+    }
+
+    def test_matches_dijkstra(self):
+        cch_router.recustomize()
+        r_d = client.post("/api/v1/route_ambulance", json=self.PAYLOAD)
+        r_c = client.post("/api/v1/route_ambulance_cch", json=self.PAYLOAD)
+        assert r_c.status_code == 200
+        assert r_c.json()["algorithm"] == "cch"
+        assert r_c.json()["estimated_arrival"] == r_d.json()["estimated_arrival"]
+
+    def test_traffic_snapshot_triggers_recustomization(self):
+        client.post("/api/v1/route_ambulance_cch", json=self.PAYLOAD)
+        client.post(
+            "/api/v1/traffic_snapshot",
+            json={
+                "timestamp": "2026-06-12T08:00:00Z",
+                "edge_updates": [{"edge_id": 4, "absolute_time": 9999.0}],
+            },
+        )
+        worker = cch_router.recustomize_async()
+        worker.join(timeout=10)
+        assert cch_router.metric(MaskSpec()).epoch == graph.epoch
+        r_d = client.post("/api/v1/route_ambulance", json=self.PAYLOAD)
+        r_c = client.post("/api/v1/route_ambulance_cch", json=self.PAYLOAD)
+        assert r_c.json()["path"] == r_d.json()["path"]
+
+
+class TestRouteAmbulanceMLD:
+    PAYLOAD = TestRouteAmbulanceCCH.PAYLOAD
+
+    def test_matches_dijkstra(self):
+        mld_router.recustomize()
+        r_d = client.post("/api/v1/route_ambulance", json=self.PAYLOAD)
+        r_m = client.post("/api/v1/route_ambulance_mld", json=self.PAYLOAD)
+        assert r_m.status_code == 200
+        assert r_m.json()["algorithm"] == "mld"
+        assert r_m.json()["estimated_arrival"] == r_d.json()["estimated_arrival"]
+
+    def test_traffic_snapshot_recustomizes_touched_cells(self):
+        client.post("/api/v1/route_ambulance_mld", json=self.PAYLOAD)
+        client.post(
+            "/api/v1/traffic_snapshot",
+            json={
+                "timestamp": "2026-06-12T08:00:00Z",
+                "edge_updates": [{"edge_id": 4, "absolute_time": 9999.0}],
+            },
+        )
+        worker = mld_router.recustomize_async()
+        worker.join(timeout=10)
+        assert mld_router.metric(MaskSpec()).epoch == graph.epoch
+        r_d = client.post("/api/v1/route_ambulance", json=self.PAYLOAD)
+        r_m = client.post("/api/v1/route_ambulance_mld", json=self.PAYLOAD)
+        assert r_m.json()["path"] == r_d.json()["path"]
+        assert client.get("/api/v1/metrics").json()["mld"]["levels"] >= 1
+
+
+class TestRouteAmbulanceAuto:
+    PAYLOAD = TestRouteAmbulanceCCH.PAYLOAD
+
+    def test_explores_then_reports_choice(self, monkeypatch):
+        # Start from no samples so every engine is explored whatever ran before.
+        monkeypatch.setattr(engines, "_latency", {})
+        monkeypatch.setattr(engines, "_picks", {})
+        seen = set()
+        for _ in range(20):
+            r = client.post("/api/v1/route_ambulance?algorithm=auto", json=self.PAYLOAD)
+            assert r.status_code == 200
+            data = r.json()
+            assert data["algorithm"] in engines.names()
+            assert data["auto_selection"]["reason"] in ("fastest", "exploring")
+            seen.add(data["algorithm"])
+        assert {"dijkstra", "astar"} <= seen
+        stats = client.get("/api/v1/metrics").json()["engines"]["engines"]
+        assert sum(e["auto_selections"] for e in stats.values()) >= 20
+        assert stats["dijkstra"]["latency_by_band"]
+
+    def test_matches_dijkstra(self):
+        r_d = client.post("/api/v1/route_ambulance", json=self.PAYLOAD)
+        r_a = client.post("/api/v1/route_ambulance?algorithm=auto", json=self.PAYLOAD)
+        assert r_a.json()["estimated_arrival"] == r_d.json()["estimated_arrival"]
+        assert r_d.json()["auto_selection"] is None
+
+    def test_profile_only_uses_profile_engines(self):
+        payload = dict(self.PAYLOAD, profile="motorcycle")
+        for _ in range(10):
+            r = client.post("/api/v1/route_ambulance?algorithm=auto", json=payload)
+            assert r.json()["algorithm"] in ("dijkstra", "astar")
+
+    def test_named_engine_and_unknown(self):
+        r = client.post("/api/v1/route_ambulance?algorithm=mld", json=self.PAYLOAD)
+        assert r.json()["algorithm"] == "mld"
+        r = client.post("/api/v1/route_ambulance?algorithm=warp", json=self.PAYLOAD)
+        assert r.status_code == 422
+
+
 # ------------------------------------------------------------------
 # POST /traffic_snapshot
 # ------------------------------------------------------------------
@@ -166,6 +358,39 @@ class TestTrafficSnapshot:
         # but the response should be valid
         assert "auto_reroutes" in r.json()
 
+    def test_shared_destination_uses_one_reverse_tree(self, monkeypatch):
+        import api.main
+
+        built = []
+        real = api.main.reverse_tree_for
+
+        def counting(*args, **kwargs):
+            built.append(args[1])
+            return real(*args, **kwargs)
+
+        monkeypatch.setattr(api.main, "reverse_tree_for", counting)
+        for amb_id in ("HOT-1", "HOT-2", "HOT-3"):
+            client.post(
+                "/route_ambulance",
+                json={
+                    "ambulance_id": amb_id,
+                    "current_location": {"lat": 12.97, "lon": 77.59},
+                    "destination": {"lat": 12.965, "lon": 77.60},
+                    "departure_time": "2030-01-01T08:00:00Z",
+                },
+            )
+        r = client.post(
+            "/traffic_snapshot",
+            json={
+                "timestamp": "2030-01-01T08:00:00Z",
+                "edge_updates": [{"edge_id": 4, "multiplier": 1.5}],
+            },
+        )
+        assert r.status_code == 200
+        assert built == [4]
+        for amb_id in ("HOT-1", "HOT-2", "HOT-3"):
+            assert active_routes[amb_id]["remaining_seconds"] == pytest.approx(130.0, abs=5.0)
+
 
 # ------------------------------------------------------------------
 # POST /reroute_check
@@ -219,6 +444,269 @@ class TestRerouteCheck:
         assert r.status_code == 200
 
 
+class TestETATables:
+    def test_route_served_from_tables(self, monkeypatch):
+        import api.main
+        from core.apsp import ETATableRouter
+
+        body = {
+            "current_location": {"lat": 12.97, "lon": 77.59},
+            "destination": {"lat": 12.965, "lon": 77.60},
+            "departure_time": "2026-06-12T08:00:00Z",
+        }
+        live = client.post("/api/v1/route_ambulance", json=body).json()
+        router = ETATableRouter(api.main.graph)
+        router.refresh()
+        monkeypatch.setattr(api.main, "eta_tables", router)
+        tabled = client.post("/api/v1/route_ambulance", json=body).json()
+        assert tabled == live
+        assert router.hits == 1
+        assert client.get("/api/v1/metrics").json()["eta_tables"]["hits"] == 1
+
+    def test_metrics_without_tables(self):
+        assert client.get("/api/v1/metrics").json()["eta_tables"] is None
+
+
+class TestArcFlags:
+    def test_route_uses_flags(self, monkeypatch):
+        import api.main
+        from core.arc_flags import ArcFlagRouter
+
+        body = {
+            "current_location": {"lat": 12.97, "lon": 77.59},
+            "destination": {"lat": 12.965, "lon": 77.60},
+            "departure_time": "2026-06-12T08:00:00Z",
+        }
+        live = client.post("/api/v1/route_ambulance_astar", json=body).json()
+        router = ArcFlagRouter(api.main.graph, workers=1)
+        router.refresh()
+        monkeypatch.setattr(api.main, "arc_flags", router)
+        flagged = client.post("/api/v1/route_ambulance_astar", json=body).json()
+        assert flagged == live
+        assert client.get("/api/v1/metrics").json()["arc_flags"]["hits"] == 1
+
+    def test_metrics_without_flags(self):
+        assert client.get("/api/v1/metrics").json()["arc_flags"] is None
+
+
+class TestETA:
+    BODY = {
+        "current_location": {"lat": 12.97, "lon": 77.59},
+        "destination": {"lat": 12.965, "lon": 77.60},
+        "departure_time": "2026-06-12T08:00:00Z",
+    }
+
+    def test_exact_uses_search(self):
+        r = client.post("/api/v1/eta", json={**self.BODY, "exact": True})
+        assert r.status_code == 200
+        data = r.json()
+        assert data["source"] == "search" and data["max_error_seconds"] == 0
+        route = client.post("/api/v1/route_ambulance", json=self.BODY).json()
+        assert data["estimated_arrival"] == route["estimated_arrival"]
+
+    def test_labels_bound_the_live_eta(self, monkeypatch):
+        import api.main
+        from core.hub_labels import HubLabelRouter
+
+        router = HubLabelRouter(api.main.graph)
+        router.refresh()
+        monkeypatch.setattr(api.main, "hub_labels", router)
+        exact = client.post("/api/v1/eta", json={**self.BODY, "exact": True}).json()
+        data = client.post("/api/v1/eta", json=self.BODY).json()
+        assert data["source"] == "labels"
+        assert data["lower_bound_seconds"] <= exact["eta_seconds"] <= data["upper_bound_seconds"]
+        assert client.get("/api/v1/metrics").json()["hub_labels"]["hits"] == 1
+
+    def test_falls_back_while_labels_build(self, monkeypatch):
+        import api.main
+        from core.hub_labels import HubLabelRouter
+
+        router = HubLabelRouter(api.main.graph)
+        monkeypatch.setattr(router, "refresh_async", lambda: None)
+        monkeypatch.setattr(api.main, "hub_labels", router)
+        assert client.post("/api/v1/eta", json=self.BODY).json()["source"] == "search"
+        assert router.stats()["fallbacks"] == 1
+
+
+# ------------------------------------------------------------------
+# POST /api/v1/route_nearest
+# ------------------------------------------------------------------
+
+
+class TestRouteNearest:
+    def test_nearest_hospital_by_tag(self):
+        r = client.post(
+            "/api/v1/route_nearest",
+            json={"current_location": {"lat": 12.97, "lon": 77.59}, "tag": "hospital", "k": 2},
+        )
+        assert r.status_code == 200
+        results = r.json()["results"]
+        assert [x["node"] for x in results] == [3, 4]
+        assert results[0]["path"] == [1, 2, 3]
+        assert results[0]["total_time_minutes"] == {"minutes": 1, "seconds": 20}
+
+    def test_astar_matches_dijkstra(self):
+        body = {
+            "current_location": {"lat": 12.97, "lon": 77.59},
+            "targets": [4, 3],
+            "k": 2,
+            "departure_time": "2026-06-12T08:00:00Z",
+        }
+        d = client.post("/api/v1/route_nearest", json=body).json()
+        a = client.post("/api/v1/route_nearest", json={**body, "algorithm": "astar"}).json()
+        assert a["algorithm"] == "astar"
+        assert a["results"] == d["results"]
+
+    def test_stores_route_to_nearest(self):
+        client.post(
+            "/api/v1/route_nearest",
+            json={
+                "ambulance_id": "NEAR-001",
+                "current_location": {"lat": 12.97, "lon": 77.59},
+                "tag": "hospital",
+            },
+        )
+        assert active_routes["NEAR-001"]["path"] == [1, 2, 3]
+
+    def test_unknown_target_404(self):
+        r = client.post(
+            "/api/v1/route_nearest",
+            json={"current_location": {"lat": 12.97, "lon": 77.59}, "targets": [3, 999]},
+        )
+        assert r.status_code == 404
+
+    def test_unknown_tag_404(self):
+        r = client.post(
+            "/api/v1/route_nearest",
+            json={"current_location": {"lat": 12.97, "lon": 77.59}, "tag": "fire_station"},
+        )
+        assert r.status_code == 404
+
+    @pytest.mark.parametrize(
+        "extra",
+        [{}, {"targets": [3], "tag": "hospital"}, {"targets": []}, {"tag": "hospital", "k": 0}],
+    )
+    def test_validation(self, extra):
+        r = client.post(
+            "/api/v1/route_nearest",
+            json={"current_location": {"lat": 12.97, "lon": 77.59}, **extra},
+        )
+        assert r.status_code == 422
+
+
+# ------------------------------------------------------------------
+# GET /api/v1/catchments
+# ------------------------------------------------------------------
+
+
+class TestCatchments:
+    def test_every_node_labelled_by_tag(self):
+        r = client.get(
+            "/api/v1/catchments",
+            params={"tag": "hospital", "departure_time": "2026-06-12T08:00:00Z"},
+        )
+        assert r.status_code == 200
+        data = r.json()
+        owners = {a["node"]: (a["source"], a["eta_seconds"]) for a in data["assignments"]}
+        assert owners == {1: (3, 80.0), 2: (3, 40.0), 3: (3, 0.0), 4: (4, 0.0)}
+        assert {s["node"]: s["nodes"] for s in data["sources"]} == {3: 3, 4: 1}
+        assert data["unreachable"] == []
+
+    def test_single_node_from_sources(self):
+        r = client.get(
+            "/api/v1/catchments",
+            params={"sources": [1, 2], "direction": "from_source", "node": 4},
+        )
+        assert r.json()["assignments"] == [{"node": 4, "source": 2, "eta_seconds": 60.0}]
+
+    def test_unreachable_node_listed(self):
+        params = {"sources": [4], "direction": "from_source", "node": 1}
+        r = client.get("/api/v1/catchments", params=params)
+        data = r.json()
+        assert data["assignments"] == [] and data["unreachable"] == [1]
+
+    def test_avoid_closures_constraint(self):
+        for eid in (1, 3):  # every edge out of node 1
+            graph.apply_edge_update(EdgeUpdate(edge_id=eid, absolute_time=99999))
+        params = {"sources": [4], "node": 1, "departure_time": "2026-06-12T08:00:00Z"}
+        assert client.get("/api/v1/catchments", params=params).json()["unreachable"] == []
+        params["avoid_closures"] = True
+        assert client.get("/api/v1/catchments", params=params).json()["unreachable"] == [1]
+
+    @pytest.mark.parametrize(
+        "params,status",
+        [
+            ({}, 422),
+            ({"tag": "hospital", "vehicle_height_m": -1}, 422),
+            ({"tag": "hospital", "sources": [3]}, 422),
+            ({"tag": "fire_station"}, 404),
+            ({"sources": [999]}, 404),
+            ({"tag": "hospital", "node": 999}, 404),
+            ({"tag": "hospital", "direction": "sideways"}, 422),
+        ],
+    )
+    def test_errors(self, params, status):
+        assert client.get("/api/v1/catchments", params=params).status_code == status
+
+
+# ------------------------------------------------------------------
+# GET /api/v1/criticality
+# ------------------------------------------------------------------
+
+
+class TestCriticality:
+    def _route(self, amb_id="AMB-1"):
+        depart = datetime.datetime.now(UTC) + datetime.timedelta(hours=1)
+        client.post(
+            "/api/v1/route_ambulance",
+            json={
+                "ambulance_id": amb_id,
+                "current_location": {"lat": 12.97, "lon": 77.59},
+                "destination": {"lat": 12.965, "lon": 77.6},
+                "departure_time": depart.isoformat(),
+            },
+        )
+
+    def test_ranks_route_edges_by_penalty(self):
+        self._route()
+        data = client.get("/api/v1/criticality").json()
+        assert data["routes_analyzed"] == 1
+        assert [(e["edge_id"], e["total_penalty_seconds"], e["routes"]) for e in data["edges"]] == [
+            (1, 60.0, ["AMB-1"]),
+            (4, 20.0, ["AMB-1"]),
+        ]
+
+    def test_limit_and_no_routes(self):
+        assert client.get("/api/v1/criticality").json()["edges"] == []
+        self._route()
+        assert len(client.get("/api/v1/criticality", params={"limit": 1}).json()["edges"]) == 1
+        assert client.get("/api/v1/criticality", params={"limit": 0}).status_code == 422
+
+    def test_disconnecting_edge_has_null_penalty(self):
+        self._route()
+        client.post(
+            "/api/v1/route_ambulance",
+            json={
+                "ambulance_id": "AMB-2",
+                "current_location": {"lat": 12.969, "lon": 77.593},
+                "destination": {"lat": 12.965, "lon": 77.6},
+                "departure_time": (
+                    datetime.datetime.now(UTC) + datetime.timedelta(hours=1)
+                ).isoformat(),
+            },
+        )
+        first = client.get("/api/v1/criticality").json()["edges"][0]
+        assert first["edge_id"] == 6 and first["disconnected_routes"] == 1
+        assert first["total_penalty_seconds"] is None
+
+    def test_metrics_count_reuse(self):
+        self._route()
+        client.get("/api/v1/criticality")
+        before = client.get("/api/v1/metrics").json()["criticality"]["routes_reused"]
+        client.get("/api/v1/criticality")
+        assert client.get("/api/v1/metrics").json()["criticality"]["routes_reused"] == before + 1
+
+
 # ------------------------------------------------------------------
 # POST /update_position
 # ------------------------------------------------------------------
@@ -247,6 +735,50 @@ class TestUpdatePosition:
         assert data["ambulance_id"] == "POS-001"
         assert "remaining_seconds" in data
 
+    def _start(self, ambulance_id):
+        client.post(
+            "/route_ambulance",
+            json={
+                "ambulance_id": ambulance_id,
+                "current_location": {"lat": 12.97, "lon": 77.59},
+                "destination": {"lat": 12.969, "lon": 77.593},
+            },
+        )
+
+    def test_remaining_counts_fraction_of_current_edge(self):
+        # Route is 1 -> 2 -> 3; the ping is halfway along edge 2 (2 -> 3, 40s).
+        self._start("POS-002")
+        r = client.post(
+            "/update_position",
+            json={"ambulance_id": "POS-002", "lat": 12.970, "lon": 77.5925},
+        )
+        data = r.json()
+        assert data["matched_edge_id"] == 2
+        assert data["edge_fraction"] == pytest.approx(0.5, abs=0.01)
+        assert data["remaining_seconds"] == pytest.approx(20, abs=0.5)
+        assert data["status"] == "EN_ROUTE"
+
+    def test_end_of_last_edge_is_arrival(self):
+        self._start("POS-003")
+        r = client.post(
+            "/update_position",
+            json={"ambulance_id": "POS-003", "lat": 12.969, "lon": 77.593},
+        )
+        data = r.json()
+        assert data["remaining_seconds"] == 0
+        assert data["status"] == "ARRIVED"
+
+    def test_ping_far_from_roads_falls_back_to_nearest_node(self):
+        self._start("POS-004")
+        r = client.post(
+            "/update_position",
+            json={"ambulance_id": "POS-004", "lat": 12.99, "lon": 77.59},
+        )
+        data = r.json()
+        assert r.status_code == 200
+        assert data["matched_edge_id"] is None
+        assert data["current_node"] == 2
+
     def test_no_active_route_returns_404(self):
         r = client.post(
             "/update_position",
@@ -259,6 +791,59 @@ class TestUpdatePosition:
         assert r.status_code == 404
 
 
+# ------------------------------------------------------------------
+# Request coalescing
+# ------------------------------------------------------------------
+
+
+class TestSingleFlight:
+    def test_identical_concurrent_requests_share_one_search(self, monkeypatch):
+        import api.main
+        from api.schemas import RouteRequest
+
+        release = threading.Event()
+        searches = []
+        real = api.main.workspace_dijkstra_route
+
+        def slow(*args, **kwargs):
+            searches.append(1)
+            release.wait(5)
+            return real(*args, **kwargs)
+
+        monkeypatch.setattr(api.main, "workspace_dijkstra_route", slow)
+        req = RouteRequest(
+            current_location={"lat": 12.97, "lon": 77.59},
+            destination={"lat": 12.965, "lon": 77.60},
+            departure_time="2026-06-12T08:00:00Z",
+        )
+        before = client.get("/api/v1/metrics").json()["singleflight"]["coalesced"]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(api.main._do_route, req, "dijkstra") for _ in range(4)]
+            deadline = time.monotonic() + 5
+            while api.main.route_flight.stats()["coalesced"] < before + 3:
+                assert time.monotonic() < deadline
+                time.sleep(0.001)
+            release.set()
+            paths = [f.result()["path"] for f in futures]
+
+        assert len(searches) == 1
+        assert all(p == paths[0] for p in paths)
+        after = client.get("/api/v1/metrics").json()["singleflight"]
+        assert after["coalesced"] == before + 3
+        assert after["in_flight"] == 0
+
+    def test_explain_requests_are_not_coalesced(self):
+        before = client.get("/api/v1/metrics").json()["singleflight"]["calls"]
+        client.post(
+            "/api/v1/route_ambulance?explain=true",
+            json={
+                "current_location": {"lat": 12.97, "lon": 77.59},
+                "destination": {"lat": 12.965, "lon": 77.60},
+            },
+        )
+        assert client.get("/api/v1/metrics").json()["singleflight"]["calls"] == before
+
+
 # ------------------------------------------------------------------
 # Debug endpoints
 # ------------------------------------------------------------------
@@ -0,0 +1,132 @@
+"""Tests for core/apsp.py"""
+
+import datetime
+from functools import partial
+
+import pytest
+
+from core.apsp import ETATableRouter, ETATables
+from core.graph import EdgeUpdate, Graph
+from core.masks import MaskSpec, mask_for
+from core.routing import dijkstra_route
+from tests.helpers import random_graph
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 8, 0, 0, tzinfo=UTC)  # 28800 s into the day
+
+
+make_random_graph = partial(
+    random_graph, n=40, m=160, seed=3, spine=True, rush=0.3, window=(27000, 36000), emergency=0.95
+)
+
+
+def make_diamond() -> Graph:
+    """1 -> 2 -> 4 (60 + 60s), 1 -> 3 -> 4 (100 + 100s)."""
+    g = Graph()
+    for nid in range(1, 5):
+        g.add_node(nid, 0.0, nid * 0.01)
+    g.add_edge(1, 2, 60, 500)
+    g.add_edge(2, 4, 60, 500)
+    g.add_edge(1, 3, 100, 500)
+    g.add_edge(3, 4, 100, 500)
+    return g
+
+
+class TestETATables:
+    @pytest.mark.parametrize("hour", [3, 8, 12])
+    def test_matches_dijkstra(self, hour):
+        g = make_random_graph()
+        tables = ETATables(g)
+        mask = mask_for(g, MaskSpec())
+        depart = DEPART.replace(hour=hour)
+        answered = 0
+        for s in range(1, 41, 3):
+            for t in range(2, 41, 5):
+                got = tables.route(g, s, t, depart)
+                if got is None:
+                    continue  # crosses a bucket boundary
+                answered += 1
+                want = dijkstra_route(g, s, t, depart, mask)
+                assert got.total_seconds == pytest.approx(want.total_seconds, rel=1e-5)
+        assert answered > 0
+
+    def test_one_table_per_period(self):
+        tables = ETATables(make_random_graph())
+        assert tables.periods == [(0, 27000), (27000, 36000), (36000, 86400)]
+        assert tables.dist[0].dtype.name == "float32"
+        assert tables.first_edge[0].dtype.name == "int32"
+
+    def test_source_equals_target_and_unreachable(self):
+        g = make_diamond()
+        g.add_node(9, 1.0, 1.0)
+        tables = ETATables(g)
+        assert tables.route(g, 1, 1, DEPART).path == [1]
+        assert not tables.route(g, 1, 9, DEPART).found
+
+    def test_override_on_path_falls_back(self):
+        g = make_diamond()
+        tables = ETATables(g)
+        assert tables.route(g, 1, 4, DEPART).path == [1, 2, 4]
+        g.apply_edge_update(EdgeUpdate(edge_id=2, multiplier=5.0))
+        assert tables.route(g, 1, 4, DEPART) is None
+
+    def test_slower_edge_off_path_keeps_tables(self):
+        g = make_diamond()
+        tables = ETATables(g)
+        g.apply_edge_update(EdgeUpdate(edge_id=4, multiplier=5.0))
+        assert tables.route(g, 1, 4, DEPART).total_seconds == pytest.approx(120)
+
+    def test_cheaper_edge_anywhere_falls_back(self):
+        g = make_diamond()
+        tables = ETATables(g)
+        g.apply_edge_update(EdgeUpdate(edge_id=4, multiplier=0.1))
+        assert tables.route(g, 1, 4, DEPART) is None
+        g.reset_edge_overrides()
+        assert tables.route(g, 1, 4, DEPART) is not None
+
+    def test_trip_crossing_period_end_falls_back(self):
+        g = make_diamond()
+        g.edges[1]["time_buckets"] = [{"start": 28850, "end": 86400, "avg_time": 600}]
+        tables = ETATables(g)
+        assert tables.route(g, 1, 4, DEPART) is None  # 60s trip crosses 28850
+        assert tables.route(g, 1, 4, DEPART.replace(hour=3)) is not None
+
+    def test_topology_change_invalidates(self):
+        g = make_diamond()
+        tables = ETATables(g)
+        g.add_edge(1, 4, 10, 500)
+        assert tables.route(g, 1, 4, DEPART) is None
+
+    def test_size_guard(self, monkeypatch):
+        monkeypatch.setattr("core.apsp.APSP_MAX_BYTES", 100)
+        with pytest.raises(ValueError):
+            ETATables(make_random_graph())
+
+    def test_traffic_dependent_mask_rejected(self):
+        with pytest.raises(ValueError):
+            ETATables(make_diamond(), MaskSpec(avoid_closures=True))
+
+
+class TestETATableRouter:
+    def test_none_until_built_then_hits(self):
+        router = ETATableRouter(make_diamond())
+        assert router.route(1, 4, DEPART) is None
+        router.refresh_async().join()
+        assert router.route(1, 4, DEPART).path == [1, 2, 4]
+        stats = router.stats()
+        assert stats["ready"] and stats["hits"] == 1 and stats["fallbacks"] == 1
+        assert stats["bytes"] == 4 * 4 * 8
+
+    def test_other_mask_spec_falls_back(self):
+        router = ETATableRouter(make_diamond())
+        router.refresh()
+        assert router.route(1, 4, DEPART, MaskSpec(emergency_only=False)) is None
+
+    def test_topology_change_triggers_rebuild(self):
+        g = make_diamond()
+        router = ETATableRouter(g)
+        router.refresh()
+        g.add_edge(1, 4, 10, 500)
+        assert router.route(1, 4, DEPART) is None
+        router.refresh_async().join()
+        assert router.route(1, 4, DEPART).path == [1, 4]
@@ -0,0 +1,119 @@
+"""Tests for core/arc_flags.py"""
+
+import datetime
+import random
+
+import numpy as np
+import pytest
+
+from core.arc_flags import ArcFlagRouter, ArcFlags
+from core.graph import EdgeUpdate, Graph
+from core.lower_bounds import edge_upper_bound
+from core.masks import MaskSpec, mask_for
+from core.routing import SearchStats, dijkstra_route
+from tests.helpers import RUSH, grid_graph
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 8, 0, 0, tzinfo=UTC)
+
+
+def assert_exact(g: Graph, flags: ArcFlags, n: int = 80, seed: int = 4):
+    mask = mask_for(g, MaskSpec())
+    rng = random.Random(seed)
+    for _ in range(n):
+        s, t = rng.sample(list(g.nodes), 2)
+        want = dijkstra_route(g, s, t, DEPART, mask)
+        got = flags.route(g, s, t, DEPART)
+        assert got.found == want.found
+        if want.found:
+            assert got.total_seconds == pytest.approx(want.total_seconds)
+
+
+class TestArcFlags:
+    def test_exact_and_prunes_on_static_costs(self):
+        g = grid_graph()
+        flags = ArcFlags(g, regions=8, workers=1)
+        assert_exact(g, flags)
+        plain, pruned = SearchStats(), SearchStats()
+        dijkstra_route(g, 1, 144, DEPART, mask_for(g, MaskSpec()), plain)
+        flags.route(g, 1, 144, DEPART, pruned)
+        assert pruned.settled < plain.settled
+
+    def test_exact_with_time_buckets(self):
+        g = grid_graph(rush=0.3)
+        flags = ArcFlags(g, regions=8, workers=1)
+        assert_exact(g, flags)
+        for depart in (DEPART.replace(hour=3), DEPART.replace(hour=9, minute=58)):
+            want = dijkstra_route(g, 5, 140, depart, mask_for(g, MaskSpec()))
+            assert flags.route(g, 5, 140, depart).total_seconds == pytest.approx(want.total_seconds)
+
+    def test_astar_matches(self):
+        g = grid_graph(rush=0.3)
+        flags = ArcFlags(g, regions=8, workers=1)
+        want = dijkstra_route(g, 12, 133, DEPART, mask_for(g, MaskSpec()))
+        got = flags.route(g, 12, 133, DEPART, algorithm="astar")
+        assert got.total_seconds == pytest.approx(want.total_seconds)
+
+    def test_compact_bitset_storage(self):
+        g = grid_graph()
+        flags = ArcFlags(g, regions=8, workers=1)
+        assert flags.flags.dtype == np.uint64
+        assert flags.flags.shape == (len(g.edges), 1)
+        assert 0 < flags.flagged_fraction(0) < 1
+
+    def test_parallel_build_matches_serial(self):
+        g = grid_graph(side=8)
+        serial = ArcFlags(g, regions=4, workers=1)
+        parallel = ArcFlags(g, regions=4, workers=2)
+        assert np.array_equal(serial.flags, parallel.flags)
+
+    def test_more_than_64_regions(self):
+        g = grid_graph(side=12)
+        flags = ArcFlags(g, regions=100, workers=1)
+        assert flags.n_regions > 64 and flags.flags.shape[1] == 2
+        assert_exact(g, flags, n=30)
+
+    def test_slowdown_within_slack_stays_usable(self):
+        g = grid_graph()
+        flags = ArcFlags(g, regions=8, slack=2.0, workers=1)
+        g.apply_edge_update(EdgeUpdate(edge_id=next(iter(g.edges)), multiplier=1.5))
+        assert flags.usable(g)
+        assert_exact(g, flags, n=30)
+
+    @pytest.mark.parametrize("multiplier", [0.5, 3.0])
+    def test_costs_outside_bounds_make_flags_stale(self, multiplier):
+        g = grid_graph()
+        flags = ArcFlags(g, regions=8, slack=2.0, workers=1)
+        g.apply_edge_update(EdgeUpdate(edge_id=next(iter(g.edges)), multiplier=multiplier))
+        assert flags.route(g, 1, 144, DEPART) is None
+        g.reset_edge_overrides()
+        assert not flags.usable(g)  # stays stale until rebuilt
+
+    def test_topology_change_makes_flags_unusable(self):
+        g = grid_graph()
+        flags = ArcFlags(g, regions=8, workers=1)
+        g.add_edge(1, 144, 1, 10)
+        assert flags.route(g, 1, 144, DEPART) is None
+
+    def test_rejects_traffic_dependent_mask(self):
+        with pytest.raises(ValueError):
+            ArcFlags(grid_graph(side=3), mask_spec=MaskSpec(avoid_closures=True), workers=1)
+
+    def test_upper_bound_covers_buckets(self):
+        edge = {"base_time": 60, "time_buckets": RUSH, "multiplier": 2.0, "absolute_time": None}
+        assert edge_upper_bound(edge) == 300.0
+
+
+class TestArcFlagRouter:
+    def test_hits_fallbacks_and_rebuild(self):
+        g = grid_graph(side=6)
+        router = ArcFlagRouter(g, workers=1)
+        assert router.route(1, 36, DEPART) is None  # not built yet
+        router.refresh_async().join()
+        assert router.route(1, 36, DEPART).found
+        assert router.route(1, 36, DEPART, MaskSpec(emergency_only=False)) is None
+        g.apply_edge_update(EdgeUpdate(edge_id=next(iter(g.edges)), multiplier=0.5))
+        assert router.route(1, 36, DEPART) is None
+        router.refresh_async().join()
+        assert router.route(1, 36, DEPART).found
+        assert router.stats()["hits"] == 2 and router.stats()["fallbacks"] == 3
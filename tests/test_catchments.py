@@ -0,0 +1,78 @@
+"""Tests for core/catchments.py"""
+
+import datetime
+from functools import partial
+
+import pytest
+
+from core.catchments import Catchment, catchment_for
+from core.graph import EdgeUpdate
+from core.routing import dijkstra_route
+from tests.helpers import random_graph
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 3, 0, 0, tzinfo=UTC)
+
+
+make_random_graph = partial(
+    random_graph, n=50, m=200, seed=11, spine=True, both_ways=True, rush=0.2, window=(25200, 36000)
+)
+
+
+class TestCatchment:
+    @pytest.mark.parametrize("direction", ["to_source", "from_source"])
+    def test_matches_best_of_individual_routes(self, direction):
+        g = make_random_graph()
+        sources = [5, 20, 44]
+        c = Catchment(g, sources, DEPART, direction=direction)
+
+        def seconds_between(node, source):
+            a, b = (node, source) if direction == "to_source" else (source, node)
+            r = dijkstra_route(g, a, b, DEPART)
+            return r.total_seconds if r.found else float("inf")
+
+        for node in range(1, 51, 4):
+            owner, seconds = c.lookup(node)
+            assert seconds == pytest.approx(min(seconds_between(node, s) for s in sources))
+            assert seconds_between(node, owner) == pytest.approx(seconds)
+
+    def test_summary_counts_every_node(self):
+        g = make_random_graph()
+        c = Catchment(g, [5, 20], DEPART)
+        summary = c.summary()
+        assert sum(s["nodes"] for s in summary.values()) == len(c.owner)
+        assert summary[5]["max_seconds"] > 0
+
+    def test_unreachable_node(self):
+        g = make_random_graph()
+        g.add_node(999, 13.5, 78.0)
+        assert Catchment(g, [5], DEPART).lookup(999) is None
+
+    def test_invalid_direction(self):
+        with pytest.raises(ValueError):
+            Catchment(make_random_graph(), [5], DEPART, direction="sideways")
+
+
+class TestCatchmentCache:
+    def test_reused_within_period_until_epoch_changes(self):
+        g = make_random_graph()
+        first = catchment_for(g, [5, 20], DEPART)
+        assert catchment_for(g, [20, 5], DEPART + datetime.timedelta(minutes=30)) is first
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=3.0))
+        assert catchment_for(g, [5, 20], DEPART) is not first
+
+    def test_separate_entry_per_period_and_direction(self):
+        g = make_random_graph()
+        night = catchment_for(g, [5, 20], DEPART)
+        rush = catchment_for(g, [5, 20], DEPART.replace(hour=8))
+        assert rush is not night
+        assert rush.period == (25200, 36000)
+        assert catchment_for(g, [5, 20], DEPART, direction="from_source") is not night
+
+    def test_bounded(self, monkeypatch):
+        monkeypatch.setattr("core.catchments.CATCHMENT_CACHE_SIZE", 2)
+        g = make_random_graph()
+        oldest = catchment_for(g, [1], DEPART)
+        catchment_for(g, [2], DEPART)
+        catchment_for(g, [3], DEPART)
+        assert catchment_for(g, [1], DEPART) is not oldest
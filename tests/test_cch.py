@@ -0,0 +1,177 @@
+"""Tests for core/cch.py"""
+
+import datetime
+import random
+import threading
+
+import pytest
+
+from core.cch import CCH, CCHRouter
+from core.graph import EdgeUpdate, Graph
+from core.masks import MaskSpec, mask_for
+from core.routing import SearchStats, dijkstra_route
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 8, 0, 0, tzinfo=UTC)
+
+
+def make_road_graph(side: int = 10, seed: int = 2) -> Graph:
+    """Grid with independent costs per direction, a few one-way streets and parallel edges."""
+    rng = random.Random(seed)
+    g = Graph()
+    for r in range(side):
+        for c in range(side):
+            g.add_node(r * side + c + 1, 12.9 + r * 0.005, 77.5 + c * 0.005)
+    for r in range(side):
+        for c in range(side):
+            u = r * side + c + 1
+            for v in (u + 1 if c + 1 < side else None, u + side if r + 1 < side else None):
+                if v is None:
+                    continue
+                g.add_edge(u, v, rng.uniform(30, 180), 500)
+                if rng.random() < 0.8:
+                    g.add_edge(v, u, rng.uniform(30, 180), 500)
+    g.add_edge(1, 2, 5.0, 500)  # parallel, cheaper
+    return g
+
+
+def assert_matches_dijkstra(route_fn, g, pairs, mask=None):
+    for s, t in pairs:
+        got = route_fn(s, t)
+        want = dijkstra_route(g, s, t, DEPART, mask)
+        assert got.found == want.found
+        if want.found:
+            assert got.total_seconds == pytest.approx(want.total_seconds, abs=1e-6)
+            assert got.path[0] == s and got.path[-1] == t
+
+
+def random_pairs(g, k=40, seed=0):
+    rng = random.Random(seed)
+    ids = list(g.nodes)
+    return [tuple(rng.sample(ids, 2)) for _ in range(k)]
+
+
+class TestCCH:
+    @pytest.mark.parametrize("seed", range(3))
+    def test_matches_dijkstra(self, seed):
+        g = make_road_graph(seed=seed)
+        metric = CCH(g).customize(g, DEPART)
+        assert_matches_dijkstra(lambda s, t: metric.route(s, t, DEPART), g, random_pairs(g))
+
+    def test_recustomize_after_updates_matches_dijkstra(self):
+        g = make_road_graph()
+        cch = CCH(g)
+        rng = random.Random(7)
+        for eid in rng.sample(list(g.edges), 30):
+            g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=rng.choice([0.3, 5.0])))
+        g.apply_edge_update(EdgeUpdate(edge_id=rng.choice(list(g.edges)), absolute_time=99999.0))
+        metric = cch.customize(g, DEPART)
+        assert_matches_dijkstra(lambda s, t: metric.route(s, t, DEPART), g, random_pairs(g))
+
+    def test_respects_edge_mask(self):
+        g = make_road_graph()
+        for eid in list(g.edges)[::7]:
+            g.edges[eid]["is_emergency_allowed"] = False
+        mask = mask_for(g, MaskSpec())
+        metric = CCH(g).customize(g, DEPART, mask)
+        assert_matches_dijkstra(lambda s, t: metric.route(s, t, DEPART), g, random_pairs(g), mask)
+
+    def test_unreachable_and_trivial(self):
+        g = make_road_graph(side=4)
+        g.add_node(99, 13.5, 78.0)
+        metric = CCH(g).customize(g, DEPART)
+        assert not metric.route(1, 99, DEPART).found
+        assert not metric.route(1, 12345, DEPART).found
+        same = metric.route(5, 5, DEPART)
+        assert same.path == [5] and same.total_seconds == 0
+
+    def test_structure_is_metric_independent(self):
+        g = make_road_graph()
+        cch = CCH(g)
+        arcs = cch.n_arcs
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=9.0))
+        cch.customize(g, DEPART)
+        assert cch.n_arcs == arcs
+
+
+class TestCCHRouter:
+    def test_serves_previous_metric_until_recustomized(self, monkeypatch):
+        g = make_road_graph()
+        router = CCHRouter(g)
+        before = router.metric()
+        scheduled = []
+        monkeypatch.setattr(router, "recustomize_async", lambda: scheduled.append(True))
+        g.apply_edge_update(EdgeUpdate(edge_id=1, absolute_time=5000.0))
+        assert router.metric() is before
+        assert scheduled
+        router.recustomize(DEPART)
+        after = router.metric()
+        assert after is not before
+        assert after.epoch == g.epoch
+        assert router.customizations == 2
+
+    def test_recustomize_async_swaps_metric(self):
+        g = make_road_graph()
+        router = CCHRouter(g)
+        router.route(1, 100, DEPART)
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=3.0))
+        worker = router.recustomize_async()
+        worker.join(timeout=10)
+        assert router.metric().epoch == g.epoch
+        got = router.route(1, 100, DEPART)
+        assert got.total_seconds == pytest.approx(
+            dijkstra_route(g, 1, 100, DEPART).total_seconds, abs=1e-6
+        )
+
+    def test_queries_do_not_wait_for_customization(self, monkeypatch):
+        g = make_road_graph(side=4)
+        router = CCHRouter(g)
+        before = router.metric()
+        started, release = threading.Event(), threading.Event()
+        real = CCH.customize
+
+        def slow(self, *args):
+            started.set()
+            release.wait(timeout=10)
+            return real(self, *args)
+
+        monkeypatch.setattr(CCH, "customize", slow)
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=2.0))
+        worker = router.recustomize_async()
+        assert started.wait(timeout=10)
+        assert router.metric() is before and not release.is_set()
+        release.set()
+        worker.join(timeout=10)
+        assert router.metric().epoch == g.epoch
+
+    def test_prepare_async_builds_in_background_until_fresh(self):
+        g = make_road_graph(side=4)
+        router = CCHRouter(g)
+        spec = MaskSpec()
+        assert not router.fresh(spec)
+        router.prepare_async(spec).join(timeout=10)
+        assert router.fresh(spec) and router.customizations == 1
+        assert router.prepare_async(spec) is None
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=2.0))
+        assert not router.fresh(spec)
+
+    def test_async_noop_before_first_query(self):
+        router = CCHRouter(make_road_graph(side=3))
+        assert router.recustomize_async() is None
+
+    def test_topology_change_rebuilds(self):
+        g = make_road_graph(side=4)
+        router = CCHRouter(g)
+        first = router.metric()
+        g.add_node(500, 12.95, 77.55)
+        g.add_edge(16, 500, 10, 100)
+        assert router.metric().cch is not first.cch
+        assert router.route(1, 500, DEPART).found
+
+    def test_stats_count_upward_search_space(self):
+        g = make_road_graph()
+        metric = CCH(g).customize(g, DEPART)
+        stats = SearchStats(record_settled=True)
+        metric.route(1, 100, DEPART, stats)
+        assert 0 < stats.settled == len(stats.settled_nodes)
+        assert stats.pushes == 0
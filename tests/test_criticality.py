@@ -0,0 +1,167 @@
+"""Tests for core/criticality.py"""
+
+import datetime
+import math
+import random
+from functools import partial
+
+import pytest
+
+from core.criticality import CriticalityAnalyzer
+from core.graph import EdgeUpdate, Graph
+from core.masks import MaskSpec, mask_for
+from core.routing import dijkstra_route
+from tests.helpers import random_graph
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 3, 0, 0, tzinfo=UTC)
+
+
+make_random_graph = partial(random_graph, n=40, m=120, seed=5, spine=True)
+
+
+def brute_force_penalty(g: Graph, path, eid) -> float:
+    """Close eid via an absolute override and rerun a full search."""
+    base = dijkstra_route(g, path[0], path[-1], DEPART, mask_for(g, MaskSpec()))
+    original = g.edges[eid]["absolute_time"]
+    g.edges[eid]["absolute_time"] = 1e12
+    try:
+        r = dijkstra_route(g, path[0], path[-1], DEPART, mask_for(g, MaskSpec()))
+    finally:
+        g.edges[eid]["absolute_time"] = original
+    if not r.found or r.total_seconds >= 1e12:
+        return math.inf
+    return r.total_seconds - base.total_seconds
+
+
+def shortest_path(g: Graph, s: int, t: int):
+    return dijkstra_route(g, s, t, DEPART, mask_for(g, MaskSpec())).path
+
+
+class TestPenalties:
+    def test_matches_closing_each_edge(self):
+        g = make_random_graph()
+        routes = {"A": (shortest_path(g, 1, 40), MaskSpec()), "B": (shortest_path(g, 7, 33), None)}
+        ranked = CriticalityAnalyzer(g).analyze(routes, DEPART)
+
+        by_edge = {c.edge_id: c for c in ranked}
+        for rid, (path, _) in routes.items():
+            for u, v in zip(path, path[1:]):
+                eid = g.edge_id_between(u, v)
+                assert rid in by_edge[eid].routes
+                expected = brute_force_penalty(g, path, eid)
+                if expected == math.inf:
+                    assert by_edge[eid].disconnected_routes >= 1
+                else:
+                    assert by_edge[eid].max_penalty_seconds >= expected - 1e-6
+
+        for c in ranked:
+            if len(c.routes) == 1:
+                rid = c.routes[0]
+                assert c.total_penalty_seconds == pytest.approx(
+                    brute_force_penalty(g, routes[rid][0], c.edge_id)
+                )
+
+    def test_bridge_disconnects_and_ranks_first(self):
+        g = Graph()
+        for nid in range(1, 5):
+            g.add_node(nid, 13.0, 77.5 + nid * 0.01)
+        g.add_edge(1, 2, 60, 1000)  # only way out of 1
+        g.add_edge(2, 3, 60, 1000)
+        g.add_edge(3, 4, 60, 1000)
+        g.add_edge(2, 4, 200, 1000)
+        ranked = CriticalityAnalyzer(g).analyze({"A": ([1, 2, 3, 4], None)}, DEPART)
+
+        assert ranked[0].edge_id == g.edge_id_between(1, 2)
+        assert ranked[0].disconnected_routes == 1
+        assert ranked[0].total_penalty_seconds == math.inf
+        assert {c.edge_id: c.total_penalty_seconds for c in ranked[1:]} == {
+            g.edge_id_between(2, 3): pytest.approx(80),
+            g.edge_id_between(3, 4): pytest.approx(80),
+        }
+
+    def test_shared_edge_sums_routes(self):
+        g = Graph()
+        for nid in range(1, 4):
+            g.add_node(nid, 13.0, 77.5 + nid * 0.01)
+        g.add_edge(1, 2, 60, 1000)
+        g.add_edge(2, 3, 60, 1000)
+        g.add_edge(1, 3, 150, 1000)
+        eid = g.edge_id_between(2, 3)
+        ranked = CriticalityAnalyzer(g).analyze(
+            {"A": ([1, 2, 3], None), "B": ([2, 3], None)}, DEPART
+        )
+        shared = next(c for c in ranked if c.edge_id == eid)
+        assert sorted(shared.routes) == ["A", "B"]
+        assert shared.disconnected_routes == 1  # B has no way around from node 2
+        assert ranked[0] is shared
+
+    def test_repeated_nodes_are_collapsed(self):
+        g = make_random_graph()
+        path = shortest_path(g, 3, 30)
+        analyzer = CriticalityAnalyzer(g)
+        plain = analyzer.analyze({"A": (path, None)}, DEPART)
+        doubled = CriticalityAnalyzer(g).analyze({"A": ([path[0]] + path, None)}, DEPART)
+        assert [(c.edge_id, c.total_penalty_seconds) for c in plain] == [
+            (c.edge_id, c.total_penalty_seconds) for c in doubled
+        ]
+
+
+class TestIncremental:
+    def test_unchanged_graph_reuses_routes(self):
+        g = make_random_graph()
+        analyzer = CriticalityAnalyzer(g)
+        routes = {"A": (shortest_path(g, 1, 40), None)}
+        first = analyzer.analyze(routes, DEPART)
+        second = analyzer.analyze(routes, DEPART + datetime.timedelta(seconds=30))
+        assert analyzer.stats() == {"routes_recomputed": 1, "routes_reused": 1}
+        assert [c.edge_id for c in first] == [c.edge_id for c in second]
+
+    def test_slowdown_off_search_keeps_route(self):
+        g = Graph()
+        for nid in range(1, 7):
+            g.add_node(nid, 13.0, 77.5 + nid * 0.01)
+        g.add_edge(1, 2, 60, 1000)
+        g.add_edge(2, 3, 60, 1000)
+        g.add_edge(1, 3, 150, 1000)
+        g.add_edge(4, 5, 60, 1000)
+        g.add_edge(5, 6, 60, 1000)
+        analyzer = CriticalityAnalyzer(g)
+        routes = {"A": ([1, 2, 3], None), "B": ([4, 5, 6], None)}
+        analyzer.analyze(routes, DEPART)
+
+        g.apply_edge_update(EdgeUpdate(edge_id=g.edge_id_between(5, 6), multiplier=2.0))
+        ranked = analyzer.analyze(routes, DEPART)
+        assert analyzer.stats() == {"routes_recomputed": 3, "routes_reused": 1}
+        assert next(c for c in ranked if c.edge_id == g.edge_id_between(2, 3)).routes == ["A"]
+
+    def test_speedup_recomputes_everything(self):
+        g = make_random_graph()
+        analyzer = CriticalityAnalyzer(g)
+        routes = {"A": (shortest_path(g, 1, 40), None), "B": (shortest_path(g, 7, 33), None)}
+        analyzer.analyze(routes, DEPART)
+        g.apply_edge_update(EdgeUpdate(edge_id=next(iter(g.edges)), multiplier=0.5))
+        analyzer.analyze(routes, DEPART)
+        assert analyzer.stats()["routes_reused"] == 0
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_incremental_matches_fresh_analysis(self, seed):
+        g = make_random_graph(seed=seed)
+        rng = random.Random(seed)
+        routes = {"A": (shortest_path(g, 1, 40), None), "B": (shortest_path(g, 12, 38), None)}
+        analyzer = CriticalityAnalyzer(g)
+        analyzer.analyze(routes, DEPART)
+        for eid in rng.sample(sorted(g.edges), 10):
+            g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=rng.uniform(1.0, 3.0)))
+            got = analyzer.analyze(routes, DEPART)
+            fresh = CriticalityAnalyzer(g).analyze(routes, DEPART)
+            assert [(c.edge_id, c.total_penalty_seconds) for c in got] == [
+                (c.edge_id, pytest.approx(c.total_penalty_seconds)) for c in fresh
+            ]
+        assert analyzer.stats()["routes_reused"] > 0
+
+    def test_finished_routes_are_dropped(self):
+        g = make_random_graph()
+        analyzer = CriticalityAnalyzer(g)
+        analyzer.analyze({"A": (shortest_path(g, 1, 40), None)}, DEPART)
+        assert analyzer.analyze({}, DEPART) == []
@@ -0,0 +1,95 @@
+"""Tests for core/customizing.py"""
+
+import random
+import threading
+
+import pytest
+
+from core.cch import CCH, CCHRouter
+from core.customizing import CustomizingRouter, period_index, period_starts
+from core.graph import EdgeUpdate
+from core.masks import MaskSpec
+from core.mld import MLDRouter, Overlay
+from core.routing import dijkstra_route
+from tests.test_cch import DEPART, make_road_graph, random_pairs
+
+ROUTERS = [
+    pytest.param(CCHRouter, CCH, id="cch"),
+    pytest.param(lambda g: MLDRouter(g, (8, 40)), Overlay, id="mld"),
+]
+LATE = DEPART.replace(hour=10, minute=5)
+
+
+def make_rush_graph(side: int = 8):
+    """Road grid where half the edges are ten times slower from 10:00 to 11:00."""
+    g = make_road_graph(side=side)
+    for eid in random.Random(5).sample(list(g.edges), len(g.edges) // 2):
+        e = g.edges[eid]
+        e["time_buckets"] = [{"start": 36000, "end": 39600, "avg_time": e["base_time"] * 10}]
+    return g
+
+
+def test_period_index():
+    starts = period_starts(make_rush_graph(side=3))
+    assert starts == [0, 36000, 39600]
+    assert period_index(starts, DEPART.timestamp()) == 0
+    assert period_index(starts, LATE.timestamp()) == 1
+    assert period_index(starts, LATE.timestamp() + 86400) == 1
+
+
+def test_hooks_are_abstract():
+    class BuildOnly(CustomizingRouter):
+        def _build(self):
+            return None
+
+    with pytest.raises(TypeError):
+        BuildOnly(make_rush_graph(side=3))
+
+
+@pytest.mark.parametrize("make_router, structure", ROUTERS)
+class TestCustomizingRouter:
+    def test_each_departure_uses_its_own_period(self, make_router, structure):
+        g = make_rush_graph()
+        router = make_router(g)
+        for depart in (DEPART, LATE, DEPART):
+            for s, t in random_pairs(g, k=20):
+                got = router.route(s, t, depart)
+                want = dijkstra_route(g, s, t, depart)
+                assert got.total_seconds == pytest.approx(want.total_seconds, abs=1e-6)
+        assert router.customizations == 2
+
+    def test_fresh_per_period(self, make_router, structure):
+        g = make_rush_graph()
+        router = make_router(g)
+        spec = MaskSpec()
+        router.prepare_async(spec, DEPART).join(timeout=10)
+        assert router.fresh(spec, DEPART) and not router.fresh(spec, LATE)
+        router.prepare_async(spec, LATE).join(timeout=10)
+        assert router.fresh(spec, LATE) and router.prepare_async(spec, DEPART) is None
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=2.0))
+        assert not router.fresh(spec, DEPART) and not router.fresh(spec, LATE)
+        router.recustomize_async().join(timeout=10)
+        assert router.fresh(spec, DEPART) and router.fresh(spec, LATE)
+
+    def test_queries_do_not_wait_for_customization(self, make_router, structure, monkeypatch):
+        g = make_rush_graph()
+        router = make_router(g)
+        before = router.metric(None, DEPART)
+        started, release = threading.Event(), threading.Event()
+        real = structure.customize
+
+        def slow(self, *args):
+            started.set()
+            release.wait(timeout=10)
+            return real(self, *args)
+
+        monkeypatch.setattr(structure, "customize", slow)
+        monkeypatch.setattr(type(before), "update", lambda *args: None, raising=False)
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=2.0))
+        worker = router.recustomize_async()
+        assert started.wait(timeout=10)
+        assert router.metric(None, DEPART) is before
+        assert router.prepare_async(MaskSpec(), DEPART) is worker
+        release.set()
+        worker.join(timeout=10)
+        assert router.metric(None, DEPART).epoch == g.epoch
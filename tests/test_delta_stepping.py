@@ -0,0 +1,148 @@
+"""Tests for core/csr.py and core/delta_stepping.py"""
+
+import datetime
+from functools import partial
+
+import numpy as np
+import pytest
+
+from core.csr import CSRGraph, cached_csr
+from core.delta_stepping import delta_stepping
+from core.graph import EdgeUpdate, Graph
+from core.masks import MaskSpec, mask_for
+from core.routing import SearchStats, dijkstra_one_to_all, dijkstra_route
+from tests.helpers import random_graph
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 8, 0, 0, tzinfo=UTC)
+
+
+make_random_graph = partial(random_graph, n=60, m=240, seed=7, rush=0.3)
+
+
+# ------------------------------------------------------------------
+# CSRGraph
+# ------------------------------------------------------------------
+
+
+class TestCSRGraph:
+    def test_travel_times_match_scalar(self):
+        g = make_random_graph()
+        g.apply_edge_update(EdgeUpdate(edge_id=3, multiplier=2.5))
+        g.apply_edge_update(EdgeUpdate(edge_id=5, absolute_time=999.0))
+        csr = CSRGraph(g)
+        eidx = np.arange(csr.n_edges)
+        for ts in (DEPART.timestamp(), DEPART.timestamp() + 6 * 3600):
+            got = csr.travel_times(eidx, np.full(csr.n_edges, ts))
+            want = [g.edge_travel_time(int(eid), ts) for eid in csr.edge_ids]
+            assert got.tolist() == want
+            assert [csr.edge_travel_time(int(eid), ts) for eid in csr.edge_ids] == want
+
+    def test_out_edges_follow_adjacency(self):
+        g = make_random_graph()
+        csr = CSRGraph(g)
+        i = csr.index_of(1)
+        eids = csr.edge_ids[csr.out_edges(np.array([i]))].tolist()
+        assert eids == [eid for _, eid in g.neighbors(1)]
+
+    def test_cache_refreshes_weights_on_update(self):
+        g = make_random_graph()
+        csr = cached_csr(g)
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=4.0))
+        assert cached_csr(g) is csr
+        assert csr.multiplier[csr.edge_index[1]] == 4.0
+
+    def test_cache_refresh_matches_full_rebuild(self, monkeypatch):
+        g = make_random_graph()
+        csr = cached_csr(g)
+        g.apply_edge_update(EdgeUpdate(edge_id=2, absolute_time=99.0))
+        g.apply_edge_update(EdgeUpdate(edge_id=3, multiplier=0.5))
+        g.reset_edge_overrides(2)
+        read = []
+        original = CSRGraph.refresh_weights
+
+        def spy(self, graph, changed=None):
+            read.append(changed)
+            original(self, graph, changed)
+
+        monkeypatch.setattr(CSRGraph, "refresh_weights", spy)
+        assert cached_csr(g) is csr and read == [{2, 3}]
+        fresh = CSRGraph(g)
+        assert np.array_equal(csr.multiplier, fresh.multiplier)
+        assert np.array_equal(csr.absolute_time, fresh.absolute_time, equal_nan=True)
+
+    def test_cache_rebuilds_on_topology_change(self):
+        g = make_random_graph()
+        csr = cached_csr(g)
+        g.add_node(999, 12.95, 77.55)
+        assert cached_csr(g) is not csr
+        assert cached_csr(g).n_nodes == len(g.nodes)
+
+
+# ------------------------------------------------------------------
+# delta_stepping
+# ------------------------------------------------------------------
+
+
+class TestDeltaStepping:
+    @pytest.mark.parametrize("delta", [None, 5.0, 1000.0])
+    def test_matches_scalar_one_to_all(self, delta):
+        g = make_random_graph()
+        g.apply_edge_update(EdgeUpdate(edge_id=4, multiplier=3.0))
+        tree = delta_stepping(g, 1, DEPART, delta=delta)
+        assert tree.to_dict() == dijkstra_one_to_all(g, 1, DEPART)
+
+    def test_matches_dijkstra_route(self):
+        g = make_random_graph()
+        tree = delta_stepping(g, 1, DEPART)
+        for target in range(2, 30):
+            arrival, path, _ = dijkstra_route(g, 1, target, DEPART)
+            if arrival is None:
+                assert tree.arrival_ts(target) is None
+                continue
+            assert tree.arrival_ts(target) == pytest.approx(arrival.timestamp(), abs=1e-3)
+            tree_path = tree.path_to(target)
+            assert tree_path[0] == 1 and tree_path[-1] == target
+
+    def test_masked_edges_are_not_used(self):
+        g = make_random_graph()
+        for eid in list(g.edges)[::3]:
+            g.edges[eid]["is_emergency_allowed"] = False
+        mask = mask_for(g, MaskSpec())
+        tree = delta_stepping(g, 1, DEPART, edge_mask=mask)
+        assert tree.to_dict() == dijkstra_one_to_all(g, 1, DEPART, mask)
+        used = tree.csr.edge_ids[tree.pred[tree.pred >= 0]]
+        assert not any(mask[eid] for eid in used.tolist())
+
+    def test_masked_edges_leave_nodes_unreachable(self):
+        g = Graph()
+        for nid in (1, 2, 3):
+            g.add_node(nid, 0, nid)
+        g.add_edge(1, 2, 30, 100)
+        closed = g.add_edge(2, 3, 30, 100)
+        g.edges[closed]["is_emergency_allowed"] = False
+        tree = delta_stepping(g, 1, DEPART, edge_mask=mask_for(g, MaskSpec()))
+        assert tree.arrival_ts(2) is not None
+        assert tree.arrival_ts(3) is None and tree.path_to(3) is None
+
+    def test_unreachable_node(self):
+        g = Graph()
+        g.add_node(1, 0, 0)
+        g.add_node(2, 0, 1)
+        tree = delta_stepping(g, 1, DEPART)
+        assert tree.arrival_ts(2) is None
+        assert tree.path_to(2) is None
+        assert tree.path_to(1) == [1]
+
+    def test_rejects_non_positive_delta(self):
+        with pytest.raises(ValueError):
+            delta_stepping(make_random_graph(), 1, DEPART, delta=0)
+
+    def test_stats_count_reached_nodes(self):
+        g = make_random_graph()
+        stats = SearchStats(record_settled=True)
+        tree = delta_stepping(g, 1, DEPART, stats=stats)
+        reached = len(tree.to_dict())
+        assert stats.settled == reached
+        assert sorted(stats.settled_nodes) == sorted(tree.to_dict())
+        assert stats.relaxations >= stats.pushes >= reached - 1
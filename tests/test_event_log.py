@@ -0,0 +1,55 @@
+"""Tests for core/event_log.py"""
+
+import io
+
+import pytest
+
+from core.event_log import BinaryEventSink, JsonlEventSink, read_events
+from core.graph import EdgeUpdate
+from core.simulator import SimEvent, SimulationEngine, TrafficInjection
+from tests.test_simulator import make_graph, utc_dt
+
+
+def simulate(sink, **kw):
+    injection = TrafficInjection(utc_dt(second=30), [EdgeUpdate(edge_id=2, multiplier=2.0)])
+    with sink:
+        return SimulationEngine(make_graph()).run(
+            "AMB-01", 1, 3, utc_dt(), [injection], on_event=sink, **kw
+        )
+
+
+@pytest.mark.parametrize("name", ["run.jsonl", "run.jsonl.gz", "run.bin", "run.bin.gz"])
+def test_round_trip(tmp_path, name):
+    path = tmp_path / name
+    sink = BinaryEventSink(path) if ".bin" in name else JsonlEventSink(path)
+    result = simulate(sink)
+    back = list(read_events(path))
+    assert sink.count == len(result.events) == len(back)
+    for ev, got in zip(result.events, back):
+        assert (got.sim_time, got.kind) == (ev.sim_time, ev.kind)
+        assert got.data == ev.data
+
+
+def test_jsonl_is_compact_and_keeps_messages_on_request(tmp_path):
+    path = tmp_path / "run.jsonl"
+    simulate(JsonlEventSink(path, messages=True), record_events=False)
+    first = path.read_text().splitlines()[0]
+    assert first.startswith('{"t":') and ", " not in first.split('"m"')[0]
+    assert next(read_events(path)).message.startswith("Ambulance AMB-01 departed")
+
+
+def test_binary_segments_are_packed(tmp_path):
+    full, compact = tmp_path / "full.bin", tmp_path / "compact.bin"
+    simulate(BinaryEventSink(full))
+    simulate(BinaryEventSink(compact), segment_events=False)
+    assert full.stat().st_size - compact.stat().st_size == 2 * (13 + 24)
+
+
+def test_file_objects_and_unknown_kinds():
+    buf = io.BytesIO()
+    sink = BinaryEventSink(buf)
+    sink(SimEvent(utc_dt(), "CUSTOM", "ignored", {"x": 1}))
+    sink.close()
+    buf.seek(0)
+    (ev,) = read_events(buf)
+    assert (ev.kind, ev.data, ev.message) == ("CUSTOM", {"x": 1}, "")
@@ -0,0 +1,193 @@
+"""Tests for core/fleet.py"""
+
+import datetime
+
+import pytest
+
+import core.fleet
+from core.fleet import FleetSimulator, Incident, Trip
+from core.graph import EdgeUpdate, Graph
+from core.simulator import SimulationEngine, TrafficInjection
+from tests.test_simulator import make_graph, utc_dt
+
+
+def make_bypass_graph() -> Graph:
+    """1->2->3 direct (60s + 300s); bypass 2->4->3 blocked at 500s + 500s."""
+    g = Graph()
+    for nid, lat, lon in [(1, 0.0, 0.0), (2, 0.0, 0.5), (3, 0.0, 1.0), (4, 0.0, 0.6)]:
+        g.add_node(nid, lat, lon)
+    g.add_edge(1, 2, 60, 500)
+    g.add_edge(2, 3, 300, 2000)
+    g.add_edge(2, 4, 10, 100)
+    g.add_edge(4, 3, 10, 100)
+    g.apply_edge_update(EdgeUpdate(edge_id=3, multiplier=50.0))
+    g.apply_edge_update(EdgeUpdate(edge_id=4, multiplier=50.0))
+    return g
+
+
+def open_bypass(at):
+    return TrafficInjection(
+        at,
+        [EdgeUpdate(edge_id=3, multiplier=1.0), EdgeUpdate(edge_id=4, multiplier=1.0)],
+        "Bypass road opened",
+    )
+
+
+def seconds(n: float) -> datetime.timedelta:
+    return datetime.timedelta(seconds=n)
+
+
+class TestTrips:
+    def test_trips_complete(self):
+        trips = [Trip(f"A{i}", 1, 3, utc_dt(minute=i)) for i in range(5)]
+        result = FleetSimulator(make_graph()).run(trips=trips)
+        assert len(result.trips) == 5
+        assert all(t.total_seconds == 120.0 and t.end_node == 3 for t in result.trips)
+        assert [t.ambulance_id for t in result.trips] == [f"A{i}" for i in range(5)]
+
+    def test_matches_single_ambulance_engine(self):
+        depart = utc_dt()
+        single = SimulationEngine(make_bypass_graph(), reroute_threshold_sec=120).run(
+            "A", 1, 3, depart, [open_bypass(depart + seconds(30))]
+        )
+        fleet = FleetSimulator(make_bypass_graph(), reroute_threshold_sec=120).run(
+            trips=[Trip("A", 1, 3, depart)],
+            traffic_injections=[open_bypass(depart + seconds(30))],
+        )
+        (trip,) = fleet.trips
+        assert trip.reroutes == single.reroutes == 1
+        assert trip.total_seconds == single.total_seconds == 80.0
+        assert trip.saved_seconds == pytest.approx(280.0)
+
+    def test_slowdown_retimes_arrival_without_reroute(self):
+        depart = utc_dt()
+        slow = TrafficInjection(depart + seconds(30), [EdgeUpdate(edge_id=2, multiplier=2.0)])
+        result = FleetSimulator(make_graph()).run(
+            trips=[Trip("A", 1, 3, depart)], traffic_injections=[slow]
+        )
+        (trip,) = result.trips
+        assert trip.total_seconds == 180.0 and trip.reroutes == 0
+        assert result.reroute_checks == 1
+
+    def test_injection_iterators_read_lazily_in_order(self):
+        depart = utc_dt()
+        slow = TrafficInjection(depart + seconds(30), [EdgeUpdate(edge_id=2, multiplier=2.0)])
+        late = TrafficInjection(depart + seconds(10), [EdgeUpdate(edge_id=2, multiplier=3.0)])
+        trips = [Trip("A", 1, 3, depart)]
+        # A list is sorted; an iterator's out-of-order injection is applied when read.
+        listed = FleetSimulator(make_graph()).run(trips=trips, traffic_injections=[slow, late])
+        streamed = FleetSimulator(make_graph()).run(
+            trips=trips, traffic_injections=iter([slow, late])
+        )
+        assert listed.trips[0].total_seconds == 180.0
+        assert streamed.trips[0].total_seconds == 240.0
+        assert streamed.injections == 2
+
+    def test_slowdown_elsewhere_is_not_checked(self):
+        depart = utc_dt()
+        g = make_graph()
+        g.add_node(9, 1.0, 1.0)
+        elsewhere = g.add_edge(3, 9, 60, 500)
+        jam = TrafficInjection(depart + seconds(30), [EdgeUpdate(edge_id=elsewhere, multiplier=3)])
+        result = FleetSimulator(g).run(trips=[Trip("A", 1, 3, depart)], traffic_injections=[jam])
+        assert result.reroute_checks == 0
+        result = FleetSimulator(g, reroute_scope="all").run(
+            trips=[Trip("A", 1, 3, depart)], traffic_injections=[jam]
+        )
+        assert result.reroute_checks == 1
+
+    def test_shared_destination_rechecked_from_one_tree(self, monkeypatch):
+        built = []
+        real = core.fleet.reverse_tree_for
+        monkeypatch.setattr(
+            core.fleet, "reverse_tree_for", lambda *a: built.append(a[1]) or real(*a)
+        )
+        depart = utc_dt()
+        trips = [Trip(f"A{i}", 1, 3, depart + seconds(i)) for i in range(4)]
+        result = FleetSimulator(make_bypass_graph(), reroute_threshold_sec=120).run(
+            trips=trips, traffic_injections=[open_bypass(depart + seconds(30))]
+        )
+        assert result.reroutes == 4
+        assert all(t.total_seconds == 80.0 for t in result.trips)
+        assert set(built) == {3}
+
+    def test_unroutable_trip_is_counted(self):
+        g = make_graph()
+        g.add_node(9, 1.0, 1.0)
+        result = FleetSimulator(g).run(trips=[Trip("A", 1, 9, utc_dt()), Trip("B", 1, 3, utc_dt())])
+        assert result.unroutable == 1 and len(result.trips) == 1
+
+    def test_events_recorded_on_request(self):
+        trips = [Trip("A", 1, 3, utc_dt())]
+        assert FleetSimulator(make_graph()).run(trips=trips).events == []
+        events = FleetSimulator(make_graph(), record_events=True).run(trips=trips).events
+        assert [e.kind for e in events] == ["DEPART", "ARRIVE"]
+
+    def test_events_streamed_to_callback(self):
+        seen = []
+        sim = FleetSimulator(make_graph(), on_event=seen.append)
+        assert sim.run(trips=[Trip("A", 1, 3, utc_dt())]).events == []
+        assert [e.kind for e in seen] == ["DEPART", "ARRIVE"]
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError):
+            FleetSimulator(make_graph(), algorithm="bfs")
+        with pytest.raises(ValueError):
+            FleetSimulator(make_graph(), reroute_scope="some")
+
+
+class TestIncidents:
+    def test_closest_idle_unit_with_transport(self):
+        g = make_graph()
+        g.add_node(0, 0.0, -1.0)
+        g.add_edge(0, 1, 60, 500)
+        incident = Incident(utc_dt(), node=2, destination=3, scene_seconds=300, label="cardiac")
+        result = FleetSimulator(g).run(incidents=[incident], ambulances={"FAR": 0, "NEAR": 1})
+        scene, transport = result.trips
+        assert scene.ambulance_id == transport.ambulance_id == "NEAR"
+        assert scene.response_seconds == 60.0 and transport.response_seconds is None
+        assert transport.departed == utc_dt() + seconds(360)
+        assert transport.end_node == 3 and transport.incident == "cardiac"
+
+    def test_incidents_wait_for_a_free_unit(self):
+        incidents = [Incident(utc_dt(), 2), Incident(utc_dt(second=1), 3)]
+        result = FleetSimulator(make_graph()).run(incidents=incidents, ambulances={"U": 1})
+        first, second = result.trips
+        assert first.response_seconds == 60.0
+        assert second.departed == first.arrived
+        assert second.response_seconds == 119.0
+        assert result.summary()["median_response_seconds"] == 119.0
+
+    def test_unit_freed_by_trip_serves_waiting_incident(self):
+        result = FleetSimulator(make_graph()).run(
+            trips=[Trip("T", 1, 2, utc_dt())], incidents=[Incident(utc_dt(), 3)]
+        )
+        assert result.unserved_incidents == 0
+        assert result.trips[-1].ambulance_id == "T" and result.trips[-1].end_node == 3
+        assert result.trips[-1].response_seconds == 120.0
+
+    def test_unit_on_trip_is_not_dispatched(self):
+        # Regression: a unit on a scheduled trip was also handed the incident,
+        # and its second leg's arrival raised KeyError.
+        result = FleetSimulator(make_graph()).run(
+            trips=[Trip("A", 1, 3, utc_dt())],
+            incidents=[Incident(utc_dt(second=5), 3)],
+            ambulances={"A": 1},
+        )
+        trip, scene = result.trips
+        assert (trip.end_node, trip.arrived) == (3, utc_dt(minute=2))
+        assert scene.departed == trip.arrived and scene.response_seconds == 115.0
+
+    def test_trip_due_while_busy_is_held(self):
+        trips = [Trip("A", 1, 2, utc_dt()), Trip("A", 2, 3, utc_dt(second=30))]
+        result = FleetSimulator(make_graph()).run(trips=trips)
+        first, second = result.trips
+        assert second.departed == first.arrived == utc_dt(minute=1)
+        assert second.arrived == utc_dt(minute=2)
+
+    def test_unserved_incidents(self):
+        result = FleetSimulator(make_graph()).run(
+            incidents=[Incident(utc_dt(), 1), Incident(utc_dt(), 2)], ambulances={"U": 3}
+        )
+        # U cannot get from node 3 to either scene; both incidents stay unserved.
+        assert result.unserved_incidents == 2 and result.unroutable == 2
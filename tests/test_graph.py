@@ -2,7 +2,16 @@
 
 import pytest
 
-from core.graph import EdgeNotFoundError, EdgeUpdate, Graph, InvalidGraphError, NodeNotFoundError
+from core.csr import cached_csr
+from core.graph import (
+    EdgeNotFoundError,
+    EdgeUpdate,
+    Graph,
+    InvalidGraphError,
+    NodeNotFoundError,
+    TrafficOverlay,
+)
+from core.masks import MaskSpec, mask_for
 
 
 def simple_graph() -> Graph:
@@ -39,6 +48,16 @@ class TestNodeCreation:
         g.add_node(7, 0.0, 0.0)
         assert g.nodes[7]["name"] == "7"
 
+    def test_tags_and_lookup(self):
+        g = Graph()
+        g.add_node(1, 0.0, 0.0, tags=["hospital", "trauma", "hospital"])
+        g.add_node(2, 0.0, 1.0)
+        g.add_node(3, 0.0, 2.0, tags=["hospital"])
+        assert g.nodes[1]["tags"] == ["hospital", "trauma"]
+        assert g.nodes[2]["tags"] == []
+        assert g.nodes_with_tag("hospital") == [1, 3]
+        assert g.nodes_with_tag("fire_station") == []
+
 
 # ------------------------------------------------------------------
 # Edge creation
@@ -259,6 +278,44 @@ class TestLoadFromFile:
         assert 7 in g.edges
         assert g.nodes[1]["name"] == "Start"
 
+    def test_load_reads_edge_restrictions(self, tmp_path):
+        import json
+
+        data = {
+            "nodes": [{"id": 1, "lat": 0, "lon": 0}, {"id": 2, "lat": 0, "lon": 1}],
+            "edges": [
+                {
+                    "from": 1,
+                    "to": 2,
+                    "base_time": 10,
+                    "is_emergency_allowed": False,
+                    "max_height": 3.5,
+                }
+            ],
+        }
+        p = tmp_path / "g.json"
+        p.write_text(json.dumps(data))
+        g = Graph()
+        g.load_from_file(str(p))
+        assert g.edges[1]["is_emergency_allowed"] is False
+        assert g.edges[1]["max_height"] == 3.5
+
+    def test_load_reads_node_tags(self, tmp_path):
+        import json
+
+        data = {
+            "nodes": [
+                {"id": 1, "lat": 0, "lon": 0, "tags": ["hospital"]},
+                {"id": 2, "lat": 0, "lon": 1},
+            ],
+            "edges": [],
+        }
+        p = tmp_path / "g.json"
+        p.write_text(json.dumps(data))
+        g = Graph()
+        g.load_from_file(str(p))
+        assert g.nodes_with_tag("hospital") == [1]
+
     def test_load_preserves_explicit_edge_ids(self, tmp_path):
         import json
 
@@ -273,6 +330,40 @@ class TestLoadFromFile:
         assert 99 in g.edges
 
 
+# ------------------------------------------------------------------
+# Epochs and change log
+# ------------------------------------------------------------------
+
+
+class TestChangeTracking:
+    def test_in_neighbors(self):
+        g = simple_graph()
+        assert sorted(u for u, _ in g.in_neighbors(3)) == [1, 2]
+
+    def test_updates_bump_epoch_not_topology(self):
+        g = simple_graph()
+        epoch, topo = g.epoch, g.topology_epoch
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=2.0))
+        assert g.epoch == epoch + 1
+        assert g.topology_epoch == topo
+
+    def test_changed_edges_since(self):
+        g = simple_graph()
+        start = g.epoch
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=2.0))
+        mid = g.epoch
+        g.reset_edge_overrides(3)
+        assert g.changed_edges_since(start) == {1, 3}
+        assert g.changed_edges_since(mid) == {3}
+        assert g.changed_edges_since(g.epoch) == set()
+
+    def test_changed_edges_unknown_after_topology_change(self):
+        g = simple_graph()
+        start = g.epoch
+        g.add_node(9, 0, 0)
+        assert g.changed_edges_since(start) is None
+
+
 # ------------------------------------------------------------------
 # graph_to_dict
 # ------------------------------------------------------------------
@@ -286,3 +377,61 @@ class TestGraphToDict:
         assert "edges" in d
         assert len(d["nodes"]) == 3
         assert len(d["edges"]) == 3
+
+
+# ------------------------------------------------------------------
+# TrafficOverlay
+# ------------------------------------------------------------------
+
+
+class TestTrafficOverlay:
+    def test_updates_leave_base_untouched(self):
+        g = simple_graph()
+        start = g.epoch
+        overlay = TrafficOverlay(g)
+        overlay.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=3.0))
+        assert overlay.edge_travel_time(1, 0) == 180
+        assert g.edge_travel_time(1, 0) == 60
+        assert g.epoch == start and overlay.changed_edges_since(start) == {1}
+
+    def test_records_shared_until_written(self):
+        g = simple_graph()
+        overlay = TrafficOverlay(g)
+        assert overlay.nodes is g.nodes and overlay.adj is g.adj
+        assert all(overlay.edges[eid] is g.edges[eid] for eid in g.edges)
+        overlay.apply_edge_update(EdgeUpdate(edge_id=2, absolute_time=500))
+        assert overlay.edges[2] is not g.edges[2]
+        assert overlay.edges[1] is g.edges[1]
+        assert overlay.overridden_edges == {2}
+
+    def test_reset_overrides_copies_before_writing(self):
+        g = simple_graph()
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=2.0))
+        overlay = TrafficOverlay(g)
+        overlay.reset_edge_overrides()
+        assert overlay.edge_travel_time(1, 0) == 60
+        assert g.edge_travel_time(1, 0) == 120
+
+    def test_topology_is_read_only(self):
+        overlay = TrafficOverlay(simple_graph())
+        with pytest.raises(InvalidGraphError):
+            overlay.add_node(9, 0.0, 0.0)
+        with pytest.raises(InvalidGraphError):
+            overlay.add_edge(1, 2, 10, 100)
+
+    def test_csr_shares_base_topology(self):
+        g = simple_graph()
+        overlay = TrafficOverlay(g)
+        overlay.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=4.0))
+        base_csr, csr = cached_csr(g), cached_csr(overlay)
+        assert csr.indptr is base_csr.indptr and csr.base_time is base_csr.base_time
+        assert csr.multiplier[csr.edge_index[1]] == 4.0
+        assert base_csr.multiplier[base_csr.edge_index[1]] == 1.0
+
+    def test_static_masks_shared_with_base(self):
+        g = simple_graph()
+        overlay = TrafficOverlay(g)
+        assert mask_for(overlay, MaskSpec()) is mask_for(g, MaskSpec())
+        overlay.apply_edge_update(EdgeUpdate(edge_id=3, absolute_time=10**6))
+        closures = MaskSpec(avoid_closures=True)
+        assert mask_for(overlay, closures) != mask_for(g, closures)
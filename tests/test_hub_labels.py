@@ -0,0 +1,117 @@
+"""Tests for core/hub_labels.py"""
+
+import datetime
+import random
+from functools import partial
+
+import pytest
+
+from core.graph import EdgeUpdate, Graph
+from core.hub_labels import HubLabelIndex, HubLabelRouter
+from core.lower_bounds import edge_lower_bound
+from core.masks import MaskSpec, mask_for
+from core.routing import dijkstra_route
+from tests.helpers import grid_graph
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 8, 0, 0, tzinfo=UTC)
+
+
+make_grid = partial(grid_graph, side=10, seed=3)
+
+
+def pairs(g: Graph, n: int = 60, seed: int = 5):
+    rng = random.Random(seed)
+    return [tuple(rng.sample(list(g.nodes), 2)) for _ in range(n)]
+
+
+class TestHubLabelIndex:
+    def test_lower_labels_match_dijkstra_on_lower_bounds(self):
+        g = make_grid(rush=0.3)
+        index = HubLabelIndex(g, per_period=False)
+        for eid, edge in g.edges.items():
+            g.apply_edge_update(EdgeUpdate(edge_id=eid, absolute_time=edge_lower_bound(edge)))
+        mask = mask_for(g, MaskSpec())
+        for s, t in pairs(g):
+            want = dijkstra_route(g, s, t, DEPART, mask)
+            got = index.lower.distance(index.index[s], index.index[t])
+            assert got == pytest.approx(want.total_seconds if want.found else float("inf"))
+
+    def test_live_eta_within_bounds(self):
+        g = make_grid(rush=0.5)
+        index = HubLabelIndex(g, per_period=True)
+        mask = mask_for(g, MaskSpec())
+        for depart in (DEPART, DEPART.replace(hour=3), DEPART.replace(hour=9, minute=50)):
+            for s, t in pairs(g, n=30):
+                live = dijkstra_route(g, s, t, depart, mask)
+                est = index.estimate(s, t, depart)
+                assert (est is None) == (not live.found)
+                if est is None:
+                    continue
+                assert est.lower_seconds <= live.total_seconds * (1 + 1e-9)
+                assert live.total_seconds <= est.upper_seconds * (1 + 1e-9)
+                assert est.lower_seconds <= est.eta_seconds <= est.upper_seconds
+                assert abs(est.eta_seconds - live.total_seconds) <= est.max_error_seconds + 1e-6
+
+    def test_labels_are_small(self):
+        g = make_grid()
+        index = HubLabelIndex(g, per_period=False)
+        assert index.average_label_size < len(g.nodes) / 2
+
+    def test_per_period_labels_track_the_departure_bucket(self):
+        g = make_grid(side=6, rush=1.0)
+        flat = HubLabelIndex(g, per_period=False)
+        timed = HubLabelIndex(g, per_period=True)
+        live = dijkstra_route(g, 1, 36, DEPART, mask_for(g, MaskSpec()))
+        assert timed.estimate(1, 36, DEPART).eta_seconds == pytest.approx(live.total_seconds)
+        assert flat.estimate(1, 36, DEPART).eta_seconds < live.total_seconds
+        off_peak = DEPART.replace(hour=3)
+        live = dijkstra_route(g, 1, 36, off_peak, mask_for(g, MaskSpec()))
+        assert timed.estimate(1, 36, off_peak).eta_seconds == pytest.approx(live.total_seconds)
+
+    def test_unknown_node(self):
+        index = HubLabelIndex(make_grid(side=3), per_period=False)
+        assert index.estimate(1, 999, DEPART) is None
+
+    def test_costs_within_bounds_stay_usable(self):
+        g = make_grid(rush=1.0)
+        index = HubLabelIndex(g, per_period=False)
+        eid = next(iter(g.edges))
+        g.apply_edge_update(EdgeUpdate(edge_id=eid, absolute_time=g.edges[eid]["base_time"]))
+        assert index.usable(g)
+
+    @pytest.mark.parametrize("multiplier", [0.5, 3.0])
+    def test_costs_outside_bounds_make_labels_stale(self, multiplier):
+        g = make_grid()
+        index = HubLabelIndex(g, per_period=False)
+        g.apply_edge_update(EdgeUpdate(edge_id=next(iter(g.edges)), multiplier=multiplier))
+        assert not index.usable(g)
+        g.reset_edge_overrides()
+        assert not index.usable(g)  # stays stale until rebuilt
+
+    def test_topology_change_makes_labels_unusable(self):
+        g = make_grid()
+        index = HubLabelIndex(g, per_period=False)
+        g.add_edge(1, 100, 1, 10)
+        assert not index.usable(g)
+
+    def test_rejects_traffic_dependent_mask(self):
+        with pytest.raises(ValueError):
+            HubLabelIndex(make_grid(side=3), MaskSpec(avoid_closures=True))
+
+
+class TestHubLabelRouter:
+    def test_hits_fallbacks_and_rebuild(self):
+        g = make_grid(side=6)
+        router = HubLabelRouter(g, per_period=False)
+        assert router.estimate(1, 36, DEPART) is None  # not built yet
+        router.refresh_async().join()
+        assert router.estimate(1, 36, DEPART) is not None
+        assert router.estimate(1, 36, DEPART, MaskSpec(emergency_only=False)) is None
+        g.apply_edge_update(EdgeUpdate(edge_id=next(iter(g.edges)), multiplier=0.5))
+        assert router.estimate(1, 36, DEPART) is None
+        router.refresh_async().join()
+        assert router.estimate(1, 36, DEPART) is not None
+        stats = router.stats()
+        assert stats["ready"] and stats["average_label_size"] > 0
+        assert stats["hits"] == 2 and stats["fallbacks"] == 3
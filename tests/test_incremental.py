@@ -0,0 +1,113 @@
+"""Tests for core/incremental.py"""
+
+import datetime
+import random
+from functools import partial
+
+import pytest
+
+from core.graph import EdgeUpdate, Graph
+from core.incremental import IncrementalRoute
+from core.masks import MaskSpec
+from core.routing import dijkstra_route
+from tests.helpers import random_graph
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 8, 0, 0, tzinfo=UTC)
+
+
+make_random_graph = partial(random_graph, n=80, m=320, seed=3, spine=True)
+
+
+def assert_same_eta(result, g, source, target, depart):
+    _, expected_path, _ = fresh = dijkstra_route(g, source, target, depart)
+    if expected_path is None:
+        assert not result.found
+        return
+    assert result.arrival_ts == pytest.approx(fresh.arrival_ts, abs=1e-6)
+    assert result.path[0] == source and result.path[-1] == target
+
+
+class TestIncrementalRoute:
+    def test_initial_route_matches_dijkstra(self):
+        g = make_random_graph()
+        router = IncrementalRoute(g, 1, 80, DEPART)
+        assert_same_eta(router.route(), g, 1, 80, DEPART)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_repairs_after_random_updates(self, seed):
+        rng = random.Random(seed)
+        g = make_random_graph(seed=seed, rush=0.3)
+        router = IncrementalRoute(g, 1, 80, DEPART)
+        router.route()
+        for _ in range(10):
+            for eid in rng.sample(list(g.edges), 3):
+                g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=rng.choice([0.2, 1.0, 8.0])))
+            assert_same_eta(router.route(), g, 1, 80, DEPART)
+        assert router.full_searches == 1
+        assert router.repairs == 10
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_advancing_along_route(self, seed):
+        rng = random.Random(seed)
+        g = make_random_graph(seed=seed)
+        router = IncrementalRoute(g, 1, 80, DEPART)
+        result = router.route()
+        while len(result.path) > 2:
+            node, ts = result.path[1], result.node_times[1]
+            for eid in rng.sample(list(g.edges), 2):
+                g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=rng.choice([0.5, 4.0])))
+            result = router.reroute_from(node, ts)
+            assert_same_eta(result, g, node, 80, ts)
+        assert router.full_searches == 1
+
+    def test_time_shift_without_buckets_avoids_full_search(self):
+        g = make_random_graph()
+        router = IncrementalRoute(g, 1, 80, DEPART)
+        result = router.route()
+        later = result.node_times[1] + 37.0
+        assert_same_eta(router.reroute_from(result.path[1], later), g, result.path[1], 80, later)
+        assert router.full_searches == 1
+
+    def test_time_shift_with_buckets_keeps_state(self):
+        g = make_random_graph(rush=0.3)
+        router = IncrementalRoute(g, 1, 80, DEPART)
+        result = router.route()
+        later = result.node_times[1] + 37.0
+        assert_same_eta(router.reroute_from(result.path[1], later), g, result.path[1], 80, later)
+        assert router.full_searches == 1
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_moving_off_schedule_across_bucket_boundaries(self, seed):
+        # Departing just before the buckets end at 12:00; each position report
+        # is up to two minutes off the predicted time, so labels cross 12:00.
+        rng = random.Random(seed)
+        g = make_random_graph(seed=seed, rush=0.3)
+        depart = DEPART.replace(hour=11, minute=56)
+        router = IncrementalRoute(g, 1, 80, depart)
+        result = router.route()
+        while len(result.path) > 2:
+            node, ts = result.path[1], result.node_times[1] + rng.uniform(-120, 120)
+            if rng.random() < 0.5:
+                eid = rng.choice(list(g.edges))
+                g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=rng.choice([0.5, 4.0])))
+            result = router.reroute_from(node, ts)
+            assert_same_eta(result, g, node, 80, ts)
+        assert router.full_searches == 1
+
+    def test_closure_mask_change_rebuilds(self):
+        g = make_random_graph()
+        router = IncrementalRoute(g, 1, 80, DEPART, MaskSpec(avoid_closures=True))
+        first = router.route()
+        g.apply_edge_update(EdgeUpdate(edge_id=first.edge_ids[0], absolute_time=99999))
+        second = router.route()
+        assert first.edge_ids[0] not in second.edge_ids
+
+    def test_unreachable_target(self):
+        g = Graph()
+        g.add_node(1, 0, 0)
+        g.add_node(2, 0, 1)
+        router = IncrementalRoute(g, 1, 2, DEPART)
+        assert not router.route().found
+        g.add_edge(1, 2, 30, 100)
+        assert router.route().path == [1, 2]
@@ -0,0 +1,156 @@
+"""Tests for core/lower_bounds.py"""
+
+import datetime
+import random
+import threading
+
+import pytest
+
+from core import lower_bounds
+from core.graph import EdgeUpdate, Graph
+from core.lower_bounds import LowerBoundIndex, cached_lower_bounds, edge_lower_bound
+from core.routing import SearchStats, a_star_route, dijkstra_route, haversine_distance
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 8, 0, 0, tzinfo=UTC)
+
+
+def make_edge(**kw) -> dict:
+    edge = {"base_time": 100.0, "time_buckets": [], "multiplier": 1.0, "absolute_time": None}
+    edge.update(kw)
+    return edge
+
+
+def make_detour_graph() -> Graph:
+    # S -> T direct is 3 km in 150s. S -> B -> T bends 2 km north through B,
+    # 5 km in 120s: faster, and faster than the old fixed 15 m/s heuristic.
+    g = Graph()
+    g.add_node(1, 12.900, 77.5000)  # S
+    g.add_node(2, 12.900, 77.5277)  # T
+    g.add_node(3, 12.918, 77.5139)  # B
+    g.add_edge(1, 2, 150, 3000)
+    g.add_edge(1, 3, 60, 2500)
+    g.add_edge(3, 2, 60, 2500)
+    return g
+
+
+class TestEdgeLowerBound:
+    def test_base_time_times_multiplier(self):
+        assert edge_lower_bound(make_edge(multiplier=0.5)) == 50.0
+
+    def test_absolute_time_wins(self):
+        assert edge_lower_bound(make_edge(absolute_time=999.0, multiplier=0.1)) == 999.0
+
+    def test_partial_buckets_keep_base_time(self):
+        buckets = [{"start": 0, "end": 3600, "avg_time": 150.0}]
+        assert edge_lower_bound(make_edge(time_buckets=buckets)) == 100.0
+
+    def test_full_day_buckets_ignore_base_time(self):
+        buckets = [
+            {"start": 0, "end": 43200, "avg_time": 150.0},
+            {"start": 43200, "end": 86400, "avg_time": 120.0},
+        ]
+        assert edge_lower_bound(make_edge(time_buckets=buckets, multiplier=2.0)) == 240.0
+
+
+class TestLowerBoundIndex:
+    def test_max_speed_is_fastest_edge(self):
+        g = make_detour_graph()
+        idx = LowerBoundIndex(g)
+        fastest = max(idx.length_m[eid] / g.edges[eid]["base_time"] for eid in g.edges)
+        assert idx.max_speed_ms == pytest.approx(fastest)
+
+    def test_never_overestimates(self):
+        g = make_detour_graph()
+        idx = LowerBoundIndex(g)
+        fresh = dijkstra_route(g, 1, 2, DEPART)
+        assert idx.heuristic_seconds(g, 1, 2) <= fresh.total_seconds
+
+    def test_traffic_updates_applied_incrementally(self):
+        g = make_detour_graph()
+        idx = cached_lower_bounds(g)
+        before = idx.max_speed_ms
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=0.1))
+        assert cached_lower_bounds(g) is idx
+        assert idx.edge_lb[1] == pytest.approx(15.0)
+        assert idx.max_speed_ms == pytest.approx(idx.length_m[1] / 15.0)
+        assert idx.max_speed_ms > before
+
+    def test_slowing_the_fastest_edge_rescans(self):
+        g = make_detour_graph()
+        idx = cached_lower_bounds(g)
+        g.apply_edge_update(EdgeUpdate(edge_id=2, multiplier=10.0))
+        g.apply_edge_update(EdgeUpdate(edge_id=3, multiplier=10.0))
+        cached_lower_bounds(g)
+        assert idx.max_speed_ms == pytest.approx(idx.length_m[1] / 150.0)
+        g.reset_edge_overrides()
+        cached_lower_bounds(g)
+        assert idx.max_speed_ms == pytest.approx(LowerBoundIndex(g).max_speed_ms)
+
+    def test_zero_cost_edge_disables_heuristic(self):
+        g = make_detour_graph()
+        g.apply_edge_update(EdgeUpdate(edge_id=1, absolute_time=0.0))
+        idx = cached_lower_bounds(g)
+        assert idx.max_speed_ms == float("inf")
+        assert idx.heuristic_seconds(g, 1, 2) == 0.0
+
+    def test_concurrent_reader_never_sees_stale_speed(self, monkeypatch):
+        g = make_detour_graph()
+        idx = cached_lower_bounds(g)
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=0.1))
+        seen = []
+        reader = threading.Thread(target=lambda: seen.append(cached_lower_bounds(g).max_speed_ms))
+        real = lower_bounds._bounds_into
+
+        def racing(*args):
+            # A second request arrives while the bounds are being updated.
+            reader.start()
+            reader.join(timeout=0.2)
+            return real(*args)
+
+        monkeypatch.setattr(lower_bounds, "_bounds_into", racing)
+        idx.refresh(g)
+        reader.join(timeout=10)
+        assert seen == [pytest.approx(idx.length_m[1] / 15.0)]
+
+    def test_topology_change_rebuilds(self):
+        g = make_detour_graph()
+        idx = cached_lower_bounds(g)
+        g.add_edge(2, 1, 150, 3000)
+        assert cached_lower_bounds(g) is not idx
+
+
+class TestAStarWithDerivedSpeed:
+    def test_fixed_speed_misses_fast_detour(self):
+        g = make_detour_graph()
+        fixed = a_star_route(g, 1, 2, DEPART, max_speed_ms=15.0)
+        derived = a_star_route(g, 1, 2, DEPART)
+        assert fixed.total_seconds == pytest.approx(150)
+        assert derived.total_seconds == pytest.approx(120)
+        assert derived.path == [1, 3, 2]
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_matches_dijkstra_on_random_graphs(self, seed):
+        rng = random.Random(seed)
+        g = Graph()
+        for nid in range(1, 81):
+            g.add_node(nid, rng.uniform(12.9, 13.0), rng.uniform(77.5, 77.6))
+        for _ in range(400):
+            u, v = rng.sample(range(1, 81), 2)
+            a, b = g.nodes[u], g.nodes[v]
+            metres = haversine_distance(a["lat"], a["lon"], b["lat"], b["lon"])
+            g.add_edge(u, v, metres / rng.uniform(5, 40), metres)
+        for _ in range(10):
+            s, t = rng.sample(range(1, 81), 2)
+            want = dijkstra_route(g, s, t, DEPART)
+            got = a_star_route(g, s, t, DEPART)
+            assert got.total_seconds == pytest.approx(want.total_seconds, abs=1e-6)
+
+    def test_prunes_compared_to_dijkstra(self):
+        g = make_detour_graph()
+        g.add_node(4, 12.880, 77.4800)  # dead end behind the source
+        g.add_edge(1, 4, 100, 3000)
+        astar, dijkstra = SearchStats(), SearchStats()
+        a_star_route(g, 1, 2, DEPART, stats=astar)
+        dijkstra_route(g, 1, 2, DEPART, stats=dijkstra)
+        assert astar.settled < dijkstra.settled
@@ -0,0 +1,73 @@
+"""Tests for core/map_matching.py"""
+
+import pytest
+
+from core.graph import Graph
+from core.map_matching import MapMatcher
+
+
+def make_parallel_roads() -> Graph:
+    # Road A (edges 1, 2) runs along lat 12.9000; road B (edges 3, 4) is an
+    # unconnected parallel road ~33 m north of it.
+    g = Graph()
+    for i, lon in enumerate((77.500, 77.505, 77.510)):
+        g.add_node(1 + i, 12.9000, lon)
+        g.add_node(4 + i, 12.9003, lon)
+    g.add_edge(1, 2, 60, 540)
+    g.add_edge(2, 3, 60, 540)
+    g.add_edge(4, 5, 60, 540)
+    g.add_edge(5, 6, 60, 540)
+    return g
+
+
+class TestMapMatcher:
+    def test_first_ping_takes_nearest_edge(self):
+        m = MapMatcher(make_parallel_roads())
+        match = m.match("A", 12.90005, 77.5025)
+        assert match.edge_id == 1
+        assert match.fraction == pytest.approx(0.5, abs=1e-6)
+
+    def test_history_outweighs_one_noisy_ping(self):
+        g = make_parallel_roads()
+        noisy = (12.90018, 77.5040)  # closer to road B than to road A
+
+        fresh = MapMatcher(g)
+        assert fresh.match("A", *noisy).edge_id == 3
+
+        m = MapMatcher(g)
+        for lon in (77.5010, 77.5020, 77.5030):
+            assert m.match("A", 12.90005, lon).edge_id == 1
+        assert m.match("A", *noisy).edge_id == 1
+
+    def test_follows_vehicle_onto_next_edge(self):
+        m = MapMatcher(make_parallel_roads())
+        m.match("A", 12.90003, 77.5040)
+        match = m.match("A", 12.90003, 77.5060)
+        assert match.edge_id == 2
+        assert match.fraction == pytest.approx(0.2, abs=0.01)
+
+    def test_preferred_edges_break_ties(self):
+        m = MapMatcher(make_parallel_roads())
+        midway = (12.90015, 77.5025)
+        assert m.match("A", *midway).edge_id == 1
+        assert m.match("B", *midway, preferred_edges={3, 4}).edge_id == 3
+
+    def test_no_candidates_keeps_state(self):
+        m = MapMatcher(make_parallel_roads())
+        m.match("A", 12.90005, 77.5020)
+        assert m.match("A", 13.5, 78.0) is None
+        assert m.match("A", 12.90018, 77.5030).edge_id == 1
+
+    def test_forget_resets_history(self):
+        m = MapMatcher(make_parallel_roads())
+        for lon in (77.5010, 77.5020, 77.5030):
+            m.match("A", 12.90005, lon)
+        m.forget("A")
+        assert m.match("A", 12.90018, 77.5040).edge_id == 3
+
+    def test_vehicles_tracked_independently(self):
+        m = MapMatcher(make_parallel_roads())
+        m.match("A", 12.90005, 77.5020)
+        m.match("B", 12.90025, 77.5020)
+        assert m.match("A", 12.90015, 77.5030).edge_id == 1
+        assert m.match("B", 12.90015, 77.5030).edge_id == 3
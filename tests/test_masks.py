@@ -0,0 +1,97 @@
+"""Tests for core/masks.py"""
+
+import datetime
+
+from core.graph import EdgeUpdate, Graph
+from core.masks import MaskSpec, compile_mask, height_class_for, mask_for
+from core.routing import a_star_route, dijkstra_route, route_many
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 8, 0, 0, tzinfo=UTC)
+
+
+def make_graph() -> Graph:
+    """
+    1 --60s--> 2 --60s--> 4        (edge 1, 2: fast, but 2->4 is not emergency-allowed)
+    1 --90s--> 3 --90s--> 4        (edge 3, 4: slower, edge 4 has a 3.0 m clearance)
+    1 --400s-> 4                   (edge 5: direct fallback)
+    """
+    g = Graph()
+    for nid, lat, lon in [(1, 0.0, 0.0), (2, 0.0, 0.5), (3, 0.0, -0.5), (4, 0.0, 1.0)]:
+        g.add_node(nid, lat, lon)
+    g.add_edge(1, 2, 60, 500)
+    g.add_edge(2, 4, 60, 500, is_emergency_allowed=False)
+    g.add_edge(1, 3, 90, 700)
+    g.add_edge(3, 4, 90, 700, max_height=3.0)
+    g.add_edge(1, 4, 400, 3000)
+    return g
+
+
+class TestHeightClass:
+    def test_rounds_up_to_class(self):
+        assert height_class_for(2.8) == 3.0
+        assert height_class_for(3.0) == 3.0
+
+    def test_taller_than_all_classes_is_kept(self):
+        assert height_class_for(6.0) == 6.0
+
+
+class TestCompileMask:
+    def test_emergency_only_blocks_restricted_edges(self):
+        mask = compile_mask(make_graph(), MaskSpec())
+        assert mask[2] == 1
+        assert sum(mask) == 1
+
+    def test_no_restrictions_returns_none(self):
+        assert compile_mask(make_graph(), MaskSpec(emergency_only=False)) is None
+
+    def test_height_class(self):
+        g = make_graph()
+        assert compile_mask(g, MaskSpec.build(vehicle_height_m=2.8)) is not None
+        assert compile_mask(g, MaskSpec.build(False, vehicle_height_m=3.2))[4] == 1
+        assert compile_mask(g, MaskSpec.build(False, vehicle_height_m=2.4)) is None
+
+    def test_closures(self):
+        g = make_graph()
+        g.apply_edge_update(EdgeUpdate(edge_id=3, absolute_time=99999))
+        assert compile_mask(g, MaskSpec(False, avoid_closures=True))[3] == 1
+
+
+class TestMaskCache:
+    def test_shared_across_queries(self):
+        g = make_graph()
+        assert mask_for(g, MaskSpec()) is mask_for(g, MaskSpec())
+
+    def test_closure_mask_follows_traffic(self):
+        g = make_graph()
+        spec = MaskSpec(avoid_closures=True)
+        before = mask_for(g, spec)
+        g.apply_edge_update(EdgeUpdate(edge_id=3, absolute_time=99999))
+        after = mask_for(g, spec)
+        assert after is not before
+        assert after[3] == 1
+
+    def test_static_mask_survives_traffic(self):
+        g = make_graph()
+        before = mask_for(g, MaskSpec())
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=2.0))
+        assert mask_for(g, MaskSpec()) is before
+
+
+class TestMaskedSearch:
+    def test_unmasked_uses_restricted_edge(self):
+        assert dijkstra_route(make_graph(), 1, 4, DEPART).path == [1, 2, 4]
+
+    def test_dijkstra_skips_masked_edges(self):
+        g = make_graph()
+        assert dijkstra_route(g, 1, 4, DEPART, mask_for(g, MaskSpec())).path == [1, 3, 4]
+
+    def test_astar_skips_masked_edges(self):
+        g = make_graph()
+        mask = mask_for(g, MaskSpec.build(vehicle_height_m=3.5))
+        assert a_star_route(g, 1, 4, DEPART, mask).path == [1, 4]
+
+    def test_route_many_applies_spec(self):
+        g = make_graph()
+        [(_, result)] = route_many(g, [(1, 4)], DEPART, workers=1, mask_spec=MaskSpec())
+        assert result.path == [1, 3, 4]
@@ -0,0 +1,152 @@
+"""Tests for core/mld.py"""
+
+import random
+
+import pytest
+
+from core.graph import EdgeUpdate
+from core.masks import MaskSpec, mask_for
+from core.mld import MLDRouter, Overlay
+from core.routing import SearchStats, dijkstra_route
+from tests.test_cch import DEPART, assert_matches_dijkstra, make_road_graph, random_pairs
+
+SIZES = (8, 40)
+
+
+class TestOverlay:
+    def test_cells_nest(self):
+        overlay = Overlay(make_road_graph(side=12), SIZES)
+        fine, coarse = overlay.cells
+        parent = {}
+        for nid, cell in fine.items():
+            assert parent.setdefault(cell, coarse[nid]) == coarse[nid]
+        assert max(fine.values()) > max(coarse.values()) > 0
+
+    def test_boundary_nodes_have_crossing_edges(self):
+        g = make_road_graph(side=8)
+        overlay = Overlay(g, SIZES)
+        cells = overlay.cells[0]
+        for cell, boundary in enumerate(overlay.boundary[0]):
+            for nid in boundary:
+                assert cells[nid] == cell
+                crossing = [v for v, _ in g.neighbors(nid)] + [u for u, _ in g.in_neighbors(nid)]
+                assert any(cells[x] != cell for x in crossing)
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_matches_dijkstra(self, seed):
+        g = make_road_graph(side=12, seed=seed)
+        metric = Overlay(g, SIZES).customize(g, DEPART)
+        assert_matches_dijkstra(lambda s, t: metric.route(s, t, DEPART), g, random_pairs(g))
+
+    def test_single_level(self):
+        g = make_road_graph(side=8)
+        metric = Overlay(g, (10,)).customize(g, DEPART)
+        assert_matches_dijkstra(lambda s, t: metric.route(s, t, DEPART), g, random_pairs(g))
+
+    def test_respects_edge_mask(self):
+        g = make_road_graph(side=8)
+        for eid in random.Random(1).sample(list(g.edges), 20):
+            g.edges[eid]["is_emergency_allowed"] = False
+        mask = mask_for(g, MaskSpec())
+        metric = Overlay(g, SIZES).customize(g, DEPART, mask)
+        route = lambda s, t: metric.route(s, t, DEPART)  # noqa: E731
+        assert_matches_dijkstra(route, g, random_pairs(g), mask)
+
+    def test_unreachable_and_trivial(self):
+        g = make_road_graph(side=4)
+        g.add_node(999, 13.5, 78.0)
+        metric = Overlay(g, (4,)).customize(g, DEPART)
+        assert not metric.route(1, 999, DEPART).found
+        assert not metric.route(1, 12345, DEPART).found
+        same = metric.route(5, 5, DEPART)
+        assert same.path == [5] and same.total_seconds == 0
+
+    def test_searches_less_than_dijkstra(self):
+        g = make_road_graph(side=16)
+        metric = Overlay(g, (16, 64)).customize(g, DEPART)
+        plain, overlay = SearchStats(), SearchStats()
+        dijkstra_route(g, 1, 256, DEPART, None, plain)
+        metric.route(1, 256, DEPART, overlay)
+        assert overlay.settled < plain.settled
+
+
+class TestMetricUpdate:
+    def test_update_recustomizes_only_touched_cells(self):
+        g = make_road_graph(side=12)
+        overlay = Overlay(g, SIZES)
+        metric = overlay.customize(g, DEPART)
+        rng = random.Random(3)
+        for eid in rng.sample(list(g.edges), 8):
+            g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=rng.choice([0.3, 3.0])))
+        updated = metric.update(DEPART)
+        assert 0 < updated.cells_customized < sum(overlay.n_cells)
+        assert_matches_dijkstra(lambda s, t: updated.route(s, t, DEPART), g, random_pairs(g))
+        # The previous metric is untouched and still answers for the old costs.
+        assert metric.cliques is not updated.cliques
+
+    def test_unchanged_cells_are_shared(self):
+        g = make_road_graph(side=12)
+        metric = Overlay(g, SIZES).customize(g, DEPART)
+        eid = next(iter(g.edges))
+        g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=2.0))
+        updated = metric.update(DEPART)
+        shared = sum(a is b for a, b in zip(metric.cliques[0], updated.cliques[0]))
+        assert shared == len(metric.cliques[0]) - 1
+
+    def test_update_refuses_new_period_or_topology(self):
+        g = make_road_graph(side=6)
+        g.add_edge(1, 2, 30, 500, [{"start": 36000, "end": 40000, "avg_time": 90}])
+        metric = Overlay(g, (9,)).customize(g, DEPART)
+        assert metric.update(DEPART.replace(hour=10, minute=30)) is None
+        g.add_edge(1, 36, 1, 10)
+        assert metric.update(DEPART) is None
+
+
+class TestMLDRouter:
+    def test_serves_previous_metric_until_recustomized(self, monkeypatch):
+        g = make_road_graph(side=8)
+        router = MLDRouter(g, SIZES)
+        monkeypatch.setattr(router, "recustomize_async", lambda: None)
+        before = router.route(1, 64, DEPART)
+        for eid in router.route(1, 64, DEPART).edge_ids:
+            g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=50.0))
+        stale = router.route(1, 64, DEPART)
+        assert stale.edge_ids == before.edge_ids
+        router.recustomize()
+        fresh = router.route(1, 64, DEPART)
+        assert fresh.edge_ids != before.edge_ids
+        assert router.stats()["updates"] == 1
+
+    def test_recustomize_async_updates_cells(self):
+        g = make_road_graph(side=8)
+        router = MLDRouter(g, SIZES)
+        router.route(1, 64, DEPART)
+        g.apply_edge_update(EdgeUpdate(edge_id=next(iter(g.edges)), multiplier=3.0))
+        router.recustomize_async().join(timeout=10)
+        assert router.metric().epoch == g.epoch
+        stats = router.stats()
+        assert stats["customizations"] == 1 and stats["updates"] == 1
+        assert 0 < stats["cells_recustomized"] < sum(stats["cells"])
+
+    def test_prepare_async_builds_in_background_until_fresh(self):
+        g = make_road_graph(side=6)
+        router = MLDRouter(g, (9,))
+        spec = MaskSpec()
+        assert not router.fresh(spec)
+        router.prepare_async(spec).join(timeout=10)
+        assert router.fresh(spec) and router.prepare_async(spec) is None
+        g.apply_edge_update(EdgeUpdate(edge_id=next(iter(g.edges)), multiplier=2.0))
+        assert not router.fresh(spec)
+        router.prepare_async(spec).join(timeout=10)
+        assert router.fresh(spec) and router.stats()["updates"] == 1
+
+    def test_async_noop_before_first_query(self):
+        assert MLDRouter(make_road_graph(side=3)).recustomize_async() is None
+
+    def test_topology_change_rebuilds(self):
+        g = make_road_graph(side=6)
+        router = MLDRouter(g, (9,))
+        first = router.metric()
+        shortcut = g.add_edge(1, 36, 1.0, 10)
+        assert router.metric() is not first
+        assert router.route(1, 36, DEPART).edge_ids == [shortcut]
@@ -0,0 +1,125 @@
+"""Tests for core/montecarlo.py"""
+
+import datetime
+
+import pytest
+
+from core.graph import EdgeUpdate, Graph
+from core.incremental import IncrementalRoute
+from core.montecarlo import (
+    Distribution,
+    Scenario,
+    random_scenarios,
+    run_scenarios,
+    sweep_thresholds,
+)
+from core.simulator import TrafficInjection
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 8, 0, 0, tzinfo=UTC)
+
+
+def make_bypass_graph() -> Graph:
+    """
+    1 -> 2 -> 3 -> 4 main road (edges 1..3, 420s) and a jammed 2 -> 5 -> 4
+    bypass (edges 4, 5: 40s each at multiplier 1, 50x in the base graph).
+    """
+    g = Graph()
+    for nid, lat, lon in [(1, 0.0, 0.0), (2, 0.0, 0.1), (3, 0.0, 0.2), (4, 0.0, 0.3)]:
+        g.add_node(nid, lat, lon)
+    g.add_node(5, 0.05, 0.2)
+    g.add_edge(1, 2, 60, 1000)
+    g.add_edge(2, 3, 60, 1000)
+    g.add_edge(3, 4, 300, 1000)
+    g.add_edge(2, 5, 40, 1300)
+    g.add_edge(5, 4, 40, 1300)
+    g.apply_edge_update(EdgeUpdate(edge_id=4, multiplier=50.0))
+    g.apply_edge_update(EdgeUpdate(edge_id=5, multiplier=50.0))
+    return g
+
+
+def clear_bypass(multiplier: float = 1.0) -> TrafficInjection:
+    """Bypass eases to multiplier 30s after departure, seen at node 2 (60s in)."""
+    return TrafficInjection(
+        DEPART + datetime.timedelta(seconds=30),
+        [EdgeUpdate(edge_id=eid, multiplier=multiplier) for eid in (4, 5)],
+    )
+
+
+class TestRunScenarios:
+    def test_scenarios_do_not_leak_into_base_or_each_other(self):
+        g = make_bypass_graph()
+        epoch = g.epoch
+        scenarios = [Scenario(1, 4, DEPART, [clear_bypass()]), Scenario(1, 4, DEPART)]
+        result = run_scenarios(g, scenarios, reroute_threshold_sec=10, workers=1)
+        cleared, jammed = result.outcomes
+        assert cleared.reroutes == 1 and cleared.saved_seconds == 280
+        assert cleared.eta_seconds == 140
+        assert jammed.reroutes == 0 and jammed.eta_seconds == 420
+        assert g.edge_travel_time(4, 0) == 2000 and g.epoch == epoch
+
+    def test_threshold_suppresses_reroute(self):
+        g = make_bypass_graph()
+        result = run_scenarios(g, [Scenario(1, 4, DEPART, [clear_bypass(3.0)])], 200, workers=1)
+        assert result.outcomes[0].reroutes == 0
+        assert result.outcomes[0].eta_seconds == 420
+
+    def test_unroutable_counted(self):
+        g = make_bypass_graph()
+        scenarios = [Scenario(4, 1, DEPART), Scenario(1, 4, DEPART)]
+        result = run_scenarios(g, scenarios, workers=1)
+        assert result.unroutable == 1
+        assert not result.outcomes[0].found and result.eta.count == 1
+
+    def test_other_errors_propagate(self, monkeypatch):
+        def broken(self):
+            raise ValueError("corrupt search state")
+
+        monkeypatch.setattr(IncrementalRoute, "route", broken)
+        with pytest.raises(ValueError, match="corrupt"):
+            run_scenarios(make_bypass_graph(), [Scenario(1, 4, DEPART)], workers=1)
+
+    def test_process_pool_matches_serial(self):
+        g = make_bypass_graph()
+        scenarios = random_scenarios(g, 12, DEPART, seed=3, window_sec=200)
+        serial = run_scenarios(g, scenarios, 10, workers=1)
+        pooled = run_scenarios(g, scenarios, 10, workers=2, chunksize=1)
+        assert pooled.outcomes == serial.outcomes
+        assert [o.index for o in pooled.outcomes] == list(range(12))
+
+    def test_sweep_thresholds(self):
+        g = make_bypass_graph()
+        scenarios = [Scenario(1, 4, DEPART, [clear_bypass(m)]) for m in (1.0, 3.0, 10.0)]
+        results = sweep_thresholds(g, scenarios, [10, 200, 1000], workers=1)
+        reroutes = {th: sum(o.reroutes for o in r.outcomes) for th, r in results.items()}
+        assert reroutes == {10: 2, 200: 1, 1000: 0}
+        assert results[200].saved.maximum == 280
+
+
+class TestRandomScenarios:
+    def test_deterministic_for_seed(self):
+        g = make_bypass_graph()
+        a = random_scenarios(g, 5, DEPART, seed=7)
+        b = random_scenarios(g, 5, DEPART, seed=7)
+        assert a == b
+        for s in a:
+            assert s.start_node != s.end_node
+            times = [inj.trigger_at for inj in s.traffic_injections]
+            assert times == sorted(times) and all(t >= DEPART for t in times)
+
+    def test_edges_restricts_pool(self):
+        g = make_bypass_graph()
+        for s in random_scenarios(g, 5, DEPART, edges=[4], edges_per_injection=2):
+            for inj in s.traffic_injections:
+                assert [eu.edge_id for eu in inj.edge_updates] == [4]
+
+
+class TestDistribution:
+    def test_percentiles(self):
+        d = Distribution.of(range(1, 101))
+        assert d.count == 100 and d.mean == 50.5
+        assert (d.minimum, d.p50, d.p90, d.p99, d.maximum) == (1, 50, 90, 99, 100)
+
+    def test_empty(self):
+        d = Distribution.of([])
+        assert d.count == 0 and d.p50 is None
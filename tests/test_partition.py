@@ -0,0 +1,61 @@
+"""Tests for core/partition.py"""
+
+import pytest
+
+from core.partition import (
+    coordinate_bisection,
+    nested_dissection_order,
+    recursive_bisection,
+    undirected_neighbors,
+)
+from tests.helpers import grid_graph
+
+
+class TestPartition:
+    def test_undirected_neighbors_ignore_direction(self):
+        g = grid_graph(3)
+        nbrs = undirected_neighbors(g)
+        assert nbrs[5] == {2, 4, 6, 8}
+
+    def test_bisection_is_balanced(self):
+        g = grid_graph()
+        left, right = coordinate_bisection(g, list(g.nodes))
+        assert abs(len(left) - len(right)) <= 1
+        assert set(left).isdisjoint(right)
+
+    @pytest.mark.parametrize("max_cell", [1, 10, 50, 1000])
+    def test_recursive_bisection_respects_cell_size(self, max_cell):
+        g = grid_graph()
+        cells = recursive_bisection(g, max_cell)
+        assert set(cells) == set(g.nodes)
+        sizes = {}
+        for cell in cells.values():
+            sizes[cell] = sizes.get(cell, 0) + 1
+        assert max(sizes.values()) <= max_cell
+
+    def test_nested_dissection_is_permutation(self):
+        g = grid_graph()
+        order = nested_dissection_order(g, leaf_size=8)
+        assert sorted(order) == sorted(g.nodes)
+
+    def test_top_separator_splits_graph(self):
+        g = grid_graph()
+        order = nested_dissection_order(g, leaf_size=8)
+        # Removing the last `side` nodes (the top-level separator) disconnects the grid.
+        removed = set(order[-12:])
+        nbrs = undirected_neighbors(g)
+        start = next(n for n in g.nodes if n not in removed)
+        seen, stack = {start}, [start]
+        while stack:
+            for m in nbrs[stack.pop()]:
+                if m not in removed and m not in seen:
+                    seen.add(m)
+                    stack.append(m)
+        assert len(seen) < len(g.nodes) - len(removed)
+
+    def test_invalid_sizes_rejected(self):
+        g = grid_graph(2)
+        with pytest.raises(ValueError):
+            recursive_bisection(g, 0)
+        with pytest.raises(ValueError):
+            nested_dissection_order(g, leaf_size=0)
@@ -0,0 +1,113 @@
+"""Tests for core/profiles.py"""
+
+import random
+import threading
+
+import pytest
+
+from core.graph import EdgeUpdate
+from core.masks import MaskSpec, mask_for
+from core.profiles import PROFILES, CostLayer, VehicleProfile, cost_layer
+from core.routing import a_star_route, dijkstra_route
+from tests.test_hub_labels import DEPART, make_grid, pairs
+
+MOTORCYCLE = PROFILES["motorcycle"]
+
+
+class TestVehicleProfile:
+    def test_congestion_factor_only_scales_delay(self):
+        edge = {"base_time": 60.0, "distance": 500}
+        assert MOTORCYCLE.edge_cost(edge, 50.0) == pytest.approx(45.0)
+        assert MOTORCYCLE.edge_cost(edge, 160.0) == pytest.approx(54.0 + 40.0)
+
+    def test_max_speed_floor(self):
+        profile = VehicleProfile("slow", max_speed_kmh=36.0)
+        assert profile.edge_cost({"base_time": 10.0, "distance": 500}, 10.0) == 50.0
+
+    def test_closures_pass_through(self):
+        edge = {"base_time": 60.0, "distance": 500, "absolute_time": 99999.0}
+        assert MOTORCYCLE.edge_cost(edge, 99999.0) == 99999.0
+
+    def test_mask_spec_uses_profile_height(self):
+        assert PROFILES["als"].mask_spec().height_class == 3.5
+        assert PROFILES["bls"].mask_spec() == MaskSpec()
+
+
+class TestCostLayer:
+    def test_bls_layer_matches_graph(self):
+        g = make_grid(rush=0.5)
+        layer = CostLayer(g, PROFILES["bls"])
+        for depart in (DEPART, DEPART.replace(hour=3)):
+            ts = depart.timestamp()
+            for eid in g.edges:
+                assert layer.travel_time(eid, ts) == g.edge_travel_time(eid, ts)
+
+    def test_motorcycle_faster_in_rush_and_astar_agrees(self):
+        g = make_grid(rush=0.5)
+        layer = CostLayer(g, MOTORCYCLE)
+        mask = mask_for(g, MaskSpec())
+        for s, t in pairs(g, n=30):
+            plain = dijkstra_route(g, s, t, DEPART, mask)
+            moto = dijkstra_route(g, s, t, DEPART, mask, travel_time=layer.travel_time)
+            star = a_star_route(g, s, t, DEPART, mask, None, layer.max_speed_ms, layer.travel_time)
+            assert moto.found == plain.found == star.found
+            if plain.found:
+                assert moto.total_seconds < plain.total_seconds
+                assert star.total_seconds == pytest.approx(moto.total_seconds)
+
+    def test_columns_built_lazily_per_period(self):
+        g = make_grid(side=4, rush=1.0)
+        layer = CostLayer(g, MOTORCYCLE)
+        assert layer.nbytes == 0
+        layer.travel_time(1, DEPART.timestamp())
+        layer.travel_time(2, DEPART.timestamp())
+        assert layer.rebuilds == 1
+        layer.travel_time(1, DEPART.replace(hour=3).timestamp())
+        assert layer.rebuilds == 2 and layer.nbytes > 0
+
+    def test_sync_recomputes_only_changed_edges(self):
+        g = make_grid(side=5)
+        layer = cost_layer(g, MOTORCYCLE)
+        ts = DEPART.timestamp()
+        layer.travel_time(1, ts)
+        eids = random.Random(2).sample(list(g.edges), 3)
+        for eid in eids:
+            g.apply_edge_update(EdgeUpdate(edge_id=eid, multiplier=4.0))
+        assert cost_layer(g, MOTORCYCLE) is layer
+        assert layer.edges_recomputed == 3 and layer.rebuilds == 1
+        fresh = CostLayer(g, MOTORCYCLE)
+        for eid in g.edges:
+            assert layer.travel_time(eid, ts) == fresh.travel_time(eid, ts)
+
+    def test_concurrent_reader_waits_for_sync(self, monkeypatch):
+        g = make_grid(side=4)
+        layer = cost_layer(g, MOTORCYCLE)
+        ts = DEPART.timestamp()
+        layer.travel_time(1, ts)
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=4.0))
+        seen = []
+        reader = threading.Thread(
+            target=lambda: seen.append(cost_layer(g, MOTORCYCLE).travel_time(1, ts))
+        )
+        real = CostLayer._cost
+
+        def racing(self, eid, at):
+            # A second request arrives while the columns are being rewritten.
+            if not reader.is_alive() and not seen:
+                reader.start()
+                reader.join(timeout=0.2)
+            return real(self, eid, at)
+
+        monkeypatch.setattr(CostLayer, "_cost", racing)
+        layer.sync()
+        reader.join(timeout=10)
+        assert seen == [CostLayer(g, MOTORCYCLE).travel_time(1, ts)]
+
+    def test_topology_change_resets_columns(self):
+        g = make_grid(side=3)
+        layer = cost_layer(g, MOTORCYCLE)
+        layer.travel_time(1, DEPART.timestamp())
+        shortcut = g.add_edge(1, 9, 100.0, 500)
+        cost_layer(g, MOTORCYCLE)
+        assert layer.nbytes == 0
+        assert layer.travel_time(shortcut, DEPART.timestamp()) == pytest.approx(90.0)
@@ -0,0 +1,54 @@
+"""Tests for core/refreshing.py"""
+
+import threading
+
+import pytest
+
+from core.apsp import ETATableRouter
+from core.arc_flags import ArcFlagRouter
+from core.hub_labels import HubLabelRouter
+from core.masks import MaskSpec
+from core.refreshing import RefreshingRouter
+from tests.helpers import grid_graph
+
+ROUTERS = [
+    pytest.param(ETATableRouter, id="eta-tables"),
+    pytest.param(ArcFlagRouter, id="arc-flags"),
+    pytest.param(HubLabelRouter, id="hub-labels"),
+]
+
+
+def test_refresh_is_abstract():
+    with pytest.raises(TypeError):
+        RefreshingRouter(grid_graph(side=3))
+
+
+@pytest.mark.parametrize("make_router", ROUTERS)
+def test_one_background_refresh_at_a_time(make_router, monkeypatch):
+    router = make_router(grid_graph(side=4))
+    release = threading.Event()
+    calls = []
+
+    def slow_refresh():
+        calls.append(threading.current_thread().name)
+        release.wait(5)
+
+    monkeypatch.setattr(router, "refresh", slow_refresh)
+    first = router.refresh_async()
+    assert router.refresh_async() is first
+    release.set()
+    first.join(5)
+    assert calls == [router.thread_name]
+    assert router._worker is None
+
+
+@pytest.mark.parametrize("make_router", ROUTERS)
+def test_stats_count_hits_and_fallbacks(make_router):
+    router = make_router(grid_graph(side=4))
+    router._count(None)
+    router._count(object())
+    router._count(object())
+    stats = router.stats()
+    assert (stats["ready"], stats["hits"], stats["fallbacks"]) == (False, 2, 1)
+    assert router._serves(None) and router._serves(MaskSpec())
+    assert not router._serves(MaskSpec(avoid_closures=True))
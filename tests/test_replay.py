@@ -0,0 +1,114 @@
+"""Tests for core/replay.py"""
+
+import datetime
+import gzip
+import json
+
+import pytest
+
+from core.fleet import Trip
+from core.graph import EdgeUpdate
+from core.replay import coalesce, read_injections, replay
+from core.simulator import SimulationEngine, TrafficInjection
+from tests.test_fleet import make_bypass_graph
+from tests.test_simulator import make_graph, utc_dt
+
+
+def snapshot(at: datetime.datetime, *updates) -> dict:
+    return {
+        "timestamp": at.isoformat().replace("+00:00", "Z"),
+        "edge_updates": [{"edge_id": eid, "multiplier": m} for eid, m in updates],
+    }
+
+
+def write_archive(path, snapshots, gzipped: bool = False, tail: str = "") -> str:
+    lines = "".join(json.dumps(s) + "\n" for s in snapshots) + tail
+    if gzipped:
+        with gzip.open(path, "wt") as fp:
+            fp.write(lines)
+    else:
+        path.write_text(lines)
+    return str(path)
+
+
+SNAPSHOTS = [
+    snapshot(utc_dt(minute=0, second=30), (3, 1.0), (4, 1.0)),
+    snapshot(utc_dt(minute=5), (2, 2.0)),
+    snapshot(utc_dt(minute=10), (2, 1.0)),
+]
+
+
+class TestReadInjections:
+    @pytest.mark.parametrize("gzipped", [False, True])
+    def test_reads_plain_and_gzip(self, tmp_path, gzipped):
+        # gzip is detected from the content, whatever the file is called.
+        path = write_archive(tmp_path / "feed.jsonl", SNAPSHOTS, gzipped)
+        injections = list(read_injections(path))
+        assert [inj.trigger_at for inj in injections] == [
+            utc_dt(second=30),
+            utc_dt(minute=5),
+            utc_dt(minute=10),
+        ]
+        assert [eu.edge_id for eu in injections[0].edge_updates] == [3, 4]
+
+    def test_window_stops_reading_after_end(self, tmp_path):
+        path = write_archive(tmp_path / "feed.jsonl", SNAPSHOTS, tail="\nnot json\n")
+        injections = read_injections(path, start=utc_dt(minute=1), end=utc_dt(minute=9))
+        assert [inj.trigger_at for inj in injections] == [utc_dt(minute=5)]
+
+    def test_simulator_reads_only_until_arrival(self, tmp_path):
+        late = [snapshot(utc_dt(hour=9), (1, 2.0))]
+        path = write_archive(tmp_path / "feed.jsonl", SNAPSHOTS[:1] + late, tail="not json\n")
+        result = SimulationEngine(make_graph()).run("AMB-01", 1, 3, utc_dt(), read_injections(path))
+        assert result.total_seconds == 120
+
+
+class TestCoalesce:
+    def test_merges_windows_like_sequential_updates(self):
+        injections = [
+            TrafficInjection(utc_dt(second=0), [EdgeUpdate(edge_id=1, multiplier=2.0)]),
+            TrafficInjection(utc_dt(second=40), [EdgeUpdate(edge_id=1, absolute_time=90.0)]),
+            TrafficInjection(utc_dt(second=50), [EdgeUpdate(edge_id=2, multiplier=3.0)]),
+            TrafficInjection(utc_dt(minute=1, second=10), [EdgeUpdate(edge_id=1, multiplier=1.0)]),
+        ]
+        merged = list(coalesce(iter(injections), 60))
+        assert [inj.trigger_at for inj in merged] == [
+            utc_dt(second=50),
+            utc_dt(minute=1, second=10),
+        ]
+        first = {eu.edge_id: eu for eu in merged[0].edge_updates}
+        assert (first[1].multiplier, first[1].absolute_time) == (2.0, 90.0)
+        assert first[2].multiplier == 3.0
+
+        sequential, windowed = make_graph(), make_graph()
+        for inj in injections:
+            for eu in inj.edge_updates:
+                sequential.apply_edge_update(eu)
+        for inj in merged:
+            for eu in inj.edge_updates:
+                windowed.apply_edge_update(eu)
+        assert windowed.edges == sequential.edges
+
+    def test_replay_with_coalescing(self, tmp_path):
+        path = write_archive(tmp_path / "feed.jsonl", SNAPSHOTS)
+        result = replay(make_bypass_graph(), path, coalesce_sec=3600)
+        assert result.snapshots == 3 and result.fleet.injections == 1
+
+
+class TestReplay:
+    def test_replays_feed_on_overlay(self, tmp_path):
+        g = make_bypass_graph()
+        epoch = g.epoch
+        path = write_archive(tmp_path / "feed.jsonl.gz", SNAPSHOTS, gzipped=True)
+        result = replay(g, path, trips=[Trip("A", 1, 3, utc_dt())], reroute_threshold_sec=120)
+        assert result.snapshots == 3 and result.edge_updates == 4
+        assert result.fleet.reroutes == 1 and result.fleet.injections == 3
+        assert g.epoch == epoch and g.edges[3]["multiplier"] == 50.0
+        assert result.simulated_seconds == 600
+        summary = result.summary()
+        assert summary["snapshots"] == 3 and summary["sim_hours_per_wall_second"] > 0
+
+    def test_window(self, tmp_path):
+        path = write_archive(tmp_path / "feed.jsonl", SNAPSHOTS)
+        result = replay(make_bypass_graph(), path, start=utc_dt(minute=1))
+        assert result.snapshots == 2 and result.simulated_seconds == 300
@@ -0,0 +1,88 @@
+"""Tests for core/reverse_tree.py"""
+
+import datetime
+from functools import partial
+
+import pytest
+
+from core.graph import EdgeUpdate, Graph, NodeNotFoundError
+from core.masks import MaskSpec
+from core.reverse_tree import ReverseTree, reverse_tree_for
+from core.routing import dijkstra_route
+from tests.helpers import random_graph
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 8, 0, 0, tzinfo=UTC)
+
+
+make_random_graph = partial(random_graph, n=60, m=240, seed=5, spine=True)
+
+
+class TestReverseTree:
+    @pytest.mark.parametrize("seed", range(3))
+    def test_matches_forward_search_without_buckets(self, seed):
+        g = make_random_graph(seed=seed)
+        tree = ReverseTree(g, 60, DEPART)
+        for source in range(1, 60, 7):
+            result = tree.route_from(source, DEPART)
+            fresh = dijkstra_route(g, source, 60, DEPART)
+            assert result.total_seconds == pytest.approx(fresh.total_seconds, abs=1e-6)
+            assert result.total_seconds == pytest.approx(tree.remaining[source], abs=1e-6)
+            assert result.path == tree.path_from(source)
+
+    def test_route_times_edges_at_entry_time(self):
+        g = Graph()
+        for nid in (1, 2, 3):
+            g.add_node(nid, 12.97, 77.59)
+        g.add_edge(1, 2, 100, 1000, edge_id=1)
+        # 08:01:40 falls inside this bucket only if edge 1 was timed first.
+        g.add_edge(2, 3, 50, 1000, [{"start": 28900, "end": 30000, "avg_time": 500}], edge_id=2)
+        result = ReverseTree(g, 3, DEPART).route_from(1, DEPART)
+        assert result.path == [1, 2, 3]
+        assert result.total_seconds == pytest.approx(600)
+
+    def test_unreachable_source(self):
+        g = make_random_graph()
+        g.add_node(99, 12.9, 77.5)
+        tree = ReverseTree(g, 60, DEPART)
+        assert tree.path_from(99) is None
+        assert not tree.route_from(99, DEPART).found
+
+    def test_unknown_target_raises(self):
+        with pytest.raises(NodeNotFoundError):
+            ReverseTree(make_random_graph(), 999, DEPART)
+
+    def test_respects_edge_mask(self):
+        g = Graph()
+        for nid in (1, 2, 3):
+            g.add_node(nid, 12.97, 77.59)
+        g.add_edge(1, 3, 10, 100, edge_id=1, is_emergency_allowed=False)
+        g.add_edge(1, 2, 10, 100, edge_id=2)
+        g.add_edge(2, 3, 10, 100, edge_id=3)
+        tree = reverse_tree_for(g, 3, DEPART, MaskSpec())
+        assert tree.path_from(1) == [1, 2, 3]
+
+
+class TestReverseTreeCache:
+    def test_reused_within_epoch(self):
+        g = make_random_graph()
+        tree = reverse_tree_for(g, 60, DEPART)
+        later = DEPART + datetime.timedelta(seconds=30)
+        assert reverse_tree_for(g, 60, later) is tree
+
+    def test_rebuilt_after_traffic_update(self):
+        g = make_random_graph()
+        tree = reverse_tree_for(g, 60, DEPART)
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=3.0))
+        assert reverse_tree_for(g, 60, DEPART) is not tree
+
+    def test_rebuilt_when_too_old(self):
+        g = make_random_graph()
+        tree = reverse_tree_for(g, 60, DEPART)
+        later = DEPART + datetime.timedelta(hours=1)
+        assert reverse_tree_for(g, 60, later) is not tree
+
+    def test_keyed_by_mask_spec(self):
+        g = make_random_graph()
+        plain = reverse_tree_for(g, 60, DEPART)
+        assert reverse_tree_for(g, 60, DEPART, MaskSpec(avoid_closures=True)) is not plain
@@ -2,15 +2,30 @@
 
 import datetime
 
+import pytest
+
+from core.cch import CCHRouter
 from core.graph import EdgeUpdate, Graph
+from core.masks import MaskSpec
 from core.routing import (
+    Engine,
+    EngineRegistry,
+    SearchStats,
     _ensure_utc,
     _remaining_seconds,
     a_star_route,
+    dijkstra_multi_source,
+    dijkstra_one_to_all,
     dijkstra_route,
+    distance_band,
     haversine_distance,
+    nearest_targets_a_star,
+    nearest_targets_dijkstra,
+    route_many,
     time_dependent_dijkstra,
 )
+from tests.test_cch import DEPART
+from tests.test_customizing import LATE, make_rush_graph
 
 UTC = datetime.timezone.utc
 
@@ -261,3 +276,316 @@ class TestAStarRoute:
         arrival, path, segs = a_star_route(g, 1, 1, utc_dt())
         assert path == [1]
         assert segs == []
+
+
+# ------------------------------------------------------------------
+# Multi-target search
+# ------------------------------------------------------------------
+
+
+def make_star_graph() -> Graph:
+    """Hub 1 with spokes to 2..6, spoke i costs i * 10s; plus 2 -> 7 (5s)."""
+    g = Graph()
+    g.add_node(1, 0.0, 0.0)
+    for i in range(2, 7):
+        g.add_node(i, 0.0, i * 0.01)
+        g.add_edge(1, i, i * 10, 1000)
+    g.add_node(7, 0.01, 0.02)
+    g.add_edge(2, 7, 5, 500)
+    return g
+
+
+class TestNearestTargets:
+    @pytest.mark.parametrize("fn", [nearest_targets_dijkstra, nearest_targets_a_star])
+    def test_nearest_matches_best_single_route(self, fn):
+        g = make_star_graph()
+        results = fn(g, 1, [5, 7, 3], utc_dt())
+        assert len(results) == 1
+        assert results[0].path == [1, 2, 7]
+        assert results[0].total_seconds == pytest.approx(25)
+
+    @pytest.mark.parametrize("fn", [nearest_targets_dijkstra, nearest_targets_a_star])
+    def test_k_results_soonest_first(self, fn):
+        g = make_star_graph()
+        results = fn(g, 1, [6, 5, 7, 3], utc_dt(), k=3)
+        assert [r.path[-1] for r in results] == [7, 3, 5]
+        for r in results:
+            single = dijkstra_route(g, 1, r.path[-1], utc_dt())
+            assert r == single
+
+    def test_fewer_results_when_targets_unreachable(self):
+        g = make_star_graph()
+        g.add_node(99, 1.0, 1.0)
+        results = nearest_targets_dijkstra(g, 1, [99, 4], utc_dt(), k=2)
+        assert [r.path[-1] for r in results] == [4]
+        assert nearest_targets_dijkstra(g, 1, [99], utc_dt()) == []
+
+    def test_source_is_a_target(self):
+        results = nearest_targets_dijkstra(make_star_graph(), 1, [1, 2], utc_dt(), k=2)
+        assert results[0].path == [1]
+        assert results[0].total_seconds == 0
+
+    def test_one_search_for_many_targets(self):
+        g = make_star_graph()
+        stats = SearchStats()
+        nearest_targets_dijkstra(g, 1, [2, 3, 4, 5, 6], utc_dt(), stats=stats)
+        assert stats.settled == 2  # hub and the first spoke
+
+    def test_respects_edge_mask(self):
+        g = make_star_graph()
+        mask = bytearray(len(g.edges) + 1)
+        mask[1] = 1  # 1 -> 2 closed
+        results = nearest_targets_dijkstra(g, 1, [7, 3], utc_dt(), edge_mask=mask)
+        assert results[0].path == [1, 3]
+
+    def test_invalid_k(self):
+        with pytest.raises(ValueError):
+            nearest_targets_dijkstra(make_star_graph(), 1, [2], utc_dt(), k=0)
+
+
+class TestMultiSource:
+    def test_forward_labels_match_per_source_searches(self):
+        g = make_star_graph()
+        g.add_node(8, 0.02, 0.0)
+        g.add_edge(8, 6, 15, 100)
+        seconds, owner = dijkstra_multi_source(g, [1, 8], utc_dt())
+        assert owner[6] == 8 and seconds[6] == pytest.approx(15)
+        assert owner[7] == 1 and seconds[7] == pytest.approx(25)
+        for node, sec in seconds.items():
+            routes = [dijkstra_route(g, s, node, utc_dt()) for s in (1, 8)]
+            assert sec == pytest.approx(min(r.total_seconds for r in routes if r.found))
+
+    def test_reverse_is_time_to_closest_source(self):
+        g = make_star_graph()
+        seconds, owner = dijkstra_multi_source(g, [3, 7], utc_dt(), reverse=True)
+        assert owner[1] == 7 and seconds[1] == pytest.approx(25)
+        assert owner[2] == 7 and seconds[2] == pytest.approx(5)
+        assert 4 not in owner  # spoke 4 reaches neither source
+
+    def test_unknown_sources_ignored(self):
+        seconds, owner = dijkstra_multi_source(make_star_graph(), [99], utc_dt())
+        assert seconds == {} and owner == {}
+
+
+# ------------------------------------------------------------------
+# RouteResult
+# ------------------------------------------------------------------
+
+
+class TestRouteResult:
+    def test_holds_float_times_and_edge_ids(self):
+        g = make_linear_graph()
+        depart = utc_dt()
+        result = dijkstra_route(g, 1, 3, depart)
+        assert result.found
+        assert result.edge_ids == [1, 2]
+        assert result.node_times == [
+            depart.timestamp(),
+            depart.timestamp() + 60,
+            depart.timestamp() + 120,
+        ]
+        assert result.total_seconds == 120.0
+        assert result.segment_seconds() == [60.0, 60.0]
+
+    def test_segments_built_lazily(self):
+        result = dijkstra_route(make_linear_graph(), 1, 3, utc_dt())
+        assert result._per_seg is None
+        segs = result.per_segment_times
+        assert segs[0] == (utc_dt(), utc_dt(minute=1))
+        assert result.per_segment_times is segs
+
+    def test_segments_follow_search_times_on_parallel_edges(self):
+        g = make_linear_graph()
+        slow = g.add_edge(1, 2, 500, 100)
+        g.edges[1]["base_time"] = 900  # the first 1->2 edge is now the slow one
+        result = dijkstra_route(g, 1, 3, utc_dt())
+        assert result.edge_ids[0] == slow
+        assert result.segment_seconds()[0] == 500.0
+
+    def test_empty_result(self):
+        g = Graph()
+        g.add_node(1, 0, 0)
+        g.add_node(2, 0, 1)
+        result = a_star_route(g, 1, 2, utc_dt())
+        assert not result.found
+        assert result.arrival is None and result.per_segment_times is None
+
+
+# ------------------------------------------------------------------
+# SearchStats
+# ------------------------------------------------------------------
+
+
+class TestSearchStats:
+    def test_dijkstra_counters(self):
+        stats = SearchStats(record_settled=True)
+        dijkstra_route(make_diamond_graph(), 1, 4, utc_dt(), stats=stats)
+        # Settles 1 and 2 before popping the target; 3 is reached but never settled.
+        assert stats.settled_nodes == [1, 2]
+        assert stats.settled == 2
+        assert stats.relaxations == 3
+        assert stats.pushes == 3
+        assert stats.peak_heap == 2
+        assert stats.stale_pops == 0
+
+    def test_stale_pops_counted(self):
+        g = make_diamond_graph()
+        g.add_edge(2, 3, 10, 100)  # improves node 3 after it was pushed via 1 -> 3
+        stats = SearchStats()
+        dijkstra_one_to_all(g, 1, utc_dt(), stats=stats)
+        assert stats.settled == 4
+        assert stats.stale_pops == 1
+
+    def test_astar_settles_no_more_than_dijkstra(self):
+        g = make_diamond_graph()
+        d, a = SearchStats(), SearchStats()
+        dijkstra_route(g, 1, 4, utc_dt(), stats=d)
+        a_star_route(g, 1, 4, utc_dt(), stats=a)
+        assert a.settled <= d.settled
+
+    def test_settled_nodes_only_when_requested(self):
+        stats = SearchStats()
+        dijkstra_route(make_linear_graph(), 1, 3, utc_dt(), stats=stats)
+        assert stats.settled_nodes == []
+        assert "settled_nodes" not in stats.to_dict()
+
+    def test_stats_accumulate_across_searches(self):
+        stats = SearchStats()
+        dijkstra_route(make_linear_graph(), 1, 3, utc_dt(), stats=stats)
+        dijkstra_route(make_linear_graph(), 1, 3, utc_dt(), stats=stats)
+        assert stats.settled == 4
+
+
+# ------------------------------------------------------------------
+# route_many
+# ------------------------------------------------------------------
+
+
+class TestRouteMany:
+    PAIRS = [(1, 4), (1, 2), (3, 4), (4, 1), (1, 1)]
+
+    def _expected(self, g, t):
+        return {i: dijkstra_route(g, s, d, t) for i, (s, d) in enumerate(self.PAIRS)}
+
+    def test_serial_matches_dijkstra(self):
+        g = make_diamond_graph()
+        t = utc_dt()
+        got = dict(route_many(g, self.PAIRS, t, workers=1))
+        assert got == self._expected(g, t)
+
+    def test_process_pool_matches_dijkstra(self):
+        g = make_diamond_graph()
+        g.apply_edge_update(EdgeUpdate(edge_id=1, multiplier=5.0))
+        t = utc_dt()
+        got = dict(route_many(g, self.PAIRS, t, workers=2, chunksize=1))
+        assert got == self._expected(g, t)
+
+    def test_process_pool_astar_with_mask(self):
+        g = make_diamond_graph()
+        g.edges[1]["is_emergency_allowed"] = False
+        t, spec = utc_dt(), MaskSpec()
+        serial = dict(route_many(g, self.PAIRS, t, "astar", workers=1, mask_spec=spec))
+        pooled = dict(route_many(g, self.PAIRS, t, "astar", workers=2, mask_spec=spec))
+        assert pooled == serial and pooled[0].path == [1, 3, 4]
+
+    def test_astar_algorithm(self):
+        g = make_diamond_graph()
+        got = dict(route_many(g, [(1, 4)], utc_dt(), algorithm="astar", workers=1))
+        assert got[0].path == [1, 2, 4]
+
+    def test_unknown_algorithm_raises(self):
+        with pytest.raises(ValueError):
+            list(route_many(make_diamond_graph(), [(1, 4)], utc_dt(), algorithm="bfs"))
+
+
+class TestEngineRegistry:
+    @staticmethod
+    def _registry(fresh: bool = True):
+        registry = EngineRegistry()
+        prepared = []
+        registry.register(Engine("plain", lambda *a: None, profiles=True))
+        registry.register(
+            Engine(
+                "prepped",
+                lambda *a: None,
+                preprocessing="index",
+                fresh=lambda spec, depart: fresh,
+                prepare=lambda spec, depart: prepared.append((spec, depart)),
+            )
+        )
+        return registry, prepared
+
+    def _pick(self, registry, distance=100.0, **latencies):
+        choice = registry.select(distance)
+        registry.observe(choice.engine.name, distance, latencies[choice.engine.name])
+        return choice
+
+    def test_explores_then_picks_fastest(self):
+        registry, _ = self._registry()
+        first = [self._pick(registry, plain=0.002, prepped=0.001) for _ in range(6)]
+        assert all(c.reason == "exploring" for c in first)
+        assert {c.engine.name for c in first} == {"plain", "prepped"}
+        choice = registry.select(100.0)
+        assert (choice.engine.name, choice.reason) == ("prepped", "fastest")
+        assert choice.expected_seconds == pytest.approx(0.001)
+
+    def test_bands_learn_separately(self):
+        registry, _ = self._registry()
+        for _ in range(6):
+            self._pick(registry, 100.0, plain=0.001, prepped=0.002)
+            self._pick(registry, 20000.0, plain=0.05, prepped=0.002)
+        assert registry.select(100.0).engine.name == "plain"
+        assert registry.select(20000.0).engine.name == "prepped"
+
+    def test_stale_engine_is_skipped_and_prepared(self):
+        registry, prepared = self._registry(fresh=False)
+        assert registry.select(100.0).engine.name == "plain"
+        assert prepared == [(None, None)]
+
+    def test_customized_engine_valid_only_for_its_period(self):
+        g = make_rush_graph()
+        router = CCHRouter(g)
+        registry = EngineRegistry()
+        registry.register(Engine("plain", lambda *a: None))
+        registry.register(
+            Engine("cch", router.route, fresh=router.fresh, prepare=router.prepare_async)
+        )
+        router.prepare_async(MaskSpec(), DEPART).join(timeout=10)
+        assert registry.get("cch").valid(MaskSpec(), DEPART)
+        # A departure in another time period must not use the 08:00 customization.
+        for _ in range(10):
+            assert registry.select(100.0, MaskSpec(), depart_dt=LATE).engine.name == "plain"
+        worker = router.prepare_async(MaskSpec(), LATE)
+        if worker is not None:
+            worker.join(timeout=10)
+        assert registry.get("cch").valid(MaskSpec(), LATE)
+
+    def test_profile_queries_only_use_profile_engines(self):
+        registry, _ = self._registry()
+        for _ in range(10):
+            assert registry.select(100.0, profile=True).engine.name == "plain"
+
+    def test_periodic_exploration(self, monkeypatch):
+        monkeypatch.setattr("core.routing.AUTO_EXPLORE_EVERY", 4)
+        registry, _ = self._registry()
+        reasons = [self._pick(registry, plain=0.002, prepped=0.001).reason for _ in range(12)]
+        assert reasons[6:] == ["fastest", "exploring", "fastest", "fastest", "fastest", "exploring"]
+
+    def test_register_rejects_duplicates_and_auto(self):
+        registry, _ = self._registry()
+        with pytest.raises(ValueError):
+            registry.register(Engine("plain", lambda *a: None))
+        with pytest.raises(ValueError):
+            registry.register(Engine("auto", lambda *a: None))
+
+    def test_distance_band(self):
+        assert distance_band(0) == distance_band(499) == 0
+        assert distance_band(500) == 1
+        assert distance_band(1999) == 2 and distance_band(2000) == 3
+
+    def test_stats(self):
+        registry, _ = self._registry(fresh=False)
+        registry.observe("plain", 100.0, 0.004)
+        stats = registry.stats()["engines"]
+        assert stats["plain"]["latency_by_band"]["0"]["ewma_ms"] == pytest.approx(4.0)
+        assert stats["prepped"]["fresh"] is False and stats["plain"]["fresh"] is True
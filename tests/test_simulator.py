@@ -5,7 +5,7 @@ import datetime
 import pytest
 
 from core.graph import EdgeUpdate, Graph
-from core.simulator import SimulationEngine, TrafficInjection
+from core.simulator import NoRouteError, SimulationEngine, TrafficInjection
 
 UTC = datetime.timezone.utc
 
@@ -118,7 +118,7 @@ class TestSimulationEngine:
         g.add_node(2, 0, 1)
         # no edges
         engine = SimulationEngine(g)
-        with pytest.raises(ValueError):
+        with pytest.raises(NoRouteError):
             engine.run("AMB-01", 1, 2, depart_dt=utc_dt())
 
     def test_log_output_is_string(self):
@@ -128,3 +128,56 @@ class TestSimulationEngine:
         log = result.log()
         assert isinstance(log, str)
         assert "AMB-01" in log
+
+
+class TestEventStreaming:
+    def _injection(self):
+        return TrafficInjection(
+            trigger_at=utc_dt(second=30), edge_updates=[EdgeUpdate(edge_id=2, multiplier=2.0)]
+        )
+
+    def test_stream_yields_events_then_returns_result(self):
+        stream = SimulationEngine(make_graph()).stream("AMB-01", 1, 3, utc_dt())
+        kinds = []
+        while True:
+            try:
+                kinds.append(next(stream).kind)
+            except StopIteration as done:
+                result = done.value
+                break
+        assert kinds == ["DEPART", "SEGMENT", "SEGMENT", "ARRIVE"]
+        assert result.total_seconds == 120 and result.events == []
+
+    def test_callback_without_recording(self):
+        seen = []
+        result = SimulationEngine(make_graph()).run(
+            "AMB-01",
+            1,
+            3,
+            utc_dt(),
+            [self._injection()],
+            on_event=seen.append,
+            record_events=False,
+        )
+        assert result.events == []
+        assert [e.kind for e in seen] == [
+            "DEPART",
+            "SEGMENT",
+            "TRAFFIC",
+            "REROUTE",
+            "SEGMENT",
+            "ARRIVE",
+        ]
+
+    def test_skip_segment_events(self):
+        result = SimulationEngine(make_graph()).run(
+            "AMB-01", 1, 3, utc_dt(), [self._injection()], segment_events=False
+        )
+        assert "SEGMENT" not in [e.kind for e in result.events]
+        assert result.total_seconds == 120
+
+    def test_unsorted_injections_fire_in_time_order(self):
+        late = TrafficInjection(utc_dt(second=50), [EdgeUpdate(edge_id=2, multiplier=1.0)])
+        g = make_graph()
+        SimulationEngine(g).run("AMB-01", 1, 3, utc_dt(), [late, self._injection()])
+        assert g.edges[2]["multiplier"] == 1.0
@@ -0,0 +1,84 @@
+"""Tests for core/singleflight.py"""
+
+import threading
+import time
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def run_concurrently(flight, key, fn, n):
+    """Start n callers on key; fn blocks until released by the test."""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as ex:
+            errors.append(ex)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+class TestSingleFlight:
+    def test_sequential_calls_do_not_share(self):
+        flight = SingleFlight()
+        assert flight.do("k", lambda: 1) == (1, False)
+        assert flight.do("k", lambda: 2) == (2, False)
+        assert flight.stats()["coalesced"] == 0
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        runs = []
+
+        def work():
+            runs.append(1)
+            release.wait(5)
+            return "route"
+
+        threads, results, errors = run_concurrently(flight, "k", work, 5)
+        wait_for(lambda: flight.stats()["coalesced"] == 4)
+        release.set()
+        for t in threads:
+            t.join(5)
+        assert len(runs) == 1
+        assert not errors
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert all(r == "route" for r, _ in results)
+        stats = flight.stats()
+        assert stats["executions"] == 1 and stats["in_flight"] == 0
+        assert stats["coalesce_ratio"] == pytest.approx(0.8)
+
+    def test_different_keys_run_independently(self):
+        flight = SingleFlight()
+        assert flight.do("a", lambda: 1)[0] == 1
+        assert flight.do("b", lambda: 2)[0] == 2
+        assert flight.stats()["executions"] == 2
+
+    def test_error_is_shared_and_key_released(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise RuntimeError("boom")
+
+        threads, results, errors = run_concurrently(flight, "k", fail, 3)
+        wait_for(lambda: flight.stats()["coalesced"] == 2)
+        release.set()
+        for t in threads:
+            t.join(5)
+        assert len(errors) == 3 and not results
+        assert flight.do("k", lambda: "ok") == ("ok", False)
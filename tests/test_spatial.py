@@ -0,0 +1,68 @@
+"""Tests for core/spatial.py"""
+
+import pytest
+
+from core.graph import Graph
+from core.spatial import EdgeGrid, cached_edge_grid
+
+
+def make_street() -> Graph:
+    # Three nodes along one latitude, ~540 m apart, plus a long diagonal edge.
+    g = Graph()
+    g.add_node(1, 12.90, 77.500)
+    g.add_node(2, 12.90, 77.505)
+    g.add_node(3, 12.90, 77.510)
+    g.add_node(4, 12.95, 77.550)
+    g.add_edge(1, 2, 60, 540)
+    g.add_edge(2, 3, 60, 540)
+    g.add_edge(1, 4, 600, 7000)
+    return g
+
+
+class TestEdgeGrid:
+    def test_projection_fraction_and_distance(self):
+        grid = EdgeGrid(make_street())
+        c = grid.project(1, 12.9001, 77.5025)
+        assert c.fraction == pytest.approx(0.5, abs=1e-6)
+        assert c.distance_m == pytest.approx(11.06, abs=0.1)
+        assert c.lat == pytest.approx(12.90)
+
+    def test_projection_clamps_to_endpoints(self):
+        grid = EdgeGrid(make_street())
+        assert grid.project(1, 12.90, 77.4990).fraction == 0.0
+        assert grid.project(1, 12.90, 77.5100).fraction == 1.0
+
+    def test_candidates_within_radius_nearest_first(self):
+        grid = EdgeGrid(make_street())
+        found = grid.candidates(12.9002, 77.5070, radius_m=50)
+        assert [c.edge_id for c in found] == [2]
+        found = grid.candidates(12.9000, 77.5050, radius_m=50)
+        assert sorted(c.edge_id for c in found) == [1, 2]
+        assert all(c.distance_m <= 50 for c in found)
+
+    def test_limit(self):
+        grid = EdgeGrid(make_street())
+        assert len(grid.candidates(12.9000, 77.5050, radius_m=50, limit=1)) == 1
+
+    def test_long_edge_found_away_from_its_endpoints(self):
+        grid = EdgeGrid(make_street(), cell_deg=0.005)
+        found = grid.candidates(12.925, 77.525, radius_m=30)
+        assert [c.edge_id for c in found] == [3]
+        assert found[0].fraction == pytest.approx(0.5, abs=0.01)
+
+    def test_nothing_nearby(self):
+        assert EdgeGrid(make_street()).candidates(13.5, 78.0, radius_m=100) == []
+
+    def test_invalid_cell_size(self):
+        with pytest.raises(ValueError):
+            EdgeGrid(make_street(), cell_deg=0)
+
+    def test_cache_rebuilds_only_on_topology_change(self):
+        g = make_street()
+        grid = cached_edge_grid(g)
+        g.edges[1]["multiplier"] = 2.0
+        assert cached_edge_grid(g) is grid
+        g.add_edge(3, 1, 120, 1080)
+        rebuilt = cached_edge_grid(g)
+        assert rebuilt is not grid
+        assert 4 in rebuilt.segments
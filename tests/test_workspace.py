@@ -0,0 +1,132 @@
+"""Tests for core/workspace.py"""
+
+import datetime
+import random
+import threading
+from functools import partial
+
+import pytest
+
+from core.csr import CSRGraph, attach_shared, publish_shared
+from core.graph import EdgeUpdate
+from core.masks import MaskSpec, mask_for
+from core.routing import SearchStats, _heuristic_speed, a_star_route, dijkstra_route
+from core.workspace import (
+    SearchWorkspace,
+    csr_route,
+    workspace_a_star_route,
+    workspace_dijkstra_route,
+    workspace_for,
+)
+from tests.helpers import random_graph
+
+UTC = datetime.timezone.utc
+DEPART = datetime.datetime(2026, 6, 12, 7, 50, 0, tzinfo=UTC)
+
+PAIRS = [
+    (workspace_dijkstra_route, dijkstra_route),
+    (workspace_a_star_route, a_star_route),
+]
+
+
+# Ids 10, 20, ... inserted in descending order, so CSR indexes differ from ids.
+make_random_graph = partial(
+    random_graph,
+    n=60,
+    m=240,
+    seed=3,
+    rush=0.2,
+    window=(28800, 36000),
+    emergency=0.9,
+    stride=10,
+    costs=(60, 90, 120),
+)
+
+
+class TestSearchWorkspace:
+    def test_reset_is_a_generation_bump(self):
+        ws = SearchWorkspace(4)
+        ws.stamp[2] = ws.generation
+        assert ws.reset(4) == 1 and ws.stamp[2] != ws.generation
+        assert len(ws) == 4
+
+    def test_reset_grows(self):
+        ws = SearchWorkspace(2)
+        ws.reset(10)
+        assert len(ws) == 10 and len(ws.dist) == 10 and len(ws.pred) == 10
+
+    def test_one_workspace_per_thread(self):
+        mine = workspace_for(5)
+        assert workspace_for(5) is mine
+        seen = []
+        t = threading.Thread(target=lambda: seen.append(workspace_for(5)))
+        t.start()
+        t.join()
+        assert seen[0] is not mine
+
+
+class TestWorkspaceKernels:
+    @pytest.mark.parametrize("fn,reference", PAIRS)
+    def test_matches_dict_kernels(self, fn, reference):
+        g = make_random_graph()
+        mask = mask_for(g, MaskSpec())
+        rng = random.Random(9)
+        nodes = list(g.nodes)
+        for _ in range(150):
+            s, t = rng.sample(nodes, 2)
+            got, want = fn(g, s, t, DEPART, mask), reference(g, s, t, DEPART, mask)
+            assert got == want
+            assert got.edge_ids == want.edge_ids
+
+    @pytest.mark.parametrize("fn,reference", PAIRS)
+    def test_same_search_statistics(self, fn, reference):
+        g = make_random_graph()
+        got, want = SearchStats(record_settled=True), SearchStats(record_settled=True)
+        fn(g, 10, 600, DEPART, stats=got)
+        reference(g, 10, 600, DEPART, stats=want)
+        assert got.to_dict() == want.to_dict()
+
+    @pytest.mark.parametrize("fn,_", PAIRS)
+    def test_unknown_and_unreachable(self, fn, _):
+        g = make_random_graph()
+        g.add_node(9999, 13.5, 78.0)
+        assert not fn(g, 10, 9999, DEPART).found
+        assert not fn(g, 10, 12345, DEPART).found
+        assert fn(g, 10, 10, DEPART).path == [10]
+
+    def test_follows_traffic_and_topology_changes(self):
+        g = make_random_graph()
+        before = workspace_dijkstra_route(g, 10, 600, DEPART)
+        g.apply_edge_update(EdgeUpdate(edge_id=before.edge_ids[0], multiplier=50.0))
+        assert workspace_dijkstra_route(g, 10, 600, DEPART) == dijkstra_route(g, 10, 600, DEPART)
+        g.add_node(7777, 12.95, 77.55)
+        g.add_edge(10, 7777, 1, 10)
+        g.add_edge(7777, 600, 1, 10)
+        assert workspace_dijkstra_route(g, 10, 600, DEPART).path == [10, 7777, 600]
+
+    def test_back_to_back_queries_do_not_leak_state(self):
+        g = make_random_graph()
+        first = workspace_dijkstra_route(g, 10, 600, DEPART)
+        workspace_dijkstra_route(g, 600, 10, DEPART)
+        assert workspace_dijkstra_route(g, 10, 600, DEPART) == first
+
+    def test_csr_route_on_shared_snapshot(self):
+        g = make_random_graph()
+        g.apply_edge_update(EdgeUpdate(edge_id=3, multiplier=4.0))
+        g.apply_edge_update(EdgeUpdate(edge_id=7, absolute_time=5.0))
+        mask, speed = mask_for(g, MaskSpec()), _heuristic_speed(g, None)
+        shm, handle = publish_shared(CSRGraph(g))
+        attached, csr = attach_shared(handle)
+        try:
+            rng = random.Random(4)
+            ts = DEPART.timestamp()
+            for s, t in (rng.sample(list(g.nodes), 2) for _ in range(100)):
+                assert csr_route(csr, s, t, ts, mask) == dijkstra_route(g, s, t, DEPART, mask)
+                got = csr_route(csr, s, t, ts, mask, max_speed_ms=speed)
+                assert got == a_star_route(g, s, t, DEPART, mask)
+            assert not csr_route(csr, 10, 12345, ts).found
+        finally:
+            del csr  # the arrays are views into the block
+            attached.close()
+            shm.close()
+            shm.unlink()